@@ -0,0 +1,180 @@
+from nifiapi.flowfiletransform import FlowFileTransform, FlowFileTransformResult
+from nifiapi.properties import PropertyDescriptor, StandardValidators, ProcessContext, TimeUnit, DataUnit
+from nifiapi.relationship import Relationship
+from typing import List
+import json
+import threading
+import time
+
+from batch_assembly import DEFAULT_COMPRESSION_RATIO, MAX_PARTICIPANTS, STALE_DEADLINES, BatchAssembler
+
+
+class AssembleRegulatoryBatches(FlowFileTransform):
+    """
+    Assigns stream records to size-targeted, single-tournament batches,
+    replacing MergeRecord and UpdateRecord in Batch_Processing.
+
+    Each record gets the BATCH_ID of its tournament's open batch and passes
+    straight through to BATCH_STAGING, so nothing is held in memory. A batch
+    closes when its predicted archive size reaches the target or its
+    deadline passes; the closed BATCH_IDs ride on the next FlowFile as
+    batch.closed.ids for PROCESS_ASSEMBLED_BATCHES. A timer-driven tick
+    FlowFile enforces deadlines when no records arrive, and
+    batch.stale.seconds lets PROCESS_ASSEMBLED_BATCHES recover closed
+    batches whose FlowFile never got them processed, and the batches left
+    open by a restart.
+    """
+
+    class Java:
+        implements = ['org.apache.nifi.python.processor.FlowFileTransform']
+
+    class ProcessorDetails:
+        version = '0.0.3'
+        description = 'Assigns stream records to single-tournament batches that close at a predicted compressed archive size or a latency deadline'
+        tags = ['batch', 'bin', 'merge', 'size', 'xml', 'regulatory', 'dgoj', 'spain']
+
+    def __init__(self, *args, **kwargs):
+        super().__init__()
+
+        self.target_archive_size = PropertyDescriptor(
+            name="Target Archive Size",
+            description="Compressed, encrypted archive size at which a batch closes. A batch never exceeds it unless a single record does.",
+            required=True,
+            default_value="256 KB",
+            validators=[StandardValidators.DATA_SIZE_VALIDATOR]
+        )
+
+        self.max_batch_latency = PropertyDescriptor(
+            name="Max Batch Latency",
+            description="Time after its first record at which a batch closes whatever its size. Enforced on the next FlowFile, so schedule the tick FlowFile well inside it.",
+            required=True,
+            default_value="15 min",
+            validators=[StandardValidators.TIME_PERIOD_VALIDATOR]
+        )
+
+        self.compression_ratio = PropertyDescriptor(
+            name="Compression Ratio",
+            description="Archive bytes per lote XML byte, as produced by PrepareRegulatoryFile",
+            required=True,
+            default_value=str(DEFAULT_COMPRESSION_RATIO),
+            validators=[StandardValidators.NUMBER_VALIDATOR]
+        )
+
+        self.archive_overhead = PropertyDescriptor(
+            name="Archive Overhead",
+            description="Fixed archive bytes independent of the XML size (ZIP structure, encryption and signature)",
+            required=True,
+            default_value="2 KB",
+            validators=[StandardValidators.DATA_SIZE_VALIDATOR]
+        )
+
+        self.max_records = PropertyDescriptor(
+            name="Max Records Per Batch",
+            description="Records at which a batch closes whatever its size (at most {}, the NumeroParticipantes limit)".format(MAX_PARTICIPANTS),
+            required=True,
+            default_value=str(MAX_PARTICIPANTS),
+            validators=[StandardValidators.POSITIVE_INTEGER_VALIDATOR]
+        )
+
+        self.max_open_batches = PropertyDescriptor(
+            name="Maximum Open Batches",
+            description="Tournaments with an open batch at a time; opening one more closes the oldest. Open batches hold no records, so size it to the number of tournaments in play.",
+            required=True,
+            default_value="1000",
+            validators=[StandardValidators.POSITIVE_INTEGER_VALIDATOR]
+        )
+
+        self.descriptors = [
+            self.target_archive_size,
+            self.max_batch_latency,
+            self.compression_ratio,
+            self.archive_overhead,
+            self.max_records,
+            self.max_open_batches
+        ]
+
+        self.assembler = None
+        self.last_success = 0.0
+        self.lock = threading.Lock()
+
+    def getPropertyDescriptors(self) -> List[PropertyDescriptor]:
+        return self.descriptors
+
+    def onScheduled(self, context: ProcessContext):
+        self.assembler = BatchAssembler(
+            target_archive_bytes=context.getProperty(self.target_archive_size).asDataSize(DataUnit.B),
+            max_age_seconds=context.getProperty(self.max_batch_latency).asTimePeriod(TimeUnit.SECONDS),
+            compression_ratio=float(context.getProperty(self.compression_ratio).getValue()),
+            archive_overhead=context.getProperty(self.archive_overhead).asDataSize(DataUnit.B),
+            max_records=context.getProperty(self.max_records).asInteger(),
+            max_open=context.getProperty(self.max_open_batches).asInteger()
+        )
+        # Batches opened before a restart are unknown now and go stale;
+        # the first tick sweeps them once they are
+        self.last_success = 0.0
+        self.logger.info("Assembling batches up to {:.0f} bytes or {:.0f} s".format(
+            self.assembler.target_archive_bytes, self.assembler.max_age_seconds))
+
+    def transform(self, context: ProcessContext, flowfile) -> FlowFileTransformResult:
+        """
+        Tag the records with their BATCH_ID and report the batches closed since the last FlowFile.
+
+        Args:
+            context: ProcessContext providing access to properties and state
+            flowfile: JSON array of stream records, or an empty tick FlowFile
+
+        Returns:
+            FlowFileTransformResult with the tagged records (success) or an unchanged tick (idle)
+        """
+        try:
+            contents = flowfile.getContentsAsBytes()
+            records = json.loads(contents) if contents and contents.strip() else []
+            if isinstance(records, dict):
+                records = [records]
+
+            with self.lock:
+                now = time.time()
+                for record in records:
+                    record["BATCH_ID"] = self.assembler.add(record, now)
+                self.assembler.expire(now)
+                closed = self.assembler.take_closed()
+                # A quiet flow still sends a tick through Write Audit Record
+                # once per deadline so stale batches are swept
+                sweep = now - self.last_success >= self.assembler.max_age_seconds
+                if not records and not closed and not sweep:
+                    return FlowFileTransformResult(relationship="idle")
+                self.last_success = now
+
+            attributes = {
+                "batch.closed.ids": json.dumps([batch.batch_id for batch in closed]),
+                "batch.closed.count": str(len(closed)),
+                "batch.closed.records": str(sum(batch.records for batch in closed)),
+                "batch.stale.seconds": str(int(STALE_DEADLINES * self.assembler.max_age_seconds)),
+                "record.count": str(len(records)),
+                "mime.type": "application/json"
+            }
+
+            for batch in closed:
+                self.logger.debug("Closed batch {} of tournament {}: {} records, ~{:.0f} archive bytes".format(
+                    batch.batch_id, batch.tournament_id, batch.records,
+                    self.assembler.predicted_archive_size(batch.xml_size())))
+
+            return FlowFileTransformResult(
+                relationship="success",
+                contents=json.dumps(records, separators=(",", ":")),
+                attributes=attributes
+            )
+
+        except Exception as e:
+            self.logger.error("Failed to assemble batches: {}".format(str(e)))
+            return FlowFileTransformResult(
+                relationship="failure",
+                attributes={"error.message": str(e)}
+            )
+
+    def getRelationships(self) -> List[Relationship]:
+        return [
+            Relationship(name="success", description="Records tagged with BATCH_ID, with the batches closed since the previous FlowFile"),
+            Relationship(name="idle", description="Tick FlowFiles that closed no batch and are not due to sweep stale batches"),
+            Relationship(name="failure", description="FlowFiles whose content is not a JSON record array")
+        ]
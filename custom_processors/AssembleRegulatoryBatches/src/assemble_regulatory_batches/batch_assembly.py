@@ -0,0 +1,214 @@
+"""
+Size-targeted batch assembly for the Batch_Processing flow.
+
+Records are binned by tournament. For every record the size of its
+<Jugador> element in the lote XML is predicted from its fields (the same
+template as sql/python/poker_xml.py), and a batch closes when its predicted
+archive size would pass the target, when it reaches its deadline, when it
+reaches the record limit or when it is the oldest batch and a new one has to
+be opened. The archive size is predicted as
+
+    compression_ratio * (header + sum of <Jugador> sizes + footer) + overhead
+
+which is linear in the XML size for these lotes (deflate plus AES-256
+encryption and the detached signature add a near constant overhead).
+
+No NiFi dependency, so testing/batch_assembly_check.py drives
+BatchAssembler directly.
+"""
+
+import math
+import uuid
+from collections import OrderedDict
+from xml.sax.saxutils import escape
+
+# Measured on PrepareRegulatoryFile archives of 500-20000 players
+DEFAULT_COMPRESSION_RATIO = 0.115
+DEFAULT_ARCHIVE_OVERHEAD = 2048
+
+# NumeroParticipantes is an entero6 in the DGOJ schema
+MAX_PARTICIPANTS = 999999
+
+# A staged batch with no rows for this many deadlines is closed, whether or
+# not its closing FlowFile got it processed (batch.stale.seconds)
+STALE_DEADLINES = 2
+
+# Text of the templates in sql/python/poker_xml.py without their fields
+_HEADER_TEXT = (
+    '<?xml version="1.0" encoding="UTF-8"?>'
+    '<Lote xmlns="http://cnjuego.gob.es/sci/v3.3.xsd" xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance">'
+    "<Cabecera><OperadorId></OperadorId><AlmacenId></AlmacenId><LoteId></LoteId><Version>3.3</Version></Cabecera>"
+    '<Registro xsi:type="RegistroPoquerTorneo">'
+    "<Cabecera><RegistroId>REG_</RegistroId><SubregistroId>1</SubregistroId>"
+    "<SubregistroTotal>1</SubregistroTotal><Fecha>YYYYMMDDHHMMSS</Fecha></Cabecera>"
+    "<Juego><JuegoId></JuegoId><JuegoDesc></JuegoDesc><TipoJuego>POT</TipoJuego>"
+    "<FechaInicio>YYYYMMDDHHMMSS+0000</FechaInicio><FechaFin>YYYYMMDDHHMMSS+0000</FechaFin>"
+    "<JuegoEnRed>S</JuegoEnRed><LiquidezInternacional>N</LiquidezInternacional>"
+    "<Variante></Variante><VarianteComercial></VarianteComercial>"
+    "<NumeroParticipantes></NumeroParticipantes></Juego>"
+)
+_PLAYER_TEXT = (
+    "<Jugador><ID><OperadorId></OperadorId><JugadorId></JugadorId></ID>"
+    "<Participacion><Linea><Cantidad></Cantidad><Unidad>EUR</Unidad></Linea></Participacion>"
+    "<ParticipacionDevolucion><Linea><Cantidad></Cantidad><Unidad>EUR</Unidad></Linea></ParticipacionDevolucion>"
+    "<Premios><Linea><Cantidad></Cantidad><Unidad>EUR</Unidad></Linea></Premios>"
+    "<IP></IP><Dispositivo>PC</Dispositivo><IdDispositivo></IdDispositivo></Jugador>"
+)
+_FOOTER_TEXT = "</Registro></Lote>"
+
+_DEMO_JUEGO = len("TOUR_12345678" "Texas Holdem Demo Tournament" "TH" "Texas Holdem No Limit")
+_BATCH_ID_LENGTH = 36
+
+
+def field(record, name):
+    """Value of an upper-case column name in a record whose keys may be in either case."""
+    value = record.get(name)
+    if value is None:
+        value = record.get(name.lower())
+    return value
+
+
+def _text_size(value, default, limit=None):
+    if value is None or value == "" or (isinstance(value, float) and math.isnan(value)):
+        value = default
+    text = str(value)
+    if limit:
+        text = text[:limit]
+    return len(escape(text).encode("utf-8"))
+
+
+def _amount_size(value):
+    try:
+        return len("{:.2f}".format(float(value or 0)))
+    except (TypeError, ValueError):
+        return 4
+
+
+def jugador_size(record, operator_id="OP01"):
+    """Predicted UTF-8 size of a record's <Jugador> element."""
+    return (
+        len(_PLAYER_TEXT)
+        + _text_size(operator_id, "")
+        + _text_size(field(record, "PLAYER_ID"), "UNKNOWN")
+        + _amount_size(field(record, "BET_AMOUNT"))
+        + _amount_size(field(record, "REFUND_AMOUNT"))
+        + _amount_size(field(record, "WIN_AMOUNT"))
+        + _text_size(field(record, "PLAYER_IP"), "0.0.0.0")
+        + _text_size(field(record, "DEVICE_ID"), "UNKNOWN")
+    )
+
+
+def header_size(record, operator_id="OP01", warehouse_id="WH001"):
+    """Predicted size of the lote header and footer, without NumeroParticipantes."""
+    size = (
+        len(_HEADER_TEXT) + len(_FOOTER_TEXT)
+        + _text_size(operator_id, "") + _text_size(warehouse_id, "")
+        + 2 * _BATCH_ID_LENGTH
+    )
+    if field(record, "TOURNAMENT_ID") and field(record, "TOURNAMENT_START") and field(record, "VARIANT"):
+        return size + (
+            _text_size(field(record, "TOURNAMENT_ID"), "")
+            + _text_size(field(record, "TOURNAMENT_NAME"), "Poker Tournament", 200)
+            + _text_size(field(record, "VARIANT"), "")
+            + _text_size(field(record, "VARIANT_COMMERCIAL"), "", 200)
+        )
+    # Demo header: its dates carry +0100 instead of +0000, the same length
+    return size + _DEMO_JUEGO
+
+
+class Batch:
+    """An open batch: the records of one tournament staged under one BATCH_ID."""
+
+    __slots__ = ("batch_id", "tournament_id", "opened_at", "records", "header_bytes", "player_bytes", "close_reason")
+
+    def __init__(self, tournament_id, opened_at, header_bytes):
+        self.batch_id = str(uuid.uuid4())
+        self.tournament_id = tournament_id
+        self.opened_at = opened_at
+        self.records = 0
+        self.header_bytes = header_bytes
+        self.player_bytes = 0
+        self.close_reason = None
+
+    def xml_size(self, records=None, player_bytes=0):
+        records = self.records if records is None else records
+        return self.header_bytes + len(str(records)) + self.player_bytes + player_bytes
+
+
+class BatchAssembler:
+    """
+    Assigns records to per-tournament batches and decides when each closes.
+
+    add() returns the BATCH_ID for a record; expire() closes the batches past
+    their deadline. Closed BATCH_IDs accumulate until take_closed(). Not
+    thread-safe: the processor holds a lock around each FlowFile.
+    """
+
+    def __init__(self, target_archive_bytes, max_age_seconds, compression_ratio=DEFAULT_COMPRESSION_RATIO,
+                 archive_overhead=DEFAULT_ARCHIVE_OVERHEAD, max_records=MAX_PARTICIPANTS, max_open=1000,
+                 operator_id="OP01", warehouse_id="WH001"):
+        if compression_ratio <= 0:
+            raise ValueError("Compression ratio must be positive")
+        self.target_archive_bytes = target_archive_bytes
+        self.max_age_seconds = max_age_seconds
+        self.compression_ratio = compression_ratio
+        self.archive_overhead = archive_overhead
+        self.max_records = min(max_records, MAX_PARTICIPANTS)
+        self.max_open = max(1, max_open)
+        self.operator_id = operator_id
+        self.warehouse_id = warehouse_id
+        # Largest XML whose archive still fits the target
+        self.target_xml_bytes = (target_archive_bytes - archive_overhead) / compression_ratio
+        self.open = OrderedDict()
+        self.closed = []
+        self.closed_reasons = {}
+
+    def predicted_archive_size(self, xml_bytes):
+        return self.compression_ratio * xml_bytes + self.archive_overhead
+
+    def add(self, record, now):
+        """Place a record in its tournament's batch and return that batch's BATCH_ID."""
+        key = field(record, "TOURNAMENT_ID")
+        size = jugador_size(record, self.operator_id)
+        batch = self.open.get(key)
+
+        if batch is not None:
+            if batch.records >= self.max_records:
+                self._close(key, "records")
+                batch = None
+            elif batch.records and batch.xml_size(batch.records + 1, size) > self.target_xml_bytes:
+                self._close(key, "size")
+                batch = None
+
+        if batch is None:
+            if len(self.open) >= self.max_open:
+                self._close(next(iter(self.open)), "evicted")
+            batch = Batch(key, now, header_size(record, self.operator_id, self.warehouse_id))
+            self.open[key] = batch
+
+        batch.records += 1
+        batch.player_bytes += size
+        return batch.batch_id
+
+    def expire(self, now):
+        """Close every batch opened more than max_age_seconds ago."""
+        for key in [key for key, batch in self.open.items() if now - batch.opened_at >= self.max_age_seconds]:
+            self._close(key, "deadline")
+
+    def close_all(self, reason="flush"):
+        for key in list(self.open):
+            self._close(key, reason)
+
+    def take_closed(self):
+        """Return and forget the batches closed since the last call, oldest first."""
+        closed, self.closed = self.closed, []
+        return closed
+
+    def open_ids(self):
+        return [batch.batch_id for batch in self.open.values()]
+
+    def _close(self, key, reason):
+        batch = self.open.pop(key)
+        batch.close_reason = reason
+        self.closed.append(batch)
+        self.closed_reasons[reason] = self.closed_reasons.get(reason, 0) + 1
@@ -0,0 +1,293 @@
+from nifiapi.flowfiletransform import FlowFileTransform, FlowFileTransformResult
+from nifiapi.properties import PropertyDescriptor, StandardValidators, ExpressionLanguageScope, ProcessContext, TimeUnit
+from nifiapi.relationship import Relationship
+from typing import List
+
+from sftp_pool import RemoteFileExists, SftpSessionPool, connector
+
+
+class DeliverRegulatoryFile(FlowFileTransform):
+    """
+    Uploads FlowFile content over SFTP using a pool of authenticated sessions,
+    replacing PutSFTP in BoeGamingReport.
+
+    PutSFTP with Batch Size 1 opens a new SSH session, authenticates and
+    checks the remote directory for every archive. This processor keeps up
+    to 'Maximum Sessions' sessions open between FlowFiles, shared by all
+    concurrent tasks, and caches the remote directories it has created or
+    seen. File data is sent as pipelined SFTP writes. Optionally the file is
+    written under a dot-prefixed temporary name and renamed into place, so
+    the regulator never picks up a partial archive.
+
+    Each upload adds its timings as sftp.upload.* attributes.
+    """
+
+    class Java:
+        implements = ['org.apache.nifi.python.processor.FlowFileTransform']
+
+    class ProcessorDetails:
+        version = '0.0.3'
+        description = 'Uploads files over SFTP with pooled sessions, cached remote directories, pipelined writes and optional temp-name-then-rename'
+        tags = ['sftp', 'put', 'upload', 'pool', 'regulatory', 'dgoj', 'spain']
+        dependencies = ['paramiko']
+
+    def __init__(self, *args, **kwargs):
+        super().__init__()
+
+        self.hostname = PropertyDescriptor(
+            name="Hostname",
+            description="SFTP server hostname",
+            required=True,
+            validators=[StandardValidators.NON_EMPTY_VALIDATOR],
+            expression_language_scope=ExpressionLanguageScope.ENVIRONMENT
+        )
+
+        self.port = PropertyDescriptor(
+            name="Port",
+            description="SFTP server port",
+            required=True,
+            default_value="22",
+            validators=[StandardValidators.PORT_VALIDATOR]
+        )
+
+        self.username = PropertyDescriptor(
+            name="Username",
+            description="SFTP username",
+            required=True,
+            validators=[StandardValidators.NON_EMPTY_VALIDATOR],
+            expression_language_scope=ExpressionLanguageScope.ENVIRONMENT
+        )
+
+        self.private_key_path = PropertyDescriptor(
+            name="Private Key Path",
+            description="Path to the private key file (e.g. a parameter context asset)",
+            required=False,
+            expression_language_scope=ExpressionLanguageScope.ENVIRONMENT
+        )
+
+        self.private_key_passphrase = PropertyDescriptor(
+            name="Private Key Passphrase",
+            description="Passphrase for an encrypted private key",
+            required=False,
+            sensitive=True
+        )
+
+        self.password = PropertyDescriptor(
+            name="Password",
+            description="Password authentication, when no private key is used",
+            required=False,
+            sensitive=True
+        )
+
+        self.remote_path = PropertyDescriptor(
+            name="Remote Path",
+            description="Remote directory to upload into",
+            required=False,
+            default_value="${meta.sftpPath}",
+            expression_language_scope=ExpressionLanguageScope.FLOWFILE_ATTRIBUTES
+        )
+
+        self.remote_filename = PropertyDescriptor(
+            name="Remote Filename",
+            description="Name of the remote file",
+            required=True,
+            default_value="${filename}",
+            validators=[StandardValidators.NON_EMPTY_VALIDATOR],
+            expression_language_scope=ExpressionLanguageScope.FLOWFILE_ATTRIBUTES
+        )
+
+        self.create_directory = PropertyDescriptor(
+            name="Create Directory",
+            description="Create the remote directory (and parents) if missing. Directories are checked once and then cached.",
+            required=True,
+            allowable_values=["true", "false"],
+            default_value="true"
+        )
+
+        self.temporary_rename = PropertyDescriptor(
+            name="Temporary Rename",
+            description="Write to '.<filename>' and rename to the final name once the upload is complete",
+            required=True,
+            allowable_values=["true", "false"],
+            default_value="false"
+        )
+
+        self.conflict_resolution = PropertyDescriptor(
+            name="Conflict Resolution",
+            description="NONE overwrites an existing remote file; FAIL routes the FlowFile to 'reject'",
+            required=True,
+            allowable_values=["NONE", "FAIL"],
+            default_value="NONE"
+        )
+
+        self.max_sessions = PropertyDescriptor(
+            name="Maximum Sessions",
+            description="Maximum SFTP sessions kept open; set to at least the number of concurrent tasks",
+            required=True,
+            default_value="3",
+            validators=[StandardValidators.POSITIVE_INTEGER_VALIDATOR]
+        )
+
+        self.session_idle_timeout = PropertyDescriptor(
+            name="Session Idle Timeout",
+            description="Sessions unused for longer than this are closed rather than reused. Keep below the server's idle timeout.",
+            required=True,
+            default_value="5 min",
+            validators=[StandardValidators.TIME_PERIOD_VALIDATOR]
+        )
+
+        self.connection_timeout = PropertyDescriptor(
+            name="Connection Timeout",
+            description="Timeout for connecting and authenticating",
+            required=True,
+            default_value="30 sec",
+            validators=[StandardValidators.TIME_PERIOD_VALIDATOR]
+        )
+
+        self.data_timeout = PropertyDescriptor(
+            name="Data Timeout",
+            description="Timeout for each SFTP request",
+            required=True,
+            default_value="30 sec",
+            validators=[StandardValidators.TIME_PERIOD_VALIDATOR]
+        )
+
+        self.write_chunk_size = PropertyDescriptor(
+            name="Write Chunk Size",
+            description="Bytes per pipelined SFTP write request",
+            required=True,
+            default_value="32768",
+            validators=[StandardValidators.POSITIVE_INTEGER_VALIDATOR]
+        )
+
+        self.strict_host_key_checking = PropertyDescriptor(
+            name="Strict Host Key Checking",
+            description="Reject servers whose host key is not in 'Known Hosts File'",
+            required=True,
+            allowable_values=["true", "false"],
+            default_value="false"
+        )
+
+        self.known_hosts_file = PropertyDescriptor(
+            name="Known Hosts File",
+            description="OpenSSH known_hosts file with the server's host key",
+            required=False,
+            expression_language_scope=ExpressionLanguageScope.ENVIRONMENT
+        )
+
+        self.descriptors = [
+            self.hostname,
+            self.port,
+            self.username,
+            self.private_key_path,
+            self.private_key_passphrase,
+            self.password,
+            self.remote_path,
+            self.remote_filename,
+            self.create_directory,
+            self.temporary_rename,
+            self.conflict_resolution,
+            self.max_sessions,
+            self.session_idle_timeout,
+            self.connection_timeout,
+            self.data_timeout,
+            self.write_chunk_size,
+            self.strict_host_key_checking,
+            self.known_hosts_file
+        ]
+
+        self.pool = None
+
+    def getPropertyDescriptors(self) -> List[PropertyDescriptor]:
+        return self.descriptors
+
+    def onScheduled(self, context: ProcessContext):
+        self.host = context.getProperty(self.hostname).evaluateAttributeExpressions().getValue()
+        self.port_number = context.getProperty(self.port).asInteger()
+
+        connect = connector(
+            self.host,
+            self.port_number,
+            context.getProperty(self.username).evaluateAttributeExpressions().getValue(),
+            private_key_path=context.getProperty(self.private_key_path).evaluateAttributeExpressions().getValue(),
+            private_key_passphrase=context.getProperty(self.private_key_passphrase).getValue(),
+            password=context.getProperty(self.password).getValue(),
+            connect_timeout=context.getProperty(self.connection_timeout).asTimePeriod(TimeUnit.MILLISECONDS) / 1000,
+            data_timeout=context.getProperty(self.data_timeout).asTimePeriod(TimeUnit.MILLISECONDS) / 1000,
+            known_hosts_path=context.getProperty(self.known_hosts_file).evaluateAttributeExpressions().getValue(),
+            strict_host_key_checking=context.getProperty(self.strict_host_key_checking).getValue() == "true"
+        )
+        self.pool = SftpSessionPool(
+            connect,
+            max_sessions=context.getProperty(self.max_sessions).asInteger(),
+            max_idle_seconds=context.getProperty(self.session_idle_timeout).asTimePeriod(TimeUnit.SECONDS)
+        )
+
+    def onStopped(self, context: ProcessContext):
+        if self.pool is not None:
+            self.logger.info("Closing SFTP session pool: {}".format(dict(self.pool.stats)))
+            self.pool.close()
+            self.pool = None
+
+    def transform(self, context: ProcessContext, flowfile):
+        """
+        Upload the FlowFile content to the remote path.
+
+        Args:
+            context: Process context with property values
+            flowfile: FlowFile to upload
+
+        Returns:
+            FlowFileTransformResult routed to success, reject or failure
+        """
+        try:
+            directory = context.getProperty(self.remote_path).evaluateAttributeExpressions(flowfile).getValue() or ""
+            filename = context.getProperty(self.remote_filename).evaluateAttributeExpressions(flowfile).getValue()
+
+            result = self.pool.upload(
+                directory.strip(),
+                filename.strip(),
+                flowfile.getContentsAsBytes(),
+                create_directory=context.getProperty(self.create_directory).getValue() == "true",
+                temporary_rename=context.getProperty(self.temporary_rename).getValue() == "true",
+                conflict_resolution=context.getProperty(self.conflict_resolution).getValue(),
+                chunk_size=context.getProperty(self.write_chunk_size).asInteger()
+            )
+
+            self.logger.info("Uploaded {} ({} bytes) in {:.0f} ms".format(
+                result["remote_path"], result["bytes"], result["total_millis"]))
+
+            return FlowFileTransformResult(relationship="success", attributes=self._attributes(result))
+
+        except RemoteFileExists as e:
+            self.logger.warn(str(e))
+            return FlowFileTransformResult(relationship="reject", attributes={"error.message": str(e)})
+
+        except Exception as e:
+            self.logger.error("Failed to upload over SFTP: {}".format(str(e)))
+            return FlowFileTransformResult(relationship="failure", attributes={"error.message": str(e)})
+
+    def _attributes(self, result):
+        return {
+            "sftp.remote.host": self.host,
+            "sftp.remote.port": str(self.port_number),
+            "sftp.remote.filename": result["remote_path"],
+            "sftp.upload.bytes": str(result["bytes"]),
+            "sftp.upload.timestamp": result["uploaded_at"].isoformat(timespec="milliseconds"),
+            "sftp.upload.session.reused": str(result["session_reused"]).lower(),
+            "sftp.upload.session.uploads": str(result["session_uploads"]),
+            "sftp.upload.wait.millis": str(round(result["wait_millis"])),
+            "sftp.upload.connect.millis": str(round(result["connect_millis"])),
+            "sftp.upload.directory.millis": str(round(result["directory_millis"])),
+            "sftp.upload.directory.roundTrips": str(result["directory_round_trips"]),
+            "sftp.upload.write.millis": str(round(result["write_millis"])),
+            "sftp.upload.rename.millis": str(round(result["rename_millis"])),
+            "sftp.upload.total.millis": str(round(result["total_millis"]))
+        }
+
+    def getRelationships(self) -> List[Relationship]:
+        return [
+            Relationship(name="success", description="FlowFiles uploaded successfully, with sftp.upload.* timing attributes"),
+            Relationship(name="reject", description="FlowFiles not uploaded because the remote file exists and 'Conflict Resolution' is FAIL"),
+            Relationship(name="failure", description="FlowFiles that could not be uploaded (connection, authentication or write errors)")
+        ]
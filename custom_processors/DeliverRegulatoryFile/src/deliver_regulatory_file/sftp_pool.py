@@ -0,0 +1,361 @@
+"""
+Pooled SFTP delivery used by the DeliverRegulatoryFile processor.
+
+Kept free of NiFi imports so it can be exercised against a local paramiko
+SFTP server (testing/sftp_delivery_check.py).
+
+SftpSessionPool keeps authenticated sessions open between uploads and
+remembers which remote directories are known to exist, so a steady stream
+of small archives pays for the SSH handshake, authentication and the
+uploads/YYYY/MM/DD directory checks once per session or day instead of
+once per file. Each upload is written with pipelined SFTP write requests
+(the acknowledgements are collected when the file is closed).
+"""
+
+import collections
+import posixpath
+import stat
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import paramiko
+
+# Errors that leave an SFTP channel unusable even if the transport is still up
+CHANNEL_ERRORS = (paramiko.SSHException, EOFError, TimeoutError)
+
+
+class RemoteFileExists(Exception):
+    """The target file exists and conflict resolution is FAIL."""
+
+
+class SessionLost(Exception):
+    """The SSH connection dropped during an upload; the session was discarded."""
+
+
+def connector(hostname, port, username, private_key_path=None, private_key_passphrase=None,
+              password=None, connect_timeout=30.0, data_timeout=30.0, keepalive_seconds=30,
+              known_hosts_path=None, strict_host_key_checking=False):
+    """
+    Build a zero-argument function that opens an authenticated SFTP session.
+
+    Returns:
+        Callable returning (SSHClient, SFTPClient)
+    """
+    def connect():
+        client = paramiko.SSHClient()
+        if known_hosts_path:
+            client.load_host_keys(known_hosts_path)
+        client.set_missing_host_key_policy(
+            paramiko.RejectPolicy() if strict_host_key_checking else paramiko.AutoAddPolicy())
+        try:
+            client.connect(
+                hostname,
+                port=port,
+                username=username,
+                password=password,
+                key_filename=private_key_path,
+                passphrase=private_key_passphrase,
+                timeout=connect_timeout,
+                banner_timeout=connect_timeout,
+                auth_timeout=connect_timeout,
+                look_for_keys=False,
+                allow_agent=False,
+            )
+            client.get_transport().set_keepalive(keepalive_seconds)
+            sftp = client.open_sftp()
+            sftp.get_channel().settimeout(data_timeout)
+        except Exception:
+            client.close()
+            raise
+        return client, sftp
+
+    return connect
+
+
+class PooledSession:
+    """One authenticated SFTP session and its usage counters."""
+
+    def __init__(self, client, sftp, connect_millis):
+        self.client = client
+        self.sftp = sftp
+        self.connect_millis = connect_millis
+        self.uploads = 0
+        self.last_used = time.monotonic()
+
+    def alive(self):
+        transport = self.client.get_transport()
+        return transport is not None and transport.is_active()
+
+    def close(self):
+        try:
+            self.sftp.close()
+        finally:
+            self.client.close()
+
+
+class SftpSessionPool:
+    """
+    Thread-safe pool of SFTP sessions with a shared remote directory cache.
+
+    ``session()`` lends a session for one upload. Sessions idle for longer
+    than ``max_idle_seconds`` are closed instead of reused. A session whose
+    connection dropped is discarded and the error re-raised as SessionLost;
+    after any other error (missing permission, file exists) it is reused.
+    """
+
+    def __init__(self, connect, max_sessions=3, max_idle_seconds=300.0, borrow_timeout=60.0,
+                 clock=time.monotonic):
+        if max_sessions < 1:
+            raise ValueError("max_sessions must be at least 1")
+        self._connect = connect
+        self.max_sessions = max_sessions
+        self.max_idle_seconds = max_idle_seconds
+        self.borrow_timeout = borrow_timeout
+        self.clock = clock
+        self.stats = collections.Counter()
+
+        self._idle = []
+        self._open = 0
+        self._closed = False
+        self._condition = threading.Condition()
+        self._directories = set()
+        self._directories_lock = threading.Lock()
+        self._directory_walk_lock = threading.Lock()
+
+    def _borrow(self):
+        deadline = self.clock() + self.borrow_timeout
+        with self._condition:
+            while True:
+                if self._closed:
+                    raise RuntimeError("SFTP session pool is closed")
+                while self._idle:
+                    session = self._idle.pop()
+                    if self.clock() - session.last_used <= self.max_idle_seconds and session.alive():
+                        self.stats["reused"] += 1
+                        return session
+                    self._open -= 1
+                    self.stats["expired"] += 1
+                    session.close()
+                if self._open < self.max_sessions:
+                    self._open += 1
+                    break
+                remaining = deadline - self.clock()
+                if remaining <= 0:
+                    raise TimeoutError("No SFTP session available within {} s".format(self.borrow_timeout))
+                self._condition.wait(remaining)
+
+        # Connect outside the lock so other threads can return sessions meanwhile
+        started = time.perf_counter()
+        try:
+            client, sftp = self._connect()
+        except Exception:
+            with self._condition:
+                self._open -= 1
+                self._condition.notify()
+            raise
+        self._count("connected")
+        return PooledSession(client, sftp, (time.perf_counter() - started) * 1000)
+
+    def _release(self, session, broken):
+        with self._condition:
+            if broken or self._closed:
+                self._open -= 1
+                self.stats["discarded" if broken else "closed"] += 1
+                session.close()
+            else:
+                session.last_used = self.clock()
+                self._idle.append(session)
+            self._condition.notify()
+
+    @contextmanager
+    def session(self):
+        session = self._borrow()
+        try:
+            yield session
+        except Exception as e:
+            if session.alive() and not isinstance(e, CHANNEL_ERRORS):
+                self._release(session, broken=False)
+                raise
+            self._release(session, broken=True)
+            raise SessionLost(str(e) or type(e).__name__) from e
+        except BaseException:
+            self._release(session, broken=True)
+            raise
+        self._release(session, broken=False)
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._open -= len(idle)
+            self._condition.notify_all()
+        for session in idle:
+            session.close()
+
+    def ensure_directory(self, sftp, path):
+        """
+        Create ``path`` and its parents unless already known to exist.
+
+        Returns:
+            Number of remote round trips made (0 when every level was cached)
+        """
+        path = posixpath.normpath(path)
+        if path in ("", ".", "/"):
+            return 0
+        with self._directories_lock:
+            if path in self._directories:
+                return 0
+
+        # Uncached paths are rare (a new day); one walk at a time avoids racing mkdirs
+        with self._directory_walk_lock:
+            return self._walk_directory(sftp, path)
+
+    def _walk_directory(self, sftp, path):
+        with self._directories_lock:
+            if path in self._directories:
+                return 0
+
+        round_trips = 0
+        missing = []
+        current = path
+        # Walk up until an existing (or cached) directory is found
+        while current not in ("", ".", "/"):
+            with self._directories_lock:
+                if current in self._directories:
+                    break
+            round_trips += 1
+            try:
+                if not stat.S_ISDIR(sftp.stat(current).st_mode):
+                    raise NotADirectoryError("Remote path is not a directory: {}".format(current))
+                break
+            except FileNotFoundError:
+                missing.append(current)
+                current = posixpath.dirname(current)
+
+        for directory in reversed(missing):
+            round_trips += 1
+            try:
+                sftp.mkdir(directory)
+            except OSError:
+                # Another session may have created it first
+                round_trips += 1
+                if not stat.S_ISDIR(sftp.stat(directory).st_mode):
+                    raise
+        with self._directories_lock:
+            self._directories.add(path)
+            for directory in missing:
+                self._directories.add(directory)
+        self._count("directory_checks", round_trips)
+        return round_trips
+
+    def _count(self, key, amount=1):
+        with self._condition:
+            self.stats[key] += amount
+
+    def forget_directories(self):
+        with self._directories_lock:
+            self._directories.clear()
+
+    def upload(self, directory, filename, data, create_directory=True, temporary_rename=False,
+               conflict_resolution="NONE", chunk_size=32768, retries=1):
+        """
+        Write ``data`` to ``directory/filename`` on a pooled session.
+
+        When the connection drops mid-upload the session is discarded and
+        the upload is retried on a fresh one (``retries`` times), which
+        covers sessions the server closed while they sat in the pool.
+
+        Returns:
+            Dict of upload timings and details (see DeliverRegulatoryFile attributes)
+
+        Raises:
+            RemoteFileExists: conflict_resolution is FAIL and the file exists
+        """
+        attempt = 0
+        while True:
+            try:
+                return self._upload_once(directory, filename, data, create_directory, temporary_rename,
+                                         conflict_resolution, chunk_size)
+            except SessionLost:
+                if attempt >= retries:
+                    raise
+                attempt += 1
+                self._count("retried")
+                # A directory cached through a lost session may have been removed meanwhile
+                self.forget_directories()
+
+    def _upload_once(self, directory, filename, data, create_directory, temporary_rename,
+                     conflict_resolution, chunk_size):
+        started = time.perf_counter()
+        with self.session() as session:
+            borrowed = time.perf_counter()
+            sftp = session.sftp
+            remote_path = posixpath.join(directory, filename) if directory else filename
+
+            directory_round_trips = 0
+            if create_directory and directory:
+                directory_round_trips = self.ensure_directory(sftp, directory)
+            directory_done = time.perf_counter()
+
+            if conflict_resolution == "FAIL" and _exists(sftp, remote_path):
+                raise RemoteFileExists("Remote file already exists: {}".format(remote_path))
+
+            target = posixpath.join(directory, "." + filename) if temporary_rename else remote_path
+            view = memoryview(data)
+            try:
+                with sftp.open(target, "wb") as remote:
+                    remote.set_pipelined(True)
+                    for offset in range(0, len(view), chunk_size):
+                        remote.write(view[offset:offset + chunk_size])
+                written = time.perf_counter()
+
+                if temporary_rename:
+                    try:
+                        sftp.posix_rename(target, remote_path)
+                    except OSError:
+                        # No posix-rename extension: plain SFTP rename fails if the target exists
+                        if _exists(sftp, remote_path):
+                            sftp.remove(remote_path)
+                        sftp.rename(target, remote_path)
+            except OSError:
+                if temporary_rename and session.alive():
+                    _remove_quietly(sftp, target)
+                raise
+            finished = time.perf_counter()
+
+            session.uploads += 1
+            reused = session.uploads > 1
+            self._count("uploads")
+            self._count("bytes", len(data))
+
+        return {
+            "remote_path": remote_path,
+            "bytes": len(data),
+            "session_reused": reused,
+            "session_uploads": session.uploads,
+            "wait_millis": (borrowed - started) * 1000 - (0 if reused else session.connect_millis),
+            "connect_millis": 0.0 if reused else session.connect_millis,
+            "directory_millis": (directory_done - borrowed) * 1000,
+            "directory_round_trips": directory_round_trips,
+            "write_millis": (written - directory_done) * 1000,
+            "rename_millis": (finished - written) * 1000,
+            "total_millis": (finished - started) * 1000,
+            "uploaded_at": datetime.now(timezone.utc),
+        }
+
+
+def _exists(sftp, path):
+    try:
+        sftp.stat(path)
+        return True
+    except FileNotFoundError:
+        return False
+
+
+def _remove_quietly(sftp, path):
+    try:
+        sftp.remove(path)
+    except OSError:
+        pass
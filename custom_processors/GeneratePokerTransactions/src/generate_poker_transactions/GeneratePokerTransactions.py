@@ -0,0 +1,169 @@
+from nifiapi.flowfilesource import FlowFileSource, FlowFileSourceResult
+from nifiapi.properties import PropertyDescriptor, StandardValidators, ProcessContext
+from nifiapi.relationship import Relationship
+from typing import List
+import secrets
+import threading
+
+from poker_generator import FORMATS, MIME_TYPES, PokerSchema, PokerTransactionGenerator, encode
+
+
+class GeneratePokerTransactions(FlowFileSource):
+    """
+    Generates synthetic poker transactions for load testing, replacing
+    GenerateJSON in Generate_Transactions.
+
+    Reads the same JSON schema as GenerateJSON and produces each FlowFile as
+    one NumPy-vectorized block of records, so a single task sustains well
+    over 100k records/s. FlowFile N of a given seed always holds the same
+    records. A share of records can be skewed to a few hot tournaments and
+    whale players to stress batching and XML generation.
+    """
+
+    class Java:
+        implements = ['org.apache.nifi.python.processor.FlowFileSource']
+
+    class ProcessorDetails:
+        version = '0.0.3'
+        description = 'Generates seeded synthetic poker transactions from the GenerateJSON schema as JSON lines, CSV or Postgres COPY text, with optional hot tournaments and whale players'
+        tags = ['generate', 'synthetic', 'load', 'poker', 'numpy', 'regulatory', 'dgoj', 'spain']
+        dependencies = ['numpy']
+
+    def __init__(self, *args, **kwargs):
+        super().__init__()
+
+        self.json_schema = PropertyDescriptor(
+            name="JSON Schema",
+            description="GenerateJSON schema for the transactions (setup/schema_GeneratePokerTransactions.json)",
+            required=True,
+            validators=[StandardValidators.NON_EMPTY_VALIDATOR]
+        )
+
+        self.output_format = PropertyDescriptor(
+            name="Output Format",
+            description="JSONL (one transaction per line, as GenerateJSON JSON_LINES), CSV (transaction_data flattened, with header) or POSTGRES_COPY (text format for tournaments.poker (transaction_id, transaction_data))",
+            required=True,
+            allowable_values=list(FORMATS),
+            default_value="JSONL"
+        )
+
+        self.records_per_flowfile = PropertyDescriptor(
+            name="Records Per FlowFile",
+            description="Records generated per FlowFile (one vectorized block)",
+            required=True,
+            default_value="1000",
+            validators=[StandardValidators.POSITIVE_INTEGER_VALIDATOR]
+        )
+
+        self.seed = PropertyDescriptor(
+            name="Seed",
+            description="Seed for reproducible output. Leave empty to pick a random seed each time the processor starts; a fixed seed repeats the same transaction IDs after a restart.",
+            required=False,
+            validators=[StandardValidators.NON_NEGATIVE_INTEGER_VALIDATOR]
+        )
+
+        self.tournaments = PropertyDescriptor(
+            name="Tournaments",
+            description="Number of tournaments the transactions are spread over",
+            required=True,
+            default_value="1000",
+            validators=[StandardValidators.POSITIVE_INTEGER_VALIDATOR]
+        )
+
+        self.hot_tournaments = PropertyDescriptor(
+            name="Hot Tournaments",
+            description="Number of tournaments that receive 'Hot Tournament Share' of the transactions",
+            required=True,
+            default_value="0",
+            validators=[StandardValidators.NON_NEGATIVE_INTEGER_VALIDATOR]
+        )
+
+        self.hot_share = PropertyDescriptor(
+            name="Hot Tournament Share",
+            description="Share of transactions (0-1) placed in the hot tournaments",
+            required=True,
+            default_value="0",
+            validators=[StandardValidators.NUMBER_VALIDATOR]
+        )
+
+        self.whale_players = PropertyDescriptor(
+            name="Whale Players",
+            description="Number of high-volume players who place 'Whale Share' of the transactions, betting near the top of the bet range",
+            required=True,
+            default_value="0",
+            validators=[StandardValidators.NON_NEGATIVE_INTEGER_VALIDATOR]
+        )
+
+        self.whale_share = PropertyDescriptor(
+            name="Whale Share",
+            description="Share of transactions (0-1) placed by whale players",
+            required=True,
+            default_value="0",
+            validators=[StandardValidators.NUMBER_VALIDATOR]
+        )
+
+        self.descriptors = [
+            self.json_schema,
+            self.output_format,
+            self.records_per_flowfile,
+            self.seed,
+            self.tournaments,
+            self.hot_tournaments,
+            self.hot_share,
+            self.whale_players,
+            self.whale_share
+        ]
+
+        self.generator = None
+        self.next_block = 0
+        self.lock = threading.Lock()
+
+    def getPropertyDescriptors(self) -> List[PropertyDescriptor]:
+        return self.descriptors
+
+    def onScheduled(self, context: ProcessContext):
+        seed = context.getProperty(self.seed).getValue()
+        seed = int(seed) if seed else secrets.randbits(32)
+
+        self.format = context.getProperty(self.output_format).getValue()
+        self.block_size = context.getProperty(self.records_per_flowfile).asInteger()
+        self.generator = PokerTransactionGenerator(
+            PokerSchema.parse(context.getProperty(self.json_schema).getValue()),
+            seed=seed,
+            tournaments=context.getProperty(self.tournaments).asInteger(),
+            hot_tournaments=context.getProperty(self.hot_tournaments).asInteger(),
+            hot_share=float(context.getProperty(self.hot_share).getValue()),
+            whale_players=context.getProperty(self.whale_players).asInteger(),
+            whale_share=float(context.getProperty(self.whale_share).getValue())
+        )
+        self.next_block = 0
+        self.logger.info("Generating {} records per FlowFile as {} with seed {}".format(self.block_size, self.format, seed))
+
+    def create(self, context: ProcessContext):
+        """
+        Generate the next block of transactions.
+
+        Returns:
+            FlowFileSourceResult with one block of records
+        """
+        with self.lock:
+            block = self.next_block
+            self.next_block += 1
+
+        contents = encode(self.generator.block(block, self.block_size), self.format, header=self.format == "CSV")
+
+        return FlowFileSourceResult(
+            relationship="success",
+            attributes={
+                "generator.seed": str(self.generator.seed),
+                "generator.block": str(block),
+                "record.count": str(self.block_size),
+                "mime.type": MIME_TYPES[self.format]
+            },
+            contents=contents
+        )
+
+    def getRelationships(self) -> List[Relationship]:
+        return [
+            Relationship(name="success", description="One FlowFile per block of generated transactions")
+        ]
@@ -0,0 +1,458 @@
+"""
+Seeded, vectorized poker transaction generator used by the
+GeneratePokerTransactions processor and as a command-line tool.
+
+Reads the JSON schema the GenerateJSON processor uses
+(setup/schema_GeneratePokerTransactions.json) and produces records with the
+same structure: a transaction_id and a transaction_data object whose fields
+follow the schema's enums, regexify patterns, number ranges, date windows,
+UUID and IPv4 formats. Records are generated in NumPy blocks; block N of a
+given seed is always the same, so a run can be reproduced exactly.
+
+Unlike GenerateJSON, each record belongs to one of a pool of tournaments,
+so tournament_id, tournament_name, tournament_start/end and variant stay
+consistent across the records of a tournament. Optional skew sends a share
+of records to a few hot tournaments and to a few whale players, who bet
+near the top of the bet range.
+
+Kept free of NiFi imports so it runs from the command line:
+
+    python poker_generator.py --schema setup/schema_GeneratePokerTransactions.json \\
+        --count 1000000 --seed 42 --format POSTGRES_COPY > poker.copy
+"""
+
+import argparse
+import datetime
+import functools
+import json
+import re
+import sys
+import time
+
+import numpy as np
+
+FORMATS = ("JSONL", "CSV", "POSTGRES_COPY")
+
+MIME_TYPES = {
+    "JSONL": "application/json",
+    "CSV": "text/csv",
+    "POSTGRES_COPY": "text/plain"
+}
+
+# Fields that describe the tournament rather than the bet
+TOURNAMENT_FIELDS = ("tournament_id", "tournament_name", "tournament_start", "tournament_end", "variant", "variant_commercial")
+
+# Whale bets are drawn from the top share of the bet range
+WHALE_BET_RANGE = 0.2
+
+_TIME_UNITS = {"SECONDS": 1, "MINUTES": 60, "HOURS": 3600, "DAYS": 86400}
+_TIME_WINDOW = re.compile(r"TimeAndDate\.(past|future)\s+'(\d+)'\s*,\s*'(\w+)'")
+_REGEXIFY = re.compile(r"regexify\s+'(.*)'$")
+
+
+class SchemaError(ValueError):
+    """The schema uses a field type or format the generator does not support."""
+
+
+def _regex_positions(pattern):
+    """
+    Expand a regexify pattern into one character set per output position.
+
+    Supports literal characters, character classes with ranges ([0-9],
+    [A-Z0-9]) and fixed {n} repeats, which covers patterns like PLR[0-9]{6}.
+    """
+    positions = []
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == "[":
+            end = pattern.index("]", i)
+            body = pattern[i + 1:end]
+            chars = ""
+            j = 0
+            while j < len(body):
+                if j + 2 < len(body) and body[j + 1] == "-":
+                    chars += "".join(chr(c) for c in range(ord(body[j]), ord(body[j + 2]) + 1))
+                    j += 3
+                else:
+                    chars += body[j]
+                    j += 1
+            positions.append(chars)
+            i = end + 1
+        elif char == "{":
+            end = pattern.index("}", i)
+            if not positions:
+                raise SchemaError("Repeat without a preceding element in '{}'".format(pattern))
+            positions.extend([positions[-1]] * (int(pattern[i + 1:end]) - 1))
+            i = end + 1
+        elif char == "\\":
+            positions.append(pattern[i + 1])
+            i += 2
+        elif char in "()|*+?.^$":
+            raise SchemaError("Unsupported regexify syntax '{}' in '{}'".format(char, pattern))
+        else:
+            positions.append(char)
+            i += 1
+    return positions
+
+
+def _field_generator(name, spec):
+    """Describe how to generate one schema property."""
+    kind = spec.get("type")
+    fmt = spec.get("format", "")
+    if "enum" in spec:
+        return {"kind": "enum", "values": list(spec["enum"])}
+    if kind == "number" or kind == "integer":
+        if "minimum" not in spec or "maximum" not in spec:
+            raise SchemaError("Number field '{}' needs minimum and maximum".format(name))
+        return {"kind": "amount", "minimum": spec["minimum"], "maximum": spec["maximum"], "integer": kind == "integer"}
+    if fmt == "Internet.uuid":
+        return {"kind": "uuid"}
+    if fmt == "Internet.ipV4Address":
+        return {"kind": "ipv4"}
+    window = _TIME_WINDOW.match(fmt)
+    if window:
+        direction, amount, unit = window.groups()
+        if unit.upper() not in _TIME_UNITS:
+            raise SchemaError("Unsupported time unit '{}' for '{}'".format(unit, name))
+        seconds = int(amount) * _TIME_UNITS[unit.upper()]
+        return {"kind": "time", "low": -seconds if direction == "past" else 0, "high": 0 if direction == "past" else seconds}
+    regex = _REGEXIFY.match(fmt)
+    if regex:
+        return {"kind": "regex", "positions": _regex_positions(regex.group(1))}
+    raise SchemaError("Unsupported field '{}' (type {}, format '{}')".format(name, kind, fmt))
+
+
+class PokerSchema:
+    """Field generators read from the GenerateJSON poker transaction schema."""
+
+    def __init__(self, schema):
+        properties = schema.get("properties", {})
+        if "transaction_id" not in properties or "transaction_data" not in properties:
+            raise SchemaError("Schema must define transaction_id and transaction_data")
+        self.transaction_id = _field_generator("transaction_id", properties["transaction_id"])
+        self.fields = {
+            name: _field_generator(name, spec)
+            for name, spec in properties["transaction_data"].get("properties", {}).items()
+        }
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            return cls(json.load(f))
+
+    @classmethod
+    def parse(cls, text):
+        return cls(json.loads(text))
+
+
+class _Column:
+    """
+    One generated field as a list of parts: bytes arrays (one value per
+    record) and bytes constants, concatenated per record when encoded.
+    """
+
+    def __init__(self, parts, quoted=True, json_parts=None, csv_parts=None):
+        self.parts = parts
+        self.quoted = quoted
+        self.json_parts = json_parts or ([b'"'] + parts + [b'"'] if quoted else parts)
+        self.csv_parts = csv_parts or parts
+
+    def take(self, index):
+        def pick(parts):
+            return [part if isinstance(part, bytes) else part[index] for part in parts]
+        return _Column(pick(self.parts), self.quoted, pick(self.json_parts), pick(self.csv_parts))
+
+
+def _concat(parts, size):
+    """
+    Concatenate parts row by row into one bytes buffer, without a Python loop
+    over records.
+
+    Parts are copied side by side into a (size, total width) byte matrix;
+    bytes arrays are NUL-padded to their itemsize, so dropping the NUL bytes
+    leaves the concatenated rows. Generated text never contains NUL.
+    """
+    widths = [len(part) if isinstance(part, bytes) else part.dtype.itemsize for part in parts]
+    matrix = np.zeros((size, sum(widths)), dtype=np.uint8)
+    column = 0
+    for part, width in zip(parts, widths):
+        if width:
+            if isinstance(part, bytes):
+                matrix[:, column:column + width] = np.frombuffer(part, dtype=np.uint8)
+            else:
+                matrix[:, column:column + width] = np.ascontiguousarray(part).view(np.uint8).reshape(size, width)
+        column += width
+    flat = matrix.ravel()
+    return flat[flat != 0].tobytes()
+
+
+@functools.lru_cache(maxsize=None)
+def _digit_table(limit, width):
+    return np.array([str(i).zfill(width).encode("ascii") for i in range(limit)])
+
+
+def _digits(numbers, width=0):
+    """Decimal text of non-negative integers, zero-padded to width."""
+    limit = int(numbers.max()) + 1 if len(numbers) else 1
+    if limit <= 100000:
+        return _digit_table(limit, width)[numbers]
+    text = numbers.astype("S")
+    return np.strings.zfill(text, width) if width else text
+
+
+class PokerTransactionGenerator:
+    """
+    Produces blocks of poker transactions from a seed.
+
+    Args:
+        schema: PokerSchema
+        seed: Seed; block N of a seed is always the same
+        now: Reference time for the schema's past/future date windows (UTC)
+        tournaments: Size of the tournament pool
+        hot_tournaments: Number of hot tournaments taken from the pool
+        hot_share: Share of records that go to the hot tournaments
+        whale_players: Number of whale players
+        whale_share: Share of records placed by whale players
+    """
+
+    def __init__(self, schema, seed=0, now=None, tournaments=1000, hot_tournaments=0, hot_share=0.0,
+                 whale_players=0, whale_share=0.0):
+        if tournaments < 1:
+            raise ValueError("tournaments must be at least 1")
+        if not 0 <= hot_tournaments <= tournaments:
+            raise ValueError("hot_tournaments must be between 0 and tournaments")
+        if not (0 <= hot_share <= 1 and 0 <= whale_share <= 1):
+            raise ValueError("hot_share and whale_share must be between 0 and 1")
+        if hot_share and not hot_tournaments:
+            raise ValueError("hot_share needs at least one hot tournament")
+        if whale_share and not whale_players:
+            raise ValueError("whale_share needs at least one whale player")
+
+        self.schema = schema
+        self.seed = seed
+        self.now = now or datetime.datetime.now(datetime.timezone.utc)
+        self.tournaments = tournaments
+        self.hot_tournaments = hot_tournaments
+        self.hot_share = hot_share
+        self.whale_share = whale_share
+        self._epoch = int(self.now.timestamp())
+
+        rng = np.random.default_rng([seed, 0])
+        self._tournaments = self._tournament_pool(rng, tournaments)
+
+        player = schema.fields.get("player_id")
+        if whale_players and (player is None or player["kind"] != "regex"):
+            raise ValueError("whale players need a regexify player_id field")
+        self._whales = None
+        if whale_players:
+            space = self._regex_space(player["positions"])
+            if whale_players > space:
+                raise ValueError("whale_players exceeds the {} possible player IDs".format(space))
+            self._whales = rng.choice(space, size=whale_players, replace=False)
+
+    def _tournament_pool(self, rng, size):
+        pool = {}
+        fields = {name: spec for name, spec in self.schema.fields.items() if name in TOURNAMENT_FIELDS}
+        variant = fields.get("variant")
+        commercial = fields.get("variant_commercial")
+        # The schema lists variant codes and their commercial names in the same order
+        paired = (variant is not None and commercial is not None and variant["kind"] == commercial["kind"] == "enum"
+                  and len(variant["values"]) == len(commercial["values"]))
+        variant_index = rng.integers(len(variant["values"]), size=size) if paired else None
+        for name, spec in fields.items():
+            if paired and name in ("variant", "variant_commercial"):
+                pool[name] = self._enum_column(spec, variant_index)
+            else:
+                pool[name] = self._column(spec, size, rng)
+        return pool
+
+    def block(self, index, size):
+        """
+        Generate one block of records.
+
+        Returns:
+            Dict of field name to _Column, with "transaction_id" first
+        """
+        rng = np.random.default_rng([self.seed, 1, index])
+
+        tournament = rng.integers(self.tournaments, size=size) if self._tournaments else None
+        if tournament is not None and self.hot_share:
+            hot = rng.random(size) < self.hot_share
+            tournament[hot] = rng.integers(self.hot_tournaments, size=int(hot.sum()))
+
+        whale = rng.random(size) < self.whale_share if self.whale_share else None
+
+        columns = {"transaction_id": self._column(self.schema.transaction_id, size, rng)}
+        for name, spec in self.schema.fields.items():
+            if name in self._tournaments:
+                columns[name] = self._tournaments[name].take(tournament)
+            elif name == "player_id" and whale is not None:
+                number = rng.integers(self._regex_space(spec["positions"]), size=size)
+                number[whale] = rng.choice(self._whales, size=int(whale.sum()))
+                columns[name] = _Column([self._regex_render(spec["positions"], number)])
+            elif name == "bet_amount" and whale is not None and spec["kind"] == "amount":
+                low, high = spec["minimum"], spec["maximum"]
+                amounts = self._draw_amounts(rng, size, low, high, spec["integer"])
+                floor = high - (high - low) * WHALE_BET_RANGE
+                amounts[whale] = self._draw_amounts(rng, int(whale.sum()), floor, high, spec["integer"])
+                columns[name] = self._amount_column(amounts, spec["integer"])
+            else:
+                columns[name] = self._column(spec, size, rng)
+        return columns
+
+    def _column(self, spec, size, rng):
+        kind = spec["kind"]
+        if kind == "enum":
+            return self._enum_column(spec, rng.integers(len(spec["values"]), size=size))
+        if kind == "amount":
+            return self._amount_column(self._draw_amounts(rng, size, spec["minimum"], spec["maximum"], spec["integer"]), spec["integer"])
+        if kind == "uuid":
+            return _Column([self._uuids(rng, size)])
+        if kind == "ipv4":
+            first, second, third, fourth = (rng.integers(1, 255, size=size), rng.integers(0, 256, size=size),
+                                            rng.integers(0, 256, size=size), rng.integers(1, 255, size=size))
+            return _Column([_digits(first), b".", _digits(second), b".", _digits(third), b".", _digits(fourth)])
+        if kind == "time":
+            seconds = self._epoch + rng.integers(spec["low"], spec["high"] + 1, size=size)
+            return _Column([seconds.astype("datetime64[s]").astype("S19"), b"Z"])
+        if kind == "regex":
+            return _Column([self._regex_render(spec["positions"], rng.integers(self._regex_space(spec["positions"]), size=size))])
+        raise SchemaError("Unsupported field kind '{}'".format(kind))
+
+    @staticmethod
+    def _enum_column(spec, index):
+        values = [str(v) for v in spec["values"]]
+        raw = np.array([v.encode("utf-8") for v in values])
+        encoded = np.array([json.dumps(v, ensure_ascii=False).encode("utf-8") for v in spec["values"]])
+        quoted = np.array([('"' + v.replace('"', '""') + '"' if any(c in v for c in ',"\n') else v).encode("utf-8") for v in values])
+        return _Column([raw[index]], json_parts=[encoded[index]], csv_parts=[quoted[index]])
+
+    @staticmethod
+    def _draw_amounts(rng, size, low, high, integer):
+        # Integers, or amounts in cents
+        if integer:
+            return rng.integers(int(low), int(high) + 1, size=size)
+        return rng.integers(round(low * 100), round(high * 100) + 1, size=size)
+
+    @staticmethod
+    def _amount_column(amounts, integer):
+        if integer:
+            return _Column([amounts.astype("S")], quoted=False)
+        return _Column([_digits(amounts // 100), b".", _digits(amounts % 100, 2)], quoted=False)
+
+    @staticmethod
+    def _uuids(rng, size):
+        # Random (version 4) UUIDs built as a (size, 36) character array
+        nibbles = rng.integers(0, 16, size=(size, 32), dtype=np.uint8)
+        nibbles[:, 12] = 4
+        nibbles[:, 16] = 8 | (nibbles[:, 16] & 3)
+        chars = np.frombuffer(b"0123456789abcdef", dtype="S1")[nibbles]
+        dashed = np.full((size, 36), b"-", dtype="S1")
+        dashed[:, 0:8] = chars[:, 0:8]
+        dashed[:, 9:13] = chars[:, 8:12]
+        dashed[:, 14:18] = chars[:, 12:16]
+        dashed[:, 19:23] = chars[:, 16:20]
+        dashed[:, 24:36] = chars[:, 20:32]
+        return np.ascontiguousarray(dashed).view("S36").reshape(size)
+
+    @staticmethod
+    def _regex_space(positions):
+        space = 1
+        for chars in positions:
+            space *= len(chars)
+        return space
+
+    @staticmethod
+    def _regex_render(positions, number):
+        # Mixed-radix digits of number, one position per character set
+        chars = np.empty((len(number), len(positions)), dtype="S1")
+        rest = number.copy()
+        for i in range(len(positions) - 1, -1, -1):
+            alphabet = np.frombuffer(positions[i].encode("ascii"), dtype="S1")
+            chars[:, i] = alphabet[rest % len(alphabet)]
+            rest //= len(alphabet)
+        return np.ascontiguousarray(chars).view("S{}".format(len(positions))).reshape(len(number))
+
+
+def encode(columns, output_format, header=False):
+    """
+    Encode a block as JSONL, CSV or Postgres COPY text.
+
+    POSTGRES_COPY matches tournaments.poker (transaction_id, transaction_data).
+    CSV flattens transaction_data into one column per field.
+
+    Returns:
+        bytes, one newline-terminated line per record
+    """
+    names = [name for name in columns if name != "transaction_id"]
+    size = len(columns["transaction_id"].parts[0])
+
+    if output_format in ("JSONL", "POSTGRES_COPY"):
+        document = []
+        for i, name in enumerate(names):
+            document.append(('{"' if i == 0 else ',"').encode("utf-8") + name.encode("utf-8") + b'":')
+            document.extend(columns[name].json_parts)
+        document.append(b"}")
+        if output_format == "JSONL":
+            parts = [b'{"transaction_id":'] + columns["transaction_id"].json_parts + [b',"transaction_data":'] + document + [b"}\n"]
+            return _concat(parts, size)
+        data = _concat(columns["transaction_id"].parts + [b"\t"] + document + [b"\n"], size)
+        # COPY text format: backslash is the escape character; IDs, tabs and newlines contain none
+        return data.replace(b"\\", b"\\\\")
+
+    if output_format == "CSV":
+        parts = []
+        for i, name in enumerate(["transaction_id"] + names):
+            parts.extend(([b","] if i else []) + columns[name].csv_parts)
+        data = _concat(parts + [b"\n"], size)
+        if header:
+            return (",".join(["transaction_id"] + names) + "\n").encode("utf-8") + data
+        return data
+
+    raise ValueError("Unknown output format '{}'".format(output_format))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate seeded synthetic poker transactions")
+    parser.add_argument("--schema", required=True, help="GenerateJSON schema (setup/schema_GeneratePokerTransactions.json)")
+    parser.add_argument("--count", type=int, default=100000, help="Records to generate")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--format", choices=FORMATS, default="JSONL")
+    parser.add_argument("--block-size", type=int, default=10000, help="Records per block; part of what a seed reproduces")
+    parser.add_argument("--now", help="Reference UTC time for date windows, e.g. 2026-01-22T10:00:00 (default: now)")
+    parser.add_argument("--tournaments", type=int, default=1000, help="Tournament pool size")
+    parser.add_argument("--hot-tournaments", type=int, default=0)
+    parser.add_argument("--hot-share", type=float, default=0.0, help="Share of records in hot tournaments")
+    parser.add_argument("--whale-players", type=int, default=0)
+    parser.add_argument("--whale-share", type=float, default=0.0, help="Share of records placed by whales")
+    parser.add_argument("--output", help="Output file (default: stdout)")
+    args = parser.parse_args()
+
+    now = None
+    if args.now:
+        now = datetime.datetime.fromisoformat(args.now).replace(tzinfo=datetime.timezone.utc)
+    generator = PokerTransactionGenerator(
+        PokerSchema.load(args.schema), seed=args.seed, now=now, tournaments=args.tournaments,
+        hot_tournaments=args.hot_tournaments, hot_share=args.hot_share,
+        whale_players=args.whale_players, whale_share=args.whale_share)
+
+    out = open(args.output, "wb") if args.output else sys.stdout.buffer
+    started = time.perf_counter()
+    written = 0
+    try:
+        index = 0
+        while written < args.count:
+            size = min(args.block_size, args.count - written)
+            out.write(encode(generator.block(index, size), args.format, header=args.format == "CSV" and index == 0))
+            written += size
+            index += 1
+    finally:
+        if args.output:
+            out.close()
+    elapsed = time.perf_counter() - started
+    print("{} records in {:.2f} s ({:,.0f} records/s)".format(written, elapsed, written / elapsed if elapsed else 0), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+from nifiapi.flowfiletransform import FlowFileTransform, FlowFileTransformResult
+from nifiapi.properties import PropertyDescriptor, StandardValidators, ExpressionLanguageScope, ProcessContext, TimeUnit
+from nifiapi.relationship import Relationship
+from typing import List
+import time
+
+from batch_ack import ACK_PROCEDURE, AckCoalescer, AckFailed, SnowflakeAckStore
+import snowflake_session
+
+
+class AcknowledgeRegulatoryBatches(FlowFileTransform):
+    """
+    Marks delivered batches UPLOADED in Snowflake, replacing the per-batch
+    ExecuteSQL UPDATE at the end of BoeGamingReport.
+
+    Acknowledgments from concurrent tasks are grouped and applied with one
+    ACK_UPLOADED_BATCHES call (sql/14_batch_acks.sql), a single MERGE with the
+    batch IDs bound as JSON. A group is applied as soon as the previous call
+    has returned, so acknowledgments arriving during a call share the next
+    one. Each task waits for its group, so a FlowFile is only routed to
+    success once its batch is UPLOADED; groups can therefore only be as large
+    as the number of concurrent tasks.
+
+    UPLOAD_TIMESTAMP is taken from sftp.upload.timestamp (set by
+    DeliverRegulatoryFile), so time spent waiting here does not count as
+    delivery latency.
+
+    'Batch ID' may list several comma-separated batches, for archives that
+    bundle several lotes (dgoj.bundle.batch.ids from PrepareRegulatoryFile);
+    they are acknowledged in the same group and the FlowFile only goes to
+    success once all of them are UPLOADED.
+    """
+
+    class Java:
+        implements = ['org.apache.nifi.python.processor.FlowFileTransform']
+
+    class ProcessorDetails:
+        version = '0.0.3'
+        description = 'Marks uploaded regulatory batches UPLOADED in Snowflake, grouping acknowledgments from concurrent tasks into one MERGE'
+        tags = ['snowflake', 'acknowledge', 'batch', 'regulatory', 'dgoj', 'spain']
+        dependencies = ['snowflake-connector-python', 'cryptography']
+
+    def __init__(self, *args, **kwargs):
+        super().__init__()
+
+        self.ack_procedure = PropertyDescriptor(
+            name="Ack Procedure",
+            description="Fully qualified name of the ACK_UPLOADED_BATCHES procedure",
+            required=True,
+            default_value=ACK_PROCEDURE,
+            validators=[StandardValidators.NON_EMPTY_VALIDATOR],
+            expression_language_scope=ExpressionLanguageScope.ENVIRONMENT
+        )
+
+        self.batch_id = PropertyDescriptor(
+            name="Batch ID",
+            description="Batch to mark UPLOADED, or a comma-separated list of batches delivered in one file (for bundles: ${dgoj.bundle.batch.ids:replaceEmpty(${meta.batchId})})",
+            required=True,
+            default_value="${meta.batchId}",
+            validators=[StandardValidators.NON_EMPTY_VALIDATOR],
+            expression_language_scope=ExpressionLanguageScope.FLOWFILE_ATTRIBUTES
+        )
+
+        self.upload_timestamp = PropertyDescriptor(
+            name="Upload Timestamp",
+            description="ISO 8601 time the file was delivered. Empty or unparseable values use the time of the acknowledgment.",
+            required=False,
+            default_value="${sftp.upload.timestamp}",
+            expression_language_scope=ExpressionLanguageScope.FLOWFILE_ATTRIBUTES
+        )
+
+        self.max_batch_size = PropertyDescriptor(
+            name="Maximum Batch Size",
+            description="Most acknowledgments applied with one procedure call",
+            required=True,
+            default_value="50",
+            validators=[StandardValidators.POSITIVE_INTEGER_VALIDATOR]
+        )
+
+        self.max_wait = PropertyDescriptor(
+            name="Maximum Wait",
+            description="Longest a group waits for the previous group's call to return before it is applied anyway",
+            required=True,
+            default_value="500 millis",
+            validators=[StandardValidators.TIME_PERIOD_VALIDATOR]
+        )
+
+        self.descriptors = snowflake_session.CONNECTION_PROPERTIES + [
+            self.ack_procedure,
+            self.batch_id,
+            self.upload_timestamp,
+            self.max_batch_size,
+            self.max_wait
+        ]
+
+        self.store = None
+        self.coalescer = None
+
+    def getPropertyDescriptors(self) -> List[PropertyDescriptor]:
+        return self.descriptors
+
+    def onScheduled(self, context: ProcessContext):
+        procedure = context.getProperty(self.ack_procedure).evaluateAttributeExpressions().getValue()
+
+        settings = snowflake_session.connection_settings(context)
+        self.store = SnowflakeAckStore(lambda: snowflake_session.connect(settings), procedure)
+        self.coalescer = AckCoalescer(
+            self.store,
+            max_items=context.getProperty(self.max_batch_size).asInteger(),
+            max_wait=context.getProperty(self.max_wait).asTimePeriod(TimeUnit.MILLISECONDS) / 1000
+        )
+
+    def onStopped(self, context: ProcessContext):
+        if self.coalescer is not None:
+            self.logger.info("Stopped; acknowledgment stats: {}".format(dict(self.coalescer.stats)))
+            self.coalescer = None
+        if self.store is not None:
+            self.store.close()
+            self.store = None
+
+    def transform(self, context: ProcessContext, flowfile):
+        """
+        Acknowledge the FlowFile's batch as part of the current group.
+
+        Args:
+            context: Process context with property values
+            flowfile: Delivered FlowFile with meta.batchId (or dgoj.bundle.batch.ids) and sftp.upload.timestamp
+
+        Returns:
+            FlowFileTransformResult routed to success or failure
+        """
+        try:
+            batch_ids = [batch_id.strip() for batch_id in context.getProperty(self.batch_id).evaluateAttributeExpressions(flowfile).getValue().split(",") if batch_id.strip()]
+            uploaded_at = context.getProperty(self.upload_timestamp).evaluateAttributeExpressions(flowfile).getValue()
+            if not batch_ids:
+                raise ValueError("No batch ID to acknowledge")
+
+            started = time.monotonic()
+            group_size = self.coalescer.acknowledge_all(batch_ids, uploaded_at.strip() if uploaded_at else None)
+            wait_millis = (time.monotonic() - started) * 1000
+
+            self.logger.debug("Acknowledged {} in a group of {} ({:.0f} ms)".format(",".join(batch_ids), group_size, wait_millis))
+
+            return FlowFileTransformResult(
+                relationship="success",
+                attributes={
+                    "ack.group.size": str(group_size),
+                    "ack.wait.millis": str(round(wait_millis))
+                }
+            )
+
+        except AckFailed as e:
+            self.logger.error(str(e))
+            return FlowFileTransformResult(relationship="failure", attributes={"error.message": str(e)})
+
+        except Exception as e:
+            self.logger.error("Failed to acknowledge batch: {}".format(str(e)))
+            return FlowFileTransformResult(relationship="failure", attributes={"error.message": str(e)})
+
+    def getRelationships(self) -> List[Relationship]:
+        return [
+            Relationship(name="success", description="FlowFiles whose batches are now UPLOADED, with ack.group.size and ack.wait.millis"),
+            Relationship(name="failure", description="FlowFiles whose batch could not be marked UPLOADED (unknown batch or Snowflake errors)")
+        ]
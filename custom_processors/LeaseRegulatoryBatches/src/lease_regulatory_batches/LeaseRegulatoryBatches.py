@@ -0,0 +1,172 @@
+from nifiapi.flowfilesource import FlowFileSource, FlowFileSourceResult
+from nifiapi.properties import PropertyDescriptor, StandardValidators, ExpressionLanguageScope, ProcessContext, TimeUnit
+from nifiapi.relationship import Relationship
+from typing import List
+import json
+import os
+import socket
+
+from batch_lease import AdaptiveLeaseSize, BatchLeaser, SnowflakeLeaseStore, json_value
+import snowflake_session
+
+
+class LeaseRegulatoryBatches(FlowFileSource):
+    """
+    Leases GENERATED regulatory batches from Snowflake and emits one FlowFile
+    per batch, replacing GenerateFlowFile + ExecuteSQLRecord in BoeGamingReport.
+
+    Each claim calls LEASE_REGULATORY_BATCHES (sql/13_batch_leasing.sql), which
+    marks up to N batches PROCESSING under a lease ID, owner and expiry in one
+    serialized transaction and returns exactly those rows. Any number of
+    concurrent tasks or nodes can therefore run this processor and receive
+    disjoint batches. Batches whose lease expired (failed delivery, lost node)
+    are reclaimed by the next claim.
+
+    The lease size adapts to how quickly the flow drains each lease: NiFi stops
+    triggering this processor while its outgoing connection is back-pressured,
+    so a growing downstream queue shrinks the next lease.
+
+    FlowFile content matches ExecuteSQLRecord's output for one row (a
+    one-element JSON array), so ExtractMetadata's $[0].* paths are unchanged.
+    """
+
+    class Java:
+        implements = ['org.apache.nifi.python.processor.FlowFileSource']
+
+    class ProcessorDetails:
+        version = '0.0.3'
+        description = 'Atomically leases GENERATED regulatory batches from Snowflake with owner and expiry, reclaiming expired leases'
+        tags = ['snowflake', 'lease', 'queue', 'regulatory', 'dgoj', 'spain']
+        dependencies = ['snowflake-connector-python', 'cryptography']
+
+    def __init__(self, *args, **kwargs):
+        super().__init__()
+
+        self.lease_procedure = PropertyDescriptor(
+            name="Lease Procedure",
+            description="Fully qualified name of the LEASE_REGULATORY_BATCHES procedure",
+            required=True,
+            default_value="DEDEMO.GAMING.LEASE_REGULATORY_BATCHES",
+            validators=[StandardValidators.NON_EMPTY_VALIDATOR],
+            expression_language_scope=ExpressionLanguageScope.ENVIRONMENT
+        )
+
+        self.min_lease_size = PropertyDescriptor(
+            name="Minimum Lease Size",
+            description="Smallest number of batches claimed per lease",
+            required=True,
+            default_value="1",
+            validators=[StandardValidators.POSITIVE_INTEGER_VALIDATOR]
+        )
+
+        self.max_lease_size = PropertyDescriptor(
+            name="Maximum Lease Size",
+            description="Largest number of batches claimed per lease",
+            required=True,
+            default_value="50",
+            validators=[StandardValidators.POSITIVE_INTEGER_VALIDATOR]
+        )
+
+        self.lease_duration = PropertyDescriptor(
+            name="Lease Duration",
+            description="How long claimed batches stay reserved before any owner may reclaim them. Must comfortably exceed the time to sign and upload one lease.",
+            required=True,
+            default_value="5 min",
+            validators=[StandardValidators.TIME_PERIOD_VALIDATOR]
+        )
+
+        self.max_attempts = PropertyDescriptor(
+            name="Maximum Attempts",
+            description="Leases per batch after which an expired batch is no longer reclaimed and stays PROCESSING for manual attention",
+            required=True,
+            default_value="5",
+            validators=[StandardValidators.POSITIVE_INTEGER_VALIDATOR]
+        )
+
+        self.poll_interval = PropertyDescriptor(
+            name="Poll Interval",
+            description="Wait after an empty claim (or an error) before claiming again",
+            required=True,
+            default_value="15 sec",
+            validators=[StandardValidators.TIME_PERIOD_VALIDATOR]
+        )
+
+        self.descriptors = snowflake_session.CONNECTION_PROPERTIES + [
+            self.lease_procedure,
+            self.min_lease_size,
+            self.max_lease_size,
+            self.lease_duration,
+            self.max_attempts,
+            self.poll_interval
+        ]
+
+        self.store = None
+        self.leaser = None
+
+    def getPropertyDescriptors(self) -> List[PropertyDescriptor]:
+        return self.descriptors
+
+    def onScheduled(self, context: ProcessContext):
+        minimum = context.getProperty(self.min_lease_size).asInteger()
+        maximum = context.getProperty(self.max_lease_size).asInteger()
+        lease_seconds = context.getProperty(self.lease_duration).asTimePeriod(TimeUnit.SECONDS)
+        procedure = context.getProperty(self.lease_procedure).evaluateAttributeExpressions().getValue()
+
+        settings = snowflake_session.connection_settings(context)
+        self.store = SnowflakeLeaseStore(lambda: snowflake_session.connect(settings), procedure)
+        self.leaser = BatchLeaser(
+            self.store,
+            owner="{}/{}/{}".format(socket.gethostname(), os.getpid(), self.__class__.__name__),
+            size=AdaptiveLeaseSize(minimum, maximum),
+            lease_seconds=lease_seconds,
+            max_attempts=context.getProperty(self.max_attempts).asInteger(),
+            poll_interval=context.getProperty(self.poll_interval).asTimePeriod(TimeUnit.SECONDS)
+        )
+        self.logger.info("Leasing as {} (lease size {}-{}, {} s leases)".format(
+            self.leaser.owner, minimum, maximum, lease_seconds))
+
+    def onStopped(self, context: ProcessContext):
+        # Buffered batches are not handed out; their leases expire and are reclaimed
+        if self.leaser is not None:
+            self.leaser.abandon()
+            self.logger.info("Stopped; lease stats: {}".format(dict(self.leaser.stats)))
+        if self.store is not None:
+            self.store.close()
+
+    def create(self, context: ProcessContext):
+        """
+        Emit the next leased batch, claiming a new lease when the buffer is empty.
+
+        Returns:
+            FlowFileSourceResult for one batch, or None when nothing is available
+        """
+        try:
+            batch = self.leaser.next_batch()
+        except Exception as e:
+            self.logger.error("Failed to lease batches: {}".format(str(e)))
+            return None
+
+        if batch is None:
+            return None
+
+        record = {key: json_value(value) for key, value in batch.items()}
+        attributes = {
+            "lease.id": str(batch.get("LEASE_ID")),
+            "lease.owner": self.leaser.owner,
+            "lease.expiresAt": str(json_value(batch.get("LEASE_EXPIRES_AT"))),
+            "lease.attempt": str(json_value(batch.get("LEASE_COUNT"))),
+            "lease.size": str(self.leaser.size.value),
+            "record.count": "1",
+            "mime.type": "application/json"
+        }
+
+        return FlowFileSourceResult(
+            relationship="success",
+            attributes=attributes,
+            contents=json.dumps([record]).encode('utf-8')
+        )
+
+    def getRelationships(self) -> List[Relationship]:
+        return [
+            Relationship(name="success", description="One FlowFile per leased batch (JSON array with one record)")
+        ]
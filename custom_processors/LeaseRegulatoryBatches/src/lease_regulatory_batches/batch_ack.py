@@ -0,0 +1,209 @@
+"""
+Coalesced upload acknowledgments used by the AcknowledgeRegulatoryBatches
+processor.
+
+Kept free of NiFi imports so the same code can be driven against a local
+SQLite stand-in (testing/batch_ack_check.py).
+
+Every concurrent task that acknowledges a batch joins the current group.
+The first task in a group applies the whole group with one store call as
+soon as no other group is being applied, or once the group has
+``max_items`` members or ``max_wait`` seconds have passed; every task then
+gets its own outcome. An idle store therefore acknowledges a lone batch at
+once, and acknowledgments arriving during a call are applied together by
+the next one. A failing group is split
+in half and retried, so a bad acknowledgment fails on its own rather than
+taking its group with it. When the calls keep failing all the way down
+(warehouse or connection down) the rest of the group fails at once instead
+of retrying every item.
+
+A caller can acknowledge several batches at once (acknowledge_all, for a
+file bundling several lotes); they always share one group, so a group can
+end up somewhat above ``max_items``.
+"""
+
+import json
+import threading
+import time
+
+from batch_lease import rows_as_dicts
+
+ACK_PROCEDURE = "DEDEMO.GAMING.ACK_UPLOADED_BATCHES"
+
+
+class AckFailed(Exception):
+    """The acknowledgment for one batch could not be applied."""
+
+
+class SnowflakeAckStore:
+    """Applies acknowledgments through ACK_UPLOADED_BATCHES (14_batch_acks.sql)."""
+
+    def __init__(self, connect, procedure=ACK_PROCEDURE):
+        self._connect = connect
+        self._connection = None
+        self._lock = threading.Lock()
+        self.procedure = procedure
+
+    def acknowledge(self, acks):
+        """
+        Mark batches UPLOADED.
+
+        Args:
+            acks: List of (batch_id, uploaded_at) tuples; uploaded_at is an
+                ISO 8601 string or None for the current time
+
+        Returns:
+            Set of batch IDs that are now UPLOADED
+        """
+        payload = json.dumps([{"batch_id": batch_id, "uploaded_at": uploaded_at} for batch_id, uploaded_at in acks])
+        # One call at a time: the coalescer already serializes groups, the lock keeps the connection safe
+        with self._lock:
+            if self._connection is None:
+                self._connection = self._connect()
+            try:
+                cursor = self._connection.cursor()
+                try:
+                    cursor.execute("CALL {}(%s)".format(self.procedure), (payload,))
+                    return {row["BATCH_ID"] for row in rows_as_dicts(cursor)}
+                finally:
+                    cursor.close()
+            except Exception:
+                self.close()
+                raise
+
+    def close(self):
+        if self._connection is not None:
+            try:
+                self._connection.close()
+            except Exception:
+                pass
+            self._connection = None
+
+
+class _Group:
+    def __init__(self):
+        self.items = []
+        self.results = {}
+        self.closed = False
+        self.done = threading.Event()
+        self.failed_calls = 0
+        self.max_failed_calls = 0
+
+
+class AckCoalescer:
+    """Groups acknowledgments from concurrent callers into single store calls; thread-safe."""
+
+    def __init__(self, store, max_items=50, max_wait=0.5):
+        if max_items < 1:
+            raise ValueError("max_items must be at least 1")
+        self.store = store
+        self.max_items = max_items
+        self.max_wait = max_wait
+        self.stats = {"acknowledged": 0, "failed": 0, "calls": 0, "groups": 0}
+
+        self._condition = threading.Condition()
+        self._group = None
+        self._in_flight = 0
+
+    def acknowledge(self, batch_id, uploaded_at=None):
+        """
+        Acknowledge one batch, blocking until its group has been applied.
+
+        Returns:
+            Number of acknowledgments applied in the same group
+
+        Raises:
+            AckFailed: If this batch could not be marked UPLOADED
+        """
+        return self.acknowledge_all([batch_id], uploaded_at)
+
+    def acknowledge_all(self, batch_ids, uploaded_at=None):
+        """
+        Acknowledge several batches delivered together, blocking until their group has been applied.
+
+        Returns:
+            Number of acknowledgments applied in the same group
+
+        Raises:
+            AckFailed: If any of the batches could not be marked UPLOADED;
+                the others are UPLOADED regardless
+        """
+        if not batch_ids:
+            raise ValueError("batch_ids must not be empty")
+        with self._condition:
+            group = self._group
+            leader = group is None
+            if leader:
+                group = self._group = _Group()
+            indexes = range(len(group.items), len(group.items) + len(batch_ids))
+            group.items.extend((batch_id, uploaded_at) for batch_id in batch_ids)
+
+            if leader:
+                deadline = time.monotonic() + self.max_wait
+                while len(group.items) < self.max_items and self._in_flight:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                if not group.closed:
+                    self._close(group)
+                self._in_flight += 1
+            elif len(group.items) >= self.max_items:
+                self._close(group)
+                self._condition.notify_all()
+
+        if leader:
+            self._apply(group)
+        else:
+            group.done.wait()
+
+        errors = [group.results[index] for index in indexes if group.results.get(index) is not None]
+        if errors:
+            raise AckFailed("; ".join(errors))
+        return len(group.items)
+
+    def _close(self, group):
+        # Later arrivals start the next group while this one is applied
+        group.closed = True
+        if self._group is group:
+            self._group = None
+
+    def _apply(self, group):
+        # One bad item fails every call on its way down the bisection, plus one
+        group.max_failed_calls = len(group.items).bit_length() + 1
+        try:
+            self._apply_range(group, 0, len(group.items))
+        except Exception as e:
+            for index in range(len(group.items)):
+                group.results.setdefault(index, "Acknowledgment failed: {}".format(e))
+        finally:
+            with self._condition:
+                self._in_flight -= 1
+                self._condition.notify_all()
+                self.stats["groups"] += 1
+                self.stats["failed"] += sum(1 for error in group.results.values() if error is not None)
+                self.stats["acknowledged"] += sum(1 for error in group.results.values() if error is None)
+            group.done.set()
+
+    def _apply_range(self, group, start, end):
+        items = group.items[start:end]
+        with self._condition:
+            self.stats["calls"] += 1
+        try:
+            uploaded = self.store.acknowledge(items)
+        except Exception as e:
+            group.failed_calls += 1
+            if group.failed_calls > group.max_failed_calls:
+                raise
+            if end - start == 1:
+                group.results[start] = "Acknowledgment failed: {}".format(e)
+                return
+            # Bisect so one bad acknowledgment only fails itself
+            middle = (start + end) // 2
+            self._apply_range(group, start, middle)
+            self._apply_range(group, middle, end)
+            return
+
+        group.failed_calls = 0
+        for offset, (batch_id, _) in enumerate(items):
+            group.results[start + offset] = None if batch_id in uploaded else "Batch not found: {}".format(batch_id)
@@ -0,0 +1,187 @@
+"""
+Batch leasing used by the LeaseRegulatoryBatches processor.
+
+Kept free of NiFi imports so the same code can be driven against a local
+SQLite or DuckDB stand-in (testing/batch_lease_check.py).
+
+A store claims batches atomically: ``claim()`` returns the rows it leased
+for one lease ID and no other caller can receive them until the lease
+expires. BatchLeaser buffers one lease at a time, hands batches out one by
+one, and never hands out a batch whose lease is about to run out.
+"""
+
+import collections
+import threading
+import time
+import uuid
+from datetime import date, datetime
+from decimal import Decimal
+
+LEASE_PROCEDURE = "DEDEMO.GAMING.LEASE_REGULATORY_BATCHES"
+
+
+def rows_as_dicts(cursor):
+    """DB-API rows as dicts keyed by upper-case column name."""
+    columns = [d[0].upper() for d in cursor.description]
+    return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def json_value(value):
+    """Values as ExecuteSQLRecord's JSON writer would emit them."""
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat(sep=" ") if isinstance(value, datetime) else value.isoformat()
+    return value
+
+
+class SnowflakeLeaseStore:
+    """Claims through the LEASE_REGULATORY_BATCHES procedure (13_batch_leasing.sql)."""
+
+    def __init__(self, connect, procedure=LEASE_PROCEDURE):
+        self._connect = connect
+        self._connection = None
+        self.procedure = procedure
+
+    def claim(self, owner, lease_id, max_batches, lease_seconds, max_attempts):
+        if self._connection is None:
+            self._connection = self._connect()
+        try:
+            cursor = self._connection.cursor()
+            try:
+                cursor.execute(
+                    "CALL {}(%s, %s, %s, %s, %s)".format(self.procedure),
+                    (owner, lease_id, int(max_batches), int(lease_seconds), int(max_attempts)),
+                )
+                return rows_as_dicts(cursor)
+            finally:
+                cursor.close()
+        except Exception:
+            # Reconnect on the next call (expired session token, dropped connection)
+            self.close()
+            raise
+
+    def close(self):
+        if self._connection is not None:
+            try:
+                self._connection.close()
+            except Exception:
+                pass
+            self._connection = None
+
+
+class AdaptiveLeaseSize:
+    """
+    Lease size driven by how fast the flow drains each lease.
+
+    NiFi stops triggering a source processor while its outgoing connection is
+    back-pressured, so a deep downstream queue shows up as a lease that takes
+    long to drain. A full lease drained in under ``grow_below`` of its
+    duration doubles the size; one that takes longer than ``shrink_above``,
+    or that had to be abandoned near expiry, halves it.
+    """
+
+    def __init__(self, minimum, maximum, initial=None, grow_below=0.25, shrink_above=0.5):
+        if minimum < 1 or maximum < minimum:
+            raise ValueError("Lease size bounds must satisfy 1 <= minimum <= maximum")
+        self.minimum = minimum
+        self.maximum = maximum
+        self.grow_below = grow_below
+        self.shrink_above = shrink_above
+        self.value = min(max(initial or minimum, minimum), maximum)
+
+    def drained(self, elapsed, lease_seconds, was_full):
+        fraction = elapsed / lease_seconds
+        if was_full and fraction < self.grow_below:
+            self.value = min(self.maximum, self.value * 2)
+        elif fraction > self.shrink_above:
+            self.value = max(self.minimum, self.value // 2)
+        return self.value
+
+    def expired(self):
+        self.value = max(self.minimum, self.value // 2)
+        return self.value
+
+
+class BatchLeaser:
+    """
+    Hands out leased batches one at a time; thread-safe.
+
+    A batch is only handed out while at least ``safety_seconds`` of its lease
+    remain (measured from before the claim, so conservatively). Batches left
+    in the buffer past that point are dropped; their leases expire and the
+    next claim by any owner reclaims them.
+    """
+
+    def __init__(self, store, owner, size, lease_seconds=300, max_attempts=5,
+                 poll_interval=15.0, safety_seconds=None, clock=time.monotonic):
+        self.store = store
+        self.owner = owner
+        self.size = size
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.poll_interval = poll_interval
+        self.safety_seconds = lease_seconds * 0.2 if safety_seconds is None else safety_seconds
+        self.clock = clock
+        self.stats = collections.Counter()
+
+        self._lock = threading.Lock()
+        self._buffer = collections.deque()
+        self._lease_id = None
+        self._lease_started = None
+        self._lease_full = False
+        self._next_poll = 0.0
+
+    @property
+    def lease_id(self):
+        return self._lease_id
+
+    def next_batch(self):
+        """Return the next leased batch as a dict (with LEASE_ID), or None."""
+        with self._lock:
+            now = self.clock()
+            if self._buffer and now >= self._lease_started + self.lease_seconds - self.safety_seconds:
+                self.stats["dropped"] += len(self._buffer)
+                self._buffer.clear()
+                self._lease_id = None
+                self.size.expired()
+
+            if self._buffer:
+                self.stats["handed_out"] += 1
+                return self._buffer.popleft()
+
+            if self._lease_id is not None:
+                self.size.drained(now - self._lease_started, self.lease_seconds, self._lease_full)
+                self._lease_id = None
+
+            if now < self._next_poll:
+                return None
+
+            lease_id = str(uuid.uuid4())
+            requested = self.size.value
+            try:
+                rows = self.store.claim(self.owner, lease_id, requested, self.lease_seconds, self.max_attempts)
+            except Exception:
+                self._next_poll = now + self.poll_interval
+                raise
+            self.stats["claims"] += 1
+
+            if not rows:
+                self.stats["empty_claims"] += 1
+                self._next_poll = now + self.poll_interval
+                return None
+
+            self.stats["leased"] += len(rows)
+            self._lease_id = lease_id
+            self._lease_started = now
+            self._lease_full = len(rows) >= requested
+            self._buffer.extend(rows)
+            self.stats["handed_out"] += 1
+            return self._buffer.popleft()
+
+    def abandon(self):
+        """Forget buffered batches (processor stopped); their leases expire."""
+        with self._lock:
+            self.stats["dropped"] += len(self._buffer)
+            self._buffer.clear()
+            self._lease_id = None
@@ -0,0 +1,137 @@
+"""
+Snowflake connection properties and connect() shared by LeaseRegulatoryBatches
+and AcknowledgeRegulatoryBatches.
+"""
+
+from nifiapi.properties import PropertyDescriptor, StandardValidators, ExpressionLanguageScope
+import os
+
+SESSION_TOKEN_PATH = '/snowflake/session/token'
+
+AUTHENTICATION_STRATEGY = PropertyDescriptor(
+    name="Authentication Strategy",
+    description="SNOWFLAKE_SESSION_TOKEN uses the OpenFlow SPCS runtime's session token; KEY_PAIR uses 'User' and 'Private Key'",
+    required=True,
+    allowable_values=["SNOWFLAKE_SESSION_TOKEN", "KEY_PAIR"],
+    default_value="SNOWFLAKE_SESSION_TOKEN",
+    validators=[StandardValidators.NON_EMPTY_VALIDATOR]
+)
+
+ACCOUNT = PropertyDescriptor(
+    name="Account",
+    description="Snowflake account identifier. Optional with SNOWFLAKE_SESSION_TOKEN (taken from the runtime environment).",
+    required=False,
+    expression_language_scope=ExpressionLanguageScope.ENVIRONMENT
+)
+
+USER = PropertyDescriptor(
+    name="User",
+    description="Snowflake user for KEY_PAIR authentication",
+    required=False,
+    expression_language_scope=ExpressionLanguageScope.ENVIRONMENT
+)
+
+PRIVATE_KEY = PropertyDescriptor(
+    name="Private Key",
+    description="PEM private key for KEY_PAIR authentication",
+    required=False,
+    sensitive=True
+)
+
+PRIVATE_KEY_PASSWORD = PropertyDescriptor(
+    name="Private Key Password",
+    description="Password for an encrypted 'Private Key'. Leave empty if the key is not encrypted.",
+    required=False,
+    sensitive=True
+)
+
+ROLE = PropertyDescriptor(
+    name="Role",
+    description="Snowflake role",
+    required=False,
+    expression_language_scope=ExpressionLanguageScope.ENVIRONMENT
+)
+
+WAREHOUSE = PropertyDescriptor(
+    name="Warehouse",
+    description="Snowflake warehouse",
+    required=False,
+    expression_language_scope=ExpressionLanguageScope.ENVIRONMENT
+)
+
+CONNECTION_PROPERTIES = [
+    AUTHENTICATION_STRATEGY,
+    ACCOUNT,
+    USER,
+    PRIVATE_KEY,
+    PRIVATE_KEY_PASSWORD,
+    ROLE,
+    WAREHOUSE
+]
+
+
+def connection_settings(context):
+    """
+    Read the connection properties once, at schedule time.
+
+    Raises:
+        ValueError: If KEY_PAIR is selected without account, user and key
+    """
+    settings = {
+        "strategy": context.getProperty(AUTHENTICATION_STRATEGY).getValue(),
+        "account": context.getProperty(ACCOUNT).evaluateAttributeExpressions().getValue(),
+        "user": context.getProperty(USER).evaluateAttributeExpressions().getValue(),
+        "role": context.getProperty(ROLE).evaluateAttributeExpressions().getValue(),
+        "warehouse": context.getProperty(WAREHOUSE).evaluateAttributeExpressions().getValue(),
+        "private_key": context.getProperty(PRIVATE_KEY).getValue(),
+        "private_key_password": context.getProperty(PRIVATE_KEY_PASSWORD).getValue()
+    }
+    if settings["strategy"] == "KEY_PAIR" and not (settings["account"] and settings["user"] and settings["private_key"]):
+        raise ValueError("KEY_PAIR authentication requires 'Account', 'User' and 'Private Key'")
+    return settings
+
+
+def connect(settings):
+    """
+    Open a Snowflake connection.
+
+    Args:
+        settings: Connection settings from connection_settings
+
+    Returns:
+        snowflake.connector connection
+    """
+    import snowflake.connector
+
+    options = {
+        "role": settings["role"],
+        "warehouse": settings["warehouse"],
+        "client_session_keep_alive": True
+    }
+
+    if settings["strategy"] == "SNOWFLAKE_SESSION_TOKEN":
+        # Re-read on every connect: SPCS rotates the token file
+        with open(SESSION_TOKEN_PATH) as f:
+            token = f.read().strip()
+        options.update(
+            host=os.getenv("SNOWFLAKE_HOST"),
+            account=settings["account"] or os.getenv("SNOWFLAKE_ACCOUNT"),
+            authenticator="oauth",
+            token=token
+        )
+    else:
+        from cryptography.hazmat.primitives import serialization
+
+        password = settings["private_key_password"].encode('utf-8') if settings["private_key_password"] else None
+        key = serialization.load_pem_private_key(settings["private_key"].encode('utf-8'), password=password)
+        options.update(
+            account=settings["account"],
+            user=settings["user"],
+            private_key=key.private_bytes(
+                encoding=serialization.Encoding.DER,
+                format=serialization.PrivateFormat.PKCS8,
+                encryption_algorithm=serialization.NoEncryption()
+            )
+        )
+
+    return snowflake.connector.connect(**{k: v for k, v in options.items() if v is not None})
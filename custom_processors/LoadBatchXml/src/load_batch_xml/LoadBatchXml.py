@@ -0,0 +1,188 @@
+from nifiapi.flowfiletransform import FlowFileTransform, FlowFileTransformResult
+from nifiapi.properties import PropertyDescriptor, StandardValidators, ExpressionLanguageScope, ProcessContext, TimeUnit
+from nifiapi.relationship import Relationship
+from typing import List
+from urllib.parse import unquote, urlparse
+from urllib.request import urlopen
+import gzip
+import hashlib
+
+
+class LoadBatchXml(FlowFileTransform):
+    """
+    Loads lote XML that was offloaded from REGULATORY_BATCHES to a gzip file
+    (see sql/12_xml_offload.sql) and writes it to the FlowFile content.
+
+    The file is read from a presigned https URL (stage files) or a file://
+    URL (local testing), decompressed in chunks and checked against the
+    expected size and SHA-256 recorded in REGULATORY_BATCHES.
+
+    When the URL evaluates to empty the batch still carries GENERATED_XML
+    inline; the FlowFile passes through to success unchanged, so the flow
+    works whether or not the offload is enabled.
+    """
+
+    class Java:
+        implements = ['org.apache.nifi.python.processor.FlowFileTransform']
+
+    class ProcessorDetails:
+        version = '0.0.3'
+        description = 'Streams gzip-compressed lote XML from a stage presigned URL or local file, verifying size and SHA-256'
+        tags = ['xml', 'gzip', 'stage', 'snowflake', 'regulatory', 'dgoj', 'spain']
+        dependencies = []
+
+    def __init__(self, *args, **kwargs):
+        super().__init__()
+
+        self.xml_url = PropertyDescriptor(
+            name="XML URL",
+            description="Presigned https URL or file:// URL of the gzip-compressed XML. When empty, the FlowFile content is assumed to already hold the XML and is passed through.",
+            required=False,
+            default_value="${meta.xmlUrl}",
+            expression_language_scope=ExpressionLanguageScope.FLOWFILE_ATTRIBUTES
+        )
+
+        self.expected_sha256 = PropertyDescriptor(
+            name="Expected SHA-256",
+            description="Hex SHA-256 of the uncompressed XML (REGULATORY_BATCHES.XML_SHA256). Leave empty to skip the check.",
+            required=False,
+            default_value="${meta.xmlSha256}",
+            expression_language_scope=ExpressionLanguageScope.FLOWFILE_ATTRIBUTES
+        )
+
+        self.expected_size = PropertyDescriptor(
+            name="Expected Size",
+            description="Uncompressed XML size in bytes (REGULATORY_BATCHES.XML_BYTES). Leave empty to skip the check.",
+            required=False,
+            default_value="${meta.xmlBytes}",
+            expression_language_scope=ExpressionLanguageScope.FLOWFILE_ATTRIBUTES
+        )
+
+        self.chunk_size = PropertyDescriptor(
+            name="Read Chunk Size",
+            description="Number of decompressed bytes read per chunk",
+            required=True,
+            default_value="1048576",
+            validators=[StandardValidators.POSITIVE_INTEGER_VALIDATOR]
+        )
+
+        self.timeout = PropertyDescriptor(
+            name="Timeout",
+            description="Connection and read timeout for https URLs",
+            required=True,
+            default_value="60 sec",
+            validators=[StandardValidators.TIME_PERIOD_VALIDATOR]
+        )
+
+        self.descriptors = [
+            self.xml_url,
+            self.expected_sha256,
+            self.expected_size,
+            self.chunk_size,
+            self.timeout
+        ]
+
+    def getPropertyDescriptors(self) -> List[PropertyDescriptor]:
+        return self.descriptors
+
+    def transform(self, context: ProcessContext, flowfile) -> FlowFileTransformResult:
+        """
+        Replace the FlowFile content with the offloaded XML, or pass it through.
+
+        Args:
+            context: ProcessContext providing access to properties and state
+            flowfile: InputFlowFile carrying the batch metadata attributes
+
+        Returns:
+            FlowFileTransformResult with the XML content
+        """
+        try:
+            url = context.getProperty(self.xml_url).evaluateAttributeExpressions(flowfile).getValue()
+            if url is None or url.strip() == '':
+                return FlowFileTransformResult(
+                    relationship="success",
+                    attributes={"batch.xml.source": "inline"}
+                )
+
+            expected_sha256 = context.getProperty(self.expected_sha256).evaluateAttributeExpressions(flowfile).getValue()
+            expected_size = context.getProperty(self.expected_size).evaluateAttributeExpressions(flowfile).getValue()
+            chunk_size = context.getProperty(self.chunk_size).asInteger()
+            timeout = context.getProperty(self.timeout).asTimePeriod(TimeUnit.SECONDS)
+
+            expected_size = int(expected_size) if expected_size and expected_size.strip() else None
+            expected_sha256 = expected_sha256.strip().lower() if expected_sha256 and expected_sha256.strip() else None
+
+            xml_content = self._read_xml(url.strip(), chunk_size, timeout, expected_size, expected_sha256)
+
+            self.logger.info("Loaded {} bytes of offloaded XML".format(len(xml_content)))
+
+            return FlowFileTransformResult(
+                relationship="success",
+                contents=xml_content,
+                attributes={
+                    "batch.xml.source": "offloaded",
+                    "batch.xml.bytes": str(len(xml_content)),
+                    "mime.type": "application/xml"
+                }
+            )
+
+        except Exception as e:
+            self.logger.error("Failed to load offloaded XML: {}".format(str(e)))
+            return FlowFileTransformResult(
+                relationship="failure",
+                attributes={"error.message": str(e)}
+            )
+
+    def _read_xml(self, url, chunk_size, timeout, expected_size, expected_sha256):
+        """
+        Stream and decompress the file, hashing each chunk as it arrives.
+
+        Args:
+            url: https (presigned stage URL) or file:// URL
+            chunk_size: Decompressed bytes per read
+            timeout: Timeout in seconds for https URLs
+            expected_size: Uncompressed size in bytes, or None
+            expected_sha256: Hex SHA-256 of the uncompressed XML, or None
+
+        Returns:
+            Uncompressed XML as bytes
+
+        Raises:
+            ValueError: If the size or SHA-256 does not match
+        """
+        parsed = urlparse(url)
+        if parsed.scheme in ('http', 'https'):
+            raw = urlopen(url, timeout=timeout)
+        elif parsed.scheme == 'file':
+            raw = open(unquote(parsed.path), 'rb')
+        else:
+            raise ValueError("Unsupported XML URL scheme: '{}'".format(parsed.scheme))
+
+        digest = hashlib.sha256()
+        # Sized up front when the expected size is known, so the buffer is not regrown
+        content = bytearray(expected_size) if expected_size else bytearray()
+        size = 0
+        with raw, gzip.GzipFile(fileobj=raw, mode='rb') as stream:
+            while True:
+                chunk = stream.read(chunk_size)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                end = size + len(chunk)
+                if expected_size is not None and end > expected_size:
+                    raise ValueError("XML size mismatch: more than the expected {} bytes".format(expected_size))
+                content[size:end] = chunk
+                size = end
+
+        if expected_size is not None and size != expected_size:
+            raise ValueError("XML size mismatch: expected {} bytes, read {}".format(expected_size, size))
+        if expected_sha256 is not None and digest.hexdigest() != expected_sha256:
+            raise ValueError("XML SHA-256 mismatch: expected {}, got {}".format(expected_sha256, digest.hexdigest()))
+
+        return bytes(content)
+
+    def getRelationships(self) -> List[Relationship]:
+        return [
+            Relationship(name="success", description="FlowFiles whose content is the lote XML (loaded from the file, or passed through when inline)"),
+            Relationship(name="failure", description="FlowFiles whose XML could not be read or failed the size/SHA-256 check")
+        ]
@@ -0,0 +1 @@
+# Empty init file to make this a Python package
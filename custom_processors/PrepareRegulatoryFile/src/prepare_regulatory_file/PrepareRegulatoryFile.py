@@ -1,11 +1,16 @@
 from nifiapi.flowfiletransform import FlowFileTransform, FlowFileTransformResult
-from nifiapi.properties import PropertyDescriptor, StandardValidators, ExpressionLanguageScope, ProcessContext
+from nifiapi.properties import PropertyDescriptor, StandardValidators, ExpressionLanguageScope, ProcessContext, TimeUnit, DataUnit
 from nifiapi.relationship import Relationship
 from typing import List
 import io
+import mmap
+import os
 import re
 import textwrap
 
+from lote_bundle import BundleFailed, LoteBundler
+from memory_budget import DEFAULT_EXPANSION_FACTOR, MemoryBudget, Oversize
+
 
 class PrepareRegulatoryFile(FlowFileTransform):
     """
@@ -24,6 +29,33 @@ class PrepareRegulatoryFile(FlowFileTransform):
       PEM content from AWS Secrets Manager via External Parameter Provider.
 
     For each credential type, provide exactly one of the two options.
+
+    With 'Maximum Bundle Entries' above 1, signed lotes with the same
+    'Bundle Key' (operator, warehouse and date) are collected into one
+    encrypted archive with one entry per lote (see lote_bundle.py). No task
+    waits for the bundle to fill: the FlowFile whose lote makes its bundle
+    due carries the archive to success, and the others go to waiting with
+    their content unchanged. Waiting FlowFiles loop back to this processor
+    and go to bundled once their archive is emitted, or to failure if it
+    could not be built. Empty FlowFiles without a batch ID are ticks: each
+    carries out one bundle whose 'Maximum Bundle Wait' is over, or goes to
+    idle. The archive FlowFile gets the filename, path and meta.* attributes
+    of the bundle's first lote, and dgoj.bundle.batch.ids lists every batch
+    in it for the acknowledgment.
+
+    Each FlowFile reserves 'Memory Expansion Factor' times its size from
+    'Memory Budget' before it is signed (see memory_budget.py). FlowFiles
+    that do not fit within 'Maximum Admission Wait' go to deferred and the
+    processor yields while the budget drains, and FlowFiles whose estimate
+    exceeds the whole budget go to oversize, so concurrent large lotes
+    cannot run the Python worker out of memory. Both relationships must be
+    connected; deferred loops back to this processor.
+
+    With 'Input File' set, the lote is memory-mapped from that local path
+    instead of being read from the FlowFile content; with 'Output Directory'
+    set, the archive is written there instead of to the FlowFile content.
+    Together, multi-megabyte payloads never cross the Java-to-Python bridge
+    and the FlowFile only carries the references.
     """
 
     class Java:
@@ -113,6 +145,104 @@ class PrepareRegulatoryFile(FlowFileTransform):
             expression_language_scope=ExpressionLanguageScope.FLOWFILE_ATTRIBUTES
         )
 
+        self.max_bundle_entries = PropertyDescriptor(
+            name="Maximum Bundle Entries",
+            description="Most lotes in one archive. 1 writes every lote to its own archive.",
+            required=True,
+            default_value="1",
+            validators=[StandardValidators.POSITIVE_INTEGER_VALIDATOR]
+        )
+
+        self.max_bundle_size = PropertyDescriptor(
+            name="Maximum Bundle Size",
+            description="Most signed XML in one archive, before compression. A lote that would go over it starts the next archive; a larger lote goes out alone.",
+            required=True,
+            default_value="10 MB",
+            validators=[StandardValidators.DATA_SIZE_VALIDATOR]
+        )
+
+        self.max_bundle_wait = PropertyDescriptor(
+            name="Maximum Bundle Wait",
+            description="Longest an archive collects lotes; the next tick FlowFile after that carries it out with the lotes it has. Schedule the tick well inside it.",
+            required=True,
+            default_value="5 sec",
+            validators=[StandardValidators.TIME_PERIOD_VALIDATOR]
+        )
+
+        self.bundle_key = PropertyDescriptor(
+            name="Bundle Key",
+            description="Only lotes with the same key share an archive. The default keys by operator, warehouse and batch date.",
+            required=True,
+            default_value="${meta.operatorId}_${meta.warehouseId}_${meta.batchTimestamp:substring(0, 10)}",
+            validators=[StandardValidators.NON_EMPTY_VALIDATOR],
+            expression_language_scope=ExpressionLanguageScope.FLOWFILE_ATTRIBUTES
+        )
+
+        self.bundle_batch_id = PropertyDescriptor(
+            name="Batch ID",
+            description="Batch of the lote, listed in dgoj.bundle.batch.ids of its archive",
+            required=True,
+            default_value="${meta.batchId}",
+            validators=[StandardValidators.NON_EMPTY_VALIDATOR],
+            expression_language_scope=ExpressionLanguageScope.FLOWFILE_ATTRIBUTES
+        )
+
+        self.bundle_entry_filename = PropertyDescriptor(
+            name="Bundle Entry Filename",
+            description="Filename of the lote inside a bundled archive; must differ between lotes of one archive. 'XML Filename' is used when lotes are not bundled.",
+            required=True,
+            default_value="${meta.batchId}.xml",
+            validators=[StandardValidators.NON_EMPTY_VALIDATOR],
+            expression_language_scope=ExpressionLanguageScope.FLOWFILE_ATTRIBUTES
+        )
+
+        self.memory_budget = PropertyDescriptor(
+            name="Memory Budget",
+            description="Memory shared by the concurrent tasks for signing and encrypting; each FlowFile reserves its estimate before it starts",
+            required=True,
+            default_value="1 GB",
+            validators=[StandardValidators.DATA_SIZE_VALIDATOR]
+        )
+
+        self.memory_expansion = PropertyDescriptor(
+            name="Memory Expansion Factor",
+            description="Memory needed per byte of FlowFile content while signing and encrypting (DOM, canonicalized and serialized copies, ZIP buffer)",
+            required=True,
+            default_value=str(DEFAULT_EXPANSION_FACTOR),
+            validators=[StandardValidators.NUMBER_VALIDATOR]
+        )
+
+        self.max_admission_wait = PropertyDescriptor(
+            name="Maximum Admission Wait",
+            description="Longest a FlowFile waits for room in the memory budget before it is routed to deferred",
+            required=True,
+            default_value="5 sec",
+            validators=[StandardValidators.TIME_PERIOD_VALIDATOR]
+        )
+
+        self.input_file = PropertyDescriptor(
+            name="Input File",
+            description="Local path of the lote XML, e.g. on a staging directory or shared volume. The file is memory-mapped for parsing and the FlowFile content is ignored. When empty, the XML is read from the FlowFile content.",
+            required=False,
+            expression_language_scope=ExpressionLanguageScope.FLOWFILE_ATTRIBUTES
+        )
+
+        self.output_directory = PropertyDescriptor(
+            name="Output Directory",
+            description="Local directory the archive is written to; the FlowFile content is left as it is and dgoj.output.path names the archive. When empty, the archive becomes the FlowFile content.",
+            required=False,
+            expression_language_scope=ExpressionLanguageScope.FLOWFILE_ATTRIBUTES
+        )
+
+        self.output_filename = PropertyDescriptor(
+            name="Output Filename",
+            description="Filename of the archive in 'Output Directory'",
+            required=True,
+            default_value="${filename}",
+            validators=[StandardValidators.NON_EMPTY_VALIDATOR],
+            expression_language_scope=ExpressionLanguageScope.FLOWFILE_ATTRIBUTES
+        )
+
         self.descriptors = [
             self.certificate_path,
             self.certificate_pem,
@@ -121,12 +251,64 @@ class PrepareRegulatoryFile(FlowFileTransform):
             self.private_key_password,
             self.zip_password,
             self.signature_method,
-            self.xml_filename
+            self.xml_filename,
+            self.max_bundle_entries,
+            self.max_bundle_size,
+            self.max_bundle_wait,
+            self.bundle_key,
+            self.bundle_batch_id,
+            self.bundle_entry_filename,
+            self.memory_budget,
+            self.memory_expansion,
+            self.max_admission_wait,
+            self.input_file,
+            self.output_directory,
+            self.output_filename
         ]
 
+        self.bundler = None
+        self.budget = None
+        self.held = []
+
     def getPropertyDescriptors(self) -> List[PropertyDescriptor]:
         return self.descriptors
 
+    def onScheduled(self, context: ProcessContext):
+        self.budget = MemoryBudget(
+            limit=context.getProperty(self.memory_budget).asDataSize(DataUnit.B),
+            expansion=context.getProperty(self.memory_expansion).asFloat(),
+            max_wait=context.getProperty(self.max_admission_wait).asTimePeriod(TimeUnit.MILLISECONDS) / 1000
+        )
+
+        max_entries = context.getProperty(self.max_bundle_entries).asInteger()
+        self.bundler = None if max_entries <= 1 else LoteBundler(
+            max_entries=max_entries,
+            max_bytes=context.getProperty(self.max_bundle_size).asDataSize(DataUnit.B),
+            max_wait=context.getProperty(self.max_bundle_wait).asTimePeriod(TimeUnit.MILLISECONDS) / 1000,
+            held=self.held
+        )
+        if self.held and self.bundler is None:
+            self.logger.warn("Bundling is off; {} bundle(s) from the last run are dropped and their waiting lotes are prepared again one by one: {}".format(
+                len(self.held), self._describe(self.held)))
+        self.held = []
+
+    def onStopped(self, context: ProcessContext):
+        if self.bundler is not None:
+            # Bundles not yet carried out would be lost with the bundler; build them now and
+            # hand them to the next bundler (archives in 'Output Directory' are written here)
+            self.held = self.bundler.flush()
+            due = [bundle for bundle in self.held if not bundle.taken]
+            for bundle in due:
+                self._build_bundle(bundle)
+            if due:
+                self.logger.info("Stopped; flushed {} archive(s), which go out with the first ticks after the next start: {}".format(
+                    len(due), self._describe(due)))
+            self.logger.info("Stopped; bundle stats: {}".format(dict(self.bundler.stats)))
+            self.bundler = None
+        if self.budget is not None:
+            self.logger.info("Stopped; memory budget stats: {}".format(self.budget.snapshot()))
+            self.budget = None
+
     def transform(self, context: ProcessContext, flowfile) -> FlowFileTransformResult:
         """
         Transform the XML flowfile by signing, compressing, and encrypting it.
@@ -135,12 +317,65 @@ class PrepareRegulatoryFile(FlowFileTransform):
             context: ProcessContext providing access to properties and state
             flowfile: InputFlowFile containing the XML content
 
+        Returns:
+            FlowFileTransformResult with the encrypted ZIP content
+        """
+        # Ticks and returning bundle members are not signed, so they skip the memory budget
+        if flowfile.getSize() == 0 and not self._batch_id(context, flowfile):
+            return self._tick(context)
+        if self.bundler is not None and flowfile.getAttribute("dgoj.bundle.id"):
+            result = self._release(context, flowfile)
+            if result is not None:
+                return result
+
+        if self.budget is None:
+            return self._prepare(context, flowfile)
+
+        try:
+            input_path = self._input_path(context, flowfile)
+            size = os.path.getsize(input_path) if input_path else flowfile.getSize()
+        except OSError as e:
+            self.logger.error("Failed to read input file: {}".format(str(e)))
+            return FlowFileTransformResult(relationship="failure", attributes={"error.message": str(e)})
+
+        attributes = {
+            "dgoj.memory.estimate": str(self.budget.estimate(size)),
+            "dgoj.memory.budget": str(self.budget.limit)
+        }
+        try:
+            reservation = self.budget.admit(size)
+        except Oversize as e:
+            self.logger.warn(str(e))
+            attributes["error.message"] = str(e)
+            return FlowFileTransformResult(relationship="oversize", attributes=attributes)
+
+        if reservation is None:
+            usage = self.budget.snapshot()
+            self.logger.warn("Deferred a {} byte FlowFile; memory budget in use {} of {} bytes, {} waiting".format(
+                size, usage["in_use"], usage["limit"], usage["waiting"]))
+            attributes["dgoj.memory.in.use"] = str(usage["in_use"])
+            # Stop scheduling new lotes for the yield duration so the ones in
+            # flight can free their reservations before this one comes back
+            context.yield_resources()
+            return FlowFileTransformResult(relationship="deferred", attributes=attributes)
+
+        with reservation:
+            result = self._prepare(context, flowfile)
+        attributes.update({
+            "dgoj.memory.in.use": str(reservation.in_use),
+            "dgoj.memory.wait.millis": str(round(reservation.waited * 1000))
+        })
+        result.attributes.update(attributes)
+        return result
+
+    def _prepare(self, context, flowfile):
+        """
+        Sign, compress and encrypt the XML flowfile.
+
         Returns:
             FlowFileTransformResult with the encrypted ZIP content
         """
         try:
-            # Read XML content
-            xml_content = flowfile.getContentsAsBytes()
 
             # Get certificate properties (path mode vs PEM mode)
             cert_path = context.getProperty(self.certificate_path).evaluateAttributeExpressions(flowfile).getValue()
@@ -181,14 +416,6 @@ class PrepareRegulatoryFile(FlowFileTransform):
 
             self.logger.info("Certificate source: {}, Private key source: {}".format(cert_source[0], key_source[0]))
 
-            # Step 1: Sign XML with XAdES-BES
-            self.logger.info("Signing XML with XAdES-BES signature method: {}".format(signature_method))
-            signed_xml = self._sign_xml(xml_content, cert_source, key_source, key_password, signature_method)
-
-            # Step 2: Create ZIP with AES-256 encryption
-            self.logger.info("Creating encrypted ZIP with AES-256")
-            zip_content = self._create_encrypted_zip(signed_xml, xml_filename, zip_password)
-
             # Update attributes
             attributes = {
                 "mime.type": "application/zip",
@@ -197,12 +424,41 @@ class PrepareRegulatoryFile(FlowFileTransform):
                 "dgoj.signature.method": signature_method
             }
 
+            input_path = self._input_path(context, flowfile)
+            output_path = self._output_path(context, flowfile)
+
+            # Step 1: Sign XML with XAdES-BES
+            self.logger.info("Signing XML with XAdES-BES signature method: {}".format(signature_method))
+            if input_path:
+                attributes["dgoj.input.path"] = input_path
+                signed_xml = self._sign_xml_file(input_path, cert_source, key_source, key_password, signature_method)
+            else:
+                signed_xml = self._sign_xml(flowfile.getContentsAsBytes(), cert_source, key_source, key_password, signature_method)
+
+            if self.bundler is not None:
+                return self._bundle(context, flowfile, signed_xml, zip_password, output_path, attributes)
+
+            # Step 2: Create ZIP with AES-256 encryption
+            self.logger.info("Creating encrypted ZIP with AES-256")
+            if output_path:
+                attributes.update(self._write_encrypted_zip([(xml_filename, signed_xml)], zip_password, output_path))
+                return FlowFileTransformResult(relationship="success", attributes=attributes)
+
+            zip_content = self._create_encrypted_zip([(xml_filename, signed_xml)], zip_password)
+
             return FlowFileTransformResult(
                 relationship="success",
                 contents=zip_content,
                 attributes=attributes
             )
 
+        except BundleFailed as e:
+            self.logger.error(str(e))
+            return FlowFileTransformResult(
+                relationship="failure",
+                attributes={"error.message": str(e)}
+            )
+
         except Exception as e:
             self.logger.error("Failed to prepare regulatory file: {}".format(str(e)))
             return FlowFileTransformResult(
@@ -210,12 +466,153 @@ class PrepareRegulatoryFile(FlowFileTransform):
                 attributes={"error.message": str(e)}
             )
 
+    def _input_path(self, context, flowfile):
+        path = context.getProperty(self.input_file).evaluateAttributeExpressions(flowfile).getValue()
+        return path.strip() if path and path.strip() else None
+
+    def _output_path(self, context, flowfile):
+        directory = context.getProperty(self.output_directory).evaluateAttributeExpressions(flowfile).getValue()
+        if not directory or not directory.strip():
+            return None
+        filename = context.getProperty(self.output_filename).evaluateAttributeExpressions(flowfile).getValue()
+        if not filename or os.path.basename(filename) != filename:
+            raise ValueError("Invalid output filename: '{}'".format(filename))
+        return os.path.join(directory.strip(), filename)
+
+    def _batch_id(self, context, flowfile):
+        batch_id = context.getProperty(self.bundle_batch_id).evaluateAttributeExpressions(flowfile).getValue()
+        return batch_id.strip() if batch_id else ""
+
+    def _bundle(self, context, flowfile, signed_xml, zip_password, output_path, attributes):
+        """
+        Add a signed lote to its key's bundle and carry the archive if the lote made the bundle due.
+
+        Returns:
+            FlowFileTransformResult: the archive to success, or the unchanged
+            FlowFile to waiting while its lote waits in its bundle
+        """
+        key = context.getProperty(self.bundle_key).evaluateAttributeExpressions(flowfile).getValue()
+        entry_name = context.getProperty(self.bundle_entry_filename).evaluateAttributeExpressions(flowfile).getValue()
+
+        joined = self.bundler.add(key, self._batch_id(context, flowfile), entry_name, signed_xml,
+                                  (zip_password, output_path), self._lote_attributes(flowfile))
+        if not self.bundler.claim(joined, entry_name):
+            return FlowFileTransformResult(relationship="waiting", attributes={"dgoj.bundle.id": joined.id})
+        return self._carry(joined, attributes)
+
+    def _tick(self, context):
+        """
+        Carry out the next due bundle of any key, so 'Maximum Bundle Wait' holds when no lotes arrive.
+
+        Returns:
+            FlowFileTransformResult: the archive to success, or the tick to idle
+        """
+        bundle = self.bundler.take() if self.bundler is not None else None
+        if bundle is None:
+            return FlowFileTransformResult(relationship="idle")
+        return self._carry(bundle, {
+            "mime.type": "application/zip",
+            "dgoj.signed": "true",
+            "dgoj.encrypted": "true",
+            "dgoj.signature.method": context.getProperty(self.signature_method).getValue()
+        })
+
+    def _release(self, context, flowfile):
+        """
+        Route a member FlowFile that came back from waiting by the outcome of its bundle's archive.
+
+        Returns:
+            FlowFileTransformResult to bundled, failure or back to waiting, or
+            None if its bundle is unknown (e.g. after a worker restart) and
+            the lote must be prepared again
+        """
+        entry_name = context.getProperty(self.bundle_entry_filename).evaluateAttributeExpressions(flowfile).getValue()
+        bundle = self.bundler.release(flowfile.getAttribute("dgoj.bundle.id"), entry_name)
+        if bundle is None:
+            self.logger.warn("Bundle {} of {} is no longer held; preparing the lote again".format(
+                flowfile.getAttribute("dgoj.bundle.id"), entry_name))
+            return None
+
+        attributes = {"dgoj.bundle.id": bundle.id}
+        if not bundle.emitted:
+            return FlowFileTransformResult(relationship="waiting", attributes=attributes)
+
+        attributes.update({
+            "dgoj.bundle.count": str(len(bundle.entries)),
+            "dgoj.bundle.batch.ids": ",".join(bundle.batch_ids)
+        })
+        if bundle.error is not None:
+            attributes["error.message"] = bundle.error
+            return FlowFileTransformResult(relationship="failure", attributes=attributes)
+        return FlowFileTransformResult(relationship="bundled", attributes=attributes)
+
+    def _carry(self, bundle, attributes):
+        """
+        Build a bundle's archive and return it to success, or to failure if it cannot be built.
+
+        Returns:
+            FlowFileTransformResult carrying the archive or its reference attributes
+        """
+        self._build_bundle(bundle)
+        # The carrier may be a later lote or a tick; the archive is described by its first lote
+        attributes.update(bundle.attributes)
+        attributes.update({
+            "dgoj.bundle.id": bundle.id,
+            "dgoj.bundle.count": str(len(bundle.entries)),
+            "dgoj.bundle.batch.ids": ",".join(bundle.batch_ids),
+            "dgoj.bundle.entries": ",".join(bundle.entry_names),
+            "dgoj.bundle.wait.millis": str(round(bundle.waited * 1000))
+        })
+        if bundle.error is not None:
+            # Its members go to failure as they come back from waiting
+            self.logger.error(bundle.error)
+            attributes["error.message"] = bundle.error
+            return FlowFileTransformResult(relationship="failure", attributes=attributes)
+
+        self.logger.info("Created encrypted ZIP {} with {} lotes ({:.0f} ms open)".format(
+            bundle.id, len(bundle.entries), bundle.waited * 1000))
+        if bundle.target[1]:
+            # The archive was written to 'Output Directory'; bundle.archive holds its reference attributes
+            attributes.update(bundle.archive)
+            return FlowFileTransformResult(relationship="success", attributes=attributes)
+        return FlowFileTransformResult(relationship="success", contents=bundle.archive, attributes=attributes)
+
+    def _build_bundle(self, bundle):
+        """Build a bundle's archive with its first lote's password and output path."""
+        zip_password, output_path = bundle.target
+        self.logger.info("Creating encrypted ZIP with AES-256 for bundle {} of {} lotes".format(bundle.id, len(bundle.entries)))
+        if output_path:
+            self.bundler.build(bundle, lambda entries: self._write_encrypted_zip(entries, zip_password, output_path))
+        else:
+            self.bundler.build(bundle, lambda entries: self._create_encrypted_zip(entries, zip_password))
+
+    def _lote_attributes(self, flowfile):
+        """Attributes of a lote that name and route its archive: filename, path and meta.*"""
+        return {name: value for name, value in flowfile.getAttributes().items()
+                if name in ("filename", "path") or name.startswith("meta.")}
+
+    def _describe(self, bundles):
+        return "; ".join("{} ({})".format(b.id, ",".join(b.batch_ids)) for b in bundles)
+
+    def _sign_xml_file(self, path, cert_source, key_source, key_password, method):
+        """
+        Sign the XML in a local file, parsing it straight from a read-only memory map.
+
+        Returns:
+            Signed XML as bytes
+        """
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                raise ValueError("Input file is empty: {}".format(path))
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                return self._sign_xml(mapped, cert_source, key_source, key_password, method)
+
     def _sign_xml(self, xml_content, cert_source, key_source, key_password, method):
         """
         Sign XML content using XAdES-BES signature.
 
         Args:
-            xml_content: XML content as bytes
+            xml_content: XML content as bytes (or a buffer such as a memory map)
             cert_source: Tuple of (source_type, value) where source_type is 'path' or 'pem'
             key_source: Tuple of (source_type, value) where source_type is 'path' or 'pem'
             key_password: Password for private key (or None)
@@ -280,25 +677,30 @@ class PrepareRegulatoryFile(FlowFileTransform):
         # Serialize back to bytes
         return etree.tostring(signed_root, xml_declaration=True, encoding='UTF-8')
 
-    def _create_encrypted_zip(self, xml_content, xml_filename, password):
+    def _create_encrypted_zip(self, entries, password):
         """
         Create a password-protected ZIP file with AES-256 encryption.
 
         Args:
-            xml_content: Signed XML content as bytes
-            xml_filename: Filename for the XML inside the ZIP
+            entries: List of (filename, signed XML bytes), one ZIP entry each
             password: Password for AES-256 encryption
 
         Returns:
             ZIP file content as bytes
         """
-        import pyzipper
-
         # Create in-memory ZIP file
         zip_buffer = io.BytesIO()
+        self._write_zip(zip_buffer, entries, password)
+
+        # Return ZIP content
+        return zip_buffer.getvalue()
+
+    def _write_zip(self, target, entries, password):
+        """Write the AES-256 encrypted ZIP to target, a path or a binary file object."""
+        import pyzipper
 
         with pyzipper.AESZipFile(
-            zip_buffer,
+            target,
             'w',
             compression=pyzipper.ZIP_DEFLATED,
             encryption=pyzipper.WZ_AES
@@ -306,11 +708,41 @@ class PrepareRegulatoryFile(FlowFileTransform):
             # Set password
             zf.setpassword(password.encode('utf-8'))
 
-            # Add XML file to ZIP
-            zf.writestr(xml_filename, xml_content)
+            # Add XML files to ZIP
+            for xml_filename, xml_content in entries:
+                zf.writestr(xml_filename, xml_content)
 
-        # Return ZIP content
-        return zip_buffer.getvalue()
+    def _write_encrypted_zip(self, entries, password, output_path):
+        """
+        Write a password-protected ZIP file with AES-256 encryption to a local file.
+
+        The archive is written under a temporary name and renamed into place,
+        so a partial archive is never visible at output_path.
+
+        Args:
+            entries: List of (filename, signed XML bytes), one ZIP entry each
+            password: Password for AES-256 encryption
+            output_path: Local path of the archive
+
+        Returns:
+            Reference attributes: dgoj.output.path and dgoj.output.bytes
+        """
+        directory, filename = os.path.split(output_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = os.path.join(directory, ".{}.part".format(filename))
+        try:
+            self._write_zip(temp_path, entries, password)
+            os.replace(temp_path, output_path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+        return {
+            "dgoj.output.path": output_path,
+            "dgoj.output.bytes": str(os.path.getsize(output_path))
+        }
 
     def _normalize_pem(self, pem_string: str) -> bytes:
         """
@@ -387,6 +819,11 @@ class PrepareRegulatoryFile(FlowFileTransform):
 
     def getRelationships(self) -> List[Relationship]:
         return [
-            Relationship(name="success", description="FlowFiles that are successfully signed, compressed, and encrypted"),
-            Relationship(name="failure", description="FlowFiles that failed processing")
+            Relationship(name="success", description="FlowFiles that are successfully signed, compressed, and encrypted; with bundling, one archive per bundle"),
+            Relationship(name="failure", description="FlowFiles that failed processing"),
+            Relationship(name="deferred", description="FlowFiles that found no room in the memory budget within 'Maximum Admission Wait'. Must be connected back to this processor (or marked for retry) so they wait for capacity; the processor yields when it defers one"),
+            Relationship(name="oversize", description="FlowFiles whose estimated memory exceeds the whole 'Memory Budget'. Must be connected, e.g. to the same alerting as failure"),
+            Relationship(name="waiting", description="Unchanged lotes held in a bundle whose archive is not out yet, with dgoj.bundle.id. Must be connected back to this processor (or marked for retry); they go to bundled or failure once the archive is emitted"),
+            Relationship(name="bundled", description="Lotes written into another FlowFile's archive, released once that archive went to success, with dgoj.bundle.id and dgoj.bundle.batch.ids", auto_terminated=True),
+            Relationship(name="idle", description="Tick FlowFiles that found no bundle due", auto_terminated=True)
         ]
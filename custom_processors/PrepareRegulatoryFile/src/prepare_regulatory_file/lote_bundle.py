@@ -0,0 +1,247 @@
+"""
+Multi-lote bundles used by the PrepareRegulatoryFile processor.
+
+Kept free of NiFi imports so the same code can be driven locally
+(testing/lote_bundle_check.py).
+
+Every signed lote joins the open bundle for the lote's key (operator,
+warehouse and date) and its task returns at once; no task waits for others.
+A bundle is due once it has ``max_entries`` lotes or ``max_bytes`` of signed
+XML, or has been open ``max_wait`` seconds. The lote that makes its own
+bundle due claims it and carries the archive; any other due bundle is taken
+by the next timer-driven tick, so ``max_wait`` holds without input. A bundle
+keeps its first lote's attributes, which describe the archive whichever
+FlowFile carries it.
+
+The other lotes of a bundle are its members: their FlowFiles wait outside
+the processor and come back until release() reports the archive emitted.
+A bundle is tracked until its archive is out and every member has been
+released. Bundles that are still open when the processor stops are flushed
+and, with the ones whose members are still out, handed to the next bundler.
+
+A lote that would take a bundle past ``max_bytes`` closes it and opens the
+next one; a lote larger than ``max_bytes`` goes out on its own.
+"""
+
+import collections
+import threading
+import time
+import uuid
+
+
+class BundleFailed(Exception):
+    """The archive for a bundle could not be built."""
+
+
+class Bundle:
+    """Lotes that go out in one archive."""
+
+    def __init__(self, key, target, attributes=None):
+        self.key = key
+        self.target = target
+        self.attributes = dict(attributes or {})
+        self.id = uuid.uuid4().hex[:12]
+        self.entries = []
+        self.size = 0
+        self.opened = time.monotonic()
+        self.waited = None
+        self.archive = None
+        self.error = None
+        # Entry names of members whose FlowFiles have not been released yet
+        self.waiting = set()
+        self.taken = False
+
+    @property
+    def batch_ids(self):
+        return [batch_id for batch_id, _, _ in self.entries]
+
+    @property
+    def entry_names(self):
+        return [name for _, name, _ in self.entries]
+
+    @property
+    def built(self):
+        return self.archive is not None or self.error is not None
+
+    @property
+    def emitted(self):
+        return self.taken and self.built
+
+
+class LoteBundler:
+    """Collects signed lotes from concurrent callers into per-key bundles; thread-safe."""
+
+    def __init__(self, max_entries=10, max_bytes=10 * 1024 * 1024, max_wait=5.0, held=()):
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_wait = max_wait
+        self.stats = {"lotes": 0, "bundles": 0, "failed": 0, "flushed": 0}
+
+        self._lock = threading.Lock()
+        self._open = {}
+        self._due = collections.deque()
+        self._bundles = {}
+        # Bundles handed over by a previous bundler: flushed ones go out
+        # first, emitted ones still have members to release
+        for bundle in held:
+            self._bundles[bundle.id] = bundle
+            if not bundle.taken:
+                self._due.append(bundle)
+
+    def add(self, key, batch_id, name, data, target, attributes=None):
+        """
+        Add one signed lote to its key's open bundle; never blocks.
+
+        Args:
+            key: Bundle key; only lotes with the same key share an archive
+            batch_id: Batch the lote belongs to
+            name: Entry name of the lote inside the archive
+            data: Signed lote XML as bytes
+            target: Where and how the archive is written; the bundle keeps
+                its first lote's as bundle.target
+            attributes: Lote attributes that describe the archive; the bundle
+                keeps its first lote's as bundle.attributes
+
+        Returns:
+            Bundle the lote joined
+
+        Raises:
+            BundleFailed: If the bundle already has an entry with this name
+        """
+        with self._lock:
+            bundle = self._open.get(key)
+            if bundle is not None and name in bundle.entry_names:
+                raise BundleFailed("Entry {} is already in bundle {}".format(name, bundle.id))
+            if bundle is not None and bundle.size + len(data) > self.max_bytes:
+                self._close(bundle)
+                bundle = None
+
+            if bundle is None:
+                bundle = self._open[key] = Bundle(key, target, attributes)
+                self._bundles[bundle.id] = bundle
+            bundle.entries.append((batch_id, name, data))
+            bundle.waiting.add(name)
+            bundle.size += len(data)
+            self.stats["lotes"] += 1
+
+            if len(bundle.entries) >= self.max_entries or bundle.size >= self.max_bytes:
+                self._close(bundle)
+            return bundle
+
+    def claim(self, bundle, name):
+        """
+        Hand a lote its own bundle if the bundle is due; the lote then carries the archive.
+
+        Args:
+            bundle: Bundle the lote joined, from add()
+            name: Entry name of the lote, which is no longer waiting
+
+        Returns:
+            True if the caller builds and carries the bundle, False if the
+            lote is a member and waits for it
+        """
+        with self._lock:
+            if self._open.get(bundle.key) is bundle and time.monotonic() - bundle.opened >= self.max_wait:
+                del self._open[bundle.key]
+            elif bundle in self._due:
+                self._due.remove(bundle)
+            else:
+                return False
+            bundle.taken = True
+            bundle.waiting.discard(name)
+            return True
+
+    def take(self):
+        """
+        Hand the next due bundle of any key to a tick, which builds and carries its archive.
+
+        Closed bundles come first, then the open bundle that has been past
+        max_wait longest.
+
+        Returns:
+            Bundle, or None if no bundle is due
+        """
+        with self._lock:
+            if self._due:
+                bundle = self._due.popleft()
+            else:
+                now = time.monotonic()
+                bundle = next((b for b in self._open.values() if now - b.opened >= self.max_wait), None)
+                if bundle is None:
+                    return None
+                del self._open[bundle.key]
+            bundle.taken = True
+            return bundle
+
+    def release(self, bundle_id, name):
+        """
+        Look up a returning member; once its bundle's archive is emitted, the member is released.
+
+        Args:
+            bundle_id: dgoj.bundle.id of the member's FlowFile
+            name: Entry name of the member's lote
+
+        Returns:
+            Bundle (still waiting unless bundle.emitted), or None if the
+            bundle or the member is unknown, e.g. after a worker restart
+        """
+        with self._lock:
+            bundle = self._bundles.get(bundle_id)
+            if bundle is None or name not in bundle.waiting:
+                return None
+            if bundle.emitted:
+                bundle.waiting.discard(name)
+                self._forget(bundle)
+            return bundle
+
+    def flush(self):
+        """
+        Close every open bundle, e.g. when the processor stops.
+
+        Returns:
+            Every bundle still tracked: the due ones, which stay queued, and
+            the emitted ones with members to release; pass them as held to
+            the next bundler
+        """
+        with self._lock:
+            for bundle in list(self._open.values()):
+                self._close(bundle)
+                self.stats["flushed"] += 1
+            return list(self._bundles.values())
+
+    def build(self, bundle, build):
+        """
+        Build a bundle's archive once; the outcome is left in bundle.archive or bundle.error.
+
+        Args:
+            bundle: Bundle from claim(), take() or flush()
+            build: Callable taking [(name, data), ...] and returning the archive
+        """
+        if bundle.built:
+            return
+        bundle.waited = time.monotonic() - bundle.opened
+        try:
+            bundle.archive = build([(name, data) for _, name, data in bundle.entries])
+        except Exception as e:
+            bundle.error = "Failed to build bundle {} of {} lotes: {}".format(bundle.id, len(bundle.entries), e)
+        # The archive holds the signed lotes now
+        bundle.entries = [(batch_id, name, None) for batch_id, name, _ in bundle.entries]
+        with self._lock:
+            self.stats["bundles"] += 1
+            if bundle.error is not None:
+                self.stats["failed"] += len(bundle.entries)
+            if bundle.taken:
+                self._forget(bundle)
+
+    def _forget(self, bundle):
+        # Once the archive is out and no member is left to release
+        if bundle.emitted and not bundle.waiting:
+            self._bundles.pop(bundle.id, None)
+
+    def _close(self, bundle):
+        # Later lotes for the key open the next bundle while this one waits to be taken
+        if self._open.get(bundle.key) is bundle:
+            del self._open[bundle.key]
+            self._due.append(bundle)
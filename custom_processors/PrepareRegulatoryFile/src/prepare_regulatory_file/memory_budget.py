@@ -0,0 +1,127 @@
+"""
+Memory admission control used by the PrepareRegulatoryFile processor.
+
+Kept free of NiFi imports so the same code can be driven locally
+(testing/memory_budget_check.py).
+
+Signing a lote holds the input, its DOM, the canonicalized and serialized
+copies and the ZIP buffer at the same time, so a task needs a multiple of
+the lote size. Every task reserves ``size * expansion`` bytes of a shared
+budget before it starts and releases them when it is done. Tasks are
+admitted in arrival order, so a large lote is not starved by a stream of
+small ones; a task that is not admitted within ``max_wait`` seconds gives
+up and is deferred. A lote whose estimate alone exceeds the budget can
+never be admitted and is refused at once.
+"""
+
+import collections
+import threading
+import time
+
+# Peak RSS growth per input byte while signing and encrypting a lote, measured
+# with testing/memory_budget_check.py on lotes of 1000 to 200000 players
+# (26-28x), rounded up
+DEFAULT_EXPANSION_FACTOR = 30.0
+
+
+class Oversize(Exception):
+    """The estimate for one FlowFile exceeds the whole budget."""
+
+
+class Reservation:
+    """Bytes held in a MemoryBudget until released; usable as a context manager."""
+
+    def __init__(self, budget, size, in_use, waited):
+        self.budget = budget
+        self.size = size
+        self.in_use = in_use
+        self.waited = waited
+        self._released = False
+
+    def release(self):
+        if not self._released:
+            self._released = True
+            self.budget._release(self.size)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class MemoryBudget:
+    """Shares a fixed number of bytes between concurrent callers; thread-safe."""
+
+    def __init__(self, limit, expansion=DEFAULT_EXPANSION_FACTOR, max_wait=5.0):
+        if limit <= 0:
+            raise ValueError("limit must be positive")
+        self.limit = int(limit)
+        self.expansion = expansion
+        self.max_wait = max_wait
+        self.in_use = 0
+        self.peak = 0
+        self.stats = collections.Counter()
+
+        self._condition = threading.Condition()
+        self._waiting = collections.deque()
+
+    def estimate(self, size):
+        """Bytes to reserve for a FlowFile of `size` bytes."""
+        return int(size * self.expansion)
+
+    def admit(self, size):
+        """
+        Reserve the estimate for a FlowFile, blocking until it fits.
+
+        Args:
+            size: FlowFile content size in bytes
+
+        Returns:
+            Reservation, or None if the estimate did not fit within max_wait
+
+        Raises:
+            Oversize: If the estimate is larger than the whole budget
+        """
+        needed = self.estimate(size)
+        with self._condition:
+            if needed > self.limit:
+                self.stats["oversize"] += 1
+                raise Oversize("Estimated {} bytes for a {} byte FlowFile exceeds the memory budget of {} bytes".format(
+                    needed, size, self.limit))
+
+            started = time.monotonic()
+            deadline = started + self.max_wait
+            ticket = object()
+            self._waiting.append(ticket)
+            try:
+                while self._waiting[0] is not ticket or self.in_use + needed > self.limit:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.stats["deferred"] += 1
+                        self.stats["wait_millis"] += round((time.monotonic() - started) * 1000)
+                        return None
+                    self._condition.wait(remaining)
+            finally:
+                self._waiting.remove(ticket)
+                # The next in line may fit now, or may be the one that was waiting behind this ticket
+                self._condition.notify_all()
+
+            self.in_use += needed
+            self.peak = max(self.peak, self.in_use)
+            waited = time.monotonic() - started
+            self.stats["admitted"] += 1
+            self.stats["wait_millis"] += round(waited * 1000)
+            if waited > 0.001:
+                self.stats["waited"] += 1
+            return Reservation(self, needed, self.in_use, waited)
+
+    def snapshot(self):
+        """Current usage and counters, for logging."""
+        with self._condition:
+            return dict(self.stats, in_use=self.in_use, peak=self.peak, limit=self.limit, waiting=len(self._waiting))
+
+    def _release(self, size):
+        with self._condition:
+            self.in_use -= size
+            self._condition.notify_all()
@@ -33,6 +33,10 @@ GRANT CREATE STREAMLIT ON SCHEMA DEDEMO.GAMING TO ROLE IDENTIFIER($RUNTIME_ROLE)
 GRANT CREATE STAGE ON SCHEMA DEDEMO.GAMING TO ROLE IDENTIFIER($RUNTIME_ROLE);
 GRANT CREATE SEQUENCE ON SCHEMA DEDEMO.GAMING TO ROLE IDENTIFIER($RUNTIME_ROLE);
 GRANT CREATE SEMANTIC VIEW ON SCHEMA DEDEMO.GAMING TO ROLE IDENTIFIER($RUNTIME_ROLE);
+GRANT CREATE TASK ON SCHEMA DEDEMO.GAMING TO ROLE IDENTIFIER($RUNTIME_ROLE);
+
+-- Scheduled tasks (pipeline counters, latency rollup refresh, XML offload)
+GRANT EXECUTE TASK ON ACCOUNT TO ROLE IDENTIFIER($RUNTIME_ROLE);
 
 -- Future grants for CDC-created objects
 GRANT SELECT ON FUTURE TABLES IN DATABASE DEDEMO TO ROLE IDENTIFIER($RUNTIME_ROLE);
@@ -56,7 +60,10 @@ GRANT SELECT ON STREAM DEDEMO.GAMING.POKER_TRANSACTIONS_STREAM TO ROLE IDENTIFIE
 
 -- Function and procedure
 GRANT USAGE ON FUNCTION DEDEMO.GAMING.GENERATE_POKER_XML_JS(VARIANT, VARCHAR, VARCHAR, VARCHAR) TO ROLE IDENTIFIER($RUNTIME_ROLE);
+GRANT USAGE ON FUNCTION DEDEMO.GAMING.GENERATE_POKER_XML_PY(VARIANT, VARCHAR, VARCHAR, VARCHAR) TO ROLE IDENTIFIER($RUNTIME_ROLE);
+GRANT USAGE ON FUNCTION DEDEMO.GAMING.GENERATE_POKER_XML_ROWS(VARCHAR, FLOAT, FLOAT, FLOAT, VARCHAR, VARCHAR, VARCHAR, VARCHAR, VARCHAR, VARCHAR) TO ROLE IDENTIFIER($RUNTIME_ROLE);
 GRANT USAGE ON PROCEDURE DEDEMO.GAMING.PROCESS_STAGED_BATCH(VARCHAR) TO ROLE IDENTIFIER($RUNTIME_ROLE);
+GRANT USAGE ON PROCEDURE DEDEMO.GAMING.PROCESS_STAGED_BATCHES(ARRAY, VARCHAR, VARCHAR) TO ROLE IDENTIFIER($RUNTIME_ROLE);
 
 -- Observability views
 GRANT SELECT ON VIEW DEDEMO.GAMING.PIPELINE_LATENCY_ANALYSIS TO ROLE IDENTIFIER($RUNTIME_ROLE);
@@ -64,6 +71,44 @@ GRANT SELECT ON VIEW DEDEMO.GAMING.PIPELINE_LATENCY_DETAIL TO ROLE IDENTIFIER($R
 GRANT SELECT ON VIEW DEDEMO.GAMING.OPENFLOW_LOGS TO ROLE IDENTIFIER($RUNTIME_ROLE);
 GRANT SELECT ON VIEW DEDEMO.GAMING.OPENFLOW_ERROR_SUMMARY TO ROLE IDENTIFIER($RUNTIME_ROLE);
 
+-- Pipeline counters (10_pipeline_counters.sql)
+GRANT SELECT ON TABLE DEDEMO.GAMING.PIPELINE_COUNTERS TO ROLE IDENTIFIER($RUNTIME_ROLE);
+GRANT SELECT ON TABLE DEDEMO.GAMING.PIPELINE_LAG_MINUTE TO ROLE IDENTIFIER($RUNTIME_ROLE);
+GRANT USAGE ON PROCEDURE DEDEMO.GAMING.REFRESH_PIPELINE_COUNTERS() TO ROLE IDENTIFIER($RUNTIME_ROLE);
+
+-- Latency rollup (11_latency_rollup.sql)
+GRANT SELECT ON TABLE DEDEMO.GAMING.PIPELINE_LATENCY_ROLLUP TO ROLE IDENTIFIER($RUNTIME_ROLE);
+GRANT SELECT ON TABLE DEDEMO.GAMING.ROLLUP_WATERMARKS TO ROLE IDENTIFIER($RUNTIME_ROLE);
+GRANT USAGE ON FUNCTION DEDEMO.GAMING.PIPELINE_LATENCY_PERCENTILES(TIMESTAMP_NTZ, TIMESTAMP_NTZ) TO ROLE IDENTIFIER($RUNTIME_ROLE);
+GRANT USAGE ON PROCEDURE DEDEMO.GAMING.REFRESH_PIPELINE_LATENCY_ROLLUP() TO ROLE IDENTIFIER($RUNTIME_ROLE);
+
+-- Batch XML offload (12_xml_offload.sql); READ is needed for GET_PRESIGNED_URL in the report flow
+GRANT READ, WRITE ON STAGE DEDEMO.GAMING.BATCH_XML TO ROLE IDENTIFIER($RUNTIME_ROLE);
+GRANT USAGE ON PROCEDURE DEDEMO.GAMING.OFFLOAD_BATCH_XML(ARRAY, NUMBER) TO ROLE IDENTIFIER($RUNTIME_ROLE);
+
+-- Batch leasing (13_batch_leasing.sql)
+GRANT SELECT, UPDATE ON TABLE DEDEMO.GAMING.BATCH_LEASE_LOCK TO ROLE IDENTIFIER($RUNTIME_ROLE);
+GRANT USAGE ON PROCEDURE DEDEMO.GAMING.LEASE_REGULATORY_BATCHES(VARCHAR, VARCHAR, NUMBER, NUMBER, NUMBER) TO ROLE IDENTIFIER($RUNTIME_ROLE);
+
+-- Upload acknowledgments (14_batch_acks.sql)
+GRANT USAGE ON PROCEDURE DEDEMO.GAMING.ACK_UPLOADED_BATCHES(VARCHAR) TO ROLE IDENTIFIER($RUNTIME_ROLE);
+
+-- Batch assembly (15_batch_assembly.sql)
+GRANT USAGE ON PROCEDURE DEDEMO.GAMING.PROCESS_ASSEMBLED_BATCHES(VARCHAR, NUMBER) TO ROLE IDENTIFIER($RUNTIME_ROLE);
+
+-- OpenFlow log table (16_openflow_logs.sql)
+GRANT SELECT ON TABLE DEDEMO.GAMING.OPENFLOW_LOG_EVENTS TO ROLE IDENTIFIER($RUNTIME_ROLE);
+GRANT USAGE ON FUNCTION DEDEMO.GAMING.PARSE_OPENFLOW_LOG_EVENT(VARIANT, VARIANT) TO ROLE IDENTIFIER($RUNTIME_ROLE);
+GRANT USAGE ON PROCEDURE DEDEMO.GAMING.REFRESH_OPENFLOW_LOG_EVENTS(NUMBER) TO ROLE IDENTIFIER($RUNTIME_ROLE);
+
+-- OpenFlow error rollup (17_error_rollup.sql)
+GRANT SELECT ON TABLE DEDEMO.GAMING.OPENFLOW_ERROR_ROLLUP TO ROLE IDENTIFIER($RUNTIME_ROLE);
+GRANT SELECT ON TABLE DEDEMO.GAMING.OPENFLOW_LOG_FINGERPRINTS TO ROLE IDENTIFIER($RUNTIME_ROLE);
+GRANT SELECT ON TABLE DEDEMO.GAMING.OPENFLOW_LOG_TEMPLATES TO ROLE IDENTIFIER($RUNTIME_ROLE);
+GRANT USAGE ON FUNCTION DEDEMO.GAMING.OPENFLOW_RECURRING_FAILURES(TIMESTAMP_NTZ, TIMESTAMP_NTZ) TO ROLE IDENTIFIER($RUNTIME_ROLE);
+GRANT USAGE ON PROCEDURE DEDEMO.GAMING.MINE_OPENFLOW_LOG_TEMPLATES(FLOAT) TO ROLE IDENTIFIER($RUNTIME_ROLE);
+GRANT USAGE ON PROCEDURE DEDEMO.GAMING.REFRESH_OPENFLOW_ERROR_ROLLUP(NUMBER) TO ROLE IDENTIFIER($RUNTIME_ROLE);
+
 -- =============================================================================
 -- SECTION C: Specification Extraction Objects
 -- Grants for objects created by SharePoint CDC connector and AI extraction.
@@ -1,6 +1,8 @@
 -- BOE Gaming Demo - Tables
 -- ============================================================================
--- Creates staging and audit tables for batch processing.
+-- Creates staging and audit tables for batch processing, the Cortex
+-- result export stage used by the pipeline monitor, and the stage holding
+-- Python UDF sources (sql/python, uploaded by run_sql.sh).
 -- Run after: 02_grants.sql
 -- ============================================================================
 
@@ -40,10 +42,29 @@ CREATE OR REPLACE TABLE DEDEMO.GAMING.REGULATORY_BATCHES (
     STATUS VARCHAR(20),
     UPLOAD_TIMESTAMP TIMESTAMP_NTZ(9),
     GENERATED_FILENAME VARCHAR(500),
-    SFTP_DIRECTORY_PATH VARCHAR(1000)
+    SFTP_DIRECTORY_PATH VARCHAR(1000),
+    XML_URI VARCHAR(1000),
+    XML_BYTES NUMBER(38,0),
+    XML_SHA256 VARCHAR(64),
+    LEASE_OWNER VARCHAR(200),
+    LEASE_ID VARCHAR(50),
+    LEASE_EXPIRES_AT TIMESTAMP_NTZ(9),
+    LEASE_COUNT NUMBER(38,0)
 )
 COMMENT = 'Audit table tracking batch lifecycle: GENERATED -> UPLOADED';
 
+-- Unload target for full Cortex-generated query results (Streamlit "Download full result")
+-- Server-side encryption is required for GET_PRESIGNED_URL downloads
+CREATE STAGE IF NOT EXISTS DEDEMO.GAMING.CORTEX_RESULTS
+    ENCRYPTION = (TYPE = 'SNOWFLAKE_SSE')
+    DIRECTORY = (ENABLE = FALSE)
+    COMMENT = 'Full result exports of Cortex-generated SQL from the pipeline monitor';
+
+-- Python UDF sources imported by 04_functions.sql (uploaded from sql/python)
+CREATE STAGE IF NOT EXISTS DEDEMO.GAMING.UDF_CODE
+    DIRECTORY = (ENABLE = FALSE)
+    COMMENT = 'Python modules imported by the demo UDFs';
+
 -- Verify
 SELECT 'Tables created' AS status;
 SHOW TABLES IN SCHEMA DEDEMO.GAMING;
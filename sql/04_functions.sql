@@ -1,5 +1,17 @@
--- BOE Gaming Demo - JavaScript UDF
+-- BOE Gaming Demo - XML Generation UDFs
 -- ============================================================================
+-- GENERATE_POKER_XML_JS     JavaScript UDF (original implementation)
+-- GENERATE_POKER_XML_PY     Vectorized Python UDF, drop-in for the JS UDF
+-- GENERATE_POKER_XML_ROWS   Vectorized Python UDTF over staging rows,
+--                           partitioned by batch (no ARRAY_AGG needed); the
+--                           overload with tournament columns fills the Juego
+--                           header when a batch holds a single tournament
+--
+-- The Python functions import sql/python/poker_xml.py, which produces
+-- byte-identical output to the JS UDF for valid input and XML-escapes text
+-- values. run_sql.sh uploads sql/python/*.py to @DEDEMO.GAMING.UDF_CODE
+-- before executing this file.
+--
 -- IMPORTANT: This file MUST be deployed via stage upload due to $$ delimiters.
 --
 -- Deployment method:
@@ -9,7 +21,7 @@
 --   snow stage copy 04_functions.sql @DEDEMO.GAMING.%BATCH_STAGING/sql -c <conn> --overwrite
 --   snow sql -c <conn> -q "EXECUTE IMMEDIATE FROM @DEDEMO.GAMING.%BATCH_STAGING/sql/04_functions.sql"
 --
--- Run after: 03_tables.sql (needs BATCH_STAGING table for stage)
+-- Run after: 03_tables.sql (needs BATCH_STAGING table stage and UDF_CODE stage)
 -- ============================================================================
 
 USE ROLE IDENTIFIER($RUNTIME_ROLE);
@@ -103,6 +115,126 @@ AS $$
   return xml;
 $$;
 
+-- Drop-in replacement for GENERATE_POKER_XML_JS (same arguments and output)
+CREATE OR REPLACE FUNCTION DEDEMO.GAMING.GENERATE_POKER_XML_PY(
+    JSON_ARRAY VARIANT,
+    P_OPERATOR_ID VARCHAR,
+    P_WAREHOUSE_ID VARCHAR,
+    P_BATCH_ID VARCHAR
+)
+RETURNS VARCHAR
+LANGUAGE PYTHON
+RUNTIME_VERSION = '3.11'
+PACKAGES = ('pandas')
+IMPORTS = ('@DEDEMO.GAMING.UDF_CODE/poker_xml.py')
+HANDLER = 'generate'
+AS $$
+import pandas
+from _snowflake import vectorized
+from poker_xml import generate_poker_xml
+
+@vectorized(input=pandas.DataFrame)
+def generate(df):
+    return pandas.Series([
+        generate_poker_xml(txns, operator_id, warehouse_id, batch_id)
+        for txns, operator_id, warehouse_id, batch_id in zip(df[0], df[1], df[2], df[3])
+    ])
+$$;
+
+-- One lote per partition, built directly from staging rows:
+--   TABLE(GENERATE_POKER_XML_ROWS(PLAYER_ID, ..., BATCH_ID) OVER (PARTITION BY BATCH_ID))
+CREATE OR REPLACE FUNCTION DEDEMO.GAMING.GENERATE_POKER_XML_ROWS(
+    PLAYER_ID VARCHAR,
+    BET_AMOUNT FLOAT,
+    REFUND_AMOUNT FLOAT,
+    WIN_AMOUNT FLOAT,
+    PLAYER_IP VARCHAR,
+    DEVICE_TYPE VARCHAR,
+    DEVICE_ID VARCHAR,
+    P_OPERATOR_ID VARCHAR,
+    P_WAREHOUSE_ID VARCHAR,
+    P_BATCH_ID VARCHAR
+)
+RETURNS TABLE (BATCH_ID VARCHAR, TRANSACTION_COUNT NUMBER, GENERATED_XML VARCHAR)
+LANGUAGE PYTHON
+RUNTIME_VERSION = '3.11'
+PACKAGES = ('pandas')
+IMPORTS = ('@DEDEMO.GAMING.UDF_CODE/poker_xml.py')
+HANDLER = 'PokerXmlPartition'
+AS $$
+import pandas
+from _snowflake import vectorized
+from poker_xml import generate_poker_xml_columns
+
+class PokerXmlPartition:
+    @vectorized(input=pandas.DataFrame)
+    def end_partition(self, df):
+        columns = [df.iloc[:, i].tolist() for i in range(7)]
+        xml = generate_poker_xml_columns(
+            *columns,
+            operator_id=df.iloc[0, 7],
+            warehouse_id=df.iloc[0, 8],
+            batch_id=df.iloc[0, 9],
+        )
+        return pandas.DataFrame({
+            "BATCH_ID": [df.iloc[0, 9]],
+            "TRANSACTION_COUNT": [len(df)],
+            "GENERATED_XML": [xml],
+        })
+$$;
+
+-- Same, plus each row's tournament. A batch whose rows share one
+-- TOURNAMENT_ID (as AssembleRegulatoryBatches produces) gets that tournament
+-- in its Juego header; mixed batches keep the demo header.
+CREATE OR REPLACE FUNCTION DEDEMO.GAMING.GENERATE_POKER_XML_ROWS(
+    PLAYER_ID VARCHAR,
+    BET_AMOUNT FLOAT,
+    REFUND_AMOUNT FLOAT,
+    WIN_AMOUNT FLOAT,
+    PLAYER_IP VARCHAR,
+    DEVICE_TYPE VARCHAR,
+    DEVICE_ID VARCHAR,
+    P_OPERATOR_ID VARCHAR,
+    P_WAREHOUSE_ID VARCHAR,
+    P_BATCH_ID VARCHAR,
+    TOURNAMENT_ID VARCHAR,
+    TOURNAMENT_NAME VARCHAR,
+    TOURNAMENT_START VARCHAR,
+    TOURNAMENT_END VARCHAR,
+    VARIANT VARCHAR,
+    VARIANT_COMMERCIAL VARCHAR
+)
+RETURNS TABLE (BATCH_ID VARCHAR, TRANSACTION_COUNT NUMBER, GENERATED_XML VARCHAR)
+LANGUAGE PYTHON
+RUNTIME_VERSION = '3.11'
+PACKAGES = ('pandas')
+IMPORTS = ('@DEDEMO.GAMING.UDF_CODE/poker_xml.py')
+HANDLER = 'PokerXmlPartition'
+AS $$
+import pandas
+from _snowflake import vectorized
+from poker_xml import generate_poker_xml_columns, single_tournament
+
+class PokerXmlPartition:
+    @vectorized(input=pandas.DataFrame)
+    def end_partition(self, df):
+        df = df.astype(object).where(df.notna(), None)
+        columns = [df.iloc[:, i].tolist() for i in range(7)]
+        tournament = single_tournament(*(df.iloc[:, i].tolist() for i in range(10, 16)))
+        xml = generate_poker_xml_columns(
+            *columns,
+            operator_id=df.iloc[0, 7],
+            warehouse_id=df.iloc[0, 8],
+            batch_id=df.iloc[0, 9],
+            tournament=tournament,
+        )
+        return pandas.DataFrame({
+            "BATCH_ID": [df.iloc[0, 9]],
+            "TRANSACTION_COUNT": [len(df)],
+            "GENERATED_XML": [xml],
+        })
+$$;
+
 -- Verify
-SELECT 'Function created' AS status;
-SHOW USER FUNCTIONS LIKE 'GENERATE_POKER_XML_JS' IN SCHEMA DEDEMO.GAMING;
+SELECT 'Functions created' AS status;
+SHOW USER FUNCTIONS LIKE 'GENERATE_POKER_XML%' IN SCHEMA DEDEMO.GAMING;
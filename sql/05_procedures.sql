@@ -1,11 +1,15 @@
--- BOE Gaming Demo - Stored Procedure
+-- BOE Gaming Demo - Stored Procedures
 -- ============================================================================
+-- PROCESS_STAGED_BATCH     One batch per call (Batch_Processing flow post-SQL)
+-- PROCESS_STAGED_BATCHES   Set-based: every pending batch, or a list of batch
+--                          IDs, in one pass over BATCH_STAGING
+--
 -- IMPORTANT: This file should be deployed via stage upload for consistency.
 --
 -- Deployment method:
 --   ./run_sql.sh <connection> 05_procedures.sql --stage-upload
 --
--- Run after: 04_functions.sql (procedure calls the function)
+-- Run after: 04_functions.sql (procedure calls GENERATE_POKER_XML_ROWS)
 -- ============================================================================
 
 USE ROLE IDENTIFIER($RUNTIME_ROLE);
@@ -36,22 +40,22 @@ BEGIN
     filename := 'OP01_WH001_' || REPLACE(:p_batch_id, '-', '') || '.zip';
     sftp_path := 'uploads/' || :batch_date;
 
-    SELECT DEDEMO.GAMING.GENERATE_POKER_XML_JS(
-        ARRAY_AGG(OBJECT_CONSTRUCT(
-            'PLAYER_ID', PLAYER_ID,
-            'BET_AMOUNT', BET_AMOUNT,
-            'REFUND_AMOUNT', REFUND_AMOUNT,
-            'WIN_AMOUNT', WIN_AMOUNT,
-            'PLAYER_IP', PLAYER_IP,
-            'DEVICE_TYPE', DEVICE_TYPE,
-            'DEVICE_ID', DEVICE_ID
-        )),
-        'OP01',
-        'WH001',
-        :p_batch_id
-    ) INTO xml_result
-    FROM DEDEMO.GAMING.BATCH_STAGING
-    WHERE BATCH_ID = :p_batch_id;
+    -- Python UDTF builds the lote straight from the staging rows; a batch
+    -- of one tournament gets that tournament in its Juego header. Staging is
+    -- filtered before the UDTF so only this batch's partition is generated.
+    SELECT x.GENERATED_XML INTO xml_result
+    FROM (
+        SELECT * FROM DEDEMO.GAMING.BATCH_STAGING
+        WHERE BATCH_ID = :p_batch_id
+    ) s,
+         TABLE(DEDEMO.GAMING.GENERATE_POKER_XML_ROWS(
+             s.PLAYER_ID, s.BET_AMOUNT, s.REFUND_AMOUNT, s.WIN_AMOUNT,
+             s.PLAYER_IP, s.DEVICE_TYPE, s.DEVICE_ID,
+             'OP01', 'WH001', s.BATCH_ID,
+             s.TOURNAMENT_ID, s.TOURNAMENT_NAME, s.TOURNAMENT_START, s.TOURNAMENT_END,
+             s.VARIANT, s.VARIANT_COMMERCIAL
+         ) OVER (PARTITION BY s.BATCH_ID)) x
+    WHERE x.BATCH_ID = :p_batch_id;
 
     INSERT INTO DEDEMO.GAMING.REGULATORY_BATCHES (
         BATCH_ID, OPERATOR_ID, WAREHOUSE_ID, BATCH_TIMESTAMP,
@@ -69,6 +73,77 @@ BEGIN
 END;
 $$;
 
+-- Set-based variant. Counts and XML come from one partitioned pass
+-- (GENERATE_POKER_XML_ROWS OVER (PARTITION BY BATCH_ID)), all audit rows are
+-- written by one INSERT ... SELECT and staging is cleared by one DELETE.
+-- P_BATCH_IDS = NULL processes every batch currently in BATCH_STAGING; only
+-- call it for batches that are fully staged.
+--
+-- No DDL and no BEGIN/COMMIT: PROCESS_ASSEMBLED_BATCHES calls this from the
+-- post-SQL of a PutDatabaseRecord with AutoCommit off, so it runs inside the
+-- caller's transaction and commits or rolls back with the staged rows.
+CREATE OR REPLACE PROCEDURE DEDEMO.GAMING.PROCESS_STAGED_BATCHES(
+    P_BATCH_IDS ARRAY DEFAULT NULL,
+    P_OPERATOR_ID VARCHAR DEFAULT 'OP01',
+    P_WAREHOUSE_ID VARCHAR DEFAULT 'WH001'
+)
+RETURNS VARCHAR
+LANGUAGE SQL
+EXECUTE AS OWNER
+AS
+$$
+DECLARE
+    batch_ids ARRAY;
+    batch_count NUMBER;
+    txn_count NUMBER;
+BEGIN
+    -- Fix the set of batches first so the INSERT and DELETE agree
+    SELECT ARRAY_AGG(DISTINCT BATCH_ID) INTO batch_ids
+    FROM DEDEMO.GAMING.BATCH_STAGING
+    WHERE :p_batch_ids IS NULL
+       OR BATCH_ID IN (SELECT VALUE::STRING FROM TABLE(FLATTEN(INPUT => :p_batch_ids)));
+
+    batch_count := ARRAY_SIZE(batch_ids);
+
+    IF (batch_count = 0) THEN
+        RETURN 'No staged transactions found';
+    END IF;
+
+    INSERT INTO DEDEMO.GAMING.REGULATORY_BATCHES (
+        BATCH_ID, OPERATOR_ID, WAREHOUSE_ID, BATCH_TIMESTAMP,
+        TRANSACTION_COUNT, GENERATED_XML, STATUS,
+        GENERATED_FILENAME, SFTP_DIRECTORY_PATH
+    )
+    SELECT
+        x.BATCH_ID, :p_operator_id, :p_warehouse_id, CURRENT_TIMESTAMP(),
+        x.TRANSACTION_COUNT, x.GENERATED_XML, 'GENERATED',
+        :p_operator_id || '_' || :p_warehouse_id || '_' || REPLACE(x.BATCH_ID, '-', '') || '.zip',
+        'uploads/' || TO_CHAR(CURRENT_TIMESTAMP(), 'YYYY/MM/DD')
+    FROM (
+        -- Only the fixed batch set reaches the UDTF partitions
+        SELECT *
+        FROM DEDEMO.GAMING.BATCH_STAGING
+        WHERE BATCH_ID IN (SELECT VALUE::STRING FROM TABLE(FLATTEN(INPUT => :batch_ids)))
+    ) s,
+         TABLE(DEDEMO.GAMING.GENERATE_POKER_XML_ROWS(
+             s.PLAYER_ID, s.BET_AMOUNT, s.REFUND_AMOUNT, s.WIN_AMOUNT,
+             s.PLAYER_IP, s.DEVICE_TYPE, s.DEVICE_ID,
+             :p_operator_id, :p_warehouse_id, s.BATCH_ID,
+             s.TOURNAMENT_ID, s.TOURNAMENT_NAME, s.TOURNAMENT_START, s.TOURNAMENT_END,
+             s.VARIANT, s.VARIANT_COMMERCIAL
+         ) OVER (PARTITION BY s.BATCH_ID)) x;
+
+    DELETE FROM DEDEMO.GAMING.BATCH_STAGING s
+    USING (SELECT VALUE::STRING AS BATCH_ID FROM TABLE(FLATTEN(INPUT => :batch_ids))) b
+    WHERE s.BATCH_ID = b.BATCH_ID;
+
+    -- One staging row per transaction
+    txn_count := SQLROWCOUNT;
+
+    RETURN 'Processed ' || :batch_count || ' batches with ' || :txn_count || ' transactions';
+END;
+$$;
+
 -- Verify
-SELECT 'Procedure created' AS status;
-SHOW PROCEDURES LIKE 'PROCESS_STAGED_BATCH' IN SCHEMA DEDEMO.GAMING;
+SELECT 'Procedures created' AS status;
+SHOW PROCEDURES LIKE 'PROCESS_STAGED_BATCH%' IN SCHEMA DEDEMO.GAMING;
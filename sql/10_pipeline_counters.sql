@@ -0,0 +1,195 @@
+-- BOE Gaming Demo - Pipeline Counters
+-- ============================================================================
+-- Precomputed stage counters for the pipeline monitor. A scheduled task
+-- refreshes one small row per stage so the dashboard no longer runs
+-- COUNT(*) over the CDC table, dynamic table, stream and batch table on
+-- every view.
+--
+--   - Row counts come from INFORMATION_SCHEMA metadata (no table scans)
+--   - The stream backlog is counted once per task run, not per viewer
+--   - CDC lag is aggregated incrementally into per-minute buckets from rows
+--     inserted since the last watermark. Rows can become visible a little
+--     after their _SNOWFLAKE_INSERTED_AT, so the last few minutes before the
+--     watermark are read again; the buckets they feed are rebuilt rather than
+--     added to, so re-reading them does not count a row twice
+--
+-- The refresh logic is mirrored in testing/pipeline_counters_check.py, which
+-- checks the counters and lag buckets against full scans offline.
+--
+-- IMPORTANT: This file should be deployed via stage upload ($$ procedure body).
+--
+-- Deployment method:
+--   ./run_sql.sh <connection> 10_pipeline_counters.sql --stage-upload
+--
+-- Run after: 09_views.sql (needs CDC table, dynamic table and stream)
+-- ============================================================================
+
+USE ROLE IDENTIFIER($RUNTIME_ROLE);
+USE SCHEMA DEDEMO.GAMING;
+
+-- One row per pipeline stage, refreshed by REFRESH_PIPELINE_COUNTERS_TASK
+CREATE TABLE IF NOT EXISTS DEDEMO.GAMING.PIPELINE_COUNTERS (
+    STAGE VARCHAR(50) NOT NULL PRIMARY KEY,
+    STAGE_ORDER NUMBER(2,0),
+    ROW_COUNT NUMBER(38,0),
+    LAST_INSERTED_AT TIMESTAMP_NTZ(9),
+    WATERMARK TIMESTAMP_NTZ(9),
+    ROWS_1H NUMBER(38,0),
+    AVG_LAG_1H_SEC NUMBER(10,1),
+    MAX_LAG_1H_SEC NUMBER(10,1),
+    UPDATED_AT TIMESTAMP_NTZ(9)
+)
+COMMENT = 'Precomputed pipeline stage counters read by the pipeline monitor';
+
+-- Per-minute CDC lag aggregates by source CREATED_TIMESTAMP minute, split by the
+-- minute the rows were inserted in so a re-read slice can be rebuilt; kept for
+-- 24 hours. Derived data: replaced on deploy and rebuilt by the next refresh.
+CREATE OR REPLACE TABLE DEDEMO.GAMING.PIPELINE_LAG_MINUTE (
+    MINUTE_TS TIMESTAMP_NTZ(9) NOT NULL,
+    INSERTED_MINUTE TIMESTAMP_NTZ(9) NOT NULL,
+    LAG_SUM_SEC NUMBER(38,0),
+    LAG_MAX_SEC NUMBER(38,0),
+    SAMPLES NUMBER(38,0),
+    PRIMARY KEY (MINUTE_TS, INSERTED_MINUTE)
+)
+COPY GRANTS
+COMMENT = 'Incremental per-minute CDC replication lag aggregates';
+
+CREATE OR REPLACE PROCEDURE DEDEMO.GAMING.REFRESH_PIPELINE_COUNTERS()
+RETURNS VARCHAR
+LANGUAGE SQL
+EXECUTE AS OWNER
+AS
+$$
+DECLARE
+    -- How long after its _SNOWFLAKE_INSERTED_AT a row can still become visible
+    overlap_minutes NUMBER DEFAULT 5;
+    cdc_watermark TIMESTAMP_NTZ;
+    slice_start TIMESTAMP_NTZ;
+    new_watermark TIMESTAMP_NTZ;
+    new_rows NUMBER;
+BEGIN
+    SELECT COALESCE(MAX(WATERMARK), '1970-01-01'::TIMESTAMP_NTZ) INTO :cdc_watermark
+    FROM DEDEMO.GAMING.PIPELINE_COUNTERS
+    WHERE STAGE = 'CDC Source';
+
+    -- Re-read the inserted-at minutes that can still receive late-visible rows;
+    -- after a deploy (empty buckets) rebuild the whole retention window
+    SELECT CASE
+               WHEN EXISTS (SELECT 1 FROM DEDEMO.GAMING.PIPELINE_LAG_MINUTE)
+               THEN DATE_TRUNC('minute', DATEADD(minute, -:overlap_minutes, :cdc_watermark))
+               ELSE DATE_TRUNC('minute', DATEADD(day, -1, CURRENT_TIMESTAMP()))::TIMESTAMP_NTZ
+           END
+    INTO :slice_start;
+
+    SELECT GREATEST(COALESCE(MAX(_SNOWFLAKE_INSERTED_AT)::TIMESTAMP_NTZ, :cdc_watermark), :cdc_watermark),
+           COUNT_IF(_SNOWFLAKE_INSERTED_AT > :cdc_watermark)
+    INTO :new_watermark, :new_rows
+    FROM DEDEMO.TOURNAMENTS.POKER
+    WHERE _SNOWFLAKE_INSERTED_AT >= :slice_start;
+
+    BEGIN TRANSACTION;
+    DELETE FROM DEDEMO.GAMING.PIPELINE_LAG_MINUTE
+    WHERE INSERTED_MINUTE >= :slice_start;
+
+    INSERT INTO DEDEMO.GAMING.PIPELINE_LAG_MINUTE (MINUTE_TS, INSERTED_MINUTE, LAG_SUM_SEC, LAG_MAX_SEC, SAMPLES)
+    SELECT
+        DATE_TRUNC('minute', CREATED_TIMESTAMP) as MINUTE_TS,
+        DATE_TRUNC('minute', _SNOWFLAKE_INSERTED_AT)::TIMESTAMP_NTZ as INSERTED_MINUTE,
+        SUM(TIMESTAMPDIFF(second, CREATED_TIMESTAMP, _SNOWFLAKE_INSERTED_AT)) as LAG_SUM_SEC,
+        MAX(TIMESTAMPDIFF(second, CREATED_TIMESTAMP, _SNOWFLAKE_INSERTED_AT)) as LAG_MAX_SEC,
+        COUNT(*) as SAMPLES
+    FROM DEDEMO.TOURNAMENTS.POKER
+    WHERE _SNOWFLAKE_INSERTED_AT >= :slice_start
+    GROUP BY 1, 2;
+    COMMIT;
+
+    DELETE FROM DEDEMO.GAMING.PIPELINE_LAG_MINUTE
+    WHERE MINUTE_TS < DATEADD(day, -1, CURRENT_TIMESTAMP());
+
+    MERGE INTO DEDEMO.GAMING.PIPELINE_COUNTERS t
+    USING (
+        WITH table_meta AS (
+            SELECT TABLE_SCHEMA, TABLE_NAME, ROW_COUNT, LAST_ALTERED::TIMESTAMP_NTZ as LAST_ALTERED
+            FROM DEDEMO.INFORMATION_SCHEMA.TABLES
+            WHERE (TABLE_SCHEMA = 'TOURNAMENTS' AND TABLE_NAME = 'POKER')
+               OR (TABLE_SCHEMA = 'GAMING' AND TABLE_NAME IN ('DT_POKER_FLATTENED', 'REGULATORY_BATCHES'))
+        ),
+        lag_1h AS (
+            SELECT
+                SUM(SAMPLES) as ROWS_1H,
+                ROUND(SUM(LAG_SUM_SEC) / NULLIF(SUM(SAMPLES), 0), 1) as AVG_LAG_1H_SEC,
+                MAX(LAG_MAX_SEC) as MAX_LAG_1H_SEC
+            FROM DEDEMO.GAMING.PIPELINE_LAG_MINUTE
+            WHERE MINUTE_TS > DATEADD(hour, -1, CURRENT_TIMESTAMP())
+        ),
+        batches AS (
+            SELECT
+                SUM(CASE WHEN STATUS = 'UPLOADED' THEN 1 ELSE 0 END) as UPLOADED,
+                MAX(BATCH_TIMESTAMP) as LAST_BATCH,
+                MAX(UPLOAD_TIMESTAMP) as LAST_UPLOAD
+            FROM DEDEMO.GAMING.REGULATORY_BATCHES
+        )
+        SELECT 'CDC Source' as STAGE, 1 as STAGE_ORDER,
+               (SELECT ROW_COUNT FROM table_meta WHERE TABLE_NAME = 'POKER') as ROW_COUNT,
+               :new_watermark as LAST_INSERTED_AT, :new_watermark as WATERMARK,
+               (SELECT ROWS_1H FROM lag_1h) as ROWS_1H,
+               (SELECT AVG_LAG_1H_SEC FROM lag_1h) as AVG_LAG_1H_SEC,
+               (SELECT MAX_LAG_1H_SEC FROM lag_1h) as MAX_LAG_1H_SEC
+        UNION ALL
+        SELECT 'Dynamic Table', 2,
+               (SELECT ROW_COUNT FROM table_meta WHERE TABLE_NAME = 'DT_POKER_FLATTENED'),
+               (SELECT LAST_ALTERED FROM table_meta WHERE TABLE_NAME = 'DT_POKER_FLATTENED'),
+               NULL, NULL, NULL, NULL
+        UNION ALL
+        SELECT 'Stream Pending', 3,
+               (SELECT COUNT(*) FROM DEDEMO.GAMING.POKER_TRANSACTIONS_STREAM),
+               NULL, NULL, NULL, NULL, NULL
+        UNION ALL
+        SELECT 'Batches Created', 4,
+               (SELECT ROW_COUNT FROM table_meta WHERE TABLE_NAME = 'REGULATORY_BATCHES'),
+               (SELECT LAST_BATCH FROM batches),
+               NULL, NULL, NULL, NULL
+        UNION ALL
+        SELECT 'Batches Uploaded', 5,
+               (SELECT UPLOADED FROM batches),
+               (SELECT LAST_UPLOAD FROM batches),
+               NULL, NULL, NULL, NULL
+    ) s
+    ON t.STAGE = s.STAGE
+    WHEN MATCHED THEN UPDATE SET
+        STAGE_ORDER = s.STAGE_ORDER,
+        ROW_COUNT = COALESCE(s.ROW_COUNT, 0),
+        LAST_INSERTED_AT = s.LAST_INSERTED_AT,
+        WATERMARK = s.WATERMARK,
+        ROWS_1H = s.ROWS_1H,
+        AVG_LAG_1H_SEC = s.AVG_LAG_1H_SEC,
+        MAX_LAG_1H_SEC = s.MAX_LAG_1H_SEC,
+        UPDATED_AT = CURRENT_TIMESTAMP()
+    WHEN NOT MATCHED THEN INSERT (
+        STAGE, STAGE_ORDER, ROW_COUNT, LAST_INSERTED_AT, WATERMARK,
+        ROWS_1H, AVG_LAG_1H_SEC, MAX_LAG_1H_SEC, UPDATED_AT
+    ) VALUES (
+        s.STAGE, s.STAGE_ORDER, COALESCE(s.ROW_COUNT, 0), s.LAST_INSERTED_AT, s.WATERMARK,
+        s.ROWS_1H, s.AVG_LAG_1H_SEC, s.MAX_LAG_1H_SEC, CURRENT_TIMESTAMP()
+    );
+
+    RETURN 'Refreshed pipeline counters (' || :new_rows || ' new CDC rows)';
+END;
+$$;
+
+-- Refresh every minute (matches the dynamic table target lag)
+CREATE OR REPLACE TASK DEDEMO.GAMING.REFRESH_PIPELINE_COUNTERS_TASK
+    WAREHOUSE = IDENTIFIER($WAREHOUSE_NAME)
+    SCHEDULE = '1 minute'
+    COMMENT = 'Maintains PIPELINE_COUNTERS for the pipeline monitor'
+AS
+    CALL DEDEMO.GAMING.REFRESH_PIPELINE_COUNTERS();
+
+-- Populate immediately, then start the schedule
+CALL DEDEMO.GAMING.REFRESH_PIPELINE_COUNTERS();
+ALTER TASK DEDEMO.GAMING.REFRESH_PIPELINE_COUNTERS_TASK RESUME;
+
+-- Verify
+SELECT 'Pipeline counters created' AS status;
+SELECT * FROM DEDEMO.GAMING.PIPELINE_COUNTERS ORDER BY STAGE_ORDER;
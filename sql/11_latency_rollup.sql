@@ -0,0 +1,298 @@
+-- BOE Gaming Demo - Latency Rollup
+-- ============================================================================
+-- Incrementally maintained per-minute latency rollup per pipeline stage.
+-- Each row keeps SUM/MAX/COUNT plus an APPROX_PERCENTILE state (t-digest),
+-- so p50/p95/p99 for any window are computed by combining minute states
+-- instead of rescanning the CDC table.
+--
+--   - CDC Replication: rows inserted since the last watermark
+--   - Dynamic Table Refresh: measured refresh lag from
+--     DYNAMIC_TABLE_REFRESH_HISTORY (replaces the hard-coded 60s estimate)
+--   - Batch to SFTP Upload: rebuilt from REGULATORY_BATCHES for the last
+--     24 hours on every run. ACK_UPLOADED_BATCHES stores the SFTP finish time
+--     as UPLOAD_TIMESTAMP, which can be well before the acknowledgment
+--     commits, so a watermark on it would skip late acknowledgments. The
+--     rebuilt minute states replace the stored ones, so re-reading a batch
+--     never counts it twice.
+--
+-- PIPELINE_LATENCY_ANALYSIS is (re)defined here on top of the rollup and
+-- keeps its original columns, adding P50_SEC / P95_SEC / P99_SEC.
+--
+-- The sketch merge is mirrored in testing/latency_sketch.py, which checks
+-- merged percentiles against exact computation offline.
+--
+-- IMPORTANT: This file should be deployed via stage upload ($$ procedure body).
+--
+-- Deployment method:
+--   ./run_sql.sh <connection> 11_latency_rollup.sql --stage-upload
+--
+-- Run after: 10_pipeline_counters.sql (the refresh task runs after
+--            REFRESH_PIPELINE_COUNTERS_TASK)
+-- ============================================================================
+
+USE ROLE IDENTIFIER($RUNTIME_ROLE);
+USE SCHEMA DEDEMO.GAMING;
+
+-- One row per stage per minute; PCT_STATE is an APPROX_PERCENTILE_ACCUMULATE state
+CREATE TABLE IF NOT EXISTS DEDEMO.GAMING.PIPELINE_LATENCY_ROLLUP (
+    STAGE VARCHAR(50) NOT NULL,
+    MINUTE_TS TIMESTAMP_NTZ(9) NOT NULL,
+    SAMPLES NUMBER(38,0),
+    LATENCY_SUM_SEC NUMBER(38,0),
+    LATENCY_MAX_SEC NUMBER(38,0),
+    PCT_STATE VARIANT,
+    UPDATED_AT TIMESTAMP_NTZ(9),
+    PRIMARY KEY (STAGE, MINUTE_TS)
+)
+CLUSTER BY (MINUTE_TS)
+COMMENT = 'Per-minute latency rollup per stage with mergeable percentile states';
+
+-- Last source timestamp folded into each rollup stage
+CREATE TABLE IF NOT EXISTS DEDEMO.GAMING.ROLLUP_WATERMARKS (
+    ROLLUP_NAME VARCHAR(100) NOT NULL PRIMARY KEY,
+    WATERMARK TIMESTAMP_NTZ(9),
+    UPDATED_AT TIMESTAMP_NTZ(9)
+)
+COMMENT = 'Watermarks for incrementally maintained rollups';
+
+-- The upload stage no longer uses a watermark (see above)
+DELETE FROM DEDEMO.GAMING.ROLLUP_WATERMARKS WHERE ROLLUP_NAME = 'LATENCY:Batch to SFTP Upload';
+
+-- Caller's rights: INFORMATION_SCHEMA table functions are not available to
+-- owner's rights procedures. The task calls it as the runtime role.
+CREATE OR REPLACE PROCEDURE DEDEMO.GAMING.REFRESH_PIPELINE_LATENCY_ROLLUP()
+RETURNS VARCHAR
+LANGUAGE SQL
+EXECUTE AS CALLER
+AS
+$$
+DECLARE
+    cdc_watermark TIMESTAMP_NTZ;
+    dt_watermark TIMESTAMP_NTZ;
+    -- Acknowledgments later than this after their upload are not counted
+    upload_window_hours NUMBER DEFAULT 24;
+    upload_window_start TIMESTAMP_NTZ;
+    new_samples NUMBER;
+    upload_minutes NUMBER;
+BEGIN
+    SELECT
+        COALESCE(MAX(CASE WHEN ROLLUP_NAME = 'LATENCY:CDC Replication' THEN WATERMARK END), DATEADD(day, -1, CURRENT_TIMESTAMP())::TIMESTAMP_NTZ),
+        COALESCE(MAX(CASE WHEN ROLLUP_NAME = 'LATENCY:Dynamic Table Refresh' THEN WATERMARK END), DATEADD(day, -1, CURRENT_TIMESTAMP())::TIMESTAMP_NTZ)
+    INTO :cdc_watermark, :dt_watermark
+    FROM DEDEMO.GAMING.ROLLUP_WATERMARKS;
+
+    -- New latency samples since each stage's watermark
+    CREATE OR REPLACE TEMPORARY TABLE LATENCY_DELTA AS
+    SELECT
+        'CDC Replication'::VARCHAR(50) as STAGE,
+        _SNOWFLAKE_INSERTED_AT::TIMESTAMP_NTZ as RECORD_TIMESTAMP,
+        TIMESTAMPDIFF(second, CREATED_TIMESTAMP, _SNOWFLAKE_INSERTED_AT) as LATENCY_SEC
+    FROM DEDEMO.TOURNAMENTS.POKER
+    WHERE _SNOWFLAKE_INSERTED_AT > :cdc_watermark
+
+    UNION ALL
+
+    -- Measured freshness lag at the end of each successful refresh
+    SELECT
+        'Dynamic Table Refresh',
+        REFRESH_END_TIME::TIMESTAMP_NTZ,
+        TIMESTAMPDIFF(second, DATA_TIMESTAMP, REFRESH_END_TIME)
+    FROM TABLE(DEDEMO.INFORMATION_SCHEMA.DYNAMIC_TABLE_REFRESH_HISTORY(
+        NAME => 'DEDEMO.GAMING.DT_POKER_FLATTENED'
+    ))
+    WHERE STATE = 'SUCCEEDED'
+      AND REFRESH_END_TIME::TIMESTAMP_NTZ > :dt_watermark;
+
+    SELECT COUNT(*) INTO :new_samples FROM LATENCY_DELTA;
+
+    -- Combine new minute states with the stored ones for the same minutes
+    MERGE INTO DEDEMO.GAMING.PIPELINE_LATENCY_ROLLUP t
+    USING (
+        WITH delta_minutes AS (
+            SELECT
+                STAGE,
+                DATE_TRUNC('minute', RECORD_TIMESTAMP) as MINUTE_TS,
+                COUNT(*) as SAMPLES,
+                SUM(LATENCY_SEC) as LATENCY_SUM_SEC,
+                MAX(LATENCY_SEC) as LATENCY_MAX_SEC,
+                APPROX_PERCENTILE_ACCUMULATE(LATENCY_SEC) as PCT_STATE
+            FROM LATENCY_DELTA
+            GROUP BY 1, 2
+        )
+        SELECT
+            STAGE,
+            MINUTE_TS,
+            SUM(SAMPLES) as SAMPLES,
+            SUM(LATENCY_SUM_SEC) as LATENCY_SUM_SEC,
+            MAX(LATENCY_MAX_SEC) as LATENCY_MAX_SEC,
+            APPROX_PERCENTILE_COMBINE(PCT_STATE) as PCT_STATE
+        FROM (
+            SELECT * FROM delta_minutes
+            UNION ALL
+            SELECT r.STAGE, r.MINUTE_TS, r.SAMPLES, r.LATENCY_SUM_SEC, r.LATENCY_MAX_SEC, r.PCT_STATE
+            FROM DEDEMO.GAMING.PIPELINE_LATENCY_ROLLUP r
+            JOIN delta_minutes d ON r.STAGE = d.STAGE AND r.MINUTE_TS = d.MINUTE_TS
+        )
+        GROUP BY 1, 2
+    ) s
+    ON t.STAGE = s.STAGE AND t.MINUTE_TS = s.MINUTE_TS
+    WHEN MATCHED THEN UPDATE SET
+        SAMPLES = s.SAMPLES,
+        LATENCY_SUM_SEC = s.LATENCY_SUM_SEC,
+        LATENCY_MAX_SEC = s.LATENCY_MAX_SEC,
+        PCT_STATE = s.PCT_STATE,
+        UPDATED_AT = CURRENT_TIMESTAMP()
+    WHEN NOT MATCHED THEN INSERT (
+        STAGE, MINUTE_TS, SAMPLES, LATENCY_SUM_SEC, LATENCY_MAX_SEC, PCT_STATE, UPDATED_AT
+    ) VALUES (
+        s.STAGE, s.MINUTE_TS, s.SAMPLES, s.LATENCY_SUM_SEC, s.LATENCY_MAX_SEC, s.PCT_STATE, CURRENT_TIMESTAMP()
+    );
+
+    MERGE INTO DEDEMO.GAMING.ROLLUP_WATERMARKS t
+    USING (
+        SELECT 'LATENCY:' || STAGE as ROLLUP_NAME, MAX(RECORD_TIMESTAMP) as WATERMARK
+        FROM LATENCY_DELTA
+        GROUP BY 1
+    ) s
+    ON t.ROLLUP_NAME = s.ROLLUP_NAME
+    WHEN MATCHED THEN UPDATE SET WATERMARK = s.WATERMARK, UPDATED_AT = CURRENT_TIMESTAMP()
+    WHEN NOT MATCHED THEN INSERT (ROLLUP_NAME, WATERMARK, UPDATED_AT)
+        VALUES (s.ROLLUP_NAME, s.WATERMARK, CURRENT_TIMESTAMP());
+
+    -- Upload minute states over the window, recomputed from one row per batch
+    -- and replacing what is stored
+    upload_window_start := DATE_TRUNC('minute', DATEADD(hour, -upload_window_hours, CURRENT_TIMESTAMP()))::TIMESTAMP_NTZ;
+
+    MERGE INTO DEDEMO.GAMING.PIPELINE_LATENCY_ROLLUP t
+    USING (
+        SELECT
+            'Batch to SFTP Upload' as STAGE,
+            DATE_TRUNC('minute', UPLOAD_TIMESTAMP) as MINUTE_TS,
+            COUNT(*) as SAMPLES,
+            SUM(TIMESTAMPDIFF(second, BATCH_TIMESTAMP, UPLOAD_TIMESTAMP)) as LATENCY_SUM_SEC,
+            MAX(TIMESTAMPDIFF(second, BATCH_TIMESTAMP, UPLOAD_TIMESTAMP)) as LATENCY_MAX_SEC,
+            APPROX_PERCENTILE_ACCUMULATE(TIMESTAMPDIFF(second, BATCH_TIMESTAMP, UPLOAD_TIMESTAMP)) as PCT_STATE
+        FROM DEDEMO.GAMING.REGULATORY_BATCHES
+        WHERE STATUS = 'UPLOADED'
+          AND UPLOAD_TIMESTAMP >= :upload_window_start
+        GROUP BY 1, 2
+    ) s
+    ON t.STAGE = s.STAGE AND t.MINUTE_TS = s.MINUTE_TS
+    WHEN MATCHED THEN UPDATE SET
+        SAMPLES = s.SAMPLES,
+        LATENCY_SUM_SEC = s.LATENCY_SUM_SEC,
+        LATENCY_MAX_SEC = s.LATENCY_MAX_SEC,
+        PCT_STATE = s.PCT_STATE,
+        UPDATED_AT = CURRENT_TIMESTAMP()
+    WHEN NOT MATCHED THEN INSERT (
+        STAGE, MINUTE_TS, SAMPLES, LATENCY_SUM_SEC, LATENCY_MAX_SEC, PCT_STATE, UPDATED_AT
+    ) VALUES (
+        s.STAGE, s.MINUTE_TS, s.SAMPLES, s.LATENCY_SUM_SEC, s.LATENCY_MAX_SEC, s.PCT_STATE, CURRENT_TIMESTAMP()
+    );
+    upload_minutes := SQLROWCOUNT;
+
+    -- Keep 30 days of minute states
+    DELETE FROM DEDEMO.GAMING.PIPELINE_LATENCY_ROLLUP
+    WHERE MINUTE_TS < DATEADD(day, -30, CURRENT_TIMESTAMP());
+
+    RETURN 'Refreshed latency rollup (' || :new_samples || ' new samples, ' || :upload_minutes || ' upload minutes rebuilt)';
+END;
+$$;
+
+-- Percentiles for an arbitrary window, combined from minute states
+CREATE OR REPLACE FUNCTION DEDEMO.GAMING.PIPELINE_LATENCY_PERCENTILES(
+    P_START TIMESTAMP_NTZ,
+    P_END TIMESTAMP_NTZ
+)
+RETURNS TABLE (
+    STAGE VARCHAR,
+    SAMPLES NUMBER,
+    AVG_SEC FLOAT,
+    MAX_SEC FLOAT,
+    P50_SEC FLOAT,
+    P95_SEC FLOAT,
+    P99_SEC FLOAT
+)
+AS
+$$
+    WITH combined AS (
+        SELECT
+            STAGE,
+            SUM(SAMPLES) as SAMPLES,
+            SUM(LATENCY_SUM_SEC) / NULLIF(SUM(SAMPLES), 0) as AVG_SEC,
+            MAX(LATENCY_MAX_SEC) as MAX_SEC,
+            APPROX_PERCENTILE_COMBINE(PCT_STATE) as PCT_STATE
+        FROM DEDEMO.GAMING.PIPELINE_LATENCY_ROLLUP
+        WHERE MINUTE_TS >= DATE_TRUNC('minute', P_START)
+          AND MINUTE_TS < P_END
+        GROUP BY STAGE
+    )
+    SELECT
+        STAGE,
+        SAMPLES,
+        ROUND(AVG_SEC, 1),
+        ROUND(MAX_SEC, 1),
+        ROUND(APPROX_PERCENTILE_ESTIMATE(PCT_STATE, 0.50), 1),
+        ROUND(APPROX_PERCENTILE_ESTIMATE(PCT_STATE, 0.95), 1),
+        ROUND(APPROX_PERCENTILE_ESTIMATE(PCT_STATE, 0.99), 1)
+    FROM combined
+$$;
+
+-- Summary view for last 24 hours of pipeline performance
+CREATE OR REPLACE VIEW DEDEMO.GAMING.PIPELINE_LATENCY_ANALYSIS
+AS
+WITH stage_stats AS (
+    SELECT *
+    FROM TABLE(DEDEMO.GAMING.PIPELINE_LATENCY_PERCENTILES(
+        DATEADD(hour, -24, CURRENT_TIMESTAMP())::TIMESTAMP_NTZ,
+        CURRENT_TIMESTAMP()::TIMESTAMP_NTZ
+    ))
+)
+SELECT
+    CASE STAGE
+        WHEN 'CDC Replication' THEN 1
+        WHEN 'Dynamic Table Refresh' THEN 2
+        WHEN 'Batch to SFTP Upload' THEN 3
+    END as STAGE_ORDER,
+    STAGE,
+    AVG_SEC,
+    MAX_SEC,
+    SAMPLES,
+    P50_SEC,
+    P95_SEC,
+    P99_SEC
+FROM stage_stats
+
+UNION ALL
+
+-- Sums of per-stage values: an upper-bound style estimate, not a true percentile
+SELECT
+    4 as STAGE_ORDER,
+    'TOTAL END-TO-END' as STAGE,
+    (SELECT SUM(AVG_SEC) FROM stage_stats) as AVG_SEC,
+    (SELECT SUM(MAX_SEC) FROM stage_stats) as MAX_SEC,
+    NULL as SAMPLES,
+    (SELECT SUM(P50_SEC) FROM stage_stats) as P50_SEC,
+    (SELECT SUM(P95_SEC) FROM stage_stats) as P95_SEC,
+    (SELECT SUM(P99_SEC) FROM stage_stats) as P99_SEC
+
+ORDER BY STAGE_ORDER;
+
+-- Runs after the counters task so both share one warehouse resume per minute
+ALTER TASK DEDEMO.GAMING.REFRESH_PIPELINE_COUNTERS_TASK SUSPEND;
+
+CREATE OR REPLACE TASK DEDEMO.GAMING.REFRESH_PIPELINE_LATENCY_ROLLUP_TASK
+    WAREHOUSE = IDENTIFIER($WAREHOUSE_NAME)
+    COMMENT = 'Maintains PIPELINE_LATENCY_ROLLUP for latency percentiles'
+    AFTER DEDEMO.GAMING.REFRESH_PIPELINE_COUNTERS_TASK
+AS
+    CALL DEDEMO.GAMING.REFRESH_PIPELINE_LATENCY_ROLLUP();
+
+-- Populate immediately, then start the task graph
+CALL DEDEMO.GAMING.REFRESH_PIPELINE_LATENCY_ROLLUP();
+ALTER TASK DEDEMO.GAMING.REFRESH_PIPELINE_LATENCY_ROLLUP_TASK RESUME;
+ALTER TASK DEDEMO.GAMING.REFRESH_PIPELINE_COUNTERS_TASK RESUME;
+
+-- Verify
+SELECT 'Latency rollup created' AS status;
+SELECT * FROM DEDEMO.GAMING.PIPELINE_LATENCY_ANALYSIS ORDER BY STAGE_ORDER;
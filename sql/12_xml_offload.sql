@@ -0,0 +1,80 @@
+-- BOE Gaming Demo - Batch XML Offload
+-- ============================================================================
+-- Optional offload of lote XML from REGULATORY_BATCHES to gzip files on an
+-- internal stage. An offloaded row keeps only:
+--
+--   - XML_URI:    @DEDEMO.GAMING.BATCH_XML/YYYY/MM/DD/<batch_id>.xml.gz
+--   - XML_BYTES:  uncompressed UTF-8 size of the document
+--   - XML_SHA256: SHA-256 of the uncompressed document
+--
+-- and GENERATED_XML is set to NULL. The BoeGamingReport flow fetches a
+-- presigned URL for offloaded rows and LoadBatchXml streams and verifies
+-- the file; rows that still carry GENERATED_XML pass through unchanged, so
+-- the offload can be switched on or off at any time.
+--
+-- The procedure handler lives in sql/python/batch_xml_store.py, which also
+-- has a local-directory store and the loader used by
+-- testing/batch_xml_offload_check.py.
+--
+-- Enable the offload:   ALTER TASK DEDEMO.GAMING.OFFLOAD_BATCH_XML_TASK RESUME;
+-- Offload on demand:    CALL DEDEMO.GAMING.OFFLOAD_BATCH_XML();
+--
+-- IMPORTANT: This file should be deployed via stage upload ($$ procedure body
+-- and Python import).
+--
+-- Deployment method:
+--   ./run_sql.sh <connection> 12_xml_offload.sql --stage-upload
+--
+-- Run after: 05_procedures.sql (needs REGULATORY_BATCHES and UDF_CODE)
+-- ============================================================================
+
+USE ROLE IDENTIFIER($RUNTIME_ROLE);
+USE SCHEMA DEDEMO.GAMING;
+
+-- Offload columns (already present on a fresh 03_tables.sql deployment)
+ALTER TABLE DEDEMO.GAMING.REGULATORY_BATCHES ADD COLUMN IF NOT EXISTS XML_URI VARCHAR(1000);
+ALTER TABLE DEDEMO.GAMING.REGULATORY_BATCHES ADD COLUMN IF NOT EXISTS XML_BYTES NUMBER(38,0);
+ALTER TABLE DEDEMO.GAMING.REGULATORY_BATCHES ADD COLUMN IF NOT EXISTS XML_SHA256 VARCHAR(64);
+
+-- Server-side encryption is required for GET_PRESIGNED_URL downloads
+CREATE STAGE IF NOT EXISTS DEDEMO.GAMING.BATCH_XML
+    ENCRYPTION = (TYPE = 'SNOWFLAKE_SSE')
+    DIRECTORY = (ENABLE = FALSE)
+    COMMENT = 'Gzip-compressed lote XML offloaded from REGULATORY_BATCHES';
+
+-- Moves inline GENERATED_XML (oldest first) to the stage and records URI, size and hash
+CREATE OR REPLACE PROCEDURE DEDEMO.GAMING.OFFLOAD_BATCH_XML(
+    P_BATCH_IDS ARRAY DEFAULT NULL,
+    P_MAX_BATCHES NUMBER DEFAULT 500
+)
+RETURNS VARCHAR
+LANGUAGE PYTHON
+RUNTIME_VERSION = '3.11'
+PACKAGES = ('snowflake-snowpark-python')
+IMPORTS = ('@DEDEMO.GAMING.UDF_CODE/batch_xml_store.py')
+HANDLER = 'offload'
+EXECUTE AS CALLER
+AS
+$$
+from batch_xml_store import offload_batches
+
+
+def offload(session, p_batch_ids, p_max_batches):
+    return offload_batches(session, batch_ids=p_batch_ids, max_batches=p_max_batches)
+$$;
+
+-- Created suspended: resuming it is what switches the offload on
+CREATE OR REPLACE TASK DEDEMO.GAMING.OFFLOAD_BATCH_XML_TASK
+    WAREHOUSE = IDENTIFIER($WAREHOUSE_NAME)
+    SCHEDULE = '1 minute'
+    COMMENT = 'Offloads GENERATED_XML to @DEDEMO.GAMING.BATCH_XML'
+AS
+    CALL DEDEMO.GAMING.OFFLOAD_BATCH_XML();
+
+-- Verify
+SELECT 'Batch XML offload created' AS status;
+SELECT
+    COUNT_IF(GENERATED_XML IS NOT NULL) AS INLINE_BATCHES,
+    COUNT_IF(XML_URI IS NOT NULL) AS OFFLOADED_BATCHES,
+    SUM(XML_BYTES) AS OFFLOADED_XML_BYTES
+FROM DEDEMO.GAMING.REGULATORY_BATCHES;
@@ -0,0 +1,141 @@
+-- BOE Gaming Demo - Batch Leasing
+-- ============================================================================
+-- Atomic claim of GENERATED batches for the BoeGamingReport flow. Replaces
+-- the ExecuteSQLRecord query + SQL Post-Query pair, whose UPDATE re-ran the
+-- same LIMIT 50 subquery and could claim batches other than the ones that
+-- were read (and forced the processor onto one thread on one node).
+--
+--   - LEASE_REGULATORY_BATCHES claims up to N batches for one lease ID and
+--     returns exactly those rows. Claimers are serialized on a one-row lock
+--     table, so concurrent callers (threads or nodes) get disjoint batches.
+--   - A claim sets STATUS = 'PROCESSING' with LEASE_OWNER, LEASE_ID and
+--     LEASE_EXPIRES_AT. PROCESSING batches whose lease has expired (the
+--     delivery failed or the node went away) are reclaimed by the next call,
+--     up to P_MAX_ATTEMPTS leases per batch.
+--
+-- The LeaseRegulatoryBatches processor (custom_processors/) calls the
+-- procedure and sizes each lease from how fast the flow drains it.
+--
+-- IMPORTANT: This file should be deployed via stage upload ($$ procedure body).
+--
+-- Deployment method:
+--   ./run_sql.sh <connection> 13_batch_leasing.sql --stage-upload
+--
+-- Run after: 12_xml_offload.sql (returns presigned URLs for offloaded XML)
+-- ============================================================================
+
+USE ROLE IDENTIFIER($RUNTIME_ROLE);
+USE SCHEMA DEDEMO.GAMING;
+
+-- Lease columns (already present on a fresh 03_tables.sql deployment)
+ALTER TABLE DEDEMO.GAMING.REGULATORY_BATCHES ADD COLUMN IF NOT EXISTS LEASE_OWNER VARCHAR(200);
+ALTER TABLE DEDEMO.GAMING.REGULATORY_BATCHES ADD COLUMN IF NOT EXISTS LEASE_ID VARCHAR(50);
+ALTER TABLE DEDEMO.GAMING.REGULATORY_BATCHES ADD COLUMN IF NOT EXISTS LEASE_EXPIRES_AT TIMESTAMP_NTZ(9);
+ALTER TABLE DEDEMO.GAMING.REGULATORY_BATCHES ADD COLUMN IF NOT EXISTS LEASE_COUNT NUMBER(38,0);
+
+-- One row per leased table; updating it inside the claim transaction
+-- serializes claimers until COMMIT
+CREATE TABLE IF NOT EXISTS DEDEMO.GAMING.BATCH_LEASE_LOCK (
+    LOCK_NAME VARCHAR(50) NOT NULL PRIMARY KEY,
+    LOCKED_BY VARCHAR(200),
+    LOCKED_AT TIMESTAMP_NTZ(9)
+)
+COMMENT = 'Serializes LEASE_REGULATORY_BATCHES claimers';
+
+MERGE INTO DEDEMO.GAMING.BATCH_LEASE_LOCK t
+USING (SELECT 'REGULATORY_BATCHES' as LOCK_NAME) s
+ON t.LOCK_NAME = s.LOCK_NAME
+WHEN NOT MATCHED THEN INSERT (LOCK_NAME) VALUES (s.LOCK_NAME);
+
+CREATE OR REPLACE PROCEDURE DEDEMO.GAMING.LEASE_REGULATORY_BATCHES(
+    P_LEASE_OWNER VARCHAR,
+    P_LEASE_ID VARCHAR,
+    P_MAX_BATCHES NUMBER DEFAULT 50,
+    P_LEASE_SECONDS NUMBER DEFAULT 300,
+    P_MAX_ATTEMPTS NUMBER DEFAULT 5
+)
+RETURNS TABLE (
+    BATCH_ID VARCHAR,
+    OPERATOR_ID VARCHAR,
+    WAREHOUSE_ID VARCHAR,
+    BATCH_TIMESTAMP TIMESTAMP_NTZ,
+    GENERATED_XML VARCHAR,
+    GENERATED_FILENAME VARCHAR,
+    SFTP_DIRECTORY_PATH VARCHAR,
+    XML_BYTES NUMBER,
+    XML_SHA256 VARCHAR,
+    XML_URL VARCHAR,
+    LEASE_ID VARCHAR,
+    LEASE_EXPIRES_AT TIMESTAMP_NTZ,
+    LEASE_COUNT NUMBER
+)
+LANGUAGE SQL
+EXECUTE AS OWNER
+AS
+$$
+DECLARE
+    lease_expires TIMESTAMP_NTZ;
+    res RESULTSET;
+BEGIN
+    BEGIN TRANSACTION;
+
+    -- Held until COMMIT: the candidate read below sees every earlier claim
+    UPDATE DEDEMO.GAMING.BATCH_LEASE_LOCK
+    SET LOCKED_BY = :p_lease_owner, LOCKED_AT = CURRENT_TIMESTAMP()
+    WHERE LOCK_NAME = 'REGULATORY_BATCHES';
+
+    lease_expires := DATEADD(second, :p_lease_seconds, CURRENT_TIMESTAMP());
+
+    UPDATE DEDEMO.GAMING.REGULATORY_BATCHES
+    SET STATUS = 'PROCESSING',
+        LEASE_OWNER = :p_lease_owner,
+        LEASE_ID = :p_lease_id,
+        LEASE_EXPIRES_AT = :lease_expires,
+        LEASE_COUNT = COALESCE(LEASE_COUNT, 0) + 1
+    WHERE BATCH_ID IN (
+        SELECT BATCH_ID
+        FROM DEDEMO.GAMING.REGULATORY_BATCHES
+        WHERE STATUS = 'GENERATED'
+           OR (STATUS = 'PROCESSING'
+               AND LEASE_EXPIRES_AT < CURRENT_TIMESTAMP()
+               AND COALESCE(LEASE_COUNT, 0) < :p_max_attempts)
+        QUALIFY ROW_NUMBER() OVER (ORDER BY BATCH_TIMESTAMP, BATCH_ID) <= :p_max_batches
+    );
+
+    COMMIT;
+
+    res := (
+        SELECT
+            BATCH_ID,
+            OPERATOR_ID,
+            WAREHOUSE_ID,
+            BATCH_TIMESTAMP,
+            GENERATED_XML,
+            GENERATED_FILENAME,
+            SFTP_DIRECTORY_PATH,
+            XML_BYTES,
+            XML_SHA256,
+            CASE WHEN XML_URI LIKE '@%'
+                THEN GET_PRESIGNED_URL(@DEDEMO.GAMING.BATCH_XML, REGEXP_REPLACE(XML_URI, '^@[^/]+/', ''), 3600)
+                ELSE XML_URI
+            END as XML_URL,
+            LEASE_ID,
+            LEASE_EXPIRES_AT,
+            LEASE_COUNT
+        FROM DEDEMO.GAMING.REGULATORY_BATCHES
+        WHERE LEASE_ID = :p_lease_id
+        ORDER BY BATCH_TIMESTAMP, BATCH_ID
+    );
+    RETURN TABLE(res);
+END;
+$$;
+
+-- Verify
+SELECT 'Batch leasing created' AS status;
+SELECT
+    STATUS,
+    COUNT(*) AS BATCHES,
+    COUNT_IF(LEASE_EXPIRES_AT < CURRENT_TIMESTAMP()) AS EXPIRED_LEASES,
+    MAX(LEASE_COUNT) AS MAX_LEASES
+FROM DEDEMO.GAMING.REGULATORY_BATCHES
+GROUP BY STATUS;
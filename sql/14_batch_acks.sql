@@ -0,0 +1,76 @@
+-- BOE Gaming Demo - Coalesced Upload Acknowledgments
+-- ============================================================================
+-- Marks uploaded batches in one statement per group of acknowledgments.
+-- Replaces the BoeGamingReport ExecuteSQL step, which ran one UPDATE per
+-- uploaded batch with the batch ID interpolated into the SQL text.
+--
+--   - ACK_UPLOADED_BATCHES takes a JSON array of
+--     {"batch_id": ..., "uploaded_at": ...} objects as a bound parameter and
+--     applies it with a single MERGE. UPLOAD_TIMESTAMP is the time the SFTP
+--     upload finished (sftp.upload.timestamp, UTC) converted to the session
+--     time zone like CURRENT_TIMESTAMP(); missing or unparseable times fall
+--     back to CURRENT_TIMESTAMP().
+--   - Returns the batches that are now UPLOADED, so the caller can fail the
+--     acknowledgments whose batch does not exist.
+--
+-- The AcknowledgeRegulatoryBatches processor (custom_processors/
+-- LeaseRegulatoryBatches) groups acknowledgments from concurrent tasks into
+-- one call.
+--
+-- IMPORTANT: This file should be deployed via stage upload ($$ procedure body).
+--
+-- Deployment method:
+--   ./run_sql.sh <connection> 14_batch_acks.sql --stage-upload
+--
+-- Run after: 13_batch_leasing.sql (clears the lease of acknowledged batches)
+-- ============================================================================
+
+USE ROLE IDENTIFIER($RUNTIME_ROLE);
+USE SCHEMA DEDEMO.GAMING;
+
+CREATE OR REPLACE PROCEDURE DEDEMO.GAMING.ACK_UPLOADED_BATCHES(P_ACKS VARCHAR)
+RETURNS TABLE (
+    BATCH_ID VARCHAR,
+    UPLOAD_TIMESTAMP TIMESTAMP_NTZ
+)
+LANGUAGE SQL
+EXECUTE AS OWNER
+AS
+$$
+DECLARE
+    res RESULTSET;
+BEGIN
+    MERGE INTO DEDEMO.GAMING.REGULATORY_BATCHES t
+    USING (
+        SELECT
+            f.value:batch_id::VARCHAR as BATCH_ID,
+            COALESCE(
+                TRY_TO_TIMESTAMP_TZ(f.value:uploaded_at::VARCHAR)::TIMESTAMP_LTZ::TIMESTAMP_NTZ,
+                CURRENT_TIMESTAMP()::TIMESTAMP_NTZ
+            ) as UPLOAD_TIMESTAMP
+        FROM TABLE(FLATTEN(INPUT => PARSE_JSON(:p_acks))) f
+        QUALIFY ROW_NUMBER() OVER (PARTITION BY BATCH_ID ORDER BY UPLOAD_TIMESTAMP) = 1
+    ) s
+    ON t.BATCH_ID = s.BATCH_ID
+    -- A batch delivered twice (expired lease) keeps its first upload time
+    WHEN MATCHED AND t.STATUS != 'UPLOADED' THEN UPDATE SET
+        STATUS = 'UPLOADED',
+        UPLOAD_TIMESTAMP = s.UPLOAD_TIMESTAMP,
+        LEASE_EXPIRES_AT = NULL;
+
+    res := (
+        SELECT BATCH_ID, UPLOAD_TIMESTAMP
+        FROM DEDEMO.GAMING.REGULATORY_BATCHES
+        WHERE STATUS = 'UPLOADED'
+          AND BATCH_ID IN (
+              SELECT f.value:batch_id::VARCHAR
+              FROM TABLE(FLATTEN(INPUT => PARSE_JSON(:p_acks))) f
+          )
+    );
+    RETURN TABLE(res);
+END;
+$$;
+
+-- Verify
+SELECT 'Upload acknowledgments created' AS status;
+SHOW PROCEDURES LIKE 'ACK_UPLOADED_BATCHES' IN SCHEMA DEDEMO.GAMING;
@@ -0,0 +1,76 @@
+-- BOE Gaming Demo - Size-Targeted Batch Assembly
+-- ============================================================================
+-- Processes the batches closed by the AssembleRegulatoryBatches processor
+-- (custom_processors/AssembleRegulatoryBatches), which replaces the
+-- count-based MergeRecord in Batch_Processing.
+--
+--   - The processor tags every record with the BATCH_ID of its tournament's
+--     open batch and the records are staged into BATCH_STAGING right away.
+--     A batch closes when its predicted archive size reaches the target or
+--     its deadline passes, and the closed BATCH_IDs ride on the next
+--     FlowFile (batch.closed.ids).
+--   - PROCESS_ASSEMBLED_BATCHES runs as the Write Audit Record post-SQL and
+--     hands the closed batches to PROCESS_STAGED_BATCHES in one call.
+--   - Each call also sweeps stale batches: staged batches whose newest row
+--     is older than P_STALE_SECONDS (two assembler deadlines,
+--     batch.stale.seconds). The assembler has closed those long ago, so this
+--     recovers a batch whose closing FlowFile was lost or never processed,
+--     and the batches a processor restart left open. A batch that is still
+--     open always has a row younger than one deadline, so it is never swept.
+--
+-- IMPORTANT: This file should be deployed via stage upload ($$ procedure body).
+--
+-- Deployment method:
+--   ./run_sql.sh <connection> 15_batch_assembly.sql --stage-upload
+--
+-- Run after: 05_procedures.sql (calls PROCESS_STAGED_BATCHES)
+-- ============================================================================
+
+USE ROLE IDENTIFIER($RUNTIME_ROLE);
+USE SCHEMA DEDEMO.GAMING;
+
+-- Earlier signatures took the open batches after a restart; drop them so
+-- the flow's two-argument call is not ambiguous
+DROP PROCEDURE IF EXISTS DEDEMO.GAMING.PROCESS_ASSEMBLED_BATCHES(VARCHAR, VARCHAR, NUMBER);
+DROP PROCEDURE IF EXISTS DEDEMO.GAMING.PROCESS_ASSEMBLED_BATCHES(VARCHAR, VARCHAR);
+
+-- P_CLOSED_IDS:    JSON array of closed BATCH_IDs ('' or '[]' for none)
+-- P_STALE_SECONDS: Staged batches with no row newer than this are processed
+--                  as well (NULL: no sweep)
+CREATE OR REPLACE PROCEDURE DEDEMO.GAMING.PROCESS_ASSEMBLED_BATCHES(
+    P_CLOSED_IDS VARCHAR,
+    P_STALE_SECONDS NUMBER DEFAULT NULL
+)
+RETURNS VARCHAR
+LANGUAGE SQL
+EXECUTE AS OWNER
+AS
+$$
+DECLARE
+    batch_ids ARRAY;
+    result VARCHAR;
+BEGIN
+    SELECT ARRAY_AGG(DISTINCT BATCH_ID) INTO batch_ids
+    FROM (
+        SELECT VALUE::STRING AS BATCH_ID
+        FROM TABLE(FLATTEN(INPUT => PARSE_JSON(NULLIF(TRIM(:p_closed_ids), ''))))
+        UNION ALL
+        SELECT BATCH_ID
+        FROM DEDEMO.GAMING.BATCH_STAGING
+        WHERE :p_stale_seconds IS NOT NULL
+        GROUP BY BATCH_ID
+        HAVING MAX(BATCH_INSERT_TIME) < DATEADD(SECOND, -:p_stale_seconds, CURRENT_TIMESTAMP()::TIMESTAMP_NTZ)
+    );
+
+    IF (batch_ids IS NULL OR ARRAY_SIZE(batch_ids) = 0) THEN
+        RETURN 'No batches closed';
+    END IF;
+
+    CALL DEDEMO.GAMING.PROCESS_STAGED_BATCHES(:batch_ids) INTO :result;
+    RETURN result;
+END;
+$$;
+
+-- Verify
+SELECT 'Batch assembly created' AS status;
+SHOW PROCEDURES LIKE 'PROCESS_ASSEMBLED_BATCHES' IN SCHEMA DEDEMO.GAMING;
@@ -0,0 +1,226 @@
+-- BOE Gaming Demo - OpenFlow Log Table
+-- ============================================================================
+-- Incrementally loaded, pre-parsed copy of the OpenFlow runtime logs.
+-- OPENFLOW.OPENFLOW.EVENTS keeps each log line as logback JSON text, and the
+-- former OPENFLOW_LOGS view parsed it on every query of the Logs tab, the
+-- Overview error count, OPENFLOW_ERROR_SUMMARY and Cortex. Each event is now
+-- parsed once, by PARSE_OPENFLOW_LOG_EVENT, into typed columns:
+--
+--   - level, logger, process group, thread, processor name and type
+--   - message, exception and exception class, component ID
+--   - MESSAGE_PATTERN: the message with IDs, FlowFile records, URLs, paths,
+--     timestamps, addresses and numbers replaced by placeholders
+--   - MESSAGE_FINGERPRINT: a 16-character hash of MESSAGE_PATTERN, so that
+--     repeats of one failure group together
+--
+-- A task loads the events after the last watermark, re-reading a 15-minute
+-- overlap for events that reach the event table late, and deletes events
+-- older than the retention period (30 days). The table is clustered by day
+-- and level, which is how every consumer filters it.
+--
+-- OPENFLOW_LOGS is (re)defined here on top of the table and keeps its
+-- original columns. OPENFLOW_ERROR_SUMMARY is created by 17_error_rollup.sql
+-- on top of the hourly error rollup.
+--
+-- The parser lives in sql/python/openflow_log.py and is checked offline
+-- against sample events by testing/openflow_log_check.py.
+--
+-- IMPORTANT: This file should be deployed via stage upload ($$ procedure body
+-- and Python import).
+--
+-- Deployment method:
+--   ./run_sql.sh <connection> 16_openflow_logs.sql --stage-upload
+--
+-- Run after: 11_latency_rollup.sql (needs ROLLUP_WATERMARKS; the load task
+--            runs after REFRESH_PIPELINE_COUNTERS_TASK)
+-- ============================================================================
+
+USE ROLE IDENTIFIER($RUNTIME_ROLE);
+USE SCHEMA DEDEMO.GAMING;
+
+-- One row per OpenFlow runtime LOG event
+CREATE TABLE IF NOT EXISTS DEDEMO.GAMING.OPENFLOW_LOG_EVENTS (
+    EVENT_TIMESTAMP TIMESTAMP_NTZ(9) NOT NULL,
+    EVENT_HASH NUMBER(19,0) NOT NULL,
+    LOG_LEVEL VARCHAR(10),
+    LOGGER VARCHAR,
+    PROCESS_GROUP VARCHAR,
+    PROCESS_GROUP_PATH VARCHAR,
+    THREAD_NAME VARCHAR,
+    PROCESSOR_NAME VARCHAR,
+    PROCESSOR_TYPE VARCHAR,
+    COMPONENT_ID VARCHAR(36),
+    MESSAGE VARCHAR,
+    EXCEPTION VARCHAR,
+    EXCEPTION_CLASS VARCHAR,
+    MESSAGE_PATTERN VARCHAR(1000),
+    MESSAGE_FINGERPRINT VARCHAR(16),
+    RAW_VALUE VARIANT,
+    LOADED_AT TIMESTAMP_NTZ(9)
+)
+CLUSTER BY (TO_DATE(EVENT_TIMESTAMP), LOG_LEVEL)
+DATA_RETENTION_TIME_IN_DAYS = 1
+COMMENT = 'Pre-parsed OpenFlow runtime log events, loaded incrementally from OPENFLOW.OPENFLOW.EVENTS';
+
+-- Typed columns of one event as an OBJECT (NULL when VALUE is not JSON)
+CREATE OR REPLACE FUNCTION DEDEMO.GAMING.PARSE_OPENFLOW_LOG_EVENT(
+    VALUE VARIANT,
+    RESOURCE_ATTRIBUTES VARIANT
+)
+RETURNS VARIANT
+LANGUAGE PYTHON
+RUNTIME_VERSION = '3.11'
+PACKAGES = ('pandas')
+IMPORTS = ('@DEDEMO.GAMING.UDF_CODE/openflow_log.py')
+HANDLER = 'parse'
+AS $$
+import pandas
+from _snowflake import vectorized
+from openflow_log import parse_event
+
+@vectorized(input=pandas.DataFrame)
+def parse(df):
+    return pandas.Series([parse_event(value, attributes) for value, attributes in zip(df[0], df[1])])
+$$;
+
+CREATE OR REPLACE PROCEDURE DEDEMO.GAMING.REFRESH_OPENFLOW_LOG_EVENTS(
+    P_RETENTION_DAYS NUMBER DEFAULT 30
+)
+RETURNS VARCHAR
+LANGUAGE SQL
+AS
+$$
+DECLARE
+    watermark TIMESTAMP_NTZ;
+    overlap_start TIMESTAMP_NTZ;
+    new_events NUMBER;
+    expired_events NUMBER;
+BEGIN
+    SELECT COALESCE(MAX(WATERMARK), DATEADD(day, -:P_RETENTION_DAYS, CURRENT_TIMESTAMP())::TIMESTAMP_NTZ)
+    INTO :watermark
+    FROM DEDEMO.GAMING.ROLLUP_WATERMARKS
+    WHERE ROLLUP_NAME = 'OPENFLOW_LOGS';
+
+    -- Events reach the event table out of order: re-read an overlap window
+    -- and skip the events already loaded
+    overlap_start := DATEADD(minute, -15, :watermark);
+
+    CREATE OR REPLACE TEMPORARY TABLE OPENFLOW_LOG_DELTA AS
+    SELECT
+        TIMESTAMP::TIMESTAMP_NTZ as EVENT_TIMESTAMP,
+        HASH(TIMESTAMP, VALUE, RESOURCE_ATTRIBUTES) as EVENT_HASH,
+        VALUE as RAW_VALUE,
+        DEDEMO.GAMING.PARSE_OPENFLOW_LOG_EVENT(VALUE, RESOURCE_ATTRIBUTES) as PARSED
+    FROM OPENFLOW.OPENFLOW.EVENTS
+    WHERE RECORD_TYPE = 'LOG'
+      AND RESOURCE_ATTRIBUTES:"k8s.namespace.name"::STRING LIKE 'runtime-%'
+      AND TIMESTAMP > :overlap_start;
+
+    MERGE INTO DEDEMO.GAMING.OPENFLOW_LOG_EVENTS t
+    USING (
+        SELECT
+            EVENT_TIMESTAMP,
+            EVENT_HASH,
+            LEFT(PARSED:LOG_LEVEL::STRING, 10) as LOG_LEVEL,
+            PARSED:LOGGER::STRING as LOGGER,
+            PARSED:PROCESS_GROUP::STRING as PROCESS_GROUP,
+            PARSED:PROCESS_GROUP_PATH::STRING as PROCESS_GROUP_PATH,
+            PARSED:THREAD_NAME::STRING as THREAD_NAME,
+            PARSED:PROCESSOR_NAME::STRING as PROCESSOR_NAME,
+            PARSED:PROCESSOR_TYPE::STRING as PROCESSOR_TYPE,
+            PARSED:COMPONENT_ID::STRING as COMPONENT_ID,
+            PARSED:MESSAGE::STRING as MESSAGE,
+            PARSED:EXCEPTION::STRING as EXCEPTION,
+            PARSED:EXCEPTION_CLASS::STRING as EXCEPTION_CLASS,
+            PARSED:MESSAGE_PATTERN::STRING as MESSAGE_PATTERN,
+            PARSED:MESSAGE_FINGERPRINT::STRING as MESSAGE_FINGERPRINT,
+            RAW_VALUE
+        FROM OPENFLOW_LOG_DELTA
+        WHERE PARSED IS NOT NULL
+    ) s
+    ON t.EVENT_TIMESTAMP = s.EVENT_TIMESTAMP
+       AND t.EVENT_HASH = s.EVENT_HASH
+       AND t.EVENT_TIMESTAMP > :overlap_start
+    WHEN NOT MATCHED THEN INSERT (
+        EVENT_TIMESTAMP, EVENT_HASH, LOG_LEVEL, LOGGER, PROCESS_GROUP, PROCESS_GROUP_PATH, THREAD_NAME,
+        PROCESSOR_NAME, PROCESSOR_TYPE, COMPONENT_ID, MESSAGE, EXCEPTION, EXCEPTION_CLASS,
+        MESSAGE_PATTERN, MESSAGE_FINGERPRINT, RAW_VALUE, LOADED_AT
+    ) VALUES (
+        s.EVENT_TIMESTAMP, s.EVENT_HASH, s.LOG_LEVEL, s.LOGGER, s.PROCESS_GROUP, s.PROCESS_GROUP_PATH, s.THREAD_NAME,
+        s.PROCESSOR_NAME, s.PROCESSOR_TYPE, s.COMPONENT_ID, s.MESSAGE, s.EXCEPTION, s.EXCEPTION_CLASS,
+        s.MESSAGE_PATTERN, s.MESSAGE_FINGERPRINT, s.RAW_VALUE, CURRENT_TIMESTAMP()
+    );
+    new_events := SQLROWCOUNT;
+
+    MERGE INTO DEDEMO.GAMING.ROLLUP_WATERMARKS t
+    USING (
+        SELECT 'OPENFLOW_LOGS' as ROLLUP_NAME, MAX(EVENT_TIMESTAMP) as WATERMARK
+        FROM OPENFLOW_LOG_DELTA
+        HAVING MAX(EVENT_TIMESTAMP) > :watermark
+    ) s
+    ON t.ROLLUP_NAME = s.ROLLUP_NAME
+    WHEN MATCHED THEN UPDATE SET WATERMARK = s.WATERMARK, UPDATED_AT = CURRENT_TIMESTAMP()
+    WHEN NOT MATCHED THEN INSERT (ROLLUP_NAME, WATERMARK, UPDATED_AT)
+        VALUES (s.ROLLUP_NAME, s.WATERMARK, CURRENT_TIMESTAMP());
+
+    -- Retention: the clustering key makes this a whole-partition delete
+    DELETE FROM DEDEMO.GAMING.OPENFLOW_LOG_EVENTS
+    WHERE EVENT_TIMESTAMP < DATEADD(day, -:P_RETENTION_DAYS, CURRENT_TIMESTAMP());
+    expired_events := SQLROWCOUNT;
+
+    RETURN 'Loaded ' || :new_events || ' log events, expired ' || :expired_events;
+END;
+$$;
+
+-- =============================================================================
+-- View: OPENFLOW_LOGS
+-- Parsed OpenFlow logs (same columns as the former parsing view, plus the
+-- fingerprint columns)
+-- =============================================================================
+
+CREATE OR REPLACE VIEW DEDEMO.GAMING.OPENFLOW_LOGS
+AS
+SELECT
+    EVENT_TIMESTAMP,
+    LOG_LEVEL,
+    LOGGER,
+    PROCESS_GROUP,
+    PROCESS_GROUP_PATH,
+    THREAD_NAME,
+    MESSAGE,
+    EXCEPTION,
+    PROCESSOR_NAME,
+    PROCESSOR_TYPE,
+    RAW_VALUE,
+    EXCEPTION_CLASS,
+    COMPONENT_ID,
+    MESSAGE_PATTERN,
+    MESSAGE_FINGERPRINT
+FROM DEDEMO.GAMING.OPENFLOW_LOG_EVENTS;
+
+-- Runs after the counters task so all three share one warehouse resume per minute
+ALTER TASK DEDEMO.GAMING.REFRESH_PIPELINE_COUNTERS_TASK SUSPEND;
+
+CREATE OR REPLACE TASK DEDEMO.GAMING.REFRESH_OPENFLOW_LOG_EVENTS_TASK
+    WAREHOUSE = IDENTIFIER($WAREHOUSE_NAME)
+    COMMENT = 'Loads new OpenFlow log events into OPENFLOW_LOG_EVENTS and applies retention'
+    AFTER DEDEMO.GAMING.REFRESH_PIPELINE_COUNTERS_TASK
+AS
+    CALL DEDEMO.GAMING.REFRESH_OPENFLOW_LOG_EVENTS();
+
+-- Load the last 30 days now, then start the task graph
+CALL DEDEMO.GAMING.REFRESH_OPENFLOW_LOG_EVENTS();
+ALTER TASK DEDEMO.GAMING.REFRESH_OPENFLOW_LOG_EVENTS_TASK RESUME;
+ALTER TASK DEDEMO.GAMING.REFRESH_PIPELINE_COUNTERS_TASK RESUME;
+
+-- Verify
+SELECT 'OpenFlow log table created' AS status;
+SELECT
+    LOG_LEVEL,
+    COUNT(*) AS EVENTS,
+    COUNT(DISTINCT MESSAGE_FINGERPRINT) AS FINGERPRINTS,
+    MIN(EVENT_TIMESTAMP) AS OLDEST,
+    MAX(EVENT_TIMESTAMP) AS NEWEST
+FROM DEDEMO.GAMING.OPENFLOW_LOG_EVENTS
+GROUP BY LOG_LEVEL
+ORDER BY EVENTS DESC;
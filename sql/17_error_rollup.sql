@@ -0,0 +1,293 @@
+-- BOE Gaming Demo - OpenFlow Error Rollup
+-- ============================================================================
+-- Incrementally maintained hourly rollup of OpenFlow errors and warnings,
+-- keyed by message fingerprint, and the templates that group fingerprints
+-- into recurring failures.
+--
+--   - OPENFLOW_ERROR_ROLLUP: one row per hour, level, process group,
+--     component and fingerprint, folded in from the events loaded into
+--     OPENFLOW_LOG_EVENTS since the last watermark (by LOADED_AT, so late
+--     events are counted in their own hour)
+--   - OPENFLOW_LOG_FINGERPRINTS: each fingerprint's pattern and template
+--   - OPENFLOW_LOG_TEMPLATES: Drain-style templates mined from the patterns
+--     by MINE_OPENFLOW_LOG_TEMPLATES, with <*> for the tokens that masking
+--     leaves variable (host names, processor names, free text)
+--
+-- OPENFLOW_ERROR_SUMMARY is (re)defined here on top of the rollup and keeps
+-- its columns. OPENFLOW_RECURRING_FAILURES(start, end) ranks templates for
+-- any window; the Observability tab shows its top rows.
+--
+-- The miner lives in sql/python/openflow_log.py and is checked offline by
+-- testing/openflow_log_check.py.
+--
+-- IMPORTANT: This file should be deployed via stage upload ($$ procedure body
+-- and Python import).
+--
+-- Deployment method:
+--   ./run_sql.sh <connection> 17_error_rollup.sql --stage-upload
+--
+-- Run after: 16_openflow_logs.sql (the rollup task runs after
+--            REFRESH_OPENFLOW_LOG_EVENTS_TASK)
+-- ============================================================================
+
+USE ROLE IDENTIFIER($RUNTIME_ROLE);
+USE SCHEMA DEDEMO.GAMING;
+
+-- One row per hour, level, process group, component and fingerprint
+CREATE TABLE IF NOT EXISTS DEDEMO.GAMING.OPENFLOW_ERROR_ROLLUP (
+    HOUR TIMESTAMP_NTZ(9) NOT NULL,
+    LOG_LEVEL VARCHAR(10) NOT NULL,
+    PROCESS_GROUP VARCHAR NOT NULL,
+    COMPONENT VARCHAR NOT NULL,
+    MESSAGE_FINGERPRINT VARCHAR(16) NOT NULL,
+    EVENTS NUMBER(38,0),
+    FIRST_SEEN TIMESTAMP_NTZ(9),
+    LAST_SEEN TIMESTAMP_NTZ(9),
+    EXCEPTION_CLASS VARCHAR,
+    SAMPLE_MESSAGE VARCHAR(2000),
+    UPDATED_AT TIMESTAMP_NTZ(9),
+    PRIMARY KEY (HOUR, LOG_LEVEL, PROCESS_GROUP, COMPONENT, MESSAGE_FINGERPRINT)
+)
+CLUSTER BY (HOUR)
+COMMENT = 'Hourly OpenFlow error and warning counts per message fingerprint';
+
+CREATE TABLE IF NOT EXISTS DEDEMO.GAMING.OPENFLOW_LOG_FINGERPRINTS (
+    MESSAGE_FINGERPRINT VARCHAR(16) NOT NULL PRIMARY KEY,
+    MESSAGE_PATTERN VARCHAR(1000),
+    TEMPLATE_ID VARCHAR(16),
+    FIRST_SEEN TIMESTAMP_NTZ(9),
+    LAST_SEEN TIMESTAMP_NTZ(9)
+)
+COMMENT = 'Message pattern and mined template of each error fingerprint';
+
+CREATE TABLE IF NOT EXISTS DEDEMO.GAMING.OPENFLOW_LOG_TEMPLATES (
+    TEMPLATE_ID VARCHAR(16) NOT NULL PRIMARY KEY,
+    TEMPLATE VARCHAR(1000),
+    TOKEN_COUNT NUMBER(5,0),
+    CREATED_AT TIMESTAMP_NTZ(9),
+    UPDATED_AT TIMESTAMP_NTZ(9)
+)
+COMMENT = 'Drain-style templates grouping error fingerprints into recurring failures';
+
+-- Assigns a template to every fingerprint that has none yet
+CREATE OR REPLACE PROCEDURE DEDEMO.GAMING.MINE_OPENFLOW_LOG_TEMPLATES(
+    P_SIMILARITY FLOAT DEFAULT 0.4
+)
+RETURNS VARCHAR
+LANGUAGE PYTHON
+RUNTIME_VERSION = '3.11'
+PACKAGES = ('snowflake-snowpark-python')
+IMPORTS = ('@DEDEMO.GAMING.UDF_CODE/openflow_log.py')
+HANDLER = 'mine'
+AS
+$$
+from openflow_log import mine_templates
+
+
+def mine(session, p_similarity):
+    return mine_templates(session, similarity=p_similarity)
+$$;
+
+CREATE OR REPLACE PROCEDURE DEDEMO.GAMING.REFRESH_OPENFLOW_ERROR_ROLLUP(
+    P_RETENTION_DAYS NUMBER DEFAULT 90
+)
+RETURNS VARCHAR
+LANGUAGE SQL
+AS
+$$
+DECLARE
+    watermark TIMESTAMP_NTZ;
+    loaded_until TIMESTAMP_NTZ;
+    new_events NUMBER;
+    mined VARCHAR;
+BEGIN
+    SELECT COALESCE(MAX(WATERMARK), '1970-01-01'::TIMESTAMP_NTZ)
+    INTO :watermark
+    FROM DEDEMO.GAMING.ROLLUP_WATERMARKS
+    WHERE ROLLUP_NAME = 'OPENFLOW_ERRORS';
+
+    SELECT MAX(LOADED_AT) INTO :loaded_until
+    FROM DEDEMO.GAMING.OPENFLOW_LOG_EVENTS
+    WHERE LOADED_AT > :watermark;
+
+    IF (loaded_until IS NULL) THEN
+        RETURN 'No new log events';
+    END IF;
+
+    CREATE OR REPLACE TEMPORARY TABLE OPENFLOW_ERROR_DELTA AS
+    SELECT
+        DATE_TRUNC('hour', EVENT_TIMESTAMP) as HOUR,
+        LOG_LEVEL,
+        COALESCE(PROCESS_GROUP, 'System') as PROCESS_GROUP,
+        COALESCE(PROCESSOR_NAME, LOGGER, 'Unknown') as COMPONENT,
+        COALESCE(MESSAGE_FINGERPRINT, '-') as MESSAGE_FINGERPRINT,
+        MESSAGE_PATTERN,
+        EVENT_TIMESTAMP,
+        EXCEPTION_CLASS,
+        COALESCE(MESSAGE, EXCEPTION) as MESSAGE
+    FROM DEDEMO.GAMING.OPENFLOW_LOG_EVENTS
+    WHERE LOADED_AT > :watermark
+      AND LOADED_AT <= :loaded_until
+      AND LOG_LEVEL IN ('ERROR', 'WARN');
+
+    SELECT COUNT(*) INTO :new_events FROM OPENFLOW_ERROR_DELTA;
+
+    MERGE INTO DEDEMO.GAMING.OPENFLOW_ERROR_ROLLUP t
+    USING (
+        SELECT
+            HOUR,
+            LOG_LEVEL,
+            PROCESS_GROUP,
+            COMPONENT,
+            MESSAGE_FINGERPRINT,
+            COUNT(*) as EVENTS,
+            MIN(EVENT_TIMESTAMP) as FIRST_SEEN,
+            MAX(EVENT_TIMESTAMP) as LAST_SEEN,
+            MAX_BY(EXCEPTION_CLASS, EVENT_TIMESTAMP) as EXCEPTION_CLASS,
+            LEFT(MAX_BY(MESSAGE, EVENT_TIMESTAMP), 2000) as SAMPLE_MESSAGE
+        FROM OPENFLOW_ERROR_DELTA
+        GROUP BY 1, 2, 3, 4, 5
+    ) s
+    ON t.HOUR = s.HOUR
+       AND t.LOG_LEVEL = s.LOG_LEVEL
+       AND t.PROCESS_GROUP = s.PROCESS_GROUP
+       AND t.COMPONENT = s.COMPONENT
+       AND t.MESSAGE_FINGERPRINT = s.MESSAGE_FINGERPRINT
+    WHEN MATCHED THEN UPDATE SET
+        EVENTS = t.EVENTS + s.EVENTS,
+        FIRST_SEEN = LEAST(t.FIRST_SEEN, s.FIRST_SEEN),
+        LAST_SEEN = GREATEST(t.LAST_SEEN, s.LAST_SEEN),
+        EXCEPTION_CLASS = IFF(s.LAST_SEEN >= t.LAST_SEEN, s.EXCEPTION_CLASS, t.EXCEPTION_CLASS),
+        SAMPLE_MESSAGE = IFF(s.LAST_SEEN >= t.LAST_SEEN, s.SAMPLE_MESSAGE, t.SAMPLE_MESSAGE),
+        UPDATED_AT = CURRENT_TIMESTAMP()
+    WHEN NOT MATCHED THEN INSERT (
+        HOUR, LOG_LEVEL, PROCESS_GROUP, COMPONENT, MESSAGE_FINGERPRINT,
+        EVENTS, FIRST_SEEN, LAST_SEEN, EXCEPTION_CLASS, SAMPLE_MESSAGE, UPDATED_AT
+    ) VALUES (
+        s.HOUR, s.LOG_LEVEL, s.PROCESS_GROUP, s.COMPONENT, s.MESSAGE_FINGERPRINT,
+        s.EVENTS, s.FIRST_SEEN, s.LAST_SEEN, s.EXCEPTION_CLASS, s.SAMPLE_MESSAGE, CURRENT_TIMESTAMP()
+    );
+
+    -- New fingerprints wait for the miner with TEMPLATE_ID NULL
+    MERGE INTO DEDEMO.GAMING.OPENFLOW_LOG_FINGERPRINTS t
+    USING (
+        SELECT
+            MESSAGE_FINGERPRINT,
+            ANY_VALUE(MESSAGE_PATTERN) as MESSAGE_PATTERN,
+            MIN(EVENT_TIMESTAMP) as FIRST_SEEN,
+            MAX(EVENT_TIMESTAMP) as LAST_SEEN
+        FROM OPENFLOW_ERROR_DELTA
+        GROUP BY 1
+    ) s
+    ON t.MESSAGE_FINGERPRINT = s.MESSAGE_FINGERPRINT
+    WHEN MATCHED THEN UPDATE SET
+        FIRST_SEEN = LEAST(t.FIRST_SEEN, s.FIRST_SEEN),
+        LAST_SEEN = GREATEST(t.LAST_SEEN, s.LAST_SEEN)
+    WHEN NOT MATCHED THEN INSERT (MESSAGE_FINGERPRINT, MESSAGE_PATTERN, TEMPLATE_ID, FIRST_SEEN, LAST_SEEN)
+        VALUES (s.MESSAGE_FINGERPRINT, s.MESSAGE_PATTERN, NULL, s.FIRST_SEEN, s.LAST_SEEN);
+
+    MERGE INTO DEDEMO.GAMING.ROLLUP_WATERMARKS t
+    USING (SELECT 'OPENFLOW_ERRORS' as ROLLUP_NAME, :loaded_until as WATERMARK) s
+    ON t.ROLLUP_NAME = s.ROLLUP_NAME
+    WHEN MATCHED THEN UPDATE SET WATERMARK = s.WATERMARK, UPDATED_AT = CURRENT_TIMESTAMP()
+    WHEN NOT MATCHED THEN INSERT (ROLLUP_NAME, WATERMARK, UPDATED_AT)
+        VALUES (s.ROLLUP_NAME, s.WATERMARK, CURRENT_TIMESTAMP());
+
+    CALL DEDEMO.GAMING.MINE_OPENFLOW_LOG_TEMPLATES() INTO :mined;
+
+    -- Retention: hours, fingerprints and then templates nothing refers to
+    DELETE FROM DEDEMO.GAMING.OPENFLOW_ERROR_ROLLUP
+    WHERE HOUR < DATEADD(day, -:P_RETENTION_DAYS, CURRENT_TIMESTAMP());
+    DELETE FROM DEDEMO.GAMING.OPENFLOW_LOG_FINGERPRINTS
+    WHERE LAST_SEEN < DATEADD(day, -:P_RETENTION_DAYS, CURRENT_TIMESTAMP());
+    DELETE FROM DEDEMO.GAMING.OPENFLOW_LOG_TEMPLATES t
+    WHERE NOT EXISTS (
+        SELECT 1 FROM DEDEMO.GAMING.OPENFLOW_LOG_FINGERPRINTS f WHERE f.TEMPLATE_ID = t.TEMPLATE_ID
+    );
+
+    RETURN 'Rolled up ' || :new_events || ' errors and warnings; ' || :mined;
+END;
+$$;
+
+-- Templates ranked by events in a window, with the fingerprints, components
+-- and hours they span. Fingerprints not yet mined stand for themselves.
+CREATE OR REPLACE FUNCTION DEDEMO.GAMING.OPENFLOW_RECURRING_FAILURES(
+    P_START TIMESTAMP_NTZ,
+    P_END TIMESTAMP_NTZ
+)
+RETURNS TABLE (
+    TEMPLATE_ID VARCHAR,
+    TEMPLATE VARCHAR,
+    LOG_LEVEL VARCHAR,
+    EVENTS NUMBER,
+    FINGERPRINTS NUMBER,
+    COMPONENTS VARCHAR,
+    HOURS_SEEN NUMBER,
+    FIRST_SEEN TIMESTAMP_NTZ,
+    LAST_SEEN TIMESTAMP_NTZ,
+    EXCEPTION_CLASS VARCHAR,
+    SAMPLE_MESSAGE VARCHAR
+)
+AS
+$$
+    SELECT
+        COALESCE(f.TEMPLATE_ID, r.MESSAGE_FINGERPRINT),
+        ANY_VALUE(COALESCE(t.TEMPLATE, f.MESSAGE_PATTERN)),
+        r.LOG_LEVEL,
+        SUM(r.EVENTS),
+        COUNT(DISTINCT r.MESSAGE_FINGERPRINT),
+        LISTAGG(DISTINCT r.COMPONENT, ', ') WITHIN GROUP (ORDER BY r.COMPONENT),
+        COUNT(DISTINCT r.HOUR),
+        MIN(r.FIRST_SEEN),
+        MAX(r.LAST_SEEN),
+        MAX_BY(r.EXCEPTION_CLASS, r.LAST_SEEN),
+        MAX_BY(r.SAMPLE_MESSAGE, r.LAST_SEEN)
+    FROM DEDEMO.GAMING.OPENFLOW_ERROR_ROLLUP r
+    LEFT JOIN DEDEMO.GAMING.OPENFLOW_LOG_FINGERPRINTS f ON f.MESSAGE_FINGERPRINT = r.MESSAGE_FINGERPRINT
+    LEFT JOIN DEDEMO.GAMING.OPENFLOW_LOG_TEMPLATES t ON t.TEMPLATE_ID = f.TEMPLATE_ID
+    WHERE r.HOUR >= DATE_TRUNC('hour', P_START)
+      AND r.HOUR < P_END
+    GROUP BY 1, 3
+$$;
+
+-- =============================================================================
+-- View: OPENFLOW_ERROR_SUMMARY
+-- Error summary aggregation from the hourly rollup; UNIQUE_ERRORS counts
+-- distinct fingerprints
+-- =============================================================================
+
+CREATE OR REPLACE VIEW DEDEMO.GAMING.OPENFLOW_ERROR_SUMMARY
+AS
+SELECT
+    HOUR,
+    LOG_LEVEL,
+    PROCESS_GROUP,
+    SUM(EVENTS) as ERROR_COUNT,
+    COUNT(DISTINCT MESSAGE_FINGERPRINT) as UNIQUE_ERRORS
+FROM DEDEMO.GAMING.OPENFLOW_ERROR_ROLLUP
+GROUP BY 1, 2, 3;
+
+-- Runs after the log load so each run sees the events it just loaded
+ALTER TASK DEDEMO.GAMING.REFRESH_PIPELINE_COUNTERS_TASK SUSPEND;
+
+CREATE OR REPLACE TASK DEDEMO.GAMING.REFRESH_OPENFLOW_ERROR_ROLLUP_TASK
+    WAREHOUSE = IDENTIFIER($WAREHOUSE_NAME)
+    COMMENT = 'Folds new OpenFlow errors into OPENFLOW_ERROR_ROLLUP and mines their templates'
+    AFTER DEDEMO.GAMING.REFRESH_OPENFLOW_LOG_EVENTS_TASK
+AS
+    CALL DEDEMO.GAMING.REFRESH_OPENFLOW_ERROR_ROLLUP();
+
+-- Roll up the events already loaded, then start the task graph
+CALL DEDEMO.GAMING.REFRESH_OPENFLOW_ERROR_ROLLUP();
+ALTER TASK DEDEMO.GAMING.REFRESH_OPENFLOW_ERROR_ROLLUP_TASK RESUME;
+ALTER TASK DEDEMO.GAMING.REFRESH_PIPELINE_COUNTERS_TASK RESUME;
+
+-- Verify
+SELECT 'OpenFlow error rollup created' AS status;
+SELECT TEMPLATE, LOG_LEVEL, EVENTS, FINGERPRINTS, COMPONENTS, LAST_SEEN
+FROM TABLE(DEDEMO.GAMING.OPENFLOW_RECURRING_FAILURES(
+    DATEADD(day, -1, CURRENT_TIMESTAMP())::TIMESTAMP_NTZ,
+    CURRENT_TIMESTAMP()::TIMESTAMP_NTZ
+))
+ORDER BY EVENTS DESC
+LIMIT 10;
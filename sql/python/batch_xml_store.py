@@ -0,0 +1,163 @@
+"""
+Compressed file storage for lote XML offloaded from REGULATORY_BATCHES.
+
+Each lote is written once as a gzip file. REGULATORY_BATCHES then keeps only
+XML_URI, XML_BYTES (uncompressed UTF-8 size) and XML_SHA256 (of the
+uncompressed document), and GENERATED_XML is set to NULL.
+
+Two stores share the same layout (``YYYY/MM/DD/<batch_id>.xml.gz``):
+
+- StageXmlStore: an internal stage, used by the OFFLOAD_BATCH_XML procedure
+  in sql/12_xml_offload.sql (uploaded to @DEDEMO.GAMING.UDF_CODE by
+  run_sql.sh). URIs look like ``@DEDEMO.GAMING.BATCH_XML/2026/03/14/<id>.xml.gz``.
+- LocalXmlStore: a local directory, for testing without Snowflake. URIs are
+  ``file://`` URLs.
+
+read_xml() is the matching loader: it streams a file:// or presigned https
+URL, decompresses in chunks and checks size and SHA-256 as it goes.
+"""
+
+import gzip
+import hashlib
+import io
+import os
+import tempfile
+from datetime import datetime
+from pathlib import Path
+from urllib.parse import unquote, urlparse
+from urllib.request import urlopen
+
+STAGE_LOCATION = "@DEDEMO.GAMING.BATCH_XML"
+CHUNK_SIZE = 1024 * 1024
+COMPRESS_LEVEL = 6
+
+
+def object_path(batch_id, batch_timestamp=None):
+    """Relative path of a lote file: YYYY/MM/DD/<batch_id>.xml.gz."""
+    ts = batch_timestamp or datetime.utcnow()
+    return "{:%Y/%m/%d}/{}.xml.gz".format(ts, batch_id)
+
+
+def compress_xml(xml):
+    """Return (gzip payload, uncompressed byte size, SHA-256 hex) for a lote."""
+    data = xml.encode("utf-8") if isinstance(xml, str) else xml
+    # mtime=0 keeps the payload deterministic for identical documents
+    payload = gzip.compress(data, compresslevel=COMPRESS_LEVEL, mtime=0)
+    return payload, len(data), hashlib.sha256(data).hexdigest()
+
+
+class LocalXmlStore:
+    """Writes lote files under a local directory (testing)."""
+
+    def __init__(self, root):
+        self.root = Path(root)
+
+    def put(self, path, payload):
+        target = self.root / path
+        target.parent.mkdir(parents=True, exist_ok=True)
+        # Write-then-rename so a reader never sees a partial file
+        fd, tmp_name = tempfile.mkstemp(dir=str(target.parent), suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(payload)
+        os.replace(tmp_name, target)
+        return target.resolve().as_uri()
+
+
+class StageXmlStore:
+    """Writes lote files to an internal stage through a Snowpark session."""
+
+    def __init__(self, session, stage=STAGE_LOCATION):
+        self.session = session
+        self.stage = stage.rstrip("/")
+
+    def put(self, path, payload):
+        uri = "{}/{}".format(self.stage, path)
+        self.session.file.put_stream(io.BytesIO(payload), uri, auto_compress=False, overwrite=True)
+        return uri
+
+
+def offload_xml(store, batch_id, batch_timestamp, xml):
+    """Write one lote to ``store``; returns the REGULATORY_BATCHES column values."""
+    payload, size, sha256 = compress_xml(xml)
+    uri = store.put(object_path(batch_id, batch_timestamp), payload)
+    return {"BATCH_ID": batch_id, "XML_URI": uri, "XML_BYTES": size, "XML_SHA256": sha256}
+
+
+def _open_url(url, timeout):
+    parsed = urlparse(url)
+    if parsed.scheme in ("http", "https"):
+        return urlopen(url, timeout=timeout)
+    if parsed.scheme == "file":
+        return open(unquote(parsed.path), "rb")
+    if parsed.scheme == "":
+        return open(url, "rb")
+    raise ValueError("Unsupported XML URL scheme: {}".format(parsed.scheme))
+
+
+def iter_xml(url, expected_sha256=None, expected_bytes=None, chunk_size=CHUNK_SIZE, timeout=60):
+    """
+    Yield the decompressed lote in chunks, verifying size and SHA-256 once the
+    stream ends. Raises ValueError on a mismatch.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    with _open_url(url, timeout) as raw, gzip.GzipFile(fileobj=raw, mode="rb") as stream:
+        while True:
+            chunk = stream.read(chunk_size)
+            if not chunk:
+                break
+            digest.update(chunk)
+            size += len(chunk)
+            yield chunk
+    if expected_bytes is not None and size != int(expected_bytes):
+        raise ValueError("XML size mismatch: expected {} bytes, read {}".format(expected_bytes, size))
+    if expected_sha256 and digest.hexdigest() != expected_sha256.lower():
+        raise ValueError("XML SHA-256 mismatch: expected {}, got {}".format(expected_sha256, digest.hexdigest()))
+
+
+def read_xml(url, expected_sha256=None, expected_bytes=None, chunk_size=CHUNK_SIZE, timeout=60):
+    """Load and verify a whole lote as bytes."""
+    return b"".join(iter_xml(url, expected_sha256, expected_bytes, chunk_size, timeout))
+
+
+def offload_batches(session, batch_ids=None, max_batches=500, stage=STAGE_LOCATION):
+    """
+    Handler for OFFLOAD_BATCH_XML: move inline GENERATED_XML to the stage.
+
+    Rows are read one at a time, so memory holds a single lote. The table is
+    updated with one MERGE at the end; a row whose XML was already offloaded
+    (or removed) in the meantime is left alone.
+    """
+    from snowflake.snowpark.functions import col
+
+    batches = session.table("DEDEMO.GAMING.REGULATORY_BATCHES").filter(col("GENERATED_XML").is_not_null())
+    if batch_ids:
+        batches = batches.filter(col("BATCH_ID").isin(list(batch_ids)))
+    batches = batches.sort(col("BATCH_TIMESTAMP")).limit(int(max_batches))
+
+    store = StageXmlStore(session, stage)
+    offloaded = [
+        offload_xml(store, row["BATCH_ID"], row["BATCH_TIMESTAMP"], row["GENERATED_XML"])
+        for row in batches.select("BATCH_ID", "BATCH_TIMESTAMP", "GENERATED_XML").to_local_iterator()
+    ]
+    if not offloaded:
+        return "No inline XML to offload"
+
+    session.create_dataframe(
+        [[r["BATCH_ID"], r["XML_URI"], r["XML_BYTES"], r["XML_SHA256"]] for r in offloaded],
+        schema=["BATCH_ID", "XML_URI", "XML_BYTES", "XML_SHA256"],
+    ).write.save_as_table("OFFLOADED_BATCH_XML", mode="overwrite", table_type="temporary")
+
+    session.sql("""
+        MERGE INTO DEDEMO.GAMING.REGULATORY_BATCHES t
+        USING OFFLOADED_BATCH_XML s
+        ON t.BATCH_ID = s.BATCH_ID AND t.GENERATED_XML IS NOT NULL
+        WHEN MATCHED THEN UPDATE SET
+            XML_URI = s.XML_URI,
+            XML_BYTES = s.XML_BYTES,
+            XML_SHA256 = s.XML_SHA256,
+            GENERATED_XML = NULL
+    """).collect()
+
+    total_bytes = sum(r["XML_BYTES"] for r in offloaded)
+    return "Offloaded {} batches ({} bytes of XML) to {}".format(len(offloaded), total_bytes, stage)
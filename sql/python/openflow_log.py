@@ -0,0 +1,287 @@
+"""
+Parser for OpenFlow runtime log events (OPENFLOW.OPENFLOW.EVENTS).
+
+Each LOG event carries one logback JSON document in VALUE and the emitting
+component in RESOURCE_ATTRIBUTES. parse_event() turns the pair into the
+typed columns of OPENFLOW_LOG_EVENTS, once per event, so that no consumer
+has to parse VALUE again:
+
+    LOG_LEVEL, LOGGER, PROCESS_GROUP, PROCESS_GROUP_PATH, THREAD_NAME,
+    MESSAGE, EXCEPTION, EXCEPTION_CLASS, PROCESSOR_NAME, PROCESSOR_TYPE,
+    COMPONENT_ID, MESSAGE_PATTERN, MESSAGE_FINGERPRINT
+
+MESSAGE_PATTERN is the message with its variable parts (UUIDs, FlowFile
+records, URLs, paths, timestamps, addresses, quoted values, hex and numbers)
+replaced by placeholders, and MESSAGE_FINGERPRINT a short hash of it, so
+that repeats of one failure group together whatever batch, file or address
+they mention.
+
+Masking cannot know every variable part (host names, processor names, free
+text from other systems), so TemplateMiner groups the patterns further, the
+way Drain does: patterns with the same token count and first token whose
+tokens mostly agree share a template, with the differing tokens as <*>.
+Templates are persisted in OPENFLOW_LOG_TEMPLATES and a template's ID is the
+fingerprint of the first pattern that formed it, so IDs stay stable while
+templates generalize.
+
+Used by the PARSE_OPENFLOW_LOG_EVENT UDF in sql/16_openflow_logs.sql and the
+MINE_OPENFLOW_LOG_TEMPLATES procedure in sql/17_error_rollup.sql (uploaded to
+@DEDEMO.GAMING.UDF_CODE by run_sql.sh), and checked offline by
+testing/openflow_log_check.py.
+"""
+
+import hashlib
+import json
+import re
+from functools import lru_cache
+
+PATTERN_LENGTH = 1000
+MESSAGE_LENGTH = 16000
+EXCEPTION_LENGTH = 16000
+FINGERPRINT_LENGTH = 16
+WILDCARD = "<*>"
+
+# logback levels as OpenFlow writes them, and the spellings other loggers use
+_LEVELS = {"WARNING": "WARN", "SEVERE": "ERROR", "FATAL": "ERROR", "CRITICAL": "ERROR"}
+
+_COMPONENT_ID = re.compile(r"\[id=([0-9a-fA-F-]{36})\]")
+
+# Applied in order: the wider patterns first, so that their digits are not
+# replaced piecemeal by the number pattern; resource claims go before the
+# FlowFile records that embed them
+_NORMALIZERS = [
+    (re.compile(r"StandardResourceClaim\[(?:[^\[\]]|\[[^\[\]]*\])*\]"), "<claim>"),
+    (re.compile(r"StandardFlowFileRecord\[(?:[^\[\]]|\[[^\[\]]*\])*\]"), "<flowfile>"),
+    (re.compile(r"\b[A-Za-z][A-Za-z0-9+.-]*://[^\s'\"\]\[,;)]+"), "<url>"),
+    # Two or more segments: /uploads/2026/10/19/OP01_x.zip, @STAGE/2026/10/19/<id>.xml.gz
+    (re.compile(r"(?<![\w<>])(?:@[\w.]+)?(?:/[\w.\-]+){2,}/?"), "<path>"),
+    (re.compile(r"\b[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}\b"), "<uuid>"),
+    (re.compile(r"\b\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}(?::\d{2}(?:[.,]\d+)?)?(?:Z|[+-]\d{2}:?\d{2})?"), "<ts>"),
+    (re.compile(r"\b\d{1,3}(?:\.\d{1,3}){3}(?::\d+)?\b"), "<ip>"),
+    (re.compile(r"'[^']*'"), "'<str>'"),
+    (re.compile(r'"[^"]*"'), '"<str>"'),
+    # Hex identifiers: 0x-prefixed, or 8+ hex digits mixing letters and digits
+    (re.compile(r"\b(?:0x[0-9a-fA-F]+|(?=[0-9a-fA-F]*[a-fA-F])(?=[0-9a-fA-F]*\d)[0-9a-fA-F]{8,})\b"), "<hex>"),
+    (re.compile(r"(?<![A-Za-z0-9<])\d+(?:\.\d+)*"), "<n>"),
+    (re.compile(r"\s+"), " "),
+]
+
+
+@lru_cache(maxsize=4096)
+def normalize_message(message):
+    """Message with its variable parts replaced by placeholders, at most PATTERN_LENGTH characters."""
+    if not message:
+        return ""
+    text = message
+    for pattern, placeholder in _NORMALIZERS:
+        text = pattern.sub(placeholder, text)
+    return text.strip()[:PATTERN_LENGTH]
+
+
+def fingerprint(pattern):
+    """Short, stable hash of a normalized message."""
+    if not pattern:
+        return None
+    return hashlib.sha1(pattern.encode("utf-8")).hexdigest()[:FINGERPRINT_LENGTH]
+
+
+def _document(value):
+    """The event's logback JSON as a dict, whether VALUE holds it as text or as an object."""
+    if isinstance(value, dict):
+        return value
+    if isinstance(value, (bytes, bytearray)):
+        value = value.decode("utf-8", errors="replace")
+    if not isinstance(value, str):
+        return None
+    try:
+        document = json.loads(value)
+    except ValueError:
+        return None
+    return document if isinstance(document, dict) else None
+
+
+def _text(value, limit=None):
+    if value is None or value == "":
+        return None
+    if not isinstance(value, str):
+        value = json.dumps(value, separators=(",", ":"), default=str)
+    return value[:limit] if limit else value
+
+
+def _exception_class(exception):
+    """Class name on the first line of a stack trace ("java.io.IOException: ..." -> java.io.IOException)."""
+    if not exception:
+        return None
+    first = exception.lstrip().split("\n", 1)[0]
+    name = first.split(":", 1)[0].strip()
+    return name if name and " " not in name else None
+
+
+def parse_event(value, resource_attributes=None):
+    """
+    Typed columns of one LOG event, or None when VALUE is not a JSON object.
+
+    Args:
+        value: The event's VALUE (JSON text or an already parsed dict)
+        resource_attributes: The event's RESOURCE_ATTRIBUTES (dict or JSON text)
+
+    Returns:
+        dict keyed by OPENFLOW_LOG_EVENTS column name
+    """
+    document = _document(value)
+    if document is None:
+        return None
+    attributes = _document(resource_attributes) or {}
+    mdc = document.get("mdc") if isinstance(document.get("mdc"), dict) else {}
+
+    message = _text(document.get("formattedMessage") or document.get("message"), MESSAGE_LENGTH)
+    exception = _text(document.get("throwable"), EXCEPTION_LENGTH)
+    level = _text(document.get("level"))
+    if level:
+        level = level.upper()
+        level = _LEVELS.get(level, level)
+
+    component = _COMPONENT_ID.search(message) if message else None
+    # A bare exception has no message of its own: group it by its first line
+    pattern = normalize_message(message or (exception or "").split("\n", 1)[0])
+
+    return {
+        "LOG_LEVEL": level,
+        "LOGGER": _text(document.get("loggerName")),
+        "PROCESS_GROUP": _text(mdc.get("processGroupName")),
+        "PROCESS_GROUP_PATH": _text(mdc.get("processGroupNamePath")),
+        "THREAD_NAME": _text(document.get("threadName")),
+        "MESSAGE": message,
+        "EXCEPTION": exception,
+        "EXCEPTION_CLASS": _exception_class(exception),
+        "PROCESSOR_NAME": _text(attributes.get("processor.name")),
+        "PROCESSOR_TYPE": _text(attributes.get("processor.type")),
+        "COMPONENT_ID": component.group(1).lower() if component else None,
+        "MESSAGE_PATTERN": pattern or None,
+        "MESSAGE_FINGERPRINT": fingerprint(pattern),
+    }
+
+
+class TemplateMiner:
+    """
+    Drain-style grouping of message patterns into templates.
+
+    Patterns are routed by token count and first token (a first token that
+    is a placeholder routes to the wildcard leaf). In the leaf, the template
+    with the highest share of equal tokens (wildcards not counted) takes the
+    pattern if that share reaches `similarity`, and the tokens that differ
+    become <*>; otherwise the pattern starts a new template.
+    """
+
+    def __init__(self, similarity=0.4):
+        self.similarity = similarity
+        self.templates = {}
+        self.leaves = {}
+
+    @staticmethod
+    def _key(tokens):
+        first = tokens[0] if tokens else ""
+        if first.startswith("<") or any(c.isdigit() for c in first):
+            first = WILDCARD
+        return len(tokens), first
+
+    def load(self, template_id, template):
+        """Restore a persisted template."""
+        tokens = template.split(" ") if template else []
+        self.templates[template_id] = tokens
+        self.leaves.setdefault(self._key(tokens), []).append(template_id)
+
+    def _similarity(self, template, tokens):
+        equal = sum(1 for a, b in zip(template, tokens) if a != WILDCARD and a == b)
+        return equal / len(tokens) if tokens else 1.0
+
+    def add(self, pattern):
+        """
+        Place a pattern in a template.
+
+        Returns:
+            (template_id, template, changed): changed is True when the
+            template is new or has just been generalized
+        """
+        tokens = pattern.split(" ") if pattern else []
+        count, first = self._key(tokens)
+        candidates = self.leaves.get((count, first), [])
+        if first != WILDCARD:
+            candidates = candidates + self.leaves.get((count, WILDCARD), [])
+
+        best, best_score = None, -1.0
+        for template_id in candidates:
+            score = self._similarity(self.templates[template_id], tokens)
+            if score > best_score:
+                best, best_score = template_id, score
+
+        if best is None or best_score < self.similarity:
+            template_id = fingerprint(pattern) or fingerprint(WILDCARD)
+            self.templates[template_id] = tokens
+            self.leaves.setdefault((count, first), []).append(template_id)
+            return template_id, pattern, True
+
+        template = self.templates[best]
+        merged = [a if a == b else WILDCARD for a, b in zip(template, tokens)]
+        changed = merged != template
+        if changed:
+            old_key, new_key = self._key(template), self._key(merged)
+            self.templates[best] = merged
+            if new_key != old_key:
+                self.leaves[old_key].remove(best)
+                self.leaves.setdefault(new_key, []).append(best)
+        return best, " ".join(merged), changed
+
+
+def mine_templates(session, similarity=0.4):
+    """
+    Handler for MINE_OPENFLOW_LOG_TEMPLATES: give every new fingerprint in
+    OPENFLOW_LOG_FINGERPRINTS a template, creating or generalizing templates
+    in OPENFLOW_LOG_TEMPLATES as needed.
+    """
+    miner = TemplateMiner(similarity)
+    for row in session.table("DEDEMO.GAMING.OPENFLOW_LOG_TEMPLATES").select("TEMPLATE_ID", "TEMPLATE").collect():
+        miner.load(row["TEMPLATE_ID"], row["TEMPLATE"])
+
+    pending = session.sql("""
+        SELECT MESSAGE_FINGERPRINT, MESSAGE_PATTERN
+        FROM DEDEMO.GAMING.OPENFLOW_LOG_FINGERPRINTS
+        WHERE TEMPLATE_ID IS NULL
+        ORDER BY FIRST_SEEN, MESSAGE_FINGERPRINT
+    """).collect()
+    if not pending:
+        return "No new fingerprints"
+
+    assigned = []
+    changed = {}
+    for row in pending:
+        template_id, template, is_changed = miner.add(row["MESSAGE_PATTERN"] or "")
+        assigned.append([row["MESSAGE_FINGERPRINT"], template_id])
+        if is_changed:
+            changed[template_id] = template
+
+    if changed:
+        session.create_dataframe(
+            [[template_id, template, len(template.split(" ")) if template else 0]
+             for template_id, template in changed.items()],
+            schema=["TEMPLATE_ID", "TEMPLATE", "TOKEN_COUNT"],
+        ).write.save_as_table("MINED_LOG_TEMPLATES", mode="overwrite", table_type="temporary")
+        session.sql("""
+            MERGE INTO DEDEMO.GAMING.OPENFLOW_LOG_TEMPLATES t
+            USING MINED_LOG_TEMPLATES s
+            ON t.TEMPLATE_ID = s.TEMPLATE_ID
+            WHEN MATCHED THEN UPDATE SET TEMPLATE = s.TEMPLATE, UPDATED_AT = CURRENT_TIMESTAMP()
+            WHEN NOT MATCHED THEN INSERT (TEMPLATE_ID, TEMPLATE, TOKEN_COUNT, CREATED_AT, UPDATED_AT)
+                VALUES (s.TEMPLATE_ID, s.TEMPLATE, s.TOKEN_COUNT, CURRENT_TIMESTAMP(), CURRENT_TIMESTAMP())
+        """).collect()
+
+    session.create_dataframe(assigned, schema=["MESSAGE_FINGERPRINT", "TEMPLATE_ID"]).write.save_as_table(
+        "MINED_LOG_FINGERPRINTS", mode="overwrite", table_type="temporary")
+    session.sql("""
+        MERGE INTO DEDEMO.GAMING.OPENFLOW_LOG_FINGERPRINTS t
+        USING MINED_LOG_FINGERPRINTS s
+        ON t.MESSAGE_FINGERPRINT = s.MESSAGE_FINGERPRINT
+        WHEN MATCHED THEN UPDATE SET TEMPLATE_ID = s.TEMPLATE_ID
+    """).collect()
+
+    return "Assigned {} fingerprints to templates ({} new or generalized)".format(len(assigned), len(changed))
@@ -0,0 +1,238 @@
+"""
+DGOJ poker tournament XML generation (Python port of GENERATE_POKER_XML_JS).
+
+Used by the Python UDF/UDTF in sql/04_functions.sql (uploaded to
+@DEDEMO.GAMING.UDF_CODE by run_sql.sh) and importable as a plain library.
+
+For valid input the output is byte-identical to the JavaScript UDF. Unlike
+the JavaScript version, text values are XML-escaped, and the document is
+built with a single join over per-player fragments instead of repeated
+string concatenation.
+
+Given the tournament of a single-tournament lote, the Juego header carries
+that tournament instead of the demo tournament (see
+generate_poker_xml_columns); this has no JavaScript counterpart.
+"""
+
+import json
+import math
+from datetime import datetime, timezone
+from decimal import Decimal, ROUND_HALF_UP
+from xml.sax.saxutils import escape
+
+DEVICE_MAP = {
+    "MOBILE": "MO",
+    "DESKTOP": "PC",
+    "PC": "PC",
+    "TABLET": "TB",
+    "TV": "TF",
+    "OTHER": "OT",
+}
+
+TOURNAMENT_FIELDS = ("TOURNAMENT_ID", "TOURNAMENT_NAME", "TOURNAMENT_START", "TOURNAMENT_END",
+                     "VARIANT", "VARIANT_COMMERCIAL")
+
+_CENT = Decimal("0.01")
+
+_HEADER = (
+    '<?xml version="1.0" encoding="UTF-8"?>'
+    '<Lote xmlns="http://cnjuego.gob.es/sci/v3.3.xsd" xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance">'
+    "<Cabecera>"
+    "<OperadorId>{operator_id}</OperadorId>"
+    "<AlmacenId>{warehouse_id}</AlmacenId>"
+    "<LoteId>{batch_id}</LoteId>"
+    "<Version>3.3</Version>"
+    "</Cabecera>"
+    '<Registro xsi:type="RegistroPoquerTorneo">'
+    "<Cabecera>"
+    "<RegistroId>REG_{batch_id}</RegistroId>"
+    "<SubregistroId>1</SubregistroId>"
+    "<SubregistroTotal>1</SubregistroTotal>"
+    "<Fecha>{date}</Fecha>"
+    "</Cabecera>"
+    "<Juego>"
+    "<JuegoId>{juego_id}</JuegoId>"
+    "<JuegoDesc>{juego_desc}</JuegoDesc>"
+    "<TipoJuego>POT</TipoJuego>"
+    "<FechaInicio>{start}</FechaInicio>"
+    "<FechaFin>{end}</FechaFin>"
+    "<JuegoEnRed>S</JuegoEnRed>"
+    "<LiquidezInternacional>N</LiquidezInternacional>"
+    "<Variante>{variant}</Variante>"
+    "<VarianteComercial>{variant_commercial}</VarianteComercial>"
+    "<NumeroParticipantes>{participants}</NumeroParticipantes>"
+    "</Juego>"
+)
+
+_PLAYER = (
+    "<Jugador>"
+    "<ID><OperadorId>{operator_id}</OperadorId>"
+    "<JugadorId>{player_id}</JugadorId></ID>"
+    "<Participacion><Linea>"
+    "<Cantidad>{bet}</Cantidad>"
+    "<Unidad>EUR</Unidad>"
+    "</Linea></Participacion>"
+    "<ParticipacionDevolucion><Linea>"
+    "<Cantidad>{refund}</Cantidad>"
+    "<Unidad>EUR</Unidad>"
+    "</Linea></ParticipacionDevolucion>"
+    "<Premios><Linea>"
+    "<Cantidad>{win}</Cantidad>"
+    "<Unidad>EUR</Unidad>"
+    "</Linea></Premios>"
+    "<IP>{ip}</IP>"
+    "<Dispositivo>{device}</Dispositivo>"
+    "<IdDispositivo>{device_id}</IdDispositivo>"
+    "</Jugador>"
+)
+
+_FOOTER = "</Registro></Lote>"
+
+
+def format_date(now=None):
+    """YYYYMMDDHHMMSS in UTC, as the JS UDF derives it from toISOString()."""
+    now = now or datetime.now(timezone.utc)
+    if now.tzinfo is not None:
+        now = now.astimezone(timezone.utc)
+    return now.strftime("%Y%m%d%H%M%S")
+
+
+def js_string(value):
+    """String conversion matching JavaScript's String(value) for scalar values."""
+    if isinstance(value, str):
+        return value
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, float) and value.is_integer() and abs(value) < 1e21:
+        return str(int(value))
+    return str(value)
+
+
+def text_or_default(value, default):
+    """JavaScript ``(value || default)`` for text fields, XML-escaped."""
+    if not value or (isinstance(value, float) and math.isnan(value)):
+        return default
+    return escape(js_string(value))
+
+
+def format_amount(value):
+    """JavaScript ``(value || 0).toFixed(2)``: half away from zero on the exact value."""
+    if value is None or value == 0:
+        return "0.00"
+    if isinstance(value, float) and math.isnan(value):
+        return "0.00"
+    if isinstance(value, str):
+        value = float(value)
+    return str(Decimal(value).quantize(_CENT, rounding=ROUND_HALF_UP))
+
+
+def map_device_type(device_type):
+    if not device_type or (isinstance(device_type, float) and math.isnan(device_type)):
+        return "PC"
+    return DEVICE_MAP.get(js_string(device_type).upper(), "OT")
+
+
+def format_tournament_date(value):
+    """YYYYMMDDHHMMSS+0000 from a UTC datetime, ISO 8601 text or epoch milliseconds."""
+    if isinstance(value, (int, float)):
+        value = datetime.fromtimestamp(value / 1000, timezone.utc)
+    elif not isinstance(value, datetime):
+        value = datetime.fromisoformat(js_string(value).strip().replace("Z", "+00:00").replace(" ", "T"))
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return value.strftime("%Y%m%d%H%M%S") + "+0000"
+
+
+def _header(participants, operator_id, warehouse_id, batch_id, now, tournament=None):
+    batch_id = js_string(batch_id)
+    date = format_date(now)
+    juego = {
+        "juego_id": "TOUR_" + escape(batch_id[:8]),
+        "juego_desc": "Texas Holdem Demo Tournament",
+        "start": date + "+0100",
+        "end": date + "+0100",
+        "variant": "TH",
+        "variant_commercial": "Texas Holdem No Limit",
+    }
+    if tournament:
+        juego = {
+            "juego_id": escape(js_string(tournament["TOURNAMENT_ID"])),
+            "juego_desc": escape(js_string(tournament.get("TOURNAMENT_NAME") or "Poker Tournament")[:200]),
+            "start": format_tournament_date(tournament["TOURNAMENT_START"]),
+            "end": format_tournament_date(tournament["TOURNAMENT_END"]),
+            "variant": escape(js_string(tournament["VARIANT"])),
+            "variant_commercial": escape(js_string(tournament.get("VARIANT_COMMERCIAL") or "")[:200]),
+        }
+    return _HEADER.format(
+        operator_id=escape(js_string(operator_id)),
+        warehouse_id=escape(js_string(warehouse_id)),
+        batch_id=escape(batch_id),
+        date=date,
+        participants=participants,
+        **juego,
+    )
+
+
+def single_tournament(tournament_ids, names, starts, ends, variants, variant_commercials):
+    """
+    The tournament of a lote whose rows all share one TOURNAMENT_ID (and
+    carry its start, end and variant), as a dict for generate_poker_xml_columns;
+    None for mixed or incomplete rows.
+    """
+    if not tournament_ids or any(not value for value in (starts[0], ends[0], variants[0])):
+        return None
+    first = tournament_ids[0]
+    if not first or any(value != first for value in tournament_ids):
+        return None
+    return dict(zip(TOURNAMENT_FIELDS, (first, names[0], starts[0], ends[0], variants[0], variant_commercials[0])))
+
+
+def generate_poker_xml_columns(player_ids, bet_amounts, refund_amounts, win_amounts,
+                               player_ips, device_types, device_ids,
+                               operator_id, warehouse_id, batch_id, now=None, tournament=None):
+    """
+    Build one lote from column sequences (one entry per player), e.g. the
+    columns of a pandas DataFrame partition.
+
+    ``tournament`` (TOURNAMENT_ID, TOURNAMENT_NAME, TOURNAMENT_START,
+    TOURNAMENT_END, VARIANT, VARIANT_COMMERCIAL) fills the Juego header for a
+    lote that holds a single tournament; without it the header carries the
+    demo tournament, as GENERATE_POKER_XML_JS does.
+    """
+    operator = escape(js_string(operator_id))
+    parts = [_header(len(player_ids), operator_id, warehouse_id, batch_id, now, tournament)]
+    player = _PLAYER.format
+    parts.extend(
+        player(
+            operator_id=operator,
+            player_id=text_or_default(pid, "UNKNOWN"),
+            bet=format_amount(bet),
+            refund=format_amount(refund),
+            win=format_amount(win),
+            ip=text_or_default(ip, "0.0.0.0"),
+            device=map_device_type(device),
+            device_id=text_or_default(device_id, "UNKNOWN"),
+        )
+        for pid, bet, refund, win, ip, device, device_id in zip(
+            player_ids, bet_amounts, refund_amounts, win_amounts,
+            player_ips, device_types, device_ids,
+        )
+    )
+    parts.append(_FOOTER)
+    return "".join(parts)
+
+
+def generate_poker_xml(transactions, operator_id, warehouse_id, batch_id, now=None):
+    """
+    Same contract as GENERATE_POKER_XML_JS: ``transactions`` is a list of
+    objects with PLAYER_ID, BET_AMOUNT, REFUND_AMOUNT, WIN_AMOUNT, PLAYER_IP,
+    DEVICE_TYPE and DEVICE_ID (a JSON string is accepted too).
+    """
+    if isinstance(transactions, str):
+        transactions = json.loads(transactions)
+    transactions = transactions or []
+    columns = ([txn.get(key) for txn in transactions] for key in (
+        "PLAYER_ID", "BET_AMOUNT", "REFUND_AMOUNT", "WIN_AMOUNT",
+        "PLAYER_IP", "DEVICE_TYPE", "DEVICE_ID",
+    ))
+    return generate_poker_xml_columns(*columns, operator_id, warehouse_id, batch_id, now=now)
@@ -13,6 +13,9 @@
 #
 # The --stage-upload flag uploads the file to a stage and executes via
 # EXECUTE IMMEDIATE, which preserves escape sequences in $$ blocks.
+#
+# Files that import Python UDF sources (@DEDEMO.GAMING.UDF_CODE) also get
+# sql/python/*.py uploaded to that stage first.
 # ============================================================================
 
 set -e
@@ -55,6 +58,18 @@ if [ "$STAGE_UPLOAD" == "--stage-upload" ]; then
         exit 1
     fi
 
+    # Upload Python UDF sources referenced via IMPORTS
+    if grep -q "@DEDEMO.GAMING.UDF_CODE" "$FULL_PATH"; then
+        for PY_FILE in "${SCRIPT_DIR}"/python/*.py; do
+            snow stage copy "$PY_FILE" "@DEDEMO.GAMING.UDF_CODE" -c "$CONNECTION" --overwrite
+
+            if [ $? -ne 0 ]; then
+                echo "Error: Failed to upload $(basename "$PY_FILE") to stage"
+                exit 1
+            fi
+        done
+    fi
+
     # Execute from stage
     snow sql -c "$CONNECTION" -q "EXECUTE IMMEDIATE FROM ${STAGE_PATH}/${SQL_FILE}"
 
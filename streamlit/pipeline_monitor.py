@@ -8,9 +8,39 @@ Deploy to Snowflake via: snow streamlit deploy
 """
 
 import streamlit as st
+import gzip
 import json
-import _snowflake
-from snowflake.snowpark.context import get_active_session
+import logging
+import re
+import requests
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from contextlib import closing
+from datetime import datetime, timezone
+from functools import wraps
+from streamlit.runtime.scriptrunner import add_script_run_ctx
+
+try:
+    import _snowflake
+except ImportError:  # outside Snowflake (offline benchmark): no Cortex Agent API
+    _snowflake = None
+
+# Renamed across Streamlit releases; resolve once so the app runs on either side
+_rerun = getattr(st, "rerun", None) or st.experimental_rerun
+
+logger = logging.getLogger(__name__)
+
+
+def query_flag(name):
+    """True when ?<name>=<value> is on the app URL and value is not empty/0/false."""
+    if hasattr(st, "query_params"):
+        value = st.query_params.get(name, "0")
+    else:
+        value = st.experimental_get_query_params().get(name, ["0"])[0]
+    return value not in ("", "0", "false")
 
 # Page config
 st.set_page_config(
@@ -47,18 +77,279 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+def get_session():
+    """Snowpark session the app queries.
+
+    A session placed in st.session_state["snowpark_session"] before the first
+    run is used as is (testing/pipeline_monitor_benchmark.py injects a local
+    stand-in this way); otherwise the app's active Snowflake session.
+    """
+    injected = st.session_state.get("snowpark_session")
+    if injected is not None:
+        return injected
+    from snowflake.snowpark.context import get_active_session
+    return get_active_session()
+
+
 # Get Snowflake session
-session = get_active_session()
+session = get_session()
+render_started = time.perf_counter()
 
 # Cortex Agent Configuration
 CORTEX_API_ENDPOINT = "/api/v2/cortex/agent:run"
 CORTEX_API_TIMEOUT = 50000  # milliseconds
 SEMANTIC_MODEL = "@DEDEMO.GAMING.CORTEX_MODELS/semantic_models/gaming_pipeline_analytics_semantic_model.yaml"
 
+# Cortex response caching
+AGENT_CACHE_MAX_ENTRIES = 128
+AGENT_CACHE_TTL_SEC = 15 * 60
+SQL_RESULT_CACHE_TTL_SEC = 60
+SEMANTIC_MODEL_VERSION_TTL_SEC = 5 * 60
+
+# Guarded execution of Cortex-generated SQL
+CORTEX_SQL_ROW_CAP = 1000
+CORTEX_SQL_MAX_ROW_CAP = 50000
+CORTEX_SQL_MEMORY_BUDGET_BYTES = 64 * 1024 * 1024
+CORTEX_SQL_TIMEOUT_SEC = 60
+CORTEX_SQL_EXPORT_TIMEOUT_SEC = 600
+CORTEX_SQL_PANEL = "ASK_CORTEX"
+CORTEX_RESULTS_STAGE = "@DEDEMO.GAMING.CORTEX_RESULTS"
+
+# Per-panel query instrumentation (hidden Diagnostics view: append ?diagnostics=1 to the URL)
+PANEL_QUERY_TAG_PREFIX = "PIPELINE_MONITOR"
+PANEL_PROFILE_MAX_QUERIES = 500
+PANEL_PROFILE_MAX_RENDERS = 50
+
+# Precomputed stage counters (refreshed every minute by REFRESH_PIPELINE_COUNTERS_TASK)
+PIPELINE_COUNTERS_TTL_SEC = 30
+
+# Live mode: time-sensitive panels re-run as fragments and fetch only new rows
+LIVE_REFRESH_SEC = {"stream": 15, "batches": 30, "latency": 60}
+LIVE_DELTA_OVERLAP_SEC = 120
+LIVE_P95_REFRESH_SEC = 5 * 60
+RECENT_BATCHES_LIMIT = 20
+
+# Time-bucketed charts: ranges offered, bucket sizes (minutes) and point cap
+TIME_SERIES_RANGES = OrderedDict([
+    ("Last hour", 3600),
+    ("Last 6 hours", 6 * 3600),
+    ("Last 24 hours", 24 * 3600),
+    ("Last 7 days", 7 * 86400),
+    ("Last 30 days", 30 * 86400),
+    ("Last 90 days", 90 * 86400),
+])
+TIME_SERIES_BUCKET_MINUTES = [1, 5, 15, 30, 60, 180, 360, 720, 1440]
+TIME_SERIES_MAX_POINTS = 200
+TIME_SERIES_CLOSE_GRACE_SEC = 120
+BATCH_ACTIVITY_MEASURES = {"BATCHES_CREATED": "COUNT(*)", "TRANSACTIONS_PROCESSED": "SUM(TRANSACTION_COUNT)"}
 
-def cortex_agent_call(query: str, conversation_history: list = None):
-    """Call Cortex Agent API with semantic model"""
+# Batches tab XML preview
+XML_PREVIEW_PREFIX_CHARS = 16384
+XML_PREVIEW_MAX_LINES = 60
+
+SAMPLE_QUESTIONS = [
+    "How many batches were processed today?",
+    "What is the average latency for each pipeline stage?",
+    "Show me batch processing performance over the last week",
+    "Are there any errors in the last 24 hours?",
+    "What is the total number of transactions processed?"
+]
+
+
+# =============================================================================
+# PANEL QUERY INSTRUMENTATION
+# =============================================================================
+# Every query runs through panel_query() under a per-panel QUERY_TAG, and its
+# wall time, rows and bytes are kept in a bounded per-session history. Calls
+# answered by st.cache_data are recorded as cache hits by @profiled_cache.
 
+RENDER_ID = uuid.uuid4().hex[:8]
+_profile_local = threading.local()
+_tab_marks = [("PAGE", render_started)]
+
+
+def panel_query_tag(panel: str) -> str:
+    return f"{PANEL_QUERY_TAG_PREFIX}:{panel}"
+
+
+def start_tab_profile(tab: str):
+    """Attribute the time and queries from here to the next tab to this tab"""
+    _tab_marks.append((tab, time.perf_counter()))
+
+
+def _panel_profile():
+    """Query and render history of this browser session"""
+    if "panel_profile" not in st.session_state:
+        st.session_state["panel_profile"] = {
+            "queries": deque(maxlen=PANEL_PROFILE_MAX_QUERIES),
+            "renders": deque(maxlen=PANEL_PROFILE_MAX_RENDERS),
+        }
+    return st.session_state["panel_profile"]
+
+
+def _result_size(result):
+    """(rows, approximate bytes in memory) of a query result or cached value"""
+    if isinstance(result, tuple) and result and hasattr(result[0], "memory_usage"):
+        result = result[0]
+    if hasattr(result, "memory_usage"):
+        return len(result), int(result.memory_usage(deep=True).sum())
+    if isinstance(result, (str, bytes)):
+        return 1, len(result)
+    if isinstance(result, dict):
+        result = list(result.values())
+    if isinstance(result, list):
+        size = 0
+        for row in result:
+            values = row.values() if isinstance(row, dict) else row
+            size += sum(sys.getsizeof(value) for value in values)
+        return len(result), size
+    return 0, 0
+
+
+def record_panel_query(panel: str, started: float, result=None, error: Exception = None, cache_hit: bool = False):
+    """Append one query (or cache hit) to the session profile"""
+    rows, size = _result_size(result) if error is None else (0, 0)
+    _panel_profile()["queries"].append({
+        "render": RENDER_ID,
+        "tab": _tab_marks[-1][0],
+        "panel": panel,
+        "query_tag": None if cache_hit else panel_query_tag(panel),
+        "finished_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "ms": round((time.perf_counter() - started) * 1000, 1),
+        "rows": rows,
+        "bytes": size,
+        "cache_hit": cache_hit,
+        "error": None if error is None else str(error)[:200],
+    })
+    if not cache_hit:
+        _profile_local.queried = True
+
+
+def panel_query(panel: str, sql: str, to_pandas: bool = False, statement_params: dict = None):
+    """Run a panel's SQL under its QUERY_TAG and record it in the session profile.
+
+    Returns the collected rows, or a pandas DataFrame when to_pandas is set.
+    """
+    params = {"QUERY_TAG": panel_query_tag(panel), **(statement_params or {})}
+    started = time.perf_counter()
+    try:
+        df = session.sql(sql)
+        result = df.to_pandas(statement_params=params) if to_pandas else df.collect(statement_params=params)
+    except Exception as e:
+        record_panel_query(panel, started, error=e)
+        raise
+    record_panel_query(panel, started, result)
+    return result
+
+
+def profiled_cache(panel: str):
+    """Record calls of an st.cache_data function that did not reach the warehouse as cache hits.
+
+    Apply above @st.cache_data; a miss is already recorded by the panel_query
+    calls in the function body.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            outer = getattr(_profile_local, "queried", False)
+            _profile_local.queried = False
+            started = time.perf_counter()
+            try:
+                value = fn(*args, **kwargs)
+            finally:
+                queried = _profile_local.queried
+                _profile_local.queried = outer or queried
+            if not queried:
+                record_panel_query(panel, started, value, cache_hit=True)
+            return value
+        return wrapper
+    return decorator
+
+
+def finish_render_profile():
+    """Close this script run in the profile; returns its render record"""
+    profile = _panel_profile()
+    queries = [q for q in profile["queries"] if q["render"] == RENDER_ID]
+    finished = time.perf_counter()
+    marks = _tab_marks + [(None, finished)]
+    tabs = {}
+    for (tab, started), (_, ended) in zip(marks, marks[1:]):
+        tab_queries = [q for q in queries if q["tab"] == tab]
+        tabs[tab] = {
+            "ms": round((ended - started) * 1000, 1),
+            "queries": sum(1 for q in tab_queries if not q["cache_hit"]),
+            "cache_hits": sum(1 for q in tab_queries if q["cache_hit"]),
+        }
+    render = {
+        "render": RENDER_ID,
+        "finished_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "ms": round((finished - render_started) * 1000, 1),
+        "queries": sum(1 for q in queries if not q["cache_hit"]),
+        "cache_hits": sum(1 for q in queries if q["cache_hit"]),
+        "query_ms": round(sum(q["ms"] for q in queries), 1),
+        "tabs": tabs,
+    }
+    profile["renders"].append(render)
+    # Fragment re-runs and the Diagnostics view come after the page
+    _tab_marks.append(("AFTER_RENDER", finished))
+    return render
+
+
+def panel_profile_summary():
+    """Per-panel totals over the session history, slowest first"""
+    panels = {}
+    for q in _panel_profile()["queries"]:
+        p = panels.setdefault(q["panel"], {
+            "PANEL": q["panel"], "CALLS": 0, "QUERIES": 0, "CACHE_HITS": 0, "ERRORS": 0,
+            "TOTAL_MS": 0.0, "MAX_MS": 0.0, "ROWS": 0, "BYTES": 0,
+        })
+        p["CALLS"] += 1
+        p["CACHE_HITS" if q["cache_hit"] else "QUERIES"] += 1
+        p["ERRORS"] += q["error"] is not None
+        p["TOTAL_MS"] += q["ms"]
+        p["MAX_MS"] = max(p["MAX_MS"], q["ms"])
+        p["ROWS"] += q["rows"]
+        p["BYTES"] += q["bytes"]
+    for p in panels.values():
+        p["AVG_MS"] = round(p["TOTAL_MS"] / p["CALLS"], 1)
+        p["TOTAL_MS"] = round(p["TOTAL_MS"], 1)
+    return sorted(panels.values(), key=lambda p: p["TOTAL_MS"], reverse=True)
+
+
+def panel_profile_json() -> str:
+    """The session profile (summary, renders, queries) as JSON"""
+    profile = _panel_profile()
+    return json.dumps({
+        "query_tag_prefix": PANEL_QUERY_TAG_PREFIX,
+        "panels": panel_profile_summary(),
+        "renders": list(profile["renders"]),
+        "queries": list(profile["queries"]),
+    }, indent=2)
+
+
+def agent_error_event(message: str) -> dict:
+    """Agent event standing in for a failed call, so callers see every failure as an 'error' event"""
+    return {"event": "error", "data": {"message": message}}
+
+
+def _rest_credentials():
+    """(host, session token) of the session's REST connection, or (None, None) without one"""
+    connection = getattr(session, "connection", None)
+    host = getattr(connection, "host", None)
+    token = getattr(getattr(connection, "rest", None), "token", None)
+    return (host, token) if host and token else (None, None)
+
+
+def cortex_agent_call(query: str, conversation_history: list = None):
+    """Call Cortex Agent API with semantic model, yielding agent events as they arrive.
+
+    The agent is asked to stream. Where the session exposes a REST token the
+    response is read as an HTTP stream, so each event is yielded as soon as
+    its SSE frame arrives. Otherwise (warehouse-runtime Snowflake apps, or a
+    stream that cannot be opened) _snowflake.send_snow_api_request returns the
+    stream in one piece and its events are yielded from that. Failures are
+    yielded as an 'error' event.
+    """
     # Build messages array - start fresh with just the query
     messages = [
         {
@@ -70,6 +361,7 @@ def cortex_agent_call(query: str, conversation_history: list = None):
     payload = {
         "model": "claude-opus-4-5",
         "messages": messages,
+        "stream": True,
         "tools": [
             {
                 "tool_spec": {
@@ -85,6 +377,40 @@ def cortex_agent_call(query: str, conversation_history: list = None):
         }
     }
 
+    host, token = _rest_credentials()
+    if host:
+        try:
+            resp = requests.post(
+                f"https://{host}{CORTEX_API_ENDPOINT}",
+                json=payload,
+                headers={
+                    "Authorization": f'Snowflake Token="{token}"',
+                    "Content-Type": "application/json",
+                    "Accept": "text/event-stream",
+                },
+                stream=True,
+                timeout=CORTEX_API_TIMEOUT / 1000,
+            )
+        except requests.RequestException as e:
+            if _snowflake is None:
+                yield agent_error_event(str(e))
+                return
+            logger.warning("Cortex Agent stream unavailable, falling back to a buffered call: %s", e)
+        else:
+            with resp:
+                if resp.status_code != 200:
+                    yield agent_error_event(f"HTTP {resp.status_code}: {resp.reason}")
+                    return
+                try:
+                    yield from parse_sse_events(resp.iter_lines())
+                except requests.RequestException as e:
+                    yield agent_error_event(str(e))
+            return
+
+    if _snowflake is None:
+        yield agent_error_event("The Cortex Agent API is only available when running in Snowflake")
+        return
+
     try:
         resp = _snowflake.send_snow_api_request(
             "POST",
@@ -95,90 +421,711 @@ def cortex_agent_call(query: str, conversation_history: list = None):
             None,
             CORTEX_API_TIMEOUT,
         )
+    except Exception as e:
+        yield agent_error_event(str(e))
+        return
+
+    if resp["status"] != 200:
+        yield agent_error_event(f"HTTP {resp['status']}: {resp.get('reason', 'Unknown error')}")
+        return
+
+    content = resp["content"]
+    try:
+        events = json.loads(content)
+    except ValueError:
+        # The raw event stream rather than its JSON rendering
+        yield from parse_sse_events(content.splitlines())
+        return
+    yield from events if isinstance(events, list) else [events]
 
-        if resp["status"] != 200:
-            return {"error": f"HTTP {resp['status']}: {resp.get('reason', 'Unknown error')}", "raw": str(resp)}
 
-        return json.loads(resp["content"])
+def parse_sse_events(lines):
+    """Yield Cortex Agent events from Server-Sent Events lines as they arrive"""
+    event_type = None
+    data_lines = []
+
+    def build_event():
+        data = "\n".join(data_lines)
+        try:
+            data = json.loads(data)
+        except ValueError:
+            pass
+        return {"event": event_type or "message", "data": data}
+
+    for line in lines:
+        if isinstance(line, bytes):
+            line = line.decode("utf-8")
+        line = line.rstrip("\r\n")
+        if not line:
+            if data_lines:
+                yield build_event()
+            event_type = None
+            data_lines = []
+        elif line.startswith(":"):
+            continue
+        elif line.startswith("event:"):
+            event_type = line[len("event:"):].strip()
+        elif line.startswith("data:"):
+            data_lines.append(line[len("data:"):].lstrip())
+
+    if data_lines:
+        yield build_event()
+
+
+def iter_agent_content(events):
+    """Extract content from Cortex Agent events one event at a time.
+
+    Accepts a list or a live iterator of events and yields (kind, value)
+    tuples where kind is 'text', 'sql' or 'error'. Callers render text and
+    start the SQL as soon as each piece is parsed; nothing is yielded after
+    an error.
+    """
+    received = False
+    try:
+        for event in events:
+            if not isinstance(event, dict):
+                continue
+            received = True
+            event_type = event.get('event', 'no-event-field')
+
+            # Handle errors
+            if event_type == "error":
+                data = event.get('data', {})
+                error_msg = data.get('message', 'Unknown error') if isinstance(data, dict) else str(data)
+                yield "error", f"Error: {error_msg}"
+                return
+
+            # Handle message deltas
+            elif event_type == "message.delta":
+                delta = event.get('data', {}).get('delta', {})
+                for content_item in delta.get('content', []):
+                    content_type = content_item.get('type')
+
+                    if content_type == "tool_results":
+                        tool_results = content_item.get('tool_results', {})
+                        for result in tool_results.get('content', []):
+                            if result.get('type') == 'json':
+                                json_data = result.get('json', {})
+                                if json_data.get('sql'):
+                                    yield "sql", json_data.get('sql')
+                                if json_data.get('text'):
+                                    yield "text", json_data.get('text')
+
+                    elif content_type == 'text':
+                        yield "text", content_item.get('text', '')
+
+            # Handle complete messages
+            elif 'role' in event and event['role'] == 'assistant':
+                for content_item in event.get('content', []):
+                    if content_item.get('type') == 'text':
+                        yield "text", content_item.get('text', '')
 
     except Exception as e:
-        return {"error": str(e)}
+        yield "error", f"Error processing response: {e}"
+        return
+
+    if not received:
+        yield "error", "No response received"
+
+
+class AgentResponseCache:
+    """Thread-safe LRU cache with per-entry TTL for Cortex Agent responses.
+
+    Concurrent callers asking the same question wait for the first call to
+    finish instead of issuing a duplicate agent run.
+    """
+
+    def __init__(self, max_entries: int, ttl_sec: int):
+        self.max_entries = max_entries
+        self.ttl_sec = ttl_sec
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            stored_at, value = entry
+            if time.time() - stored_at > self.ttl_sec:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.time(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_or_stream(self, key, open_events):
+        """Return (events, cache_hit), opening the agent stream at most once per key at a time.
+
+        On a hit events is the stored list. Otherwise it is the live stream
+        from open_events(); its events are stored once the stream has been
+        read to the end without an error. Concurrent callers for the same key
+        wait for that stream instead of starting a duplicate agent run.
+        """
+        events = self.get(key)
+        if events is not None:
+            return events, True
+
+        with self._lock:
+            done = self._inflight.get(key)
+            owner = done is None
+            if owner:
+                done = threading.Event()
+                self._inflight[key] = done
+
+        if not owner:
+            done.wait(CORTEX_API_TIMEOUT / 1000)
+            events = self.get(key)
+            if events is not None:
+                return events, True
+            return open_events(), False
+
+        return self._record(key, open_events(), done), False
+
+    def _record(self, key, events, done):
+        received = []
+        try:
+            for event in events:
+                received.append(event)
+                yield event
+            # Errors are not cached so the next click retries the agent
+            if received and not any(isinstance(e, dict) and e.get("event") == "error" for e in received):
+                self.put(key, received)
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            done.set()
+
+
+@st.cache_resource(show_spinner=False)
+def get_agent_response_cache():
+    """Process-wide agent response cache shared by all sessions"""
+    return AgentResponseCache(AGENT_CACHE_MAX_ENTRIES, AGENT_CACHE_TTL_SEC)
+
+
+def normalize_question(question: str) -> str:
+    """Normalize question text so trivial variations share a cache entry"""
+    normalized = re.sub(r"\s+", " ", question).strip().lower()
+    return normalized.rstrip("?.! ")
+
+
+@profiled_cache("ASK_CORTEX:MODEL_VERSION")
+@st.cache_data(ttl=SEMANTIC_MODEL_VERSION_TTL_SEC, show_spinner=False)
+def get_semantic_model_version():
+    """Version tag for the semantic model file (md5 + last modified from LIST)"""
+    try:
+        rows = panel_query("ASK_CORTEX:MODEL_VERSION", f"LIST {SEMANTIC_MODEL}")
+        if rows:
+            row = rows[0].as_dict()
+            return f"{row.get('md5', '')}:{row.get('last_modified', '')}"
+    except Exception:
+        pass
+    return "unknown"
 
 
-def process_agent_response(response):
-    """Extract text and SQL from Cortex Agent response"""
-    text = ""
-    sql = ""
-    debug_info = []
+def cached_cortex_agent_call(question: str, model_version: str, cache: AgentResponseCache = None):
+    """Cortex Agent call keyed by normalized question and semantic model version.
 
-    if not response:
-        return "No response received", "", "Empty response"
+    Returns (events, cache_hit); read events to the end (iter_agent_content)
+    so a streamed answer is stored.
+    """
+    cache = cache or get_agent_response_cache()
+    key = (normalize_question(question), model_version)
+    return cache.get_or_stream(key, lambda: cortex_agent_call(question, None))
 
-    if isinstance(response, str):
-        return response, "", "String response"
 
-    if "error" in response:
-        raw_info = response.get("raw", "")
-        return response["error"], "", f"Error response: {raw_info}"
+def _strip_sql(sql: str) -> str:
+    return sql.strip().rstrip(";").strip()
 
-    try:
-        if isinstance(response, list):
-            debug_info.append(f"List response with {len(response)} events")
-            for event in response:
-                if isinstance(event, dict):
-                    event_type = event.get('event', 'no-event-field')
-                    debug_info.append(f"Event: {event_type}")
-
-                    # Handle errors
-                    if event_type == "error":
-                        error_msg = event.get('data', {}).get('message', 'Unknown error')
-                        return f"Error: {error_msg}", "", "\n".join(debug_info)
-
-                    # Handle message deltas
-                    elif event_type == "message.delta":
-                        delta = event.get('data', {}).get('delta', {})
-                        for content_item in delta.get('content', []):
-                            content_type = content_item.get('type')
-                            debug_info.append(f"  Content type: {content_type}")
-
-                            if content_type == "tool_results":
-                                tool_results = content_item.get('tool_results', {})
-                                for result in tool_results.get('content', []):
-                                    if result.get('type') == 'json':
-                                        json_data = result.get('json', {})
-                                        text += json_data.get('text', '')
-                                        if json_data.get('sql'):
-                                            sql = json_data.get('sql')
-
-                            elif content_type == 'text':
-                                text += content_item.get('text', '')
-
-                    # Handle complete messages
-                    elif 'role' in event and event['role'] == 'assistant':
-                        for content_item in event.get('content', []):
-                            if content_item.get('type') == 'text':
-                                text += content_item.get('text', '')
-
-        elif isinstance(response, dict):
-            debug_info.append(f"Dict response with keys: {list(response.keys())}")
-            if 'choices' in response:
-                for choice in response['choices']:
-                    if 'message' in choice:
-                        text += choice['message'].get('content', '')
 
+def guarded_sql(sql: str, row_cap: int) -> str:
+    """Wrap generated SQL in an outer LIMIT (one extra row detects truncation)"""
+    return f"SELECT * FROM (\n{_strip_sql(sql)}\n) LIMIT {int(row_cap) + 1}"
+
+
+@profiled_cache(CORTEX_SQL_PANEL)
+@st.cache_data(ttl=SQL_RESULT_CACHE_TTL_SEC, show_spinner=False)
+def run_generated_sql(sql: str, row_cap: int = CORTEX_SQL_ROW_CAP):
+    """Run Cortex-generated SQL under a row cap, statement timeout and memory budget.
+
+    Rows are fetched as Arrow-backed pandas batches and fetching stops once the
+    row cap or CORTEX_SQL_MEMORY_BUDGET_BYTES is reached. Returns
+    (DataFrame, truncated). Results are cached briefly to absorb repeat clicks.
+    """
+    import pandas as pd
+
+    statement_params = {
+        "STATEMENT_TIMEOUT_IN_SECONDS": CORTEX_SQL_TIMEOUT_SEC,
+        "QUERY_TAG": panel_query_tag(CORTEX_SQL_PANEL),
+    }
+
+    frames = []
+    rows = 0
+    used_bytes = 0
+    truncated = False
+    started = time.perf_counter()
+    try:
+        batches = session.sql(guarded_sql(sql, row_cap)).to_pandas_batches(statement_params=statement_params)
+        for batch in batches:
+            frames.append(batch)
+            rows += len(batch)
+            used_bytes += int(batch.memory_usage(deep=True).sum())
+            if rows > row_cap or used_bytes > CORTEX_SQL_MEMORY_BUDGET_BYTES:
+                truncated = True
+                break
     except Exception as e:
-        return f"Error processing response: {e}", "", "\n".join(debug_info)
+        record_panel_query(CORTEX_SQL_PANEL, started, error=e)
+        raise
+
+    result_df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    if len(result_df) > row_cap:
+        result_df = result_df.iloc[:row_cap]
+    record_panel_query(CORTEX_SQL_PANEL, started, result_df)
+    return result_df, truncated
+
+
+def export_generated_sql(sql: str) -> str:
+    """Unload the full result of generated SQL to the results stage.
+
+    Returns a presigned download URL valid for one hour.
+    """
+    path = f"ask_cortex/{uuid.uuid4().hex}/result.csv.gz"
+    statement_params = {"STATEMENT_TIMEOUT_IN_SECONDS": CORTEX_SQL_EXPORT_TIMEOUT_SEC}
+    panel_query("ASK_CORTEX:EXPORT", f"""
+        COPY INTO {CORTEX_RESULTS_STAGE}/{path}
+        FROM (
+        {_strip_sql(sql)}
+        )
+        FILE_FORMAT = (TYPE = CSV COMPRESSION = GZIP FIELD_OPTIONALLY_ENCLOSED_BY = '"')
+        HEADER = TRUE
+        SINGLE = TRUE
+        MAX_FILE_SIZE = 5368709120
+    """, statement_params=statement_params)
+    return panel_query("ASK_CORTEX:EXPORT", f"""
+        SELECT GET_PRESIGNED_URL({CORTEX_RESULTS_STAGE}, '{path}', 3600) AS URL
+    """)[0]['URL']
+
+
+def start_generated_sql(sql: str, row_cap: int = CORTEX_SQL_ROW_CAP):
+    """Run generated SQL on a worker thread so it overlaps streaming the answer"""
+    job = {"thread": None, "df": None, "truncated": False, "error": None}
+
+    def worker():
+        try:
+            job["df"], job["truncated"] = run_generated_sql(sql, row_cap)
+        except Exception as e:
+            job["error"] = e
+
+    thread = threading.Thread(target=worker, name="cortex-sql", daemon=True)
+    add_script_run_ctx(thread)
+    thread.start()
+    job["thread"] = thread
+    return job
+
+
+def wait_generated_sql(job):
+    """Wait for a job from start_generated_sql; returns (DataFrame, truncated, error)"""
+    job["thread"].join()
+    return job["df"], job["truncated"], job["error"]
+
+
+def _prewarm_sample_questions(cache: AgentResponseCache, model_version: str):
+    for question in SAMPLE_QUESTIONS:
+        try:
+            events, _ = cached_cortex_agent_call(question, model_version, cache)
+            for kind, value in iter_agent_content(events):
+                if kind == "error":
+                    logger.warning("Cortex prewarm failed for %r: %s", question, value)
+        except Exception:
+            logger.exception("Cortex prewarm failed for %r", question)
+
+
+@st.cache_resource(show_spinner=False)
+def start_sample_prewarm(model_version: str):
+    """Warm the agent cache with the sample questions once per model version.
+
+    The thread runs under the starting session's script-run context, so the
+    Snowflake API and Streamlit caches behave as they do in the script.
+    """
+    thread = threading.Thread(
+        target=_prewarm_sample_questions,
+        args=(get_agent_response_cache(), model_version),
+        name="cortex-prewarm",
+        daemon=True,
+    )
+    add_script_run_ctx(thread)
+    thread.start()
+    return thread
+
+
+@profiled_cache("PIPELINE_COUNTERS")
+@st.cache_data(ttl=PIPELINE_COUNTERS_TTL_SEC, show_spinner=False)
+def load_pipeline_counters():
+    """Per-stage counters from PIPELINE_COUNTERS, keyed by stage name"""
+    rows = panel_query("PIPELINE_COUNTERS", """
+        SELECT STAGE, STAGE_ORDER, ROW_COUNT, LAST_INSERTED_AT, ROWS_1H,
+               AVG_LAG_1H_SEC, MAX_LAG_1H_SEC, UPDATED_AT
+        FROM DEDEMO.GAMING.PIPELINE_COUNTERS
+        ORDER BY STAGE_ORDER
+    """)
+    return {row['STAGE']: row.as_dict() for row in rows}
+
+
+# st.fragment (Streamlit 1.37+), or its experimental name (1.33+)
+_fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None)
+
+
+def live_fragment(run_every: int):
+    """Decorator: in live mode the panel re-runs on its own every run_every seconds"""
+    if live_mode and _fragment is not None:
+        return _fragment(run_every=run_every)
+    return lambda fn: fn
+
+
+def _sql_timestamp(value) -> str:
+    return f"'{value:%Y-%m-%d %H:%M:%S.%f}'::TIMESTAMP_NTZ"
+
+
+def live_frame(name: str, panel: str, sql: str, keys: list, watermarks: list,
+               initial_where: str = "TRUE", prune=None):
+    """Rows of a panel kept in session state and brought up to date with delta queries.
+
+    The first call loads the rows matching initial_where and the newest value
+    of each watermark column. Later calls load only rows where any watermark
+    column is past its newest value (less LIVE_DELTA_OVERLAP_SEC for late
+    commits) and upsert them by keys. prune(df, as_of) drops rows the panel no
+    longer shows. Returns (DataFrame, as_of) with as_of the warehouse's
+    CURRENT_TIMESTAMP of the query.
+    """
+    import pandas as pd
+
+    state_key = f"live_frame:{name}"
+    state = st.session_state.get(state_key)
+    if state is None:
+        marks_sql = "".join(f", MAX({column}) as WM_{column}" for column in watermarks)
+        head_sql = f"SELECT CURRENT_TIMESTAMP()::TIMESTAMP_NTZ as AS_OF{marks_sql} FROM base"
+        where = initial_where
+    else:
+        head_sql = "SELECT CURRENT_TIMESTAMP()::TIMESTAMP_NTZ as AS_OF"
+        where = " OR ".join(
+            f"{column} > DATEADD(second, -{LIVE_DELTA_OVERLAP_SEC}, {_sql_timestamp(mark)})"
+            if mark is not None else f"{column} IS NOT NULL"
+            for column, mark in state["watermarks"].items()
+        )
+
+    result = panel_query(f"{panel}:{'DELTA' if state else 'LOAD'}", f"""
+        WITH base AS ({sql})
+        SELECT h.*, r.*
+        FROM ({head_sql}) h
+        LEFT JOIN (SELECT * FROM base WHERE {where}) r ON TRUE
+    """, to_pandas=True)
+
+    as_of = result["AS_OF"].iloc[0]
+    head_columns = [column for column in result.columns if column == "AS_OF" or column.startswith("WM_")]
+    rows = result.drop(columns=head_columns).dropna(subset=keys)
+
+    if state is None:
+        marks = {column: result[f"WM_{column}"].iloc[0] for column in watermarks}
+        df = rows
+    else:
+        marks = dict(state["watermarks"])
+        for column in watermarks:
+            newest = rows[column].max()
+            if pd.notna(newest) and (marks[column] is None or newest > marks[column]):
+                marks[column] = newest
+        df = pd.concat([state["df"], rows], ignore_index=True).drop_duplicates(subset=keys, keep="last")
+    marks = {column: (None if pd.isna(mark) else mark) for column, mark in marks.items()}
+
+    if prune is not None:
+        df = prune(df, as_of)
+    st.session_state[state_key] = {"df": df.reset_index(drop=True), "watermarks": marks}
+    return st.session_state[state_key]["df"], as_of
+
+
+class TimeSeriesBucketCache:
+    """Thread-safe store of closed time buckets, shared by all sessions.
+
+    Entries are keyed by series, range and bucket size and hold the buckets that
+    ended before closed_through; those never change for an append-only
+    source, so only later buckets are queried again.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            return None if entry is None else dict(entry, buckets=dict(entry["buckets"]))
+
+    def update(self, key, range_start, closed_through, buckets: dict):
+        """Add closed buckets and drop the ones before range_start"""
+        with self._lock:
+            entry = self._entries.setdefault(key, {"closed_through": closed_through, "buckets": {}})
+            entry["buckets"].update(buckets)
+            entry["closed_through"] = max(entry["closed_through"], closed_through)
+            entry["buckets"] = {b: row for b, row in entry["buckets"].items() if b >= range_start}
+
+
+@st.cache_resource(show_spinner=False)
+def get_time_series_cache():
+    """Process-wide closed-bucket cache shared by all sessions"""
+    return TimeSeriesBucketCache()
+
+
+def time_series_bucket_minutes(range_sec: int) -> int:
+    """Smallest bucket size that keeps range_sec within TIME_SERIES_MAX_POINTS buckets"""
+    for minutes in TIME_SERIES_BUCKET_MINUTES:
+        if range_sec / (minutes * 60) <= TIME_SERIES_MAX_POINTS:
+            return minutes
+    return TIME_SERIES_BUCKET_MINUTES[-1]
+
+
+def load_time_series(panel: str, table: str, time_column: str, measures: dict, range_sec: int):
+    """Time-bucketed aggregates of an append-only table over the last range_sec seconds.
+
+    The bucket size is picked by time_series_bucket_minutes and the
+    aggregation runs in Snowflake (TIME_SLICE, aligned to the epoch, so
+    bucket boundaries never move). Buckets that closed more than
+    TIME_SERIES_CLOSE_GRACE_SEC ago are kept in the shared cache; a repeat
+    call only queries from the first bucket not yet closed.
+
+    measures maps output column to aggregate SQL, e.g. {"BATCHES": "COUNT(*)"}.
+    Returns (DataFrame with BUCKET, BUCKET_UTC and the measures, bucket minutes).
+    """
+    import pandas as pd
+
+    minutes = time_series_bucket_minutes(range_sec)
+    key = (table, time_column, tuple(sorted(measures.items())), int(range_sec), minutes)
+    cache = get_time_series_cache()
+    entry = cache.get(key)
+
+    slice_sql = f"TIME_SLICE({time_column}, {minutes}, 'MINUTE')"
+    range_start_sql = (
+        f"TIME_SLICE(DATEADD(second, -{int(range_sec)}, CURRENT_TIMESTAMP()::TIMESTAMP_NTZ), {minutes}, 'MINUTE')"
+    )
+    from_sql = range_start_sql
+    if entry is not None:
+        from_sql = f"GREATEST({range_start_sql}, {_sql_timestamp(entry['closed_through'])})"
+    measures_sql = "".join(f",\n                {expr} as {name}" for name, expr in measures.items())
+
+    result = panel_query(panel, f"""
+        SELECT h.AS_OF, h.RANGE_START, r.*
+        FROM (
+            SELECT CURRENT_TIMESTAMP()::TIMESTAMP_NTZ as AS_OF, {range_start_sql} as RANGE_START
+        ) h
+        LEFT JOIN (
+            SELECT
+                {slice_sql} as BUCKET,
+                CONVERT_TIMEZONE('UTC', {slice_sql}) as BUCKET_UTC{measures_sql}
+            FROM {table}
+            WHERE {time_column} >= {from_sql}
+            GROUP BY 1, 2
+        ) r ON TRUE
+        ORDER BY r.BUCKET
+    """, to_pandas=True)
+
+    as_of = result["AS_OF"].iloc[0]
+    range_start = result["RANGE_START"].iloc[0]
+    fetched = result.drop(columns=["AS_OF", "RANGE_START"]).dropna(subset=["BUCKET"])
+    closed_through = (as_of - pd.Timedelta(seconds=TIME_SERIES_CLOSE_GRACE_SEC)).floor(f"{minutes}min")
+
+    # A bucket is closed once it ends before closed_through
+    closed = fetched[fetched["BUCKET"] + pd.Timedelta(minutes=minutes) <= closed_through]
+    cache.update(key, range_start, closed_through,
+                 {row["BUCKET"]: row for row in closed.to_dict("records")})
+
+    cached = [] if entry is None else [
+        row for bucket, row in entry["buckets"].items() if bucket >= range_start
+    ]
+    # Empty frames are left out so they cannot turn the bucket columns into object dtype
+    frames = [f for f in (pd.DataFrame(cached, columns=fetched.columns), fetched) if not f.empty]
+    series = pd.concat(frames, ignore_index=True) if frames else fetched
+    series = series.drop_duplicates(subset=["BUCKET"], keep="last").sort_values("BUCKET")
+    return series.reset_index(drop=True), minutes
+
+
+def time_series_axis_format(range_sec: int) -> str:
+    return "%d %b" if range_sec >= 7 * 86400 else "%d %H:%M"
+
+
+def live_pipeline_counters():
+    """PIPELINE_COUNTERS keyed by stage, re-read only for stages updated since the last call"""
+    df, _ = live_frame("counters", "PIPELINE_COUNTERS", """
+        SELECT STAGE, STAGE_ORDER, ROW_COUNT, LAST_INSERTED_AT, ROWS_1H,
+               AVG_LAG_1H_SEC, MAX_LAG_1H_SEC, UPDATED_AT
+        FROM DEDEMO.GAMING.PIPELINE_COUNTERS
+    """, keys=["STAGE"], watermarks=["UPDATED_AT"])
+    return {row["STAGE"]: row for row in df.sort_values("STAGE_ORDER").to_dict("records")}
+
+
+def live_batches():
+    """Batches not yet uploaded plus the most recent ones, with their status kept current.
+
+    Returns (DataFrame, as_of).
+    """
+    def prune(df, as_of):
+        recent = df.nlargest(RECENT_BATCHES_LIMIT, "BATCH_TIMESTAMP").index
+        return df[(df["STATUS"] != "UPLOADED") | df.index.isin(recent)]
+
+    return live_frame("batches", "BATCHES", """
+        SELECT BATCH_ID, STATUS, TRANSACTION_COUNT, BATCH_TIMESTAMP, UPLOAD_TIMESTAMP,
+               GENERATED_FILENAME, OPERATOR_ID, WAREHOUSE_ID, LEASE_EXPIRES_AT
+        FROM DEDEMO.GAMING.REGULATORY_BATCHES
+    """, keys=["BATCH_ID"], watermarks=["BATCH_TIMESTAMP", "UPLOAD_TIMESTAMP", "LEASE_EXPIRES_AT"],
+        initial_where=f"""STATUS != 'UPLOADED' OR BATCH_ID IN (
+            SELECT BATCH_ID FROM DEDEMO.GAMING.REGULATORY_BATCHES
+            ORDER BY BATCH_TIMESTAMP DESC LIMIT {RECENT_BATCHES_LIMIT}
+        )""", prune=prune)
+
+
+def live_latency_summary():
+    """TOTAL END-TO-END row of PIPELINE_LATENCY_ANALYSIS from delta-merged rollup minutes.
+
+    Average and maximum are combined from the minutes of the last 24 hours
+    as the view does; p95 needs the percentile states, so it is re-read from
+    the view at most every LIVE_P95_REFRESH_SEC.
+    """
+    import pandas as pd
+
+    def prune(df, as_of):
+        return df[df["MINUTE_TS"] >= (as_of - pd.Timedelta(hours=24)).floor("min")]
+
+    df, as_of = live_frame("latency", "OBSERVABILITY:LATENCY", """
+        SELECT STAGE, MINUTE_TS, SAMPLES, LATENCY_SUM_SEC, LATENCY_MAX_SEC, UPDATED_AT
+        FROM DEDEMO.GAMING.PIPELINE_LATENCY_ROLLUP
+    """, keys=["STAGE", "MINUTE_TS"], watermarks=["UPDATED_AT"],
+        initial_where="MINUTE_TS >= DATE_TRUNC('minute', DATEADD(hour, -24, CURRENT_TIMESTAMP()))",
+        prune=prune)
+
+    stages = df.astype({"SAMPLES": float, "LATENCY_SUM_SEC": float, "LATENCY_MAX_SEC": float}).groupby("STAGE").agg(
+        SAMPLES=("SAMPLES", "sum"), LATENCY_SUM_SEC=("LATENCY_SUM_SEC", "sum"), MAX_SEC=("LATENCY_MAX_SEC", "max"))
+    stages = stages[stages["SAMPLES"] > 0]
+    summary = {
+        "AVG_SEC": (stages["LATENCY_SUM_SEC"] / stages["SAMPLES"]).round(1).sum() if len(stages) else None,
+        "MAX_SEC": stages["MAX_SEC"].sum() if len(stages) else None,
+    }
+
+    p95 = st.session_state.get("live_latency_p95")
+    if p95 is None or time.time() - p95["at"] > LIVE_P95_REFRESH_SEC:
+        rows = panel_query("OBSERVABILITY:LATENCY_P95", """
+            SELECT P95_SEC FROM DEDEMO.GAMING.PIPELINE_LATENCY_ANALYSIS
+            WHERE STAGE = 'TOTAL END-TO-END'
+        """)
+        p95 = {"at": time.time(), "value": rows[0]['P95_SEC'] if rows else None}
+        st.session_state["live_latency_p95"] = p95
+    summary["P95_SEC"] = p95["value"]
+    return summary
+
+
+XML_TOKEN_PATTERN = re.compile(r"<!--.*?-->|<[^>]*>?|[^<]+", re.DOTALL)
+
+
+def iter_xml_tokens(xml_text: str):
+    """Tokenize XML into tags and text runs without building a tree.
+
+    A tag cut off at the end of a truncated prefix is dropped, so any
+    bounded prefix of a document can be tokenized.
+    """
+    for match in XML_TOKEN_PATTERN.finditer(xml_text):
+        token = match.group(0)
+        if token.startswith("<") and not token.endswith(">"):
+            return
+        if token.strip():
+            yield token.strip()
+
+
+def pretty_print_xml_prefix(xml_text: str, max_lines: int, indent: str = "  "):
+    """Incrementally pretty-print (a prefix of) an XML document.
+
+    Stops as soon as max_lines lines are produced. Returns (lines, truncated).
+    Tolerates unbalanced or truncated input since it never parses the whole
+    document.
+    """
+    lines = []
+    depth = 0
+    tokens = iter_xml_tokens(xml_text)
+    pending = next(tokens, None)
+
+    while pending is not None:
+        if len(lines) >= max_lines:
+            return lines, True
+        token = pending
+        pending = next(tokens, None)
+
+        if token.startswith(("<?", "<!")):
+            if not token.startswith("<?xml"):
+                lines.append(indent * depth + token)
+        elif token.startswith("</"):
+            depth = max(depth - 1, 0)
+            lines.append(indent * depth + token)
+        elif token.startswith("<"):
+            if token.endswith("/>"):
+                lines.append(indent * depth + token)
+                continue
+            # Keep <Tag>text</Tag> on a single line
+            if pending is not None and not pending.startswith("<"):
+                text = pending
+                closing = next(tokens, None)
+                if closing is not None and closing.startswith("</"):
+                    lines.append(indent * depth + token + text + closing)
+                    pending = next(tokens, None)
+                    continue
+                lines.append(indent * depth + token)
+                lines.append(indent * (depth + 1) + text)
+                depth += 1
+                pending = closing
+                continue
+            lines.append(indent * depth + token)
+            depth += 1
+        else:
+            lines.append(indent * depth + token)
+
+    return lines, False
+
+
+def read_offloaded_xml(xml_uri: str, max_bytes: int = None, panel: str = "BATCHES:XML_PREVIEW") -> bytes:
+    """Read (a prefix of) a lote offloaded to @DEDEMO.GAMING.BATCH_XML.
+
+    The gzip stream is decompressed only as far as max_bytes, so a preview
+    never inflates the whole document.
+    """
+    started = time.perf_counter()
+    with gzip.GzipFile(fileobj=session.file.get_stream(xml_uri), mode="rb") as stream:
+        data = stream.read(max_bytes) if max_bytes else stream.read()
+    record_panel_query(panel, started, data)
+    return data
 
-    return text, sql, "\n".join(debug_info)
 
 # App title
 st.title("BOE Gaming Regulatory Pipeline")
 
-# Global refresh
-col_title, col_refresh = st.columns([4, 1])
+# Warm the Cortex cache with the sample questions in the background
+semantic_model_version = get_semantic_model_version()
+if _snowflake is not None:
+    start_sample_prewarm(semantic_model_version)
+
+# Global refresh; live mode refreshes the time-sensitive panels on their own
+col_title, col_live, col_refresh = st.columns([3, 1, 1])
+with col_live:
+    live_mode = st.checkbox(
+        "Live mode",
+        key="live_mode",
+        disabled=_fragment is None,
+        help="Backlog, stream pending, recent batches and latency refresh on their own, fetching only new rows"
+        if _fragment is not None else "Live mode needs Streamlit 1.33 or later"
+    )
 with col_refresh:
     if st.button("Refresh All", type="primary"):
-        st.experimental_rerun()
+        _rerun()
 
 # Create tabs for narrative progression
 tab_overview, tab_cdc, tab_dt, tab_stream, tab_batches, tab_obs, tab_logs, tab_cortex = st.tabs([
@@ -196,6 +1143,7 @@ tab_overview, tab_cdc, tab_dt, tab_stream, tab_batches, tab_obs, tab_logs, tab_c
 # =============================================================================
 # TAB 1: OVERVIEW
 # =============================================================================
+start_tab_profile("OVERVIEW")
 with tab_overview:
     st.header("Pipeline Overview")
     st.caption("End-to-end view of the regulatory data pipeline from source to delivery")
@@ -204,24 +1152,20 @@ with tab_overview:
     st.subheader("Pipeline Stage Counts")
 
     try:
-        stage_counts = session.sql("""
-            SELECT 'CDC Source' as STAGE, 1 as STAGE_ORDER, COUNT(*) as COUNT FROM DEDEMO.TOURNAMENTS.POKER
-            UNION ALL SELECT 'Dynamic Table', 2, COUNT(*) FROM DEDEMO.GAMING.DT_POKER_FLATTENED
-            UNION ALL SELECT 'Stream Pending', 3, COUNT(*) FROM DEDEMO.GAMING.POKER_TRANSACTIONS_STREAM
-            UNION ALL SELECT 'Batches Created', 4, COUNT(*) FROM DEDEMO.GAMING.REGULATORY_BATCHES
-            UNION ALL SELECT 'Batches Uploaded', 5, SUM(CASE WHEN STATUS = 'UPLOADED' THEN 1 ELSE 0 END) FROM DEDEMO.GAMING.REGULATORY_BATCHES
-            ORDER BY STAGE_ORDER
-        """).collect()
+        # One small row per stage instead of COUNT(*) over each growing table
+        stage_counts = list(load_pipeline_counters().values())
 
         # Display as horizontal metrics
         cols = st.columns(5)
         stage_icons = ["📥", "🔄", "⏳", "📦", "✅"]
-        for i, row in enumerate(stage_counts):
+        for i, row in enumerate(stage_counts[:5]):
             with cols[i]:
                 st.metric(
                     label=f"{stage_icons[i]} {row['STAGE']}",
-                    value=f"{row['COUNT']:,}"
+                    value=f"{int(row['ROW_COUNT'] or 0):,}"
                 )
+        if stage_counts:
+            st.caption(f"Counters as of {str(stage_counts[0]['UPDATED_AT'])[:19]} (refreshed every minute)")
     except Exception as e:
         st.error(f"Error loading stage counts: {e}")
 
@@ -233,30 +1177,30 @@ with tab_overview:
 
     with m1:
         try:
-            result = session.sql("""
+            result = panel_query("OVERVIEW:UPLOADED_TODAY", """
                 SELECT COUNT(*) as cnt FROM DEDEMO.GAMING.REGULATORY_BATCHES
                 WHERE STATUS = 'UPLOADED' AND DATE(UPLOAD_TIMESTAMP) = CURRENT_DATE()
-            """).collect()[0]['CNT']
+            """)[0]['CNT']
             st.metric("Uploaded Today", f"{result:,}")
         except:
             st.metric("Uploaded Today", "N/A")
 
     with m2:
         try:
-            result = session.sql("""
+            result = panel_query("OVERVIEW:TRANSACTIONS_PROCESSED", """
                 SELECT SUM(TRANSACTION_COUNT) as total
                 FROM DEDEMO.GAMING.REGULATORY_BATCHES
-            """).collect()[0]['TOTAL']
+            """)[0]['TOTAL']
             st.metric("Total Transactions Processed", f"{int(result or 0):,}")
         except:
             st.metric("Total Transactions Processed", "N/A")
 
     with m3:
         try:
-            result = session.sql("""
+            result = panel_query("OVERVIEW:AVG_LATENCY", """
                 SELECT AVG_SEC FROM DEDEMO.GAMING.PIPELINE_LATENCY_ANALYSIS
                 WHERE STAGE = 'TOTAL END-TO-END'
-            """).collect()
+            """)
             if result and result[0]['AVG_SEC']:
                 avg_sec = float(result[0]['AVG_SEC'])
                 st.metric("Avg Latency (24h)", f"{avg_sec:.1f} sec")
@@ -267,11 +1211,11 @@ with tab_overview:
 
     with m4:
         try:
-            result = session.sql("""
-                SELECT COUNT(*) as cnt FROM DEDEMO.GAMING.OPENFLOW_ERROR_SUMMARY
-                WHERE HOUR > DATEADD(hour, -1, CURRENT_TIMESTAMP())
+            result = panel_query("OVERVIEW:ERRORS_1H", """
+                SELECT COUNT(*) as cnt FROM DEDEMO.GAMING.OPENFLOW_LOG_EVENTS
+                WHERE EVENT_TIMESTAMP > DATEADD(hour, -1, CURRENT_TIMESTAMP())
                 AND LOG_LEVEL = 'ERROR'
-            """).collect()[0]['CNT']
+            """)[0]['CNT']
             if result == 0:
                 st.metric("Errors (Last Hour)", "0", delta="Healthy", delta_color="normal")
             else:
@@ -288,12 +1232,12 @@ with tab_overview:
     with f1:
         try:
             # Source timestamp is already UTC, no conversion needed
-            result = session.sql("""
+            result = panel_query("OVERVIEW:LATEST_SOURCE", """
                 SELECT TO_VARCHAR(
                     MAX(CREATED_TIMESTAMP),
                     'YYYY-MM-DD HH24:MI:SS'
                 ) as ts FROM DEDEMO.TOURNAMENTS.POKER
-            """).collect()[0]['TS']
+            """)[0]['TS']
             st.metric("Latest Source Transaction", result if result else "N/A")
         except:
             st.metric("Latest Source Transaction", "N/A")
@@ -301,12 +1245,12 @@ with tab_overview:
     with f2:
         try:
             # Batch timestamp needs timezone conversion to UTC
-            result = session.sql("""
+            result = panel_query("OVERVIEW:LATEST_BATCH", """
                 SELECT TO_VARCHAR(
                     CONVERT_TIMEZONE('UTC', MAX(BATCH_TIMESTAMP)),
                     'YYYY-MM-DD HH24:MI:SS'
                 ) as ts FROM DEDEMO.GAMING.REGULATORY_BATCHES
-            """).collect()[0]['TS']
+            """)[0]['TS']
             st.metric("Latest Batch Created", result if result else "N/A")
         except:
             st.metric("Latest Batch Created", "N/A")
@@ -314,13 +1258,13 @@ with tab_overview:
     with f3:
         try:
             # Upload timestamp needs timezone conversion to UTC
-            result = session.sql("""
+            result = panel_query("OVERVIEW:LATEST_UPLOAD", """
                 SELECT TO_VARCHAR(
                     CONVERT_TIMEZONE('UTC', MAX(UPLOAD_TIMESTAMP)),
                     'YYYY-MM-DD HH24:MI:SS'
                 ) as ts FROM DEDEMO.GAMING.REGULATORY_BATCHES
                 WHERE STATUS = 'UPLOADED'
-            """).collect()[0]['TS']
+            """)[0]['TS']
             st.metric("Latest SFTP Upload", result if result else "N/A")
         except:
             st.metric("Latest SFTP Upload", "N/A")
@@ -329,6 +1273,7 @@ with tab_overview:
 # =============================================================================
 # TAB 2: CDC REPLICATION
 # =============================================================================
+start_tab_profile("CDC")
 with tab_cdc:
     st.header("CDC Replication")
     st.caption("External Postgres transactions replicated to Snowflake via OpenFlow CDC connector")
@@ -340,39 +1285,28 @@ with tab_cdc:
 
     with c1:
         try:
-            result = session.sql("""
-                SELECT COUNT(*) as cnt FROM DEDEMO.TOURNAMENTS.POKER
-            """).collect()[0]['CNT']
-            st.metric("Total Replicated Records", f"{result:,}")
+            result = load_pipeline_counters()['CDC Source']['ROW_COUNT']
+            st.metric("Total Replicated Records", f"{int(result or 0):,}")
         except:
             st.metric("Total Replicated Records", "N/A")
 
     with c2:
         try:
-            result = session.sql("""
-                SELECT COUNT(*) as cnt FROM DEDEMO.TOURNAMENTS.POKER
-                WHERE CREATED_TIMESTAMP > DATEADD(hour, -1, CURRENT_TIMESTAMP())
-            """).collect()[0]['CNT']
-            st.metric("Records (Last Hour)", f"{result:,}")
+            result = load_pipeline_counters()['CDC Source']['ROWS_1H']
+            st.metric("Records (Last Hour)", f"{int(result or 0):,}")
         except:
             st.metric("Records (Last Hour)", "N/A")
 
     with c3:
         try:
-            result = session.sql("""
-                SELECT ROUND(AVG(TIMESTAMPDIFF(second, CREATED_TIMESTAMP, _SNOWFLAKE_INSERTED_AT)), 1) as avg_lag
-                FROM DEDEMO.TOURNAMENTS.POKER
-                WHERE CREATED_TIMESTAMP > DATEADD(hour, -1, CURRENT_TIMESTAMP())
-            """).collect()[0]['AVG_LAG']
-            st.metric("Avg CDC Latency", f"{result:.1f} sec" if result else "N/A")
+            result = load_pipeline_counters()['CDC Source']['AVG_LAG_1H_SEC']
+            st.metric("Avg CDC Latency", f"{float(result):.1f} sec" if result else "N/A")
         except:
             st.metric("Avg CDC Latency", "N/A")
 
     with c4:
         try:
-            result = session.sql("""
-                SELECT MAX(_SNOWFLAKE_INSERTED_AT) as ts FROM DEDEMO.TOURNAMENTS.POKER
-            """).collect()[0]['TS']
+            result = load_pipeline_counters()['CDC Source']['LAST_INSERTED_AT']
             st.metric("Last Replication", str(result)[:19] if result else "N/A")
         except:
             st.metric("Last Replication", "N/A")
@@ -383,7 +1317,7 @@ with tab_cdc:
     st.caption("Shows raw JSONB from source plus Snowflake replication timestamps")
 
     try:
-        cdc_df = session.sql("""
+        cdc_df = panel_query("CDC:REPLICATED_DATA", """
             SELECT
                 TRANSACTION_ID,
                 CREATED_TIMESTAMP as SOURCE_TIMESTAMP,
@@ -393,7 +1327,7 @@ with tab_cdc:
             FROM DEDEMO.TOURNAMENTS.POKER
             ORDER BY CREATED_TIMESTAMP DESC
             LIMIT 25
-        """).to_pandas()
+        """, to_pandas=True)
 
         if not cdc_df.empty:
             st.dataframe(cdc_df, use_container_width=True, height=400)
@@ -406,6 +1340,7 @@ with tab_cdc:
 # =============================================================================
 # TAB 3: DYNAMIC TABLE
 # =============================================================================
+start_tab_profile("DT")
 with tab_dt:
     st.header("Dynamic Table")
     st.caption("Automatic transformation: JSONB flattened to structured columns with 1-minute refresh lag")
@@ -417,10 +1352,8 @@ with tab_dt:
 
     with d1:
         try:
-            result = session.sql("""
-                SELECT COUNT(*) as cnt FROM DEDEMO.GAMING.DT_POKER_FLATTENED
-            """).collect()[0]['CNT']
-            st.metric("Total Records", f"{result:,}")
+            result = load_pipeline_counters()['Dynamic Table']['ROW_COUNT']
+            st.metric("Total Records", f"{int(result or 0):,}")
         except:
             st.metric("Total Records", "N/A")
 
@@ -430,9 +1363,9 @@ with tab_dt:
     with d3:
         try:
             # Query DT metadata - use collect() then access as dict
-            rows = session.sql("""
+            rows = panel_query("DT:REFRESH_STATE", """
                 SHOW DYNAMIC TABLES LIKE 'DT_POKER_FLATTENED' IN SCHEMA DEDEMO.GAMING
-            """).collect()
+            """)
             if rows:
                 row_dict = rows[0].as_dict()
                 state = row_dict.get('scheduling_state', row_dict.get('SCHEDULING_STATE', 'ACTIVE'))
@@ -449,12 +1382,12 @@ with tab_dt:
     st.caption("Source data as replicated from Postgres - nested JSON structure")
 
     try:
-        before_df = session.sql("""
+        before_df = panel_query("DT:BEFORE", """
             SELECT TRANSACTION_ID, TRANSACTION_DATA
             FROM DEDEMO.TOURNAMENTS.POKER
             ORDER BY CREATED_TIMESTAMP DESC
             LIMIT 5
-        """).to_pandas()
+        """, to_pandas=True)
         st.dataframe(before_df, use_container_width=True)
     except Exception as e:
         st.error(f"Error: {e}")
@@ -465,7 +1398,7 @@ with tab_dt:
     st.caption("Dynamic Table automatically extracts JSON fields to typed columns")
 
     try:
-        dt_df = session.sql("""
+        dt_df = panel_query("DT:AFTER", """
             SELECT
                 TRANSACTION_ID,
                 CREATED_TIMESTAMP,
@@ -480,7 +1413,7 @@ with tab_dt:
             FROM DEDEMO.GAMING.DT_POKER_FLATTENED
             ORDER BY CREATED_TIMESTAMP DESC
             LIMIT 25
-        """).to_pandas()
+        """, to_pandas=True)
 
         if not dt_df.empty:
             st.dataframe(dt_df, use_container_width=True, height=400)
@@ -493,6 +1426,7 @@ with tab_dt:
 # =============================================================================
 # TAB 4: STREAM PROCESSING
 # =============================================================================
+start_tab_profile("STREAM")
 with tab_stream:
     st.header("Stream Processing")
     st.caption("Stream consumption and batch processing activity")
@@ -504,41 +1438,41 @@ with tab_stream:
 
     with s1:
         try:
-            result = session.sql("""
+            result = panel_query("STREAM:TRANSACTIONS_1H", """
                 SELECT SUM(TRANSACTION_COUNT) as total
                 FROM DEDEMO.GAMING.REGULATORY_BATCHES
                 WHERE BATCH_TIMESTAMP > DATEADD(hour, -1, CURRENT_TIMESTAMP())
-            """).collect()[0]['TOTAL']
+            """)[0]['TOTAL']
             st.metric("Transactions (Last Hour)", f"{int(result or 0):,}")
         except:
             st.metric("Transactions (Last Hour)", "N/A")
 
     with s2:
         try:
-            result = session.sql("""
+            result = panel_query("STREAM:BATCHES_1H", """
                 SELECT COUNT(*) as cnt
                 FROM DEDEMO.GAMING.REGULATORY_BATCHES
                 WHERE BATCH_TIMESTAMP > DATEADD(hour, -1, CURRENT_TIMESTAMP())
-            """).collect()[0]['CNT']
+            """)[0]['CNT']
             st.metric("Batches (Last Hour)", f"{result:,}")
         except:
             st.metric("Batches (Last Hour)", "N/A")
 
     with s3:
         try:
-            result = session.sql("""
+            result = panel_query("STREAM:AVG_BATCH_SIZE", """
                 SELECT ROUND(AVG(TRANSACTION_COUNT), 0) as avg_size
                 FROM DEDEMO.GAMING.REGULATORY_BATCHES
-            """).collect()[0]['AVG_SIZE']
+            """)[0]['AVG_SIZE']
             st.metric("Avg Batch Size", f"{int(result or 0):,}")
         except:
             st.metric("Avg Batch Size", "N/A")
 
-    with s4:
+    @live_fragment(LIVE_REFRESH_SEC["stream"])
+    def stream_pending_metric():
         try:
-            result = session.sql("""
-                SELECT COUNT(*) as cnt FROM DEDEMO.GAMING.POKER_TRANSACTIONS_STREAM
-            """).collect()[0]['CNT']
+            counters = live_pipeline_counters() if live_mode else load_pipeline_counters()
+            result = int(counters['Stream Pending']['ROW_COUNT'] or 0)
             if result == 0:
                 st.metric("Currently Pending", "0", delta="Fully consumed", delta_color="off")
             else:
@@ -546,37 +1480,43 @@ with tab_stream:
         except:
             st.metric("Currently Pending", "N/A")
 
+    with s4:
+        stream_pending_metric()
+
 
     # Processing activity over time
-    st.subheader("Batch Processing Activity - Last 24 Hours (UTC)")
+    st.subheader("Batch Processing Activity (UTC)")
+
+    activity_range = st.selectbox(
+        "Range",
+        list(TIME_SERIES_RANGES),
+        index=2,
+        key="activity_range"
+    )
+    activity_range_sec = TIME_SERIES_RANGES[activity_range]
 
     try:
         import altair as alt
 
-        activity_df = session.sql("""
-            SELECT
-                CONVERT_TIMEZONE('UTC', DATE_TRUNC('hour', BATCH_TIMESTAMP)) as HOUR_UTC,
-                COUNT(*) as BATCHES_CREATED,
-                SUM(TRANSACTION_COUNT) as TRANSACTIONS_PROCESSED
-            FROM DEDEMO.GAMING.REGULATORY_BATCHES
-            WHERE BATCH_TIMESTAMP > DATEADD(day, -1, CURRENT_TIMESTAMP())
-            GROUP BY DATE_TRUNC('hour', BATCH_TIMESTAMP)
-            ORDER BY DATE_TRUNC('hour', BATCH_TIMESTAMP)
-        """).to_pandas()
+        activity_df, bucket_minutes = load_time_series(
+            "STREAM:ACTIVITY", "DEDEMO.GAMING.REGULATORY_BATCHES", "BATCH_TIMESTAMP",
+            BATCH_ACTIVITY_MEASURES, activity_range_sec
+        )
 
         if not activity_df.empty:
             chart = alt.Chart(activity_df).mark_line(point=True).encode(
-                x=alt.X('HOUR_UTC:T', title='Time (UTC)', axis=alt.Axis(format='%d %H:%M')),
+                x=alt.X('BUCKET_UTC:T', title='Time (UTC)', axis=alt.Axis(format=time_series_axis_format(activity_range_sec))),
                 y=alt.Y('TRANSACTIONS_PROCESSED:Q', title='Transactions')
             ).properties(height=300)
             st.altair_chart(chart, use_container_width=True)
+            st.caption(f"{bucket_minutes}-minute buckets")
 
             # Format for display
-            display_df = activity_df.copy()
-            display_df['HOUR_UTC'] = display_df['HOUR_UTC'].dt.strftime('%Y-%m-%d %H:%M')
+            display_df = activity_df.drop(columns='BUCKET').rename(columns={'BUCKET_UTC': 'TIME_UTC'})
+            display_df['TIME_UTC'] = display_df['TIME_UTC'].dt.strftime('%Y-%m-%d %H:%M')
             st.dataframe(display_df, use_container_width=True)
         else:
-            st.caption("No batch activity in the last 24 hours")
+            st.caption(f"No batch activity ({activity_range.lower()})")
     except Exception as e:
         st.warning(f"Unable to load activity data: {e}")
 
@@ -585,6 +1525,7 @@ with tab_stream:
 # =============================================================================
 # TAB 5: BATCHES
 # =============================================================================
+start_tab_profile("BATCHES")
 with tab_batches:
     st.header("Regulatory Batches")
     st.caption("XML batches generated for submission: signed with XAdES-BES, encrypted with AES-256")
@@ -595,14 +1536,14 @@ with tab_batches:
     b1, b2, b3, b4 = st.columns(4)
 
     try:
-        batch_stats = session.sql("""
+        batch_stats = panel_query("BATCHES:STATUS", """
             SELECT
                 COUNT(*) as TOTAL,
                 SUM(CASE WHEN STATUS = 'GENERATED' THEN 1 ELSE 0 END) as PENDING,
                 SUM(CASE WHEN STATUS = 'UPLOADED' THEN 1 ELSE 0 END) as UPLOADED,
                 SUM(TRANSACTION_COUNT) as TOTAL_TXN
             FROM DEDEMO.GAMING.REGULATORY_BATCHES
-        """).collect()[0]
+        """)[0]
 
         with b1:
             st.metric("Total Batches", f"{batch_stats['TOTAL']:,}")
@@ -628,14 +1569,14 @@ with tab_batches:
     t1, t2, t3 = st.columns(3)
 
     try:
-        today_stats = session.sql("""
+        today_stats = panel_query("BATCHES:TODAY", """
             SELECT
                 COUNT(*) as BATCHES_TODAY,
                 SUM(CASE WHEN STATUS = 'UPLOADED' THEN 1 ELSE 0 END) as UPLOADED_TODAY,
                 SUM(TRANSACTION_COUNT) as TXN_TODAY
             FROM DEDEMO.GAMING.REGULATORY_BATCHES
             WHERE DATEADD(hour, 8, BATCH_TIMESTAMP) >= DATE_TRUNC('day', CURRENT_TIMESTAMP())
-        """).collect()[0]
+        """)[0]
 
         with t1:
             st.metric("Batches Today", f"{today_stats['BATCHES_TODAY']:,}")
@@ -652,31 +1593,78 @@ with tab_batches:
             st.metric("Transactions Today", "N/A")
 
 
+    # Upload backlog (batches generated but not yet leased for delivery)
+    st.subheader("Upload Backlog")
+
+    @live_fragment(LIVE_REFRESH_SEC["batches"])
+    def upload_backlog_metrics():
+        k1, k2, k3 = st.columns(3)
+        try:
+            if live_mode:
+                live_df, as_of = live_batches()
+                pending = live_df[live_df["STATUS"] == "GENERATED"]
+                backlog = {
+                    "BACKLOG_COUNT": len(pending),
+                    "BACKLOG_TRANSACTIONS": pending["TRANSACTION_COUNT"].sum(),
+                    "OLDEST_BATCH_AGE_MIN": int((as_of - pending["BATCH_TIMESTAMP"].min()).total_seconds() // 60)
+                    if len(pending) else None,
+                }
+            else:
+                backlog = panel_query("BATCHES:BACKLOG", """
+                    SELECT BACKLOG_COUNT, BACKLOG_TRANSACTIONS, OLDEST_BATCH_AGE_MIN
+                    FROM DEDEMO.GAMING.PIPELINE_BACKLOG
+                """)[0]
+            with k1:
+                st.metric("Batches Waiting", f"{int(backlog['BACKLOG_COUNT'] or 0):,}")
+            with k2:
+                st.metric("Transactions Waiting", f"{int(backlog['BACKLOG_TRANSACTIONS'] or 0):,}")
+            with k3:
+                age = backlog['OLDEST_BATCH_AGE_MIN']
+                st.metric("Oldest Waiting", f"{int(age)} min" if age is not None else "None")
+        except:
+            with k1:
+                st.metric("Batches Waiting", "N/A")
+            with k2:
+                st.metric("Transactions Waiting", "N/A")
+            with k3:
+                st.metric("Oldest Waiting", "N/A")
+
+    upload_backlog_metrics()
+
+
     # Recent batches
     st.subheader("Recent Batches")
 
-    try:
-        batches_df = session.sql("""
-            SELECT
-                BATCH_ID,
-                STATUS,
-                TRANSACTION_COUNT,
-                BATCH_TIMESTAMP,
-                UPLOAD_TIMESTAMP,
-                GENERATED_FILENAME,
-                OPERATOR_ID,
-                WAREHOUSE_ID
-            FROM DEDEMO.GAMING.REGULATORY_BATCHES
-            ORDER BY BATCH_TIMESTAMP DESC
-            LIMIT 20
-        """).to_pandas()
+    @live_fragment(LIVE_REFRESH_SEC["batches"])
+    def recent_batches_table():
+        try:
+            if live_mode:
+                live_df, _ = live_batches()
+                batches_df = live_df.nlargest(RECENT_BATCHES_LIMIT, "BATCH_TIMESTAMP").drop(columns="LEASE_EXPIRES_AT")
+            else:
+                batches_df = panel_query("BATCHES:RECENT", f"""
+                    SELECT
+                        BATCH_ID,
+                        STATUS,
+                        TRANSACTION_COUNT,
+                        BATCH_TIMESTAMP,
+                        UPLOAD_TIMESTAMP,
+                        GENERATED_FILENAME,
+                        OPERATOR_ID,
+                        WAREHOUSE_ID
+                    FROM DEDEMO.GAMING.REGULATORY_BATCHES
+                    ORDER BY BATCH_TIMESTAMP DESC
+                    LIMIT {RECENT_BATCHES_LIMIT}
+                """, to_pandas=True)
+
+            if not batches_df.empty:
+                st.dataframe(batches_df, use_container_width=True)
+            else:
+                st.caption("No batches created yet")
+        except Exception as e:
+            st.error(f"Error loading batches: {e}")
 
-        if not batches_df.empty:
-            st.dataframe(batches_df, use_container_width=True)
-        else:
-            st.caption("No batches created yet")
-    except Exception as e:
-        st.error(f"Error loading batches: {e}")
+    recent_batches_table()
 
 
     # XML preview
@@ -684,44 +1672,57 @@ with tab_batches:
     st.caption("Sample of regulatory XML format (XSD-compliant for DGOJ)")
 
     try:
-        xml_sample = session.sql("""
-            SELECT BATCH_ID, GENERATED_XML
+        # Only a bounded prefix leaves the warehouse; the full document is on demand.
+        # Offloaded batches (12_xml_offload.sql) are read from the stage instead.
+        xml_sample = panel_query("BATCHES:XML_PREVIEW", f"""
+            SELECT
+                BATCH_ID,
+                SUBSTR(GENERATED_XML, 1, {XML_PREVIEW_PREFIX_CHARS}) as XML_PREFIX,
+                LENGTH(GENERATED_XML) as XML_LENGTH,
+                XML_URI,
+                XML_BYTES
             FROM DEDEMO.GAMING.REGULATORY_BATCHES
-            WHERE GENERATED_XML IS NOT NULL
+            WHERE GENERATED_XML IS NOT NULL OR XML_URI IS NOT NULL
             ORDER BY BATCH_TIMESTAMP DESC
             LIMIT 1
-        """).collect()
+        """)
 
-        if xml_sample and xml_sample[0]['GENERATED_XML']:
+        if xml_sample and (xml_sample[0]['XML_PREFIX'] or xml_sample[0]['XML_URI']):
             batch_id = xml_sample[0]['BATCH_ID']
-            xml_content = xml_sample[0]['GENERATED_XML']
+            xml_uri = xml_sample[0]['XML_URI']
 
-            st.markdown(f"**Batch:** `{batch_id}`")
+            if xml_uri:
+                xml_prefix = read_offloaded_xml(xml_uri, XML_PREVIEW_PREFIX_CHARS).decode("utf-8", errors="ignore")
+                xml_length = int(xml_sample[0]['XML_BYTES'] or 0)
+                st.markdown(f"**Batch:** `{batch_id}` ({xml_length:,} bytes, offloaded to `{xml_uri}`)")
+            else:
+                xml_prefix = xml_sample[0]['XML_PREFIX']
+                xml_length = int(xml_sample[0]['XML_LENGTH'] or 0)
+                st.markdown(f"**Batch:** `{batch_id}` ({xml_length:,} characters)")
 
-            # Pretty-print the XML
-            try:
-                import xml.dom.minidom as minidom
-                dom = minidom.parseString(xml_content)
-                pretty_xml = dom.toprettyxml(indent="  ")
-                # Remove the XML declaration line that minidom adds
-                pretty_lines = pretty_xml.split('\n')
-                if pretty_lines[0].startswith('<?xml'):
-                    pretty_lines = pretty_lines[1:]
-                # Remove empty lines
-                pretty_lines = [line for line in pretty_lines if line.strip()]
-                # Limit to first 60 lines
-                if len(pretty_lines) > 60:
-                    preview_text = '\n'.join(pretty_lines[:60])
-                    preview_text += f"\n\n<!-- ... {len(pretty_lines) - 60} more lines ... -->"
-                else:
-                    preview_text = '\n'.join(pretty_lines)
-            except:
-                # Fallback if XML parsing fails - just show raw with line breaks
-                preview_text = xml_content[:3000]
-                if len(xml_content) > 3000:
-                    preview_text += "\n\n<!-- ... truncated ... -->"
+            pretty_lines, more_lines = pretty_print_xml_prefix(xml_prefix, XML_PREVIEW_MAX_LINES)
+            preview_text = '\n'.join(pretty_lines)
+            if more_lines or xml_length > len(xml_prefix):
+                preview_text += "\n\n<!-- ... preview truncated ... -->"
 
             st.code(preview_text, language="xml")
+
+            if st.button("Load full XML", key="xml_load_full"):
+                if xml_uri:
+                    full_xml = read_offloaded_xml(xml_uri, panel="BATCHES:XML_FULL")
+                else:
+                    full_xml = panel_query("BATCHES:XML_FULL", f"""
+                        SELECT GENERATED_XML
+                        FROM DEDEMO.GAMING.REGULATORY_BATCHES
+                        WHERE BATCH_ID = '{batch_id}'
+                    """)[0]['GENERATED_XML']
+                st.download_button(
+                    "Download XML",
+                    data=full_xml,
+                    file_name=f"{batch_id}.xml",
+                    mime="application/xml",
+                    key="xml_download_full"
+                )
         else:
             st.caption("No XML content available yet")
     except Exception as e:
@@ -731,6 +1732,7 @@ with tab_batches:
 # =============================================================================
 # TAB 6: OBSERVABILITY
 # =============================================================================
+start_tab_profile("OBSERVABILITY")
 with tab_obs:
     st.header("Pipeline Health Summary")
     st.caption("Key operational metrics - use Ask Cortex tab for deeper analysis")
@@ -742,11 +1744,11 @@ with tab_obs:
 
     with h1:
         try:
-            result = session.sql("""
-                SELECT COUNT(*) as cnt FROM DEDEMO.GAMING.OPENFLOW_ERROR_SUMMARY
-                WHERE HOUR > DATEADD(hour, -1, CURRENT_TIMESTAMP())
+            result = panel_query("OBSERVABILITY:ERRORS_1H", """
+                SELECT COUNT(*) as cnt FROM DEDEMO.GAMING.OPENFLOW_LOG_EVENTS
+                WHERE EVENT_TIMESTAMP > DATEADD(hour, -1, CURRENT_TIMESTAMP())
                 AND LOG_LEVEL = 'ERROR'
-            """).collect()[0]['CNT']
+            """)[0]['CNT']
             if result == 0:
                 st.metric("Errors (1h)", "None", delta="Healthy", delta_color="normal")
             else:
@@ -756,10 +1758,10 @@ with tab_obs:
 
     with h2:
         try:
-            result = session.sql("""
+            result = panel_query("OBSERVABILITY:CDC_LATENCY", """
                 SELECT AVG_SEC FROM DEDEMO.GAMING.PIPELINE_LATENCY_ANALYSIS
                 WHERE STAGE = 'CDC Replication'
-            """).collect()[0]['AVG_SEC']
+            """)[0]['AVG_SEC']
             if result:
                 latency = float(result)
                 if latency < 30:
@@ -773,85 +1775,155 @@ with tab_obs:
 
     with h3:
         try:
-            result = session.sql("""
+            result = panel_query("OBSERVABILITY:UPLOADS_1H", """
                 SELECT COUNT(*) as cnt FROM DEDEMO.GAMING.REGULATORY_BATCHES
                 WHERE STATUS = 'UPLOADED'
                 AND UPLOAD_TIMESTAMP > DATEADD(hour, -1, CURRENT_TIMESTAMP())
-            """).collect()[0]['CNT']
+            """)[0]['CNT']
             st.metric("Uploads (1h)", f"{result}")
         except:
             st.metric("Uploads (1h)", "N/A")
 
-    with h4:
+    @live_fragment(LIVE_REFRESH_SEC["stream"])
+    def stream_backlog_metric():
         try:
-            result = session.sql("""
-                SELECT COUNT(*) as cnt FROM DEDEMO.GAMING.POKER_TRANSACTIONS_STREAM
-            """).collect()[0]['CNT']
+            counters = live_pipeline_counters() if live_mode else load_pipeline_counters()
+            result = int(counters['Stream Pending']['ROW_COUNT'] or 0)
             st.metric("Stream Backlog", f"{result}")
         except:
             st.metric("Stream Backlog", "N/A")
 
+    with h4:
+        stream_backlog_metric()
+
 
     # Latency summary - simplified
     st.subheader("End-to-End Latency (Last 24 Hours)")
 
-    l1, l2 = st.columns(2)
+    @live_fragment(LIVE_REFRESH_SEC["latency"])
+    def latency_summary_metrics():
+        l1, l2, l3 = st.columns(3)
 
-    with l1:
-        try:
-            result = session.sql("""
-                SELECT AVG_SEC FROM DEDEMO.GAMING.PIPELINE_LATENCY_ANALYSIS
-                WHERE STAGE = 'TOTAL END-TO-END'
-            """).collect()[0]['AVG_SEC']
-            if result:
-                st.metric("Average", f"{float(result):.0f} seconds")
-            else:
-                st.metric("Average", "Calculating...")
-        except:
-            st.metric("Average", "N/A")
+        live_summary = {}
+        if live_mode:
+            try:
+                live_summary = live_latency_summary()
+            except Exception:
+                pass
 
-    with l2:
-        try:
-            result = session.sql("""
-                SELECT MAX_SEC FROM DEDEMO.GAMING.PIPELINE_LATENCY_ANALYSIS
-                WHERE STAGE = 'TOTAL END-TO-END'
-            """).collect()[0]['MAX_SEC']
-            if result:
-                st.metric("Maximum", f"{float(result):.0f} seconds")
-            else:
-                st.metric("Maximum", "Calculating...")
-        except:
-            st.metric("Maximum", "N/A")
+        with l1:
+            try:
+                result = live_summary["AVG_SEC"] if live_mode else panel_query("OBSERVABILITY:LATENCY_AVG", """
+                    SELECT AVG_SEC FROM DEDEMO.GAMING.PIPELINE_LATENCY_ANALYSIS
+                    WHERE STAGE = 'TOTAL END-TO-END'
+                """)[0]['AVG_SEC']
+                if result:
+                    st.metric("Average", f"{float(result):.0f} seconds")
+                else:
+                    st.metric("Average", "Calculating...")
+            except:
+                st.metric("Average", "N/A")
+
+        with l2:
+            try:
+                result = live_summary["MAX_SEC"] if live_mode else panel_query("OBSERVABILITY:LATENCY_MAX", """
+                    SELECT MAX_SEC FROM DEDEMO.GAMING.PIPELINE_LATENCY_ANALYSIS
+                    WHERE STAGE = 'TOTAL END-TO-END'
+                """)[0]['MAX_SEC']
+                if result:
+                    st.metric("Maximum", f"{float(result):.0f} seconds")
+                else:
+                    st.metric("Maximum", "Calculating...")
+            except:
+                st.metric("Maximum", "N/A")
+
+        with l3:
+            try:
+                result = live_summary["P95_SEC"] if live_mode else panel_query("OBSERVABILITY:LATENCY_P95", """
+                    SELECT P95_SEC FROM DEDEMO.GAMING.PIPELINE_LATENCY_ANALYSIS
+                    WHERE STAGE = 'TOTAL END-TO-END'
+                """)[0]['P95_SEC']
+                if result:
+                    st.metric("p95 (sum of stages)", f"{float(result):.0f} seconds")
+                else:
+                    st.metric("p95 (sum of stages)", "Calculating...")
+            except:
+                st.metric("p95 (sum of stages)", "N/A")
+
+    latency_summary_metrics()
 
 
     # Processing volume timeline
-    st.subheader("Transaction Volume - Last 24 Hours (UTC)")
+    st.subheader("Transaction Volume (UTC)")
+
+    volume_range = st.selectbox(
+        "Range",
+        list(TIME_SERIES_RANGES),
+        index=2,
+        key="volume_range"
+    )
+    volume_range_sec = TIME_SERIES_RANGES[volume_range]
 
     try:
         import altair as alt
 
-        timeline_df = session.sql("""
-            SELECT
-                CONVERT_TIMEZONE('UTC', DATE_TRUNC('hour', BATCH_TIMESTAMP)) as HOUR_UTC,
-                SUM(TRANSACTION_COUNT) as TRANSACTIONS
-            FROM DEDEMO.GAMING.REGULATORY_BATCHES
-            WHERE BATCH_TIMESTAMP > DATEADD(day, -1, CURRENT_TIMESTAMP())
-            GROUP BY DATE_TRUNC('hour', BATCH_TIMESTAMP)
-            ORDER BY DATE_TRUNC('hour', BATCH_TIMESTAMP)
-        """).to_pandas()
+        timeline_df, bucket_minutes = load_time_series(
+            "OBSERVABILITY:VOLUME", "DEDEMO.GAMING.REGULATORY_BATCHES", "BATCH_TIMESTAMP",
+            BATCH_ACTIVITY_MEASURES, volume_range_sec
+        )
 
         if not timeline_df.empty:
             chart = alt.Chart(timeline_df).mark_bar().encode(
-                x=alt.X('HOUR_UTC:T', title='Time (UTC)', axis=alt.Axis(format='%d %H:%M')),
-                y=alt.Y('TRANSACTIONS:Q', title='Transactions')
+                x=alt.X('BUCKET_UTC:T', title='Time (UTC)', axis=alt.Axis(format=time_series_axis_format(volume_range_sec))),
+                y=alt.Y('TRANSACTIONS_PROCESSED:Q', title='Transactions')
             ).properties(height=300)
             st.altair_chart(chart, use_container_width=True)
+            st.caption(f"{bucket_minutes}-minute buckets")
         else:
-            st.caption("No batch activity in the last 24 hours")
+            st.caption(f"No batch activity ({volume_range.lower()})")
     except Exception as e:
         st.warning(f"Unable to load timeline: {e}")
 
 
+    # Recurring failures from the hourly error rollup, grouped by mined template
+    st.subheader("Top Recurring Failures")
+
+    failure_window = st.selectbox(
+        "Window",
+        ["Last hour", "Last 24 hours", "Last 7 days"],
+        index=1,
+        key="failure_window"
+    )
+    failure_hours = {"Last hour": 1, "Last 24 hours": 24, "Last 7 days": 168}[failure_window]
+
+    try:
+        failures_df = panel_query("OBSERVABILITY:RECURRING_FAILURES", f"""
+            SELECT
+                TEMPLATE,
+                LOG_LEVEL,
+                EVENTS,
+                FINGERPRINTS as VARIANTS,
+                COMPONENTS,
+                HOURS_SEEN,
+                CONVERT_TIMEZONE('UTC', LAST_SEEN) as LAST_SEEN_UTC,
+                EXCEPTION_CLASS,
+                SAMPLE_MESSAGE
+            FROM TABLE(DEDEMO.GAMING.OPENFLOW_RECURRING_FAILURES(
+                DATEADD(hour, -{failure_hours}, CURRENT_TIMESTAMP())::TIMESTAMP_NTZ,
+                CURRENT_TIMESTAMP()::TIMESTAMP_NTZ
+            ))
+            ORDER BY LOG_LEVEL = 'ERROR' DESC, EVENTS DESC
+            LIMIT 10
+        """, to_pandas=True)
+
+        if not failures_df.empty:
+            st.dataframe(failures_df, use_container_width=True)
+        else:
+            st.success(f"No errors or warnings ({failure_window.lower()})")
+    except Exception as e:
+        st.warning(f"Unable to load recurring failures: {e}")
+
+
     # Pointer to Cortex for deeper analysis
     st.caption("For detailed analysis of errors, latency patterns, or anomalies, use the Ask Cortex tab.")
 
@@ -859,6 +1931,7 @@ with tab_obs:
 # =============================================================================
 # TAB 7: LOGS
 # =============================================================================
+start_tab_profile("LOGS")
 with tab_logs:
     st.header("Pipeline Logs")
     st.caption("Recent log entries from OpenFlow pipeline components")
@@ -866,7 +1939,7 @@ with tab_logs:
     # Error summary section
     st.subheader("Recent Errors")
     try:
-        errors_df = session.sql("""
+        errors_df = panel_query("LOGS:ERRORS", """
             SELECT
                 CONVERT_TIMEZONE('UTC', HOUR) as TIME_UTC,
                 PROCESS_GROUP,
@@ -877,7 +1950,7 @@ with tab_logs:
             AND HOUR > DATEADD(day, -7, CURRENT_TIMESTAMP())
             ORDER BY HOUR DESC
             LIMIT 20
-        """).to_pandas()
+        """, to_pandas=True)
 
         if not errors_df.empty:
             st.dataframe(errors_df, use_container_width=True)
@@ -890,7 +1963,7 @@ with tab_logs:
     # Warnings section
     st.subheader("Recent Warnings")
     try:
-        warnings_df = session.sql("""
+        warnings_df = panel_query("LOGS:WARNINGS", """
             SELECT
                 CONVERT_TIMEZONE('UTC', HOUR) as TIME_UTC,
                 PROCESS_GROUP,
@@ -901,7 +1974,7 @@ with tab_logs:
             AND HOUR > DATEADD(day, -7, CURRENT_TIMESTAMP())
             ORDER BY HOUR DESC
             LIMIT 20
-        """).to_pandas()
+        """, to_pandas=True)
 
         if not warnings_df.empty:
             st.dataframe(warnings_df, use_container_width=True)
@@ -933,18 +2006,18 @@ with tab_logs:
         if log_level_filter != "All":
             level_clause = f"AND LOG_LEVEL = '{log_level_filter}'"
 
-        logs_df = session.sql(f"""
+        logs_df = panel_query("LOGS:VIEWER", f"""
             SELECT
                 CONVERT_TIMEZONE('UTC', EVENT_TIMESTAMP) as TIME_UTC,
                 LOG_LEVEL,
                 COALESCE(PROCESS_GROUP, LOGGER) as COMPONENT,
                 MESSAGE
-            FROM DEDEMO.GAMING.OPENFLOW_LOGS
+            FROM DEDEMO.GAMING.OPENFLOW_LOG_EVENTS
             WHERE EVENT_TIMESTAMP > DATEADD(day, -7, CURRENT_TIMESTAMP())
             {level_clause}
             ORDER BY EVENT_TIMESTAMP DESC
             LIMIT {log_limit}
-        """).to_pandas()
+        """, to_pandas=True)
 
         if not logs_df.empty:
             st.dataframe(logs_df, use_container_width=True)
@@ -957,59 +2030,121 @@ with tab_logs:
 # =============================================================================
 # TAB 8: ASK CORTEX
 # =============================================================================
+start_tab_profile("ASK_CORTEX")
 with tab_cortex:
     st.header("Ask Cortex Analyst")
     st.caption("Natural language queries against the gaming pipeline operational data")
 
+    def _load_more_rows():
+        st.session_state["cortex_row_cap"] = min(
+            st.session_state.get("cortex_row_cap", CORTEX_SQL_ROW_CAP) * 10,
+            CORTEX_SQL_MAX_ROW_CAP
+        )
+        st.session_state["cortex_rerender"] = True
+
+    def _request_export(sql):
+        st.session_state["cortex_export_sql"] = sql
+        st.session_state["cortex_rerender"] = True
+
     # Helper function to run query and display results
-    def run_cortex_query(question):
+    def run_cortex_query(question, rerender=False):
+        if not rerender:
+            st.session_state["cortex_question"] = question
+            st.session_state["cortex_row_cap"] = CORTEX_SQL_ROW_CAP
+            st.session_state.pop("cortex_export_sql", None)
+        row_cap = st.session_state.get("cortex_row_cap", CORTEX_SQL_ROW_CAP)
+
         st.markdown(f"**Question:** {question}")
 
-        with st.spinner("Analyzing with Cortex Agent..."):
-            try:
-                response = cortex_agent_call(question, None)
-                text, sql, _ = process_agent_response(response)
-
-                if text:
-                    st.markdown(f"**Answer:** {text}")
-
-                    if sql:
-                        try:
-                            result_df = session.sql(sql).to_pandas()
-                            if not result_df.empty:
-                                st.dataframe(result_df, use_container_width=True)
-                        except Exception as sql_err:
-                            st.warning(f"Could not execute query: {sql_err}")
-
-                        with st.expander("View Generated SQL"):
-                            st.code(sql, language="sql")
-                else:
-                    st.warning("Unable to process that question. Please try rephrasing.")
+        answer = st.empty()
+        text = ""
+        sql = ""
+        sql_job = None
+        error = None
+
+        # Render the answer as its events arrive and start the generated SQL
+        # as soon as the tool_results event carrying it is parsed
+        try:
+            with st.spinner("Analyzing with Cortex Agent..."):
+                events, cache_hit = cached_cortex_agent_call(question, semantic_model_version)
+                with closing(iter_agent_content(events)) as content:
+                    for kind, value in content:
+                        if kind == "text":
+                            text += value
+                            answer.markdown(f"**Answer:** {text}")
+                        elif kind == "sql" and sql_job is None:
+                            sql = value
+                            sql_job = start_generated_sql(sql, row_cap)
+                        elif kind == "error":
+                            error = value
+                            break
+        except Exception as e:
+            error = f"Error: {e}"
+
+        if error:
+            answer.empty()
+            st.error(error)
+            return
+        if not text and not sql:
+            st.warning("Unable to process that question. Please try rephrasing.")
+            return
+
+        if cache_hit:
+            st.caption("Cached answer")
+        if not sql:
+            return
+
+        with st.spinner("Running generated SQL..."):
+            result_df, truncated, sql_err = wait_generated_sql(sql_job)
+        if sql_err is not None:
+            st.warning(f"Could not execute query: {sql_err}")
+        elif not result_df.empty:
+            st.dataframe(result_df, use_container_width=True)
+
+        if sql_err is None and truncated:
+            st.caption(f"Showing the first {len(result_df):,} rows - the full result is larger")
+            more_col, export_col = st.columns(2)
+            with more_col:
+                st.button(
+                    "Load more rows",
+                    key="cortex_load_more",
+                    disabled=row_cap >= CORTEX_SQL_MAX_ROW_CAP,
+                    on_click=_load_more_rows
+                )
+            with export_col:
+                st.button(
+                    "Download full result to stage",
+                    key="cortex_export",
+                    on_click=_request_export,
+                    args=(sql,)
+                )
+
+        if st.session_state.get("cortex_export_sql") == sql:
+            with st.spinner("Unloading full result to stage..."):
+                try:
+                    url = export_generated_sql(sql)
+                    st.markdown(f"[Download full result (CSV, gzip)]({url})")
+                except Exception as export_err:
+                    st.warning(f"Could not export result: {export_err}")
+            st.session_state.pop("cortex_export_sql", None)
 
-            except Exception as e:
-                st.error(f"Error: {e}")
+        with st.expander("View Generated SQL"):
+            st.code(sql, language="sql")
 
     # Sample questions - clicking runs immediately
     st.subheader("Sample Questions")
-    sample_questions = [
-        "How many batches were processed today?",
-        "What is the average latency for each pipeline stage?",
-        "Show me batch processing performance over the last week",
-        "Are there any errors in the last 24 hours?",
-        "What is the total number of transactions processed?"
-    ]
 
     # Track which sample was clicked
     clicked_sample = None
 
     cols = st.columns(3)
-    for i, q in enumerate(sample_questions[:3]):
+    for i, q in enumerate(SAMPLE_QUESTIONS[:3]):
         with cols[i]:
             if st.button(q, key=f"sample_{i}", use_container_width=True):
                 clicked_sample = q
 
     cols2 = st.columns(2)
-    for i, q in enumerate(sample_questions[3:]):
+    for i, q in enumerate(SAMPLE_QUESTIONS[3:]):
         with cols2[i]:
             if st.button(q, key=f"sample_{i+3}", use_container_width=True):
                 clicked_sample = q
@@ -1034,9 +2169,92 @@ with tab_cortex:
         run_cortex_query(clicked_sample)
     elif ask_clicked and custom_question:
         run_cortex_query(custom_question)
+    elif st.session_state.pop("cortex_rerender", False) and st.session_state.get("cortex_question"):
+        # "Load more" / "Download" clicks re-render the last answer from cache
+        run_cortex_query(st.session_state["cortex_question"], rerender=True)
     else:
         st.caption("Click a sample question above or type your own question to get started.")
 
 
+# =============================================================================
+# DIAGNOSTICS (hidden: append ?diagnostics=1 to the app URL)
+# =============================================================================
+render_profile = finish_render_profile()
+
+if query_flag("diagnostics"):
+    st.divider()
+    st.header("Diagnostics")
+    st.caption(
+        f"Queries of this browser session, tagged `{PANEL_QUERY_TAG_PREFIX}:<panel>`. "
+        "All tabs render on every run, so each panel's cost is paid on every click."
+    )
+
+    profile = _panel_profile()
+    g1, g2, g3, g4 = st.columns(4)
+    with g1:
+        st.metric("Render Time (this run)", f"{render_profile['ms'] / 1000:.2f} s")
+    with g2:
+        st.metric("Queries (this run)", f"{render_profile['queries']}")
+    with g3:
+        st.metric("Query Time (this run)", f"{render_profile['query_ms'] / 1000:.2f} s")
+    with g4:
+        st.metric("Cache Hits (this run)", f"{render_profile['cache_hits']}")
+
+    try:
+        import pandas as pd
+
+        st.subheader("Slowest Panels")
+        summary = panel_profile_summary()
+        if summary:
+            st.caption(f"Totals over the last {len(profile['queries'])} calls "
+                       f"({len(profile['renders'])} renders); BYTES is the approximate in-memory size")
+            st.dataframe(pd.DataFrame(summary)[[
+                "PANEL", "TOTAL_MS", "AVG_MS", "MAX_MS", "CALLS", "QUERIES", "CACHE_HITS", "ERRORS", "ROWS", "BYTES"
+            ]], use_container_width=True)
+
+        st.subheader("Tabs (this run)")
+        st.caption("PAGE is the work before the first tab (title, controls, model version)")
+        st.dataframe(pd.DataFrame([
+            {"TAB": tab, "MS": t["ms"], "QUERIES": t["queries"], "CACHE_HITS": t["cache_hits"]}
+            for tab, t in render_profile["tabs"].items()
+        ]), use_container_width=True)
+
+        st.subheader("Render History")
+        st.dataframe(pd.DataFrame(list(profile["renders"])[::-1]).drop(columns="tabs"), use_container_width=True)
+    except Exception as e:
+        st.warning(f"Unable to summarize profile: {e}")
+
+    st.download_button(
+        "Download profile (JSON)",
+        data=panel_profile_json(),
+        file_name=f"pipeline_monitor_profile_{RENDER_ID}.json",
+        mime="application/json",
+        key="diagnostics_download"
+    )
+
+    # Client wall time includes network and rendering; warehouse time comes from query history
+    if st.button("Warehouse time by panel (last hour)", key="diagnostics_history"):
+        try:
+            history_df = panel_query("DIAGNOSTICS:QUERY_HISTORY", f"""
+                SELECT
+                    QUERY_TAG,
+                    COUNT(*) as QUERIES,
+                    ROUND(SUM(TOTAL_ELAPSED_TIME) / 1000, 2) as ELAPSED_SEC,
+                    ROUND(SUM(EXECUTION_TIME) / 1000, 2) as EXECUTION_SEC,
+                    ROUND(SUM(QUEUED_OVERLOAD_TIME) / 1000, 2) as QUEUED_SEC,
+                    SUM(BYTES_SCANNED) as BYTES_SCANNED
+                FROM TABLE(INFORMATION_SCHEMA.QUERY_HISTORY(
+                    END_TIME_RANGE_START => DATEADD(hour, -1, CURRENT_TIMESTAMP()),
+                    RESULT_LIMIT => 10000
+                ))
+                WHERE QUERY_TAG LIKE '{PANEL_QUERY_TAG_PREFIX}:%'
+                GROUP BY QUERY_TAG
+                ORDER BY EXECUTION_SEC DESC
+            """, to_pandas=True)
+            st.dataframe(history_df, use_container_width=True)
+        except Exception as e:
+            st.warning(f"Unable to load query history: {e}")
+
+
 # Footer
 st.caption("BOE Gaming Regulatory Pipeline Monitor | Data refreshes on tab selection")
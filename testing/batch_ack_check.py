@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Local check for coalesced upload acknowledgments (sql/14_batch_acks.sql).
+
+Drives the AckCoalescer from the AcknowledgeRegulatoryBatches processor
+against a SQLite stand-in for REGULATORY_BATCHES. The stand-in call mirrors
+ACK_UPLOADED_BATCHES: one statement per call that reads the JSON array,
+marks the batches UPLOADED with their upload time (the first one wins) and
+returns the batches that are now UPLOADED. Each call sleeps --call-ms to
+stand in for the round trip to Snowflake.
+
+Scenarios:
+
+  grouped   - concurrent tasks acknowledge every batch, with some unknown
+              batch IDs and one batch whose call always raises. Every known
+              batch must be UPLOADED with its own upload time, unknown and
+              poisoned batches must fail on their own, and there must be far
+              fewer calls than acknowledgments.
+  bundled   - concurrent tasks acknowledge archives bundling several batches
+              (acknowledge_all, as for dgoj.bundle.batch.ids). Every batch
+              must be UPLOADED, and only the archive holding an unknown
+              batch ID may fail.
+  outage    - every call raises; each group must fail after a few calls
+              instead of retrying each acknowledgment separately.
+  per-item  - one call per acknowledgment (the old ExecuteSQL UPDATE), for
+              comparison.
+
+Usage:
+    python testing/batch_ack_check.py
+    python testing/batch_ack_check.py --batches 2000 --tasks 10 --call-ms 50
+"""
+
+import argparse
+import datetime
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "custom_processors", "LeaseRegulatoryBatches", "src", "lease_regulatory_batches"))
+
+from batch_ack import AckCoalescer, AckFailed  # noqa: E402
+
+ACK_SQL = """
+UPDATE regulatory_batches
+SET status = 'UPLOADED',
+    upload_timestamp = COALESCE(
+        (SELECT MIN(json_extract(a.value, '$.uploaded_at')) FROM json_each(?) a
+         WHERE json_extract(a.value, '$.batch_id') = regulatory_batches.batch_id),
+        strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now')),
+    lease_expires_at = NULL
+WHERE status != 'UPLOADED'
+  AND batch_id IN (SELECT json_extract(value, '$.batch_id') FROM json_each(?))
+"""
+
+UPLOADED_SQL = """
+SELECT batch_id FROM regulatory_batches
+WHERE status = 'UPLOADED'
+  AND batch_id IN (SELECT json_extract(value, '$.batch_id') FROM json_each(?))
+"""
+
+
+class SqliteAckStore:
+    """Stand-in for SnowflakeAckStore."""
+
+    def __init__(self, path, call_seconds=0.0, poison=None, outage=False):
+        self.db = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self.call_seconds = call_seconds
+        self.poison = poison
+        self.outage = outage
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def acknowledge(self, acks):
+        with self._lock:
+            self.calls += 1
+            time.sleep(self.call_seconds)
+            if self.outage:
+                raise ConnectionError("warehouse unavailable")
+            if any(batch_id == self.poison for batch_id, _ in acks):
+                raise ValueError("cannot acknowledge {}".format(self.poison))
+            payload = json.dumps([{"batch_id": batch_id, "uploaded_at": uploaded_at} for batch_id, uploaded_at in acks])
+            self.db.execute(ACK_SQL, (payload, payload))
+            return {row[0] for row in self.db.execute(UPLOADED_SQL, (payload,))}
+
+
+def create_batches(path, count):
+    db = sqlite3.connect(path)
+    db.executescript("""
+        DROP TABLE IF EXISTS regulatory_batches;
+        CREATE TABLE regulatory_batches (
+            batch_id TEXT PRIMARY KEY,
+            status TEXT,
+            upload_timestamp TEXT,
+            lease_expires_at REAL
+        );
+    """)
+    db.executemany(
+        "INSERT INTO regulatory_batches (batch_id, status, lease_expires_at) VALUES (?, 'PROCESSING', 1)",
+        [(f"batch-{i:06d}",) for i in range(count)])
+    db.commit()
+    return db
+
+
+def upload_time(index):
+    stamp = datetime.datetime(2026, 1, 22, 10, 0, tzinfo=datetime.timezone.utc) + datetime.timedelta(milliseconds=index)
+    return stamp.isoformat(timespec="milliseconds")
+
+
+def acknowledge_all(acknowledge, items, tasks):
+    """Run acknowledge(batch_id, uploaded_at) from `tasks` threads; returns {batch_id: error or None}."""
+    outcomes = {}
+    lock = threading.Lock()
+    queue = list(reversed(items))
+
+    def task():
+        while True:
+            with lock:
+                if not queue:
+                    return
+                batch_id, uploaded_at = queue.pop()
+            try:
+                acknowledge(batch_id, uploaded_at)
+                error = None
+            except AckFailed as e:
+                error = str(e)
+            with lock:
+                outcomes[batch_id] = error
+
+    threads = [threading.Thread(target=task) for _ in range(tasks)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return outcomes
+
+
+def run_grouped(path, args):
+    db = create_batches(path, args.batches)
+    poison = "batch-000007"
+    store = SqliteAckStore(path, args.call_ms / 1000, poison=poison)
+    coalescer = AckCoalescer(store, max_items=args.max_batch, max_wait=args.max_wait_ms / 1000)
+
+    items = [(f"batch-{i:06d}", upload_time(i)) for i in range(args.batches)]
+    unknown = [f"missing-{i}" for i in range(args.unknown)]
+    for n, batch_id in enumerate(unknown):
+        items.insert((n + 1) * len(items) // (len(unknown) + 1), (batch_id, upload_time(0)))
+
+    started = time.monotonic()
+    outcomes = acknowledge_all(coalescer.acknowledge, items, args.tasks)
+    elapsed = time.monotonic() - started
+
+    failed = {batch_id for batch_id, error in outcomes.items() if error is not None}
+    uploaded = dict(db.execute("SELECT batch_id, upload_timestamp FROM regulatory_batches WHERE status = 'UPLOADED'"))
+    wrong_time = sum(1 for i in range(args.batches)
+                     if f"batch-{i:06d}" in uploaded and uploaded[f"batch-{i:06d}"] != upload_time(i))
+    leased = db.execute("SELECT COUNT(*) FROM regulatory_batches WHERE lease_expires_at IS NOT NULL AND status = 'UPLOADED'").fetchone()[0]
+
+    print(f"grouped: {len(items)} acknowledgments from {args.tasks} tasks, {elapsed:.2f} s")
+    print(f"  store calls {store.calls}, groups {coalescer.stats['groups']}, "
+          f"acknowledged {coalescer.stats['acknowledged']}, failed {coalescer.stats['failed']}")
+
+    failures = 0
+    if len(uploaded) != args.batches - 1 or poison in uploaded:
+        print(f"  FAIL: expected {args.batches - 1} UPLOADED batches, got {len(uploaded)}")
+        failures += 1
+    if failed != set(unknown) | {poison}:
+        print(f"  FAIL: wrong acknowledgments failed: {sorted(failed ^ (set(unknown) | {poison}))[:5]}")
+        failures += 1
+    if wrong_time:
+        print(f"  FAIL: {wrong_time} batch(es) lost their upload time")
+        failures += 1
+    if leased:
+        print(f"  FAIL: {leased} UPLOADED batch(es) still hold a lease")
+        failures += 1
+    if store.calls > len(items) / 4:
+        print("  FAIL: acknowledgments were not grouped")
+        failures += 1
+    return failures, elapsed
+
+
+def run_bundled(path, args):
+    db = create_batches(path, args.batches)
+    store = SqliteAckStore(path, args.call_ms / 1000)
+    coalescer = AckCoalescer(store, max_items=args.max_batch, max_wait=args.max_wait_ms / 1000)
+
+    batch_ids = [f"batch-{i:06d}" for i in range(args.batches)]
+    bundles = [batch_ids[i:i + args.bundle_size] for i in range(0, len(batch_ids), args.bundle_size)]
+    bad = len(bundles) // 2
+    bundles[bad] = bundles[bad] + ["missing-bundled"]
+    items = [(",".join(bundle), upload_time(n)) for n, bundle in enumerate(bundles)]
+
+    outcomes = acknowledge_all(
+        lambda ids, uploaded_at: coalescer.acknowledge_all(ids.split(","), uploaded_at), items, args.tasks)
+
+    failed = [ids for ids, error in outcomes.items() if error is not None]
+    uploaded = {row[0] for row in db.execute("SELECT batch_id FROM regulatory_batches WHERE status = 'UPLOADED'")}
+    print(f"bundled: {len(batch_ids)} batches in {len(bundles)} archives, {store.calls} store calls, "
+          f"{len(failed)} archive(s) failed")
+
+    failures = 0
+    if uploaded != set(batch_ids):
+        print(f"  FAIL: {len(set(batch_ids) - uploaded)} bundled batch(es) not UPLOADED")
+        failures += 1
+    if failed != [items[bad][0]] or "missing-bundled" not in outcomes[items[bad][0]]:
+        print(f"  FAIL: expected only the archive with the unknown batch to fail, got {failed[:3]}")
+        failures += 1
+    return failures
+
+
+def run_outage(path, args):
+    create_batches(path, args.max_batch)
+    store = SqliteAckStore(path, outage=True)
+    coalescer = AckCoalescer(store, max_items=args.max_batch, max_wait=1.0)
+
+    items = [(f"batch-{i:06d}", upload_time(i)) for i in range(args.max_batch)]
+    outcomes = acknowledge_all(coalescer.acknowledge, items, args.max_batch)
+    failed = sum(1 for error in outcomes.values() if error is not None)
+
+    print(f"outage: {failed} of {len(items)} acknowledgments failed in {coalescer.stats['groups']} groups "
+          f"with {store.calls} store calls")
+    # Each group gives up after one failed call per bisection level, plus one
+    if failed != len(items) or store.calls > coalescer.stats["groups"] * (args.max_batch.bit_length() + 2):
+        print("  FAIL: expected every acknowledgment to fail after a few calls per group")
+        return 1
+    return 0
+
+
+def run_per_item(path, args):
+    create_batches(path, args.batches)
+    store = SqliteAckStore(path, args.call_ms / 1000)
+    items = [(f"batch-{i:06d}", upload_time(i)) for i in range(args.batches)]
+
+    started = time.monotonic()
+    acknowledge_all(lambda batch_id, uploaded_at: store.acknowledge([(batch_id, uploaded_at)]), items, args.tasks)
+    elapsed = time.monotonic() - started
+    print(f"per-item: {len(items)} acknowledgments, {store.calls} store calls, {elapsed:.2f} s (for comparison)")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check coalesced upload acknowledgments")
+    parser.add_argument("--batches", type=int, default=1000)
+    parser.add_argument("--unknown", type=int, default=3, help="Acknowledgments for batch IDs that do not exist")
+    parser.add_argument("--tasks", type=int, default=10, help="Concurrent tasks (the processor's concurrent tasks)")
+    parser.add_argument("--max-batch", type=int, default=50)
+    parser.add_argument("--max-wait-ms", type=float, default=500)
+    parser.add_argument("--bundle-size", type=int, default=5, help="Batches per archive in the bundled scenario")
+    parser.add_argument("--call-ms", type=float, default=20, help="Simulated round trip per procedure call")
+    args = parser.parse_args()
+
+    failures = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        grouped_failures, grouped_seconds = run_grouped(os.path.join(tmp, "grouped.db"), args)
+        failures += grouped_failures
+        failures += run_bundled(os.path.join(tmp, "bundled.db"), args)
+        failures += run_outage(os.path.join(tmp, "outage.db"), args)
+        per_item_seconds = run_per_item(os.path.join(tmp, "per_item.db"), args)
+
+    print(f"\nspeedup over per-item updates: {per_item_seconds / grouped_seconds:.1f}x")
+    if failures:
+        print(f"\n{failures} check(s) failed")
+        sys.exit(1)
+    print("Every known batch was acknowledged once, in groups, with its own upload time")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+"""
+Local check for the size-targeted batch assembler
+(custom_processors/AssembleRegulatoryBatches).
+
+Feeds generated transactions through BatchAssembler and the processor (via
+testing/nifiapi_stub.py) and checks:
+
+  prediction - predicted lote XML size matches poker_xml.py output and the
+               predicted archive size matches PrepareRegulatoryFile within
+               --tolerance
+  tournament - every batch holds one tournament and its Juego header and
+               NumeroParticipantes describe it
+  deadline   - batches close at Max Batch Latency and not before; ticks that
+               close nothing go to idle, except one per Max Batch Latency of
+               quiet, which goes to success to sweep stale batches
+               (batch.stale.seconds = two deadlines)
+  recovery   - after a restart the batches the previous run left open are
+               processed by the stale sweep, which never takes a batch that
+               is still open; the first tick after scheduling sweeps
+  fill       - archive sizes of size-targeted batches, by close reason,
+               against count-based batches of --count-batch records (the
+               former MergeRecord). Batches closed at the target size must
+               converge on it (fill and spread within --tolerance), no
+               archive may pass it, and there must be fewer files than
+               count-based batching produces
+
+Usage:
+    python testing/batch_assembly_check.py
+    python testing/batch_assembly_check.py --records 200000 --target-kb 512
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ASSEMBLE_DIR = os.path.join(ROOT, "custom_processors", "AssembleRegulatoryBatches", "src", "assemble_regulatory_batches")
+sys.path.insert(0, ASSEMBLE_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from batch_assembly import STALE_DEADLINES, BatchAssembler  # noqa: E402
+from nifiapi_stub import FlowFile, ProcessContext, load_processor  # noqa: E402
+from pipeline_simulator import (OPERATOR_ID, PREPARE_DIR, SCHEMA_PATH, WAREHOUSE_ID, ZIP_PASSWORD,  # noqa: E402
+                                make_credentials)
+from poker_generator import PokerSchema, PokerTransactionGenerator, encode  # noqa: E402
+from poker_xml import TOURNAMENT_FIELDS, generate_poker_xml_columns, single_tournament  # noqa: E402
+
+PLAYER_FIELDS = ("PLAYER_ID", "BET_AMOUNT", "REFUND_AMOUNT", "WIN_AMOUNT", "PLAYER_IP", "DEVICE_TYPE", "DEVICE_ID")
+
+
+def stream_records(count, seed, tournaments, hot_tournaments, hot_share):
+    """Generated transactions shaped like POKER_TRANSACTIONS_STREAM rows (upper-case columns)."""
+    generator = PokerTransactionGenerator(PokerSchema.load(SCHEMA_PATH), seed=seed, tournaments=tournaments,
+                                          hot_tournaments=hot_tournaments, hot_share=hot_share)
+    records = []
+    for line in encode(generator.block(0, count), "JSONL").splitlines():
+        record = json.loads(line)
+        row = {key.upper(): value for key, value in record["transaction_data"].items()}
+        row["TRANSACTION_ID"] = record["transaction_id"]
+        records.append(row)
+    return records
+
+
+def assemble(records, assembler, per_second, tick_seconds=10, reasons=None):
+    """
+    Run records through the assembler at per_second records/s of simulated
+    time, with a deadline tick every tick_seconds; returns {batch_id: rows}
+    and fills `reasons` with {batch_id: close reason}.
+    """
+    batches = {}
+    next_tick = tick_seconds
+    for index, record in enumerate(records):
+        now = index / per_second
+        if now >= next_tick:
+            assembler.expire(now)
+            next_tick += tick_seconds
+        batches.setdefault(assembler.add(record, now), []).append(record)
+    # The stream ends here; what is still open closes at its deadline, as it would in the flow
+    assembler.expire(len(records) / per_second + assembler.max_age_seconds)
+    for batch in assembler.take_closed():
+        if reasons is not None:
+            reasons[batch.batch_id] = batch.close_reason
+    return batches
+
+
+def lote(batch_id, rows):
+    columns = [[row.get(name) for row in rows] for name in PLAYER_FIELDS]
+    tournament = single_tournament(*([row.get(name) for row in rows] for name in TOURNAMENT_FIELDS))
+    return generate_poker_xml_columns(*columns, OPERATOR_ID, WAREHOUSE_ID, batch_id, tournament=tournament)
+
+
+class Archiver:
+    """PrepareRegulatoryFile with throwaway credentials."""
+
+    def __init__(self, directory):
+        cert_path, key_path = make_credentials(directory)
+        self.processor = load_processor(PREPARE_DIR, "PrepareRegulatoryFile")
+        self.context = ProcessContext(self.processor, {
+            "Certificate Path": cert_path,
+            "Private Key Path": key_path,
+            "ZIP Encryption Password": ZIP_PASSWORD,
+            "XML Filename": "enveloped.xml",
+        })
+
+    def size(self, batch_id, xml):
+        result = self.processor.transform(self.context, FlowFile(xml.encode("utf-8"), {"meta.batchId": batch_id}))
+        if result.relationship != "success":
+            raise RuntimeError(result.attributes.get("error.message"))
+        return len(result.contents)
+
+
+def make_assembler(args, **overrides):
+    settings = dict(target_archive_bytes=args.target_kb * 1024, max_age_seconds=args.max_age,
+                    operator_id=OPERATOR_ID, warehouse_id=WAREHOUSE_ID)
+    settings.update(overrides)
+    return BatchAssembler(**settings)
+
+
+def check_prediction(args, records, archiver):
+    failures = 0
+    assembler = make_assembler(args)
+    batches = assemble(records, assembler, args.rate)
+    assembler = make_assembler(args)
+    worst_xml = worst_archive = 0.0
+    over = 0
+    for batch_id, rows in list(batches.items())[:args.sample]:
+        xml = lote(batch_id, rows)
+        xml_bytes = len(xml.encode("utf-8"))
+        predicted_xml = assembler_xml_size(assembler, rows)
+        worst_xml = max(worst_xml, abs(predicted_xml - xml_bytes) / xml_bytes)
+
+        archive = archiver.size(batch_id, xml)
+        predicted = assembler.predicted_archive_size(predicted_xml)
+        worst_archive = max(worst_archive, abs(predicted - archive) / archive)
+        over += archive > assembler.target_archive_bytes * (1 + args.tolerance)
+
+    print(f"  XML size error (worst)      {worst_xml:7.2%}")
+    print(f"  archive size error (worst)  {worst_archive:7.2%}")
+    if worst_xml > 0.005:
+        print("  FAIL: predicted XML size differs from poker_xml.py output")
+        failures += 1
+    if worst_archive > args.tolerance or over:
+        print(f"  FAIL: archive prediction off by more than {args.tolerance:.0%} ({over} archives over target)")
+        failures += 1
+    return failures
+
+
+def assembler_xml_size(assembler, rows):
+    """Predicted XML size of a batch, by replaying its rows into a fresh assembler."""
+    batch_id = assembler.add(rows[0], 0)
+    for row in rows[1:]:
+        assembler.add(row, 0)
+    batch = next(b for b in assembler.open.values() if b.batch_id == batch_id)
+    size = batch.xml_size()
+    assembler.close_all()
+    assembler.take_closed()
+    return size
+
+
+def check_tournament(args, records):
+    failures = 0
+    batches = assemble(records, make_assembler(args), args.rate)
+    mixed = sum(len({row["TOURNAMENT_ID"] for row in rows}) != 1 for rows in batches.values())
+    wrong_header = 0
+    for batch_id, rows in list(batches.items())[:args.sample]:
+        xml = lote(batch_id, rows)
+        juego = re.search(r"<JuegoId>([^<]*)</JuegoId>.*<NumeroParticipantes>(\d+)</NumeroParticipantes>", xml)
+        wrong_header += not juego or juego.group(1) != rows[0]["TOURNAMENT_ID"] or int(juego.group(2)) != len(rows)
+    print(f"  batches                     {len(batches):7,}")
+    if mixed or wrong_header:
+        print(f"  FAIL: {mixed} batches mix tournaments, {wrong_header} headers do not match their batch")
+        failures += 1
+    return failures
+
+
+def check_deadline(args):
+    failures = 0
+    record = stream_records(1, args.seed, 1, 0, 0)[0]
+    assembler = make_assembler(args)
+    assembler.add(record, 0)
+    assembler.expire(args.max_age - 1)
+    early = len(assembler.take_closed())
+    assembler.expire(args.max_age)
+    due = len(assembler.take_closed())
+    if early or due != 1:
+        print(f"  FAIL: {early} batches closed before the deadline, {due} at it")
+        failures += 1
+
+    processor = load_processor(ASSEMBLE_DIR, "AssembleRegulatoryBatches")
+    context = ProcessContext(processor, {"Max Batch Latency": "1 sec"})
+    processor.onScheduled(context)
+    processor.transform(context, FlowFile(json.dumps([record]).encode("utf-8")))
+    idle = processor.transform(context, FlowFile(b""))
+    processor.assembler.open[record["TOURNAMENT_ID"]].opened_at -= 2
+    tick = processor.transform(context, FlowFile(b""))
+    if idle.relationship != "idle" or tick.relationship != "success" or tick.attributes["batch.closed.count"] != "1":
+        print(f"  FAIL: ticks went to {idle.relationship} and {tick.relationship}, expected idle and success "
+              "closing one batch")
+        failures += 1
+    else:
+        print("  deadline close              ok")
+
+    processor.last_success -= 1
+    sweep = processor.transform(context, FlowFile(b""))
+    if (sweep.relationship != "success" or sweep.attributes["batch.closed.count"] != "0"
+            or sweep.attributes["batch.stale.seconds"] != "2"):
+        print(f"  FAIL: quiet tick went to {sweep.relationship}, expected a success sweep "
+              "with batch.stale.seconds 2")
+        failures += 1
+    else:
+        print("  stale sweep tick            ok")
+    return failures
+
+
+def check_recovery(args):
+    """
+    Stop the assembler mid-stream and start a new one: the batches left open
+    are never closed, so only the stale sweep of PROCESS_ASSEMBLED_BATCHES
+    can process them. Sweeps run on every tick against the newest staged row
+    of each batch; they must reach every batch of the previous run and none
+    that the new run still has open.
+    """
+    failures = 0
+    max_age, per_second, tick_seconds, downtime = 60, 20, 10, 120
+    stale = STALE_DEADLINES * max_age
+    records = stream_records(8000, args.seed, 20, 2, 0.8)
+    newest = {}
+    processed = set()
+    swept_open = set()
+
+    def tick(assembler, now):
+        assembler.expire(now)
+        processed.update(batch.batch_id for batch in assembler.take_closed())
+        open_ids = set(assembler.open_ids())
+        for batch_id, staged in newest.items():
+            if batch_id not in processed and staged < now - stale:
+                if batch_id in open_ids:
+                    swept_open.add(batch_id)
+                processed.add(batch_id)
+
+    def run(assembler, rows, start, until):
+        next_tick = start + tick_seconds
+        for index, record in enumerate(rows):
+            now = start + index / per_second
+            while now >= next_tick:
+                tick(assembler, next_tick)
+                next_tick += tick_seconds
+            newest[assembler.add(record, now)] = now
+        while next_tick <= until:
+            tick(assembler, next_tick)
+            next_tick += tick_seconds
+        return next_tick
+
+    half = len(records) // 2
+    previous = make_assembler(args, max_age_seconds=max_age)
+    stopped = run(previous, records[:half], 0, 0)
+    left_open = set(previous.open_ids())
+    current = make_assembler(args, max_age_seconds=max_age)
+    restarted = stopped + downtime
+    run(current, records[half:], restarted, restarted + half / per_second + stale + max_age)
+
+    if not left_open or left_open - processed or swept_open:
+        print(f"  FAIL: {len(left_open - processed)} of {len(left_open)} batches left open by the restart never "
+              f"swept, {len(swept_open)} open batches swept")
+        failures += 1
+    else:
+        print(f"  left open by restart        {len(left_open):7,} (all swept, no open batch swept)")
+
+    processor = load_processor(ASSEMBLE_DIR, "AssembleRegulatoryBatches")
+    context = ProcessContext(processor)
+    processor.onScheduled(context)
+    first = processor.transform(context, FlowFile(b""))
+    if first.relationship != "success" or "batch.stale.seconds" not in first.attributes:
+        print(f"  FAIL: first tick after scheduling went to {first.relationship}, expected a success sweep")
+        failures += 1
+    return failures
+
+
+def check_fill(args, records, archiver):
+    failures = 0
+    target = args.target_kb * 1024
+    reasons = {}
+    sized = assemble(records, make_assembler(args, max_open=args.max_open), args.rate, reasons=reasons)
+
+    counted = {}
+    for index in range(0, len(records), args.count_batch):
+        counted["count-{:06d}-0000-0000-0000-000000000000".format(index)] = records[index:index + args.count_batch]
+
+    # Size-closed batches are the ones whose tournament filled them within Max Batch Latency;
+    # the rest close at the deadline with whatever their tournament sent
+    groups = [("count-based", list(counted.items()))]
+    for reason in sorted(set(reasons.values()), key=lambda r: (r != "size", r)):
+        groups.append((reason + "-closed", [(batch_id, rows) for batch_id, rows in sized.items()
+                                            if reasons[batch_id] == reason]))
+
+    results = {}
+    for name, batches in groups:
+        sizes = [archiver.size(batch_id, lote(batch_id, rows)) for batch_id, rows in batches[:args.sample]]
+        results[name] = sizes
+        mean = statistics.mean(sizes)
+        spread = statistics.pstdev(sizes) / mean
+        print(f"  {name:<16} {len(batches):6,} files, archive mean {mean / 1024:8.1f} KB, "
+              f"spread {spread:6.1%}, fill {mean / target:6.1%}")
+
+    full = results.get("size-closed", [])
+    if not full:
+        print("  FAIL: no batch closed at the target size")
+        return 1
+    fill = statistics.mean(full) / target
+    spread = statistics.pstdev(full) / statistics.mean(full)
+    if max(full) > target * (1 + args.tolerance) or fill < 1 - args.tolerance or spread > args.tolerance:
+        print(f"  FAIL: size-closed archives do not converge on the target (fill {fill:.1%}, spread {spread:.1%}, "
+              f"largest {max(full) / 1024:.1f} KB)")
+        failures += 1
+    over = [size for name, sizes in results.items() if name != "count-based" for size in sizes
+            if size > target * (1 + args.tolerance)]
+    if over:
+        print(f"  FAIL: {len(over)} archives over the target")
+        failures += 1
+    if len(sized) >= len(counted):
+        print(f"  FAIL: size-targeted batching produced {len(sized)} files against {len(counted)} count-based")
+        failures += 1
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the size-targeted batch assembler")
+    parser.add_argument("--records", type=int, default=200000, help="Transactions to batch")
+    parser.add_argument("--rate", type=float, default=100, help="Simulated stream rate in records/s")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--target-kb", type=int, default=256, help="Target Archive Size in KB")
+    parser.add_argument("--max-age", type=float, default=900, help="Max Batch Latency in seconds")
+    parser.add_argument("--max-open", type=int, default=1000, help="Maximum Open Batches")
+    parser.add_argument("--count-batch", type=int, default=500, help="Records per count-based batch")
+    parser.add_argument("--tournaments", type=int, default=50, help="Tournaments the transactions are spread over")
+    parser.add_argument("--hot-tournaments", type=int, default=5)
+    parser.add_argument("--hot-share", type=float, default=0.8)
+    parser.add_argument("--sample", type=int, default=40, help="Batches archived per check")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="Allowed archive size prediction error")
+    args = parser.parse_args()
+
+    records = stream_records(args.records, args.seed, args.tournaments, args.hot_tournaments, args.hot_share)
+    failures = 0
+    with tempfile.TemporaryDirectory() as workdir:
+        archiver = Archiver(workdir)
+        for name, check in (
+            ("prediction", lambda: check_prediction(args, records, archiver)),
+            ("tournament", lambda: check_tournament(args, records)),
+            ("deadline", lambda: check_deadline(args)),
+            ("recovery", lambda: check_recovery(args)),
+            ("fill", lambda: check_fill(args, records, archiver)),
+        ):
+            print(name)
+            failures += check()
+
+    print("PASS" if not failures else f"FAIL ({failures})")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
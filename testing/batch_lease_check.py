@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Local concurrency check for batch leasing (sql/13_batch_leasing.sql).
+
+Drives the BatchLeaser from the LeaseRegulatoryBatches processor against a
+SQLite stand-in for REGULATORY_BATCHES. The stand-in claim mirrors
+LEASE_REGULATORY_BATCHES: one write transaction (BEGIN IMMEDIATE plays the
+part of the BATCH_LEASE_LOCK row) that leases GENERATED rows and expired
+PROCESSING rows under max attempts, then returns the rows for the lease ID.
+
+Scenarios:
+
+  parallel  - several workers lease, "upload" and acknowledge every batch;
+              some crash mid-lease and their batches must be reclaimed after
+              the lease expires. Every batch must be uploaded exactly once.
+  attempts  - a batch that is never acknowledged is leased exactly
+              max-attempts times and then left PROCESSING.
+  legacy    - the old ExecuteSQLRecord query + SQL Post-Query pattern run
+              from several workers, for comparison (reports overlaps only).
+
+Usage:
+    python testing/batch_lease_check.py
+    python testing/batch_lease_check.py --batches 2000 --workers 8 --crashers 2
+"""
+
+import argparse
+import collections
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "custom_processors", "LeaseRegulatoryBatches", "src", "lease_regulatory_batches"))
+
+from batch_lease import AdaptiveLeaseSize, BatchLeaser, rows_as_dicts  # noqa: E402
+
+CLAIM_SQL = """
+UPDATE regulatory_batches
+SET status = 'PROCESSING',
+    lease_owner = ?,
+    lease_id = ?,
+    lease_expires_at = ?,
+    lease_count = COALESCE(lease_count, 0) + 1
+WHERE batch_id IN (
+    SELECT batch_id
+    FROM regulatory_batches
+    WHERE status = 'GENERATED'
+       OR (status = 'PROCESSING' AND lease_expires_at < ? AND COALESCE(lease_count, 0) < ?)
+    ORDER BY batch_timestamp, batch_id
+    LIMIT ?
+)
+"""
+
+
+class SqliteLeaseStore:
+    """Stand-in for SnowflakeLeaseStore; one connection per thread."""
+
+    def __init__(self, path, clock=time.monotonic):
+        self.path = path
+        self.clock = clock
+        self._local = threading.local()
+
+    def connection(self):
+        if not hasattr(self._local, "connection"):
+            self._local.connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        return self._local.connection
+
+    def claim(self, owner, lease_id, max_batches, lease_seconds, max_attempts):
+        db = self.connection()
+        now = self.clock()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            db.execute(CLAIM_SQL, (owner, lease_id, now + lease_seconds, now, max_attempts, max_batches))
+            db.execute("COMMIT")
+        except Exception:
+            db.execute("ROLLBACK")
+            raise
+        cursor = db.execute(
+            "SELECT batch_id, batch_timestamp, lease_id, lease_expires_at, lease_count "
+            "FROM regulatory_batches WHERE lease_id = ? ORDER BY batch_timestamp, batch_id", (lease_id,))
+        return rows_as_dicts(cursor)
+
+    def acknowledge(self, batch_id):
+        self.connection().execute(
+            "UPDATE regulatory_batches SET status = 'UPLOADED' WHERE batch_id = ?", (batch_id,))
+
+
+def create_batches(path, count):
+    db = sqlite3.connect(path)
+    db.executescript("""
+        DROP TABLE IF EXISTS regulatory_batches;
+        CREATE TABLE regulatory_batches (
+            batch_id TEXT PRIMARY KEY,
+            batch_timestamp INTEGER,
+            status TEXT,
+            lease_owner TEXT,
+            lease_id TEXT,
+            lease_expires_at REAL,
+            lease_count INTEGER
+        );
+    """)
+    db.executemany(
+        "INSERT INTO regulatory_batches (batch_id, batch_timestamp, status) VALUES (?, ?, 'GENERATED')",
+        [(f"batch-{i:06d}", i) for i in range(count)])
+    db.commit()
+    return db
+
+
+def run_parallel(path, args):
+    create_batches(path, args.batches)
+    store = SqliteLeaseStore(path)
+    uploads = collections.Counter()
+    uploads_lock = threading.Lock()
+    done = threading.Event()
+    leasers = []
+
+    def worker(index, crash_after):
+        leaser = BatchLeaser(store, f"worker-{index}", AdaptiveLeaseSize(1, args.max_lease),
+                             lease_seconds=args.lease_seconds, max_attempts=5, poll_interval=0.05)
+        leasers.append(leaser)
+        handled = 0
+        while not done.is_set():
+            batch = leaser.next_batch()
+            if batch is None:
+                time.sleep(0.01)
+                continue
+            if crash_after is not None and handled >= crash_after:
+                # Dies holding the rest of its lease; nothing is acknowledged
+                leaser.abandon()
+                return
+            time.sleep(random.uniform(0, args.work_ms) / 1000)
+            with uploads_lock:
+                uploads[batch["BATCH_ID"]] += 1
+            store.acknowledge(batch["BATCH_ID"])
+            handled += 1
+
+    threads = [threading.Thread(target=worker, args=(i, 5 if i < args.crashers else None))
+               for i in range(args.workers)]
+    started = time.monotonic()
+    for t in threads:
+        t.start()
+
+    db = sqlite3.connect(path, timeout=30)
+    deadline = started + args.timeout
+    while time.monotonic() < deadline:
+        remaining = db.execute("SELECT COUNT(*) FROM regulatory_batches WHERE status != 'UPLOADED'").fetchone()[0]
+        if remaining == 0:
+            break
+        time.sleep(0.05)
+    done.set()
+    for t in threads:
+        t.join()
+    elapsed = time.monotonic() - started
+
+    status = dict(db.execute("SELECT status, COUNT(*) FROM regulatory_batches GROUP BY status").fetchall())
+    reclaimed = db.execute("SELECT COUNT(*) FROM regulatory_batches WHERE lease_count > 1").fetchone()[0]
+    duplicates = sum(1 for n in uploads.values() if n > 1)
+    stats = sum((leaser.stats for leaser in leasers), collections.Counter())
+
+    print(f"parallel: {args.batches} batches, {args.workers} workers ({args.crashers} crash), {elapsed:.2f} s")
+    print(f"  status {status}")
+    print(f"  claims {stats['claims']} (empty {stats['empty_claims']}), leased {stats['leased']}, "
+          f"dropped {stats['dropped']}, reclaimed batches {reclaimed}")
+    print(f"  final lease sizes {[leaser.size.value for leaser in leasers]}")
+
+    failures = 0
+    if status.get("UPLOADED", 0) != args.batches:
+        print("  FAIL: not every batch was uploaded")
+        failures += 1
+    if duplicates:
+        print(f"  FAIL: {duplicates} batch(es) uploaded more than once")
+        failures += 1
+    if args.crashers and reclaimed == 0:
+        print("  FAIL: crashed workers' batches were not reclaimed")
+        failures += 1
+    return failures
+
+
+def run_attempts(path, args):
+    db = create_batches(path, 1)
+    store = SqliteLeaseStore(path)
+    max_attempts = 3
+    leaser = BatchLeaser(store, "poison", AdaptiveLeaseSize(1, 1), lease_seconds=0.1,
+                         max_attempts=max_attempts, poll_interval=0.01, safety_seconds=0)
+
+    deadline = time.monotonic() + 2.0
+    while time.monotonic() < deadline:
+        leaser.next_batch()  # never acknowledged
+        time.sleep(0.02)
+
+    status, count = db.execute("SELECT status, lease_count FROM regulatory_batches").fetchone()
+    print(f"attempts: never-acknowledged batch leased {count} time(s), status {status}")
+    if count != max_attempts or status != "PROCESSING":
+        print(f"  FAIL: expected {max_attempts} leases and PROCESSING")
+        return 1
+    return 0
+
+
+def run_legacy(path, args):
+    create_batches(path, args.batches)
+    reads = collections.Counter()
+    lock = threading.Lock()
+    limit = 50
+
+    def worker():
+        db = sqlite3.connect(path, timeout=30, isolation_level=None)
+        while True:
+            rows = db.execute(
+                "SELECT batch_id FROM regulatory_batches WHERE status = 'GENERATED' "
+                "ORDER BY batch_timestamp LIMIT ?", (limit,)).fetchall()
+            if not rows:
+                return
+            time.sleep(0.001)
+            db.execute(
+                "UPDATE regulatory_batches SET status = 'PROCESSING' WHERE batch_id IN ("
+                "SELECT batch_id FROM regulatory_batches WHERE status = 'GENERATED' "
+                "ORDER BY batch_timestamp LIMIT ?) AND status = 'GENERATED'", (limit,))
+            with lock:
+                reads.update(r[0] for r in rows)
+
+    threads = [threading.Thread(target=worker) for _ in range(args.workers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    db = sqlite3.connect(path)
+    marked = db.execute("SELECT COUNT(*) FROM regulatory_batches WHERE status = 'PROCESSING'").fetchone()[0]
+    overlaps = sum(1 for n in reads.values() if n > 1)
+    print(f"legacy: {overlaps} of {args.batches} batches read by more than one worker, "
+          f"{marked - len(reads)} marked PROCESSING without being read (for comparison only)")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check batch leasing under concurrent claimers")
+    parser.add_argument("--batches", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=6)
+    parser.add_argument("--crashers", type=int, default=2, help="Workers that die holding a lease")
+    parser.add_argument("--max-lease", type=int, default=50)
+    parser.add_argument("--lease-seconds", type=float, default=2.0)
+    parser.add_argument("--work-ms", type=float, default=2.0, help="Maximum simulated upload time per batch")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    args = parser.parse_args()
+
+    failures = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        failures += run_parallel(os.path.join(tmp, "parallel.db"), args)
+        failures += run_attempts(os.path.join(tmp, "attempts.db"), args)
+        failures += run_legacy(os.path.join(tmp, "legacy.db"), args)
+
+    if failures:
+        print(f"\n{failures} check(s) failed")
+        sys.exit(1)
+    print("\nEvery batch was leased to one worker at a time and uploaded exactly once")
+
+
+if __name__ == "__main__":
+    main()
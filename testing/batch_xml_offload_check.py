@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Local round-trip check for the batch XML offload (sql/12_xml_offload.sql).
+
+Generates lotes with sql/python/poker_xml.py, offloads them with the
+LocalXmlStore from sql/python/batch_xml_store.py and loads them back the
+two ways the fetch path can see them:
+
+  file://  - the local-directory store, as used for testing
+  http://  - a local HTTP server standing in for a stage presigned URL
+
+Each loaded document must match the original byte-for-byte and pass the
+size and SHA-256 checks. A truncated file, a flipped byte and a wrong
+expected hash must each be rejected. Reports the compression ratio per size.
+
+Usage:
+    python testing/batch_xml_offload_check.py
+    python testing/batch_xml_offload_check.py --sizes 500 5000 50000
+"""
+
+import argparse
+import functools
+import http.server
+import os
+import sys
+import tempfile
+import threading
+from pathlib import Path
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "sql", "python"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from batch_xml_store import LocalXmlStore, offload_xml, read_xml  # noqa: E402
+from poker_xml import generate_poker_xml  # noqa: E402
+from poker_xml_benchmark import make_rows  # noqa: E402
+from poker_xml_equivalence import FIXED_NOW  # noqa: E402
+
+
+class QuietHandler(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(directory):
+    handler = functools.partial(QuietHandler, directory=directory)
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def expect_rejected(label, url, sha256, size):
+    try:
+        read_xml(url, expected_sha256=sha256, expected_bytes=size)
+    except (ValueError, EOFError, OSError) as e:
+        print(f"  rejected {label:<20} {type(e).__name__}: {str(e)[:60]}")
+        return 0
+    print(f"  NOT rejected: {label}")
+    return 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Round-trip lotes through the offload store and loader")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 1000, 10000, 50000])
+    args = parser.parse_args()
+
+    failures = 0
+    with tempfile.TemporaryDirectory() as root:
+        store = LocalXmlStore(root)
+        server = serve(root)
+        http_base = f"http://127.0.0.1:{server.server_address[1]}"
+
+        print(f"{'players':>8} {'xml MB':>8} {'gz MB':>7} {'ratio':>6}  file://  http://")
+        offloaded = []
+        for i, size in enumerate(args.sizes):
+            batch_id = f"3f2a9c1e-7b4d-4e8f-9a0b-{i:012d}"
+            xml = generate_poker_xml(make_rows(size, seed=i), "OP01", "WH001", batch_id, now=FIXED_NOW)
+            row = offload_xml(store, batch_id, FIXED_NOW, xml)
+            offloaded.append(row)
+
+            file_path = Path(row["XML_URI"][len("file://"):])
+            http_url = f"{http_base}/{file_path.relative_to(Path(root).resolve()).as_posix()}"
+            results = []
+            for url in (row["XML_URI"], http_url):
+                loaded = read_xml(url, expected_sha256=row["XML_SHA256"], expected_bytes=row["XML_BYTES"])
+                results.append(loaded == xml.encode("utf-8"))
+            failures += results.count(False)
+
+            gz_bytes = file_path.stat().st_size
+            print(f"{size:>8} {row['XML_BYTES'] / 1e6:>8.2f} {gz_bytes / 1e6:>7.2f} "
+                  f"{row['XML_BYTES'] / gz_bytes:>5.1f}x  {'ok' if results[0] else 'FAIL':<7}  "
+                  f"{'ok' if results[1] else 'FAIL'}")
+
+        # Same document offloaded twice gives the same file and hash
+        again = offload_xml(store, offloaded[0]["BATCH_ID"], FIXED_NOW, generate_poker_xml(
+            make_rows(args.sizes[0], seed=0), "OP01", "WH001", offloaded[0]["BATCH_ID"], now=FIXED_NOW))
+        if again != offloaded[0]:
+            print("Re-offloading the same lote changed its URI, size or hash")
+            failures += 1
+
+        print("\nCorruption checks:")
+        row = offloaded[-1]
+        path = Path(row["XML_URI"][len("file://"):])
+        payload = path.read_bytes()
+        failures += expect_rejected("wrong SHA-256", row["XML_URI"], "0" * 64, row["XML_BYTES"])
+        failures += expect_rejected("wrong size", row["XML_URI"], row["XML_SHA256"], row["XML_BYTES"] + 1)
+
+        path.write_bytes(payload[: len(payload) // 2])
+        failures += expect_rejected("truncated file", row["XML_URI"], row["XML_SHA256"], row["XML_BYTES"])
+
+        flipped = bytearray(payload)
+        flipped[len(flipped) // 2] ^= 0xFF
+        path.write_bytes(bytes(flipped))
+        failures += expect_rejected("flipped byte", row["XML_URI"], row["XML_SHA256"], row["XML_BYTES"])
+
+        server.shutdown()
+
+    if failures:
+        print(f"\n{failures} check(s) failed")
+        sys.exit(1)
+    print("\nAll lotes round-tripped and all corruptions were rejected")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+Local check for the file-reference mode of PrepareRegulatoryFile
+('Input File' and 'Output Directory').
+
+Drives the processor through testing/nifiapi_stub.py with a throwaway
+certificate and a lote from sql/python/poker_xml.py. The stand-in FlowFile
+counts the bytes handed over by getContentsAsBytes() and returned as
+contents=, which in NiFi would cross the Java-to-Python bridge.
+
+Scenarios:
+
+  equivalence - the same lote through content mode and through file mode
+                (memory-mapped input, archive written to a directory) must
+                decrypt to the same signed XML, and file mode must move no
+                content across the bridge.
+  memory      - peak RSS growth and time per lote for both modes, each in a
+                fresh child process (as in testing/memory_budget_check.py).
+  bundled     - with 'Maximum Bundle Entries' above 1 and 'Output
+                Directory' set, each bundle is written once and the FlowFile
+                whose lote fills it carries dgoj.output.path.
+  errors      - a missing or empty input file goes to failure, and a failed
+                write leaves no partial archive behind.
+  budget      - the memory estimate comes from the input file, not the
+                (empty) FlowFile content.
+
+Requires signxml, cryptography, lxml and pyzipper (PrepareRegulatoryFile's
+dependencies).
+
+Usage:
+    python testing/file_reference_check.py
+    python testing/file_reference_check.py --players 100000
+"""
+
+import argparse
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "testing"))
+sys.path.insert(0, os.path.join(ROOT, "sql", "python"))
+
+PREPARE_DIR = os.path.join(ROOT, "custom_processors", "PrepareRegulatoryFile", "src", "prepare_regulatory_file")
+ZIP_PASSWORD = "file-reference-check"
+MB = 1024 * 1024
+
+from memory_budget_check import peak_rss, write_lote  # noqa: E402
+from nifiapi_stub import FlowFile, ProcessContext, load_processor  # noqa: E402
+
+import pyzipper  # noqa: E402
+
+
+class BridgeFlowFile(FlowFile):
+    """FlowFile stand-in that counts the content bytes read across the bridge."""
+
+    def __init__(self, contents=b"", attributes=None):
+        super().__init__(contents, attributes)
+        self.bytes_read = 0
+
+    def getContentsAsBytes(self):
+        self.bytes_read += len(self.contents)
+        return super().getContentsAsBytes()
+
+
+def make_processor(credentials, settings):
+    processor = load_processor(PREPARE_DIR, "PrepareRegulatoryFile")
+    cert_path, key_path = credentials
+    context = ProcessContext(processor, {
+        "Certificate Path": cert_path,
+        "Private Key Path": key_path,
+        "ZIP Encryption Password": ZIP_PASSWORD,
+        **settings,
+    })
+    processor.onScheduled(context)
+    return processor, context
+
+
+def file_settings(output_dir):
+    return {"Input File": "${absolute.path}/${input.filename}", "Output Directory": output_dir}
+
+
+def file_flowfile(path, filename="lote.zip"):
+    return BridgeFlowFile(b"", {"absolute.path": os.path.dirname(path), "input.filename": os.path.basename(path),
+                                "filename": filename, "meta.batchId": os.path.basename(path)[:-4]})
+
+
+def read_archive(archive):
+    source = io.BytesIO(archive) if isinstance(archive, bytes) else archive
+    with pyzipper.AESZipFile(source) as zf:
+        zf.setpassword(ZIP_PASSWORD.encode("utf-8"))
+        return {name: zf.read(name) for name in zf.namelist()}
+
+
+def run_equivalence(credentials, tmp, lote_path):
+    with open(lote_path, "rb") as f:
+        data = f.read()
+    output_dir = os.path.join(tmp, "out")
+
+    processor, context = make_processor(credentials, {})
+    inline = BridgeFlowFile(data, {"filename": "lote.zip"})
+    content_result = processor.transform(context, inline)
+
+    processor, context = make_processor(credentials, file_settings(output_dir))
+    referenced = file_flowfile(lote_path)
+    file_result = processor.transform(context, referenced)
+
+    if content_result.relationship != "success" or file_result.relationship != "success":
+        print(f"  FAIL: content mode -> {content_result.relationship}, file mode -> {file_result.relationship}: "
+              f"{file_result.attributes.get('error.message')}")
+        return 1
+
+    output_path = file_result.attributes.get("dgoj.output.path")
+    content_bridge = inline.bytes_read + len(content_result.contents)
+    file_bridge = referenced.bytes_read + len(file_result.contents or b"")
+    print(f"equivalence: {len(data) / MB:.1f} MB lote; bridge bytes content mode {content_bridge / MB:.1f} MB, "
+          f"file mode {file_bridge} bytes; archive {output_path}")
+
+    failures = 0
+    if read_archive(content_result.contents) != read_archive(output_path):
+        print("  FAIL: the archives decrypt to different signed XML")
+        failures += 1
+    if file_bridge:
+        print("  FAIL: file mode moved content across the bridge")
+        failures += 1
+    if file_result.attributes.get("dgoj.output.bytes") != str(os.path.getsize(output_path)):
+        print("  FAIL: dgoj.output.bytes does not match the archive")
+        failures += 1
+    if [name for name in os.listdir(output_dir) if name.endswith(".part")]:
+        print("  FAIL: a temporary .part file was left behind")
+        failures += 1
+    return failures
+
+
+def child(spec):
+    """Runs in a fresh process: one lote through content mode or file mode; prints peak RSS growth and time."""
+    settings = file_settings(spec["output_dir"]) if spec["mode"] == "file" else {}
+    processor, context = make_processor(spec["credentials"], settings)
+    # Warm up imports so they do not count as lote memory
+    warmup, warmup_context = make_processor(spec["credentials"], {})
+    warmup.transform(warmup_context, BridgeFlowFile(b"<Lote/>", {"filename": "warmup.zip"}))
+
+    before = peak_rss()
+    started = time.monotonic()
+    if spec["mode"] == "file":
+        result = processor.transform(context, file_flowfile(spec["path"]))
+    else:
+        # The bytes would arrive from the bridge
+        with open(spec["path"], "rb") as f:
+            result = processor.transform(context, BridgeFlowFile(f.read(), {"filename": "lote.zip"}))
+    elapsed = time.monotonic() - started
+    print(json.dumps({"relationship": result.relationship, "growth": peak_rss() - before, "seconds": elapsed}))
+
+
+def run_memory(credentials, tmp, lote_path):
+    failures = 0
+    results = {}
+    for mode in ("content", "file"):
+        spec = {"credentials": credentials, "mode": mode, "path": lote_path, "output_dir": os.path.join(tmp, "memory")}
+        out = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", json.dumps(spec)],
+                             capture_output=True, text=True, check=True).stdout
+        results[mode] = json.loads(out.strip().splitlines()[-1])
+        print(f"memory ({mode}): peak +{results[mode]['growth'] / MB:.0f} MB, {results[mode]['seconds']:.2f} s")
+        if results[mode]["relationship"] != "success":
+            print(f"  FAIL: {mode} mode -> {results[mode]['relationship']}")
+            failures += 1
+    return failures
+
+
+def run_bundled(credentials, tmp, lote_path):
+    output_dir = os.path.join(tmp, "bundled")
+    settings = dict(file_settings(output_dir), **{
+        "Maximum Bundle Entries": "4",
+        "Maximum Bundle Wait": "2 sec",
+        # The stand-in only substitutes plain ${attr} references, not EL functions
+        "Bundle Key": "${bundle.key}",
+        "Output Filename": "${bundle.key}_${meta.batchId}.zip",
+    })
+    processor, context = make_processor(credentials, settings)
+
+    # Four small lotes per key, written next to each other like a staging directory
+    flowfiles = []
+    for i in range(8):
+        path = os.path.join(tmp, "staging", f"batch-{i:03d}.xml")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(f'<?xml version="1.0" encoding="UTF-8"?><Lote id="batch-{i:03d}"><Registro/></Lote>'.encode("utf-8"))
+        flowfile = file_flowfile(path)
+        flowfile.attributes["bundle.key"] = f"OP0{i % 2 + 1}"
+        flowfiles.append(flowfile)
+
+    results = []
+    lock = threading.Lock()
+
+    def task(flowfile):
+        result = processor.transform(context, flowfile)
+        with lock:
+            results.append(result)
+
+    threads = [threading.Thread(target=task, args=(flowfile,)) for flowfile in flowfiles]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    processor.onStopped(context)
+
+    archives = [r for r in results if r.relationship == "success"]
+    written = sorted(name for name in os.listdir(output_dir))
+    print(f"bundled: {len(flowfiles)} lotes -> {len(archives)} archives written {written}")
+    entries = sum(len(read_archive(r.attributes["dgoj.output.path"])) for r in archives)
+    if len(archives) != 2 or len(written) != 2 or entries != len(flowfiles) or any(r.contents for r in results):
+        print("  FAIL: expected two archives of four lotes each, written to the directory and not returned as content")
+        return 1
+    return 0
+
+
+def run_errors(credentials, tmp):
+    failures = 0
+    empty = os.path.join(tmp, "empty.xml")
+    open(empty, "wb").close()
+    lote = os.path.join(tmp, "small.xml")
+    with open(lote, "wb") as f:
+        f.write(b'<?xml version="1.0" encoding="UTF-8"?><Lote><Registro/></Lote>')
+    blocked = os.path.join(tmp, "blocked")
+    open(blocked, "wb").close()
+
+    cases = [
+        ("missing input", file_settings(os.path.join(tmp, "errors")), file_flowfile(os.path.join(tmp, "missing.xml"))),
+        ("empty input", file_settings(os.path.join(tmp, "errors")), file_flowfile(empty)),
+        # Output Directory is a regular file, so the archive cannot be written
+        ("unwritable output", file_settings(blocked), file_flowfile(lote)),
+        ("unsafe filename", file_settings(os.path.join(tmp, "errors")), file_flowfile(lote, "../escape.zip")),
+    ]
+    for name, settings, flowfile in cases:
+        processor, context = make_processor(credentials, settings)
+        result = processor.transform(context, flowfile)
+        print(f"errors ({name}): {result.relationship}: {result.attributes.get('error.message')}")
+        if result.relationship != "failure":
+            print("  FAIL: expected failure")
+            failures += 1
+
+    leftovers = [name for root, _, files in os.walk(tmp) for name in files if name.endswith(".part")]
+    if leftovers or os.path.exists(os.path.join(tmp, "escape.zip")):
+        print(f"  FAIL: partial or misplaced archives left behind: {leftovers}")
+        failures += 1
+    return failures
+
+
+def run_budget(credentials, tmp, lote_path):
+    processor, context = make_processor(credentials, dict(file_settings(os.path.join(tmp, "budget")), **{"Memory Budget": "1 MB"}))
+    result = processor.transform(context, file_flowfile(lote_path))
+    estimate = int(result.attributes.get("dgoj.memory.estimate", 0))
+    print(f"budget: {os.path.getsize(lote_path) / MB:.1f} MB input file, empty content -> {result.relationship}, "
+          f"estimate {estimate / MB:.0f} MB")
+    if result.relationship != "oversize" or estimate < os.path.getsize(lote_path):
+        print("  FAIL: expected the estimate from the input file to exceed the 1 MB budget")
+        return 1
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the file-reference mode of PrepareRegulatoryFile")
+    parser.add_argument("--players", type=int, default=50000, help="Players in the lote")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(json.loads(args.child))
+        return
+
+    from pipeline_simulator import make_credentials
+
+    failures = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        credentials = make_credentials(tmp)
+        lote_path = os.path.join(tmp, "staging", "lote.xml")
+        os.makedirs(os.path.dirname(lote_path))
+        write_lote(lote_path, args.players)
+
+        failures += run_equivalence(credentials, tmp, lote_path)
+        failures += run_memory(credentials, tmp, lote_path)
+        failures += run_bundled(credentials, tmp, lote_path)
+        failures += run_errors(credentials, tmp)
+        failures += run_budget(credentials, tmp, lote_path)
+
+    if failures:
+        print(f"\n{failures} check(s) failed")
+        sys.exit(1)
+    print("\nFile mode produced the same archives without moving content across the bridge")
+
+
+if __name__ == "__main__":
+    main()
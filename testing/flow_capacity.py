@@ -0,0 +1,489 @@
+#!/usr/bin/env python3
+"""
+Capacity analyzer for the OpenFlow flow definitions in flow/*.json.
+
+Builds the processor graph of a flow export (scheduling strategy and period,
+concurrent tasks, per-trigger batch sizes, relationships and the back-pressure
+thresholds of every connection), combines it with measured service times and
+computes, for a given arrival rate:
+
+  - the capacity of every processor (FlowFiles/s with all its tasks busy,
+    capped by its run schedule) and its utilization
+  - the steady-state throughput through the graph and the bottleneck (the
+    processor with the highest utilization), plus how far the arrival rate
+    can grow before the bottleneck saturates
+  - for an overloaded flow, how fast each queue grows, when it reaches its
+    back-pressure threshold and how back pressure then spreads upstream
+
+Service times come from a benchmark JSON keyed by processor name (or
+"<Flow>/<processor name>", which wins over the bare name):
+
+    {
+      "processors": {
+        "DgojXadesProcessor": {"service_ms": 180},
+        "AcknowledgeRegulatoryBatches": {"service_ms": 0.5, "trigger_ms": 150},
+        "ValidateXml": {"service_ms": 30, "routes": {"invalid": 0.01}},
+        "BoeGamingReport/DeliverRegulatoryFile": {"service_ms": 60, "flowfile_bytes": 40000}
+      }
+    }
+
+  service_ms     time per FlowFile for one task
+  trigger_ms     time per onTrigger, shared by the FlowFiles of one batch
+  routes         FlowFiles sent to a relationship per FlowFile in (default 1;
+                 0 for failure, retry, invalid, unmatched, reject, original)
+  flowfile_bytes size of the FlowFiles the processor emits, to check the
+                 data-size back-pressure threshold
+
+testing/pipeline_simulator.py --benchmark-json writes this file from a local
+run. Processors without a measurement use --default-service-ms and are
+marked with '*'.
+
+Sources (processors without incoming connections) emit their per-trigger
+batch every run-schedule period; sources scheduled continuously (Consume
+Stream, LeaseRegulatoryBatches) emit what arrives, given with --arrival;
+without a rate they run as fast as the flow can take their output, which
+gives the flow's maximum steady-state throughput.
+
+Usage:
+    python testing/flow_capacity.py flow/BoeGamingReport.json --benchmark bench.json --arrival LeaseRegulatoryBatches=2
+    python testing/flow_capacity.py flow/BatchProcessing.json --arrival "Consume Stream=0.5" --horizon 3600
+"""
+
+import argparse
+import json
+import math
+import os
+import re
+import sys
+from collections import deque
+
+# Relationships that carry no steady-state traffic unless the benchmark says so
+SIDE_RELATIONSHIPS = {"failure", "retry", "no retry", "invalid", "unmatched", "reject", "original", "idle", "oversize"}
+
+# Per-trigger batch properties: (property, unit). "flowfiles" batches are
+# FlowFiles handled or emitted per onTrigger; "records" are records per FlowFile
+BATCH_PROPERTIES = {
+    "GenerateFlowFile": ("Batch Size", "flowfiles"),
+    "LeaseRegulatoryBatches": ("Maximum Lease Size", "flowfiles"),
+    "AcknowledgeRegulatoryBatches": ("Maximum Batch Size", "flowfiles"),
+    "ConsumeSnowflakeStream": ("Max Chunk Size", "records"),
+    "GeneratePokerTransactions": ("Records Per FlowFile", "records"),
+    "ExecuteSQLRecord": ("Max Rows Per Flow File", "records"),
+}
+
+_PERIOD = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([a-z]+)\s*$", re.IGNORECASE)
+_SECONDS = {
+    "ms": 0.001, "millis": 0.001, "milliseconds": 0.001,
+    "sec": 1, "secs": 1, "second": 1, "seconds": 1, "s": 1,
+    "min": 60, "mins": 60, "minute": 60, "minutes": 60, "m": 60,
+    "hr": 3600, "hrs": 3600, "hour": 3600, "hours": 3600, "h": 3600,
+    "day": 86400, "days": 86400, "d": 86400,
+}
+_DATA = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([kmgt]?b)\s*$", re.IGNORECASE)
+_BYTES = {"b": 1, "kb": 1024, "mb": 1024 ** 2, "gb": 1024 ** 3, "tb": 1024 ** 4}
+
+
+def parse_period(text):
+    """Seconds in a NiFi time period ('15 sec', '5 day'); None if not a period (e.g. a CRON expression)."""
+    match = _PERIOD.match(text or "")
+    if not match or match.group(2).lower() not in _SECONDS:
+        return None
+    return float(match.group(1)) * _SECONDS[match.group(2).lower()]
+
+
+def parse_data_size(text):
+    match = _DATA.match(text or "")
+    return float(match.group(1)) * _BYTES[match.group(2).lower()] if match else None
+
+
+def short_type(component_type):
+    return component_type.rsplit(".", 1)[-1]
+
+
+class Processor:
+    def __init__(self, component):
+        self.id = component["identifier"]
+        self.name = component["name"]
+        self.type = short_type(component["type"])
+        self.strategy = component.get("schedulingStrategy", "TIMER_DRIVEN")
+        self.period = parse_period(component.get("schedulingPeriod")) if self.strategy == "TIMER_DRIVEN" else None
+        self.tasks = max(1, int(component.get("concurrentlySchedulableTaskCount") or 1))
+        self.run_duration_ms = component.get("runDurationMillis") or 0
+        self.enabled = component.get("scheduledState", "ENABLED") != "DISABLED"
+        self.properties = component.get("properties") or {}
+
+        self.flowfiles_per_trigger = 1
+        self.records_per_flowfile = None
+        prop = BATCH_PROPERTIES.get(self.type)
+        if prop and str(self.properties.get(prop[0], "")).strip().isdigit():
+            value = int(self.properties[prop[0]])
+            if prop[1] == "flowfiles":
+                self.flowfiles_per_trigger = max(1, value)
+            else:
+                self.records_per_flowfile = value
+
+        self.inputs = []
+        self.outputs = []
+        self.service_ms = None
+        self.trigger_ms = 0.0
+        self.routes = {}
+        self.flowfile_bytes = None
+        self.measured = False
+
+        self.offered = 0.0
+        self.throughput = 0.0
+
+    @property
+    def service_seconds(self):
+        return (self.service_ms + self.trigger_ms / self.flowfiles_per_trigger) / 1000
+
+    @property
+    def capacity(self):
+        """FlowFiles/s with every task busy, capped by the run schedule."""
+        capacity = self.tasks / self.service_seconds if self.service_seconds > 0 else math.inf
+        if self.period:
+            capacity = min(capacity, self.flowfiles_per_trigger / self.period)
+        return capacity
+
+    @property
+    def utilization(self):
+        return self.offered / self.capacity if self.capacity else math.inf
+
+    def route(self, relationship):
+        if relationship in self.routes:
+            return self.routes[relationship]
+        return 0.0 if relationship.lower() in SIDE_RELATIONSHIPS else 1.0
+
+
+class Connection:
+    def __init__(self, component, source, destination):
+        self.id = component["identifier"]
+        self.source = source
+        self.destination = destination
+        self.relationships = component.get("selectedRelationships") or []
+        self.max_objects = component.get("backPressureObjectThreshold") or 0
+        self.max_bytes = parse_data_size(component.get("backPressureDataSizeThreshold"))
+        self.rate = 0.0
+
+    @property
+    def fanout(self):
+        """FlowFiles on this connection per FlowFile processed by its source."""
+        return sum(self.source.route(relationship) for relationship in self.relationships)
+
+    @property
+    def label(self):
+        return "{} -> {} [{}]".format(self.source.name, self.destination.name, ", ".join(self.relationships))
+
+
+class FlowGraph:
+    """Processors and the connections between them, from a flow definition export."""
+
+    def __init__(self, path):
+        with open(path, encoding="utf-8") as f:
+            definition = json.load(f)
+        self.name = os.path.splitext(os.path.basename(path))[0]
+        self.processors = {}
+        self.connections = []
+        self.self_loops = []
+        self.ignored = []
+        self.arrivals = {}
+        self._load(definition["flowContents"])
+
+    def _load(self, group, prefix=""):
+        for component in group.get("processors", []):
+            processor = Processor(component)
+            if prefix:
+                processor.name = prefix + processor.name
+            self.processors[processor.id] = processor
+        for child in group.get("processGroups", []):
+            self._load(child, prefix + child["name"] + "/")
+        # Ports and funnels are pass-through; only processor-to-processor edges are modelled
+        for component in group.get("connections", []):
+            source = self.processors.get(component["source"]["id"])
+            destination = self.processors.get(component["destination"]["id"])
+            if source is None or destination is None:
+                self.ignored.append(component["source"]["name"] + " -> " + component["destination"]["name"])
+                continue
+            connection = Connection(component, source, destination)
+            if source is destination:
+                self.self_loops.append(connection)
+                continue
+            self.connections.append(connection)
+            source.outputs.append(connection)
+            destination.inputs.append(connection)
+
+    def find(self, name):
+        for processor in self.processors.values():
+            if processor.name == name:
+                return processor
+        raise KeyError("No processor named '{}' in {} (have: {})".format(
+            name, self.name, ", ".join(sorted(p.name for p in self.processors.values()))))
+
+    @property
+    def sources(self):
+        return [p for p in self.processors.values() if not p.inputs and p.enabled]
+
+    def order(self):
+        """Processors in topological order; processors on a cycle come last, in definition order."""
+        indegree = {pid: len(p.inputs) for pid, p in self.processors.items()}
+        ready = deque(pid for pid, count in indegree.items() if count == 0)
+        ordered = []
+        while ready:
+            processor = self.processors[ready.popleft()]
+            ordered.append(processor)
+            for connection in processor.outputs:
+                indegree[connection.destination.id] -= 1
+                if indegree[connection.destination.id] == 0:
+                    ready.append(connection.destination.id)
+        seen = {p.id for p in ordered}
+        return ordered + [p for p in self.processors.values() if p.id not in seen]
+
+    def apply_benchmark(self, benchmark, default_service_ms):
+        measurements = benchmark.get("processors", {})
+        for processor in self.processors.values():
+            entry = measurements.get(self.name + "/" + processor.name, measurements.get(processor.name))
+            if entry is None:
+                processor.service_ms = default_service_ms
+                continue
+            processor.measured = True
+            processor.service_ms = float(entry.get("service_ms", default_service_ms))
+            processor.trigger_ms = float(entry.get("trigger_ms", 0))
+            processor.routes = {k: float(v) for k, v in (entry.get("routes") or {}).items()}
+            processor.flowfile_bytes = entry.get("flowfile_bytes")
+
+    def solve(self, arrivals):
+        """
+        Offered load and throughput of every processor for the given source
+        arrival rates (FlowFiles/s). Continuously scheduled sources without a
+        rate run as fast as the flow takes their output: their rate is raised
+        until the busiest processor is saturated.
+        """
+        self.arrivals = dict(arrivals)
+        flat_out = [p for p in self.sources if p.name not in arrivals and not p.period]
+        if flat_out:
+            self._propagate(arrivals, {p.name: 0.0 for p in flat_out})
+            base = {p.id: p.offered for p in self.processors.values()}
+            self._propagate(arrivals, {p.name: 1.0 for p in flat_out})
+            rate = min(p.capacity for p in flat_out)
+            for processor in self.processors.values():
+                extra = processor.offered - base[processor.id]
+                if processor.inputs and processor.enabled and extra > 0:
+                    rate = min(rate, max(0.0, processor.capacity - base[processor.id]) / extra)
+            arrivals = dict(arrivals, **{p.name: rate for p in flat_out})
+        self._propagate(arrivals, {})
+
+    def _propagate(self, arrivals, overrides):
+        for connection in self.connections:
+            connection.rate = 0.0
+        for processor in self.order():
+            if not processor.inputs:
+                if processor.name in overrides:
+                    processor.offered = overrides[processor.name]
+                elif processor.name in arrivals:
+                    processor.offered = arrivals[processor.name]
+                elif processor.period:
+                    processor.offered = processor.flowfiles_per_trigger / processor.period
+                else:
+                    processor.offered = processor.capacity
+            else:
+                processor.offered = sum(connection.rate for connection in processor.inputs)
+            processor.throughput = min(processor.offered, processor.capacity) if processor.enabled else 0.0
+            for connection in processor.outputs:
+                connection.rate = processor.throughput * connection.fanout
+
+    def bottleneck(self):
+        candidates = [p for p in self.processors.values() if p.enabled and p.offered > 0 and p.inputs]
+        candidates = candidates or [p for p in self.processors.values() if p.enabled and p.offered > 0]
+        return max(candidates, key=lambda p: (p.utilization, p.measured), default=None)
+
+    def backlog(self, horizon):
+        """
+        Queue growth for overloaded processors and the spread of back pressure.
+
+        Returns (connection, growth FlowFiles/s, seconds until back pressure,
+        projected depth at horizon) rows, bottleneck queues first, then the
+        queues upstream of them in the order they fill.
+        """
+        rows = []
+        for processor in self.order():
+            excess = processor.offered - processor.capacity
+            if not processor.enabled or excess <= 1e-12 or not processor.inputs:
+                continue
+            self._backlog(processor, processor.capacity, horizon, 0.0, rows, set())
+        return rows
+
+    def _backlog(self, processor, drained, horizon, started, rows, visited):
+        if processor.id in visited:
+            return
+        visited.add(processor.id)
+        offered = sum(c.rate for c in processor.inputs)
+        if offered <= drained:
+            return
+        for connection in processor.inputs:
+            share = connection.rate / offered if offered else 0
+            growth = (offered - drained) * share
+            if growth <= 1e-9 * max(1.0, offered):
+                continue
+            limits = []
+            if connection.max_objects:
+                limits.append(connection.max_objects / growth)
+            if connection.max_bytes and connection.source.flowfile_bytes:
+                limits.append(connection.max_bytes / (growth * connection.source.flowfile_bytes))
+            fills = started + min(limits) if limits else math.inf
+            depth = growth * max(0.0, min(horizon, fills) - started)
+            rows.append((connection, growth, fills, depth))
+            if fills > horizon:
+                continue
+            # Once the queue is full its source is only scheduled as fast as it drains
+            source = connection.source
+            fanout = connection.fanout
+            allowed = drained * share / fanout if fanout else math.inf
+            self._backlog(source, min(allowed, source.capacity), horizon, fills, rows, visited)
+
+
+def fmt_rate(value):
+    if value == math.inf:
+        return "unbounded"
+    return "{:,.3f}".format(value) if value < 10 else "{:,.1f}".format(value)
+
+
+def fmt_seconds(value):
+    if value == math.inf:
+        return "never"
+    if value >= 86400:
+        return "{:.1f} d".format(value / 86400)
+    if value >= 3600:
+        return "{:.1f} h".format(value / 3600)
+    if value >= 60:
+        return "{:.1f} min".format(value / 60)
+    return "{:.1f} s".format(value)
+
+
+def report(graph, horizon):
+    print("{} ({} processors, {} connections)".format(graph.name, len(graph.processors), len(graph.connections)))
+    header = "  {:<30} {:<28} {:>5} {:>9} {:>5} {:>10} {:>11} {:>11} {:>6} {:>11} {:>10}".format(
+        "processor", "type", "tasks", "period", "batch", "svc ms", "offered/s", "capacity/s", "util", "through/s",
+        "records/s")
+    print(header)
+    for processor in graph.order():
+        period = "cron" if processor.strategy == "CRON_DRIVEN" else (
+            fmt_seconds(processor.period) if processor.period else "-")
+        records = processor.records_per_flowfile or _upstream_records(processor)
+        records_rate = "{:,.1f}".format(processor.throughput * records) if records else "-"
+        print("  {:<30} {:<28} {:>5} {:>9} {:>5} {:>9.2f}{} {:>11} {:>11} {:>6} {:>11} {:>10}".format(
+            processor.name[:30], processor.type[:28], processor.tasks, period, processor.flowfiles_per_trigger,
+            processor.service_seconds * 1000, " " if processor.measured else "*",
+            fmt_rate(processor.offered), fmt_rate(processor.capacity),
+            "-" if not processor.inputs else "{:.0%}".format(processor.utilization),
+            fmt_rate(processor.throughput), records_rate))
+
+    unmeasured = [p.name for p in graph.processors.values() if not p.measured]
+    if unmeasured:
+        print("  * no measurement; --default-service-ms used")
+    if any(p.records_per_flowfile for p in graph.processors.values()):
+        print("  records/s assumes every FlowFile carries the full batch of its source")
+    for connection in graph.self_loops:
+        print("  self-loop not modelled: {}".format(connection.label))
+    for label in graph.ignored:
+        print("  connection through a port or funnel not modelled: {}".format(label))
+
+    bottleneck = graph.bottleneck()
+    if bottleneck is None:
+        print("\n  no traffic")
+        return None
+    headroom = 1 / bottleneck.utilization if bottleneck.utilization else math.inf
+    print("\n  bottleneck: {} ({:.0%} utilized, {} FlowFiles/s capacity with {} task(s){})".format(
+        bottleneck.name, bottleneck.utilization, fmt_rate(bottleneck.capacity), bottleneck.tasks,
+        "" if bottleneck.measured else ", unmeasured"))
+    flat_out = [p for p in graph.sources if p.offered and not p.period and p.name not in graph.arrivals]
+    if flat_out:
+        print("  maximum steady state: {} at {} FlowFiles/s".format(
+            ", ".join(p.name for p in flat_out), " / ".join(fmt_rate(p.offered) for p in flat_out)))
+    elif bottleneck.utilization <= 1:
+        print("  steady state: sources can grow {:.2f}x before {} saturates".format(headroom, bottleneck.name))
+    else:
+        print("  overloaded: arrivals must drop to {:.0%} of the current rate for a steady state".format(headroom))
+
+    rows = graph.backlog(horizon)
+    if rows:
+        print("\n  {:<62} {:>10} {:>10} {:>14} {:>12}".format(
+            "queue", "growth/s", "threshold", "back pressure", "at horizon"))
+        for connection, growth, fills, depth in rows:
+            print("  {:<62} {:>10} {:>10,} {:>14} {:>12,.0f}".format(
+                connection.label[:62], fmt_rate(growth), connection.max_objects, fmt_seconds(fills), depth))
+        throttled = [c.source for c, _, fills, _ in rows if fills <= horizon and not c.source.inputs]
+        for source in throttled:
+            print("  {} is throttled by back pressure within {}; the backlog then builds upstream of the flow"
+                  .format(source.name, fmt_seconds(horizon)))
+    return bottleneck
+
+
+def _upstream_records(processor, depth=0):
+    """Records per FlowFile inherited from the nearest upstream processor that sets it."""
+    if depth > 20:
+        return None
+    for connection in processor.inputs:
+        source = connection.source
+        records = source.records_per_flowfile or _upstream_records(source, depth + 1)
+        if records:
+            return records
+    return None
+
+
+def parse_arrivals(values):
+    arrivals = {}
+    for value in values or []:
+        name, _, rate = value.rpartition("=")
+        try:
+            arrivals[name] = float(rate)
+        except ValueError:
+            raise argparse.ArgumentTypeError("--arrival expects NAME=FLOWFILES_PER_SECOND, got '{}'".format(value))
+        if not name:
+            raise argparse.ArgumentTypeError("--arrival expects NAME=FLOWFILES_PER_SECOND, got '{}'".format(value))
+    return arrivals
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compute throughput, bottleneck and queue growth of a flow definition")
+    parser.add_argument("flow", nargs="+", help="Flow definition export(s), e.g. flow/BoeGamingReport.json")
+    parser.add_argument("--benchmark", help="JSON with measured service times per processor")
+    parser.add_argument("--arrival", nargs="+", metavar="NAME=RATE",
+                        help="FlowFiles/s arriving at a source processor, e.g. 'Consume Stream=0.5'")
+    parser.add_argument("--default-service-ms", type=float, default=1.0,
+                        help="Service time for processors without a measurement")
+    parser.add_argument("--horizon", type=float, default=3600, help="Seconds of queue growth to project")
+    args = parser.parse_args()
+    try:
+        arrivals = parse_arrivals(args.arrival)
+    except argparse.ArgumentTypeError as e:
+        parser.error(str(e))
+
+    benchmark = {}
+    if args.benchmark:
+        with open(args.benchmark, encoding="utf-8") as f:
+            benchmark = json.load(f)
+
+    graphs = []
+    for path in args.flow:
+        graph = FlowGraph(path)
+        graph.apply_benchmark(benchmark, args.default_service_ms)
+        graphs.append(graph)
+
+    names = {p.name: (graph, p) for graph in graphs for p in graph.processors.values()}
+    for name in arrivals:
+        if name not in names:
+            parser.error("no processor named '{}' in the given flows".format(name))
+        if names[name][1].inputs:
+            parser.error("'{}' in {} has incoming connections; --arrival applies to sources".format(
+                name, names[name][0].name))
+
+    for index, graph in enumerate(graphs):
+        graph.solve({name: rate for name, rate in arrivals.items() if names[name][0] is graph})
+        if index:
+            print()
+        report(graph, args.horizon)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
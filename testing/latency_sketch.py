@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Reference implementation of the mergeable latency sketch used by
+sql/11_latency_rollup.sql.
+
+The rollup stores one APPROX_PERCENTILE_ACCUMULATE state (a t-digest) per
+stage per minute and answers window percentiles by combining those states.
+This module implements the same idea in plain Python - a merging t-digest
+with the k1 (arcsine) scale function - so the behaviour of "accumulate per
+minute, combine per window" can be checked against exact percentiles
+without a Snowflake connection.
+
+Usage:
+    python testing/latency_sketch.py                  # default check
+    python testing/latency_sketch.py --minutes 1440 --per-minute 500
+
+Exits non-zero if any merged percentile is off by more than the allowed
+rank error.
+"""
+
+import argparse
+import bisect
+import math
+import random
+import sys
+
+
+class TDigest:
+    """Merging t-digest. Centroids are kept as sorted [mean, weight] pairs."""
+
+    def __init__(self, compression=100):
+        self.compression = compression
+        self.centroids = []
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+        self._buffer = []
+
+    def add(self, value, weight=1):
+        self._buffer.append((float(value), weight))
+        self.count += weight
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        if len(self._buffer) >= 10 * self.compression:
+            self._compress()
+
+    def merge(self, other):
+        """Return a new digest combining self and other (neither is modified)."""
+        merged = TDigest(max(self.compression, other.compression))
+        merged.count = self.count + other.count
+        merged.min = min(self.min, other.min)
+        merged.max = max(self.max, other.max)
+        merged._buffer = (
+            [tuple(c) for c in self.centroids] + self._buffer +
+            [tuple(c) for c in other.centroids] + other._buffer
+        )
+        merged._compress()
+        return merged
+
+    def _k(self, q):
+        return self.compression / (2 * math.pi) * math.asin(2 * q - 1)
+
+    def _compress(self):
+        points = sorted([tuple(c) for c in self.centroids] + self._buffer)
+        self._buffer = []
+        if not points:
+            self.centroids = []
+            return
+        total = sum(w for _, w in points)
+        result = []
+        mean, weight = points[0]
+        cumulative = 0.0
+        k_left = self._k(0.0)
+        for next_mean, next_weight in points[1:]:
+            q_right = (cumulative + weight + next_weight) / total
+            if self._k(min(q_right, 1.0)) - k_left <= 1.0:
+                weight += next_weight
+                mean += (next_mean - mean) * next_weight / weight
+            else:
+                result.append([mean, weight])
+                cumulative += weight
+                k_left = self._k(cumulative / total)
+                mean, weight = next_mean, next_weight
+        result.append([mean, weight])
+        self.centroids = result
+
+    def quantile(self, q):
+        if self._buffer:
+            self._compress()
+        if not self.centroids:
+            return None
+        if len(self.centroids) == 1:
+            return self.centroids[0][0]
+        target = q * self.count
+        # Centroid centres on the cumulative-weight axis
+        centres = []
+        cumulative = 0.0
+        for mean, weight in self.centroids:
+            centres.append(cumulative + weight / 2)
+            cumulative += weight
+        if target <= centres[0]:
+            first_mean, first_weight = self.centroids[0]
+            if first_weight <= 1:
+                return self.min
+            return self.min + (first_mean - self.min) * target / centres[0]
+        if target >= centres[-1]:
+            last_mean, _ = self.centroids[-1]
+            span = self.count - centres[-1]
+            if span <= 0:
+                return self.max
+            return last_mean + (self.max - last_mean) * (target - centres[-1]) / span
+        i = bisect.bisect_right(centres, target) - 1
+        left_mean, right_mean = self.centroids[i][0], self.centroids[i + 1][0]
+        fraction = (target - centres[i]) / (centres[i + 1] - centres[i])
+        return left_mean + (right_mean - left_mean) * fraction
+
+    def to_state(self):
+        """JSON-serialisable state (the analogue of a stored PCT_STATE)."""
+        if self._buffer:
+            self._compress()
+        return {
+            "compression": self.compression,
+            "count": self.count,
+            "min": self.min,
+            "max": self.max,
+            "centroids": self.centroids,
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        digest = cls(state["compression"])
+        digest.count = state["count"]
+        digest.min = state["min"]
+        digest.max = state["max"]
+        digest.centroids = [list(c) for c in state["centroids"]]
+        return digest
+
+
+def exact_quantile(sorted_values, q):
+    """Linear-interpolated percentile, as PERCENTILE_CONT computes it."""
+    if not sorted_values:
+        return None
+    pos = q * (len(sorted_values) - 1)
+    lower = int(math.floor(pos))
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (pos - lower)
+
+
+def rank_error(sorted_values, estimate, q):
+    """Distance between the estimate's rank and the requested rank, as a fraction."""
+    lo = bisect.bisect_left(sorted_values, estimate)
+    hi = bisect.bisect_right(sorted_values, estimate)
+    target = q * len(sorted_values)
+    if lo <= target <= hi:
+        return 0.0
+    return min(abs(lo - target), abs(hi - target)) / len(sorted_values)
+
+
+def simulated_latency(rng, minute):
+    """Whole-second latencies: mostly lognormal, with periodic slow minutes and rare spikes."""
+    base = rng.lognormvariate(1.6, 0.6)
+    if minute % 97 < 5:
+        base *= 4
+    if rng.random() < 0.005:
+        base += rng.uniform(60, 300)
+    return int(round(base))
+
+
+def run_check(minutes, per_minute, compression, max_rank_error, seed):
+    rng = random.Random(seed)
+    minute_states = []
+    all_values = []
+    for minute in range(minutes):
+        digest = TDigest(compression)
+        count = rng.randint(per_minute // 2, per_minute * 3 // 2)
+        for _ in range(count):
+            value = simulated_latency(rng, minute)
+            digest.add(value)
+            all_values.append((minute, value))
+        # Round-trip through the stored form, like a VARIANT column
+        minute_states.append(digest.to_state())
+
+    windows = [("last 60 min", minutes - 60, minutes), ("full range", 0, minutes)]
+    if minutes >= 180:
+        windows.append(("minutes 30-150", 30, 150))
+
+    failures = 0
+    print(f"{'window':<16} {'q':>5} {'exact':>9} {'sketch':>9} {'rank err':>9}")
+    for name, start, end in windows:
+        start = max(start, 0)
+        combined = TDigest(compression)
+        for state in minute_states[start:end]:
+            combined = combined.merge(TDigest.from_state(state))
+        exact_values = sorted(v for m, v in all_values if start <= m < end)
+        for q in (0.50, 0.95, 0.99):
+            estimate = combined.quantile(q)
+            error = rank_error(exact_values, estimate, q)
+            flag = "" if error <= max_rank_error else "  FAIL"
+            failures += bool(flag)
+            print(f"{name:<16} {q:>5.2f} {exact_quantile(exact_values, q):>9.1f} "
+                  f"{estimate:>9.1f} {error:>9.4f}{flag}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check merged t-digest percentiles against exact values")
+    parser.add_argument("--minutes", type=int, default=360, help="Minutes of simulated data")
+    parser.add_argument("--per-minute", type=int, default=200, help="Average samples per minute")
+    parser.add_argument("--compression", type=int, default=100, help="t-digest compression")
+    parser.add_argument("--max-rank-error", type=float, default=0.01, help="Allowed rank error (fraction)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    failures = run_check(args.minutes, args.per_minute, args.compression,
+                         args.max_rank_error, args.seed)
+    if failures:
+        print(f"\n{failures} percentile(s) exceeded rank error {args.max_rank_error}")
+        sys.exit(1)
+    print("\nAll merged percentiles within rank error {}".format(args.max_rank_error))
+
+
+if __name__ == "__main__":
+    main()
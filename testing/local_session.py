@@ -0,0 +1,519 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Snowpark session the Pipeline Monitor reads through.
+
+LocalSession answers session.sql(...).collect() / .to_pandas() from an
+in-memory DuckDB database holding the DEDEMO objects the app queries, filled
+with generated fixtures at a configurable scale:
+
+  TOURNAMENTS.POKER            CDC rows (TRANSACTION_DATA as JSON text)
+  GAMING.DT_POKER_FLATTENED    the same rows flattened
+  GAMING.REGULATORY_BATCHES    lotes over the last 30 days, newest still GENERATED
+  GAMING.OPENFLOW_LOG_EVENTS   INFO/WARN/ERROR events over the last 7 days
+  PIPELINE_COUNTERS, PIPELINE_LATENCY_ROLLUP, OPENFLOW_ERROR_ROLLUP,
+  OPENFLOW_LOG_FINGERPRINTS, OPENFLOW_LOG_TEMPLATES
+                               filled once from the rows above, as their
+                               refresh tasks would
+  PIPELINE_LATENCY_ANALYSIS, PIPELINE_BACKLOG, OPENFLOW_ERROR_SUMMARY,
+  OPENFLOW_RECURRING_FAILURES  views / table macro
+
+The app's Snowflake SQL is rewritten for DuckDB by a handful of regular
+expressions and macros (DATEADD, TIMESTAMPDIFF, TIME_SLICE, TO_VARCHAR, ...);
+it is a stand-in, not a dialect translator. PIPELINE_LATENCY_ANALYSIS takes
+exact percentiles over the samples where Snowflake combines APPROX_PERCENTILE
+states. SHOW DYNAMIC TABLES answers ACTIVE, LIST answers no files, and stage
+reads (session.file) are not available.
+
+Requires duckdb (pip install duckdb).
+
+Usage:
+    python testing/local_session.py
+    python testing/local_session.py --transactions 500000 --batches 20000 --log-events 100000
+"""
+
+import argparse
+import re
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+try:
+    import duckdb
+except ImportError:
+    sys.exit("duckdb is required for the local session: pip install duckdb")
+
+DEFAULT_SCALE = {"transactions": 100000, "batches": 5000, "log_events": 20000}
+
+SCHEMA = """
+ATTACH ':memory:' AS DEDEMO;
+CREATE SCHEMA DEDEMO.GAMING;
+CREATE SCHEMA DEDEMO.TOURNAMENTS;
+
+CREATE MACRO sf_now() AS CAST(get_current_timestamp() AS TIMESTAMP);
+CREATE MACRO sf_dateadd(unit, n, ts) AS CAST(ts AS TIMESTAMP) + to_seconds(n * CASE lower(unit)
+    WHEN 'second' THEN 1 WHEN 'minute' THEN 60 WHEN 'hour' THEN 3600 WHEN 'day' THEN 86400 END);
+CREATE MACRO sf_date(ts) AS CAST(ts AS DATE);
+CREATE MACRO convert_timezone(tz, ts) AS ts;
+CREATE MACRO to_varchar(ts, fmt) AS strftime(ts, fmt);
+CREATE MACRO time_slice(ts, n, unit) AS time_bucket(to_seconds(n * CASE lower(unit)
+    WHEN 'second' THEN 1 WHEN 'minute' THEN 60 WHEN 'hour' THEN 3600 WHEN 'day' THEN 86400 END),
+    CAST(ts AS TIMESTAMP), TIMESTAMP '1970-01-01');
+
+CREATE TABLE DEDEMO.TOURNAMENTS.POKER (
+    TRANSACTION_ID VARCHAR,
+    CREATED_TIMESTAMP TIMESTAMP,
+    TRANSACTION_DATA VARCHAR,
+    _SNOWFLAKE_INSERTED_AT TIMESTAMP
+);
+
+CREATE TABLE DEDEMO.GAMING.DT_POKER_FLATTENED (
+    TRANSACTION_ID VARCHAR,
+    CREATED_TIMESTAMP TIMESTAMP,
+    TOURNAMENT_ID VARCHAR,
+    TOURNAMENT_NAME VARCHAR,
+    VARIANT VARCHAR,
+    PLAYER_ID VARCHAR,
+    BET_AMOUNT DECIMAL(10,2),
+    WIN_AMOUNT DECIMAL(10,2),
+    REFUND_AMOUNT DECIMAL(10,2),
+    DEVICE_TYPE VARCHAR
+);
+
+CREATE TABLE DEDEMO.GAMING.REGULATORY_BATCHES (
+    BATCH_ID VARCHAR PRIMARY KEY,
+    OPERATOR_ID VARCHAR,
+    WAREHOUSE_ID VARCHAR,
+    BATCH_TIMESTAMP TIMESTAMP,
+    TRANSACTION_COUNT BIGINT,
+    GENERATED_XML VARCHAR,
+    STATUS VARCHAR,
+    UPLOAD_TIMESTAMP TIMESTAMP,
+    GENERATED_FILENAME VARCHAR,
+    SFTP_DIRECTORY_PATH VARCHAR,
+    XML_URI VARCHAR,
+    XML_BYTES BIGINT,
+    XML_SHA256 VARCHAR,
+    LEASE_OWNER VARCHAR,
+    LEASE_ID VARCHAR,
+    LEASE_EXPIRES_AT TIMESTAMP,
+    LEASE_COUNT BIGINT
+);
+
+CREATE TABLE DEDEMO.GAMING.PIPELINE_COUNTERS (
+    STAGE VARCHAR PRIMARY KEY,
+    STAGE_ORDER INTEGER,
+    ROW_COUNT BIGINT,
+    LAST_INSERTED_AT TIMESTAMP,
+    WATERMARK TIMESTAMP,
+    ROWS_1H BIGINT,
+    AVG_LAG_1H_SEC DECIMAL(10,1),
+    MAX_LAG_1H_SEC DECIMAL(10,1),
+    UPDATED_AT TIMESTAMP
+);
+
+CREATE TABLE DEDEMO.GAMING.PIPELINE_LATENCY_ROLLUP (
+    STAGE VARCHAR,
+    MINUTE_TS TIMESTAMP,
+    SAMPLES BIGINT,
+    LATENCY_SUM_SEC BIGINT,
+    LATENCY_MAX_SEC BIGINT,
+    PCT_STATE VARCHAR,
+    UPDATED_AT TIMESTAMP,
+    PRIMARY KEY (STAGE, MINUTE_TS)
+);
+
+CREATE TABLE DEDEMO.GAMING.OPENFLOW_LOG_EVENTS (
+    EVENT_TIMESTAMP TIMESTAMP,
+    EVENT_HASH BIGINT,
+    LOG_LEVEL VARCHAR,
+    LOGGER VARCHAR,
+    PROCESS_GROUP VARCHAR,
+    PROCESS_GROUP_PATH VARCHAR,
+    THREAD_NAME VARCHAR,
+    PROCESSOR_NAME VARCHAR,
+    PROCESSOR_TYPE VARCHAR,
+    COMPONENT_ID VARCHAR,
+    MESSAGE VARCHAR,
+    EXCEPTION VARCHAR,
+    EXCEPTION_CLASS VARCHAR,
+    MESSAGE_PATTERN VARCHAR,
+    MESSAGE_FINGERPRINT VARCHAR,
+    RAW_VALUE VARCHAR,
+    LOADED_AT TIMESTAMP
+);
+"""
+
+FIXTURES = """
+INSERT INTO DEDEMO.TOURNAMENTS.POKER
+SELECT
+    printf('TX%010d', i),
+    created,
+    json_object(
+        'tournament', json_object('id', printf('T%04d', i % 40), 'name', printf('Torneo %d', i % 40),
+                                  'variant', CASE i % 3 WHEN 0 THEN 'TEXAS_HOLDEM' WHEN 1 THEN 'OMAHA' ELSE 'STUD' END),
+        'player', json_object('id', printf('P%06d', i % 5000), 'device', CASE i % 4 WHEN 0 THEN 'MOBILE' WHEN 1 THEN 'TABLET' ELSE 'DESKTOP' END),
+        'amounts', json_object('bet', (i % 200) + 0.5, 'win', (i % 7) * 3.25, 'refund', 0)
+    )::VARCHAR,
+    created + to_seconds(2 + i % 7 + CASE WHEN i % 997 = 0 THEN 90 ELSE 0 END)
+FROM (
+    SELECT range AS i, $now - to_seconds(120 + range * $tx_span / $transactions) AS created
+    FROM range($transactions)
+);
+
+INSERT INTO DEDEMO.GAMING.DT_POKER_FLATTENED
+SELECT
+    TRANSACTION_ID,
+    CREATED_TIMESTAMP,
+    TRANSACTION_DATA->>'$.tournament.id',
+    TRANSACTION_DATA->>'$.tournament.name',
+    TRANSACTION_DATA->>'$.tournament.variant',
+    TRANSACTION_DATA->>'$.player.id',
+    CAST(TRANSACTION_DATA->>'$.amounts.bet' AS DECIMAL(10,2)),
+    CAST(TRANSACTION_DATA->>'$.amounts.win' AS DECIMAL(10,2)),
+    CAST(TRANSACTION_DATA->>'$.amounts.refund' AS DECIMAL(10,2)),
+    TRANSACTION_DATA->>'$.player.device'
+FROM DEDEMO.TOURNAMENTS.POKER;
+
+INSERT INTO DEDEMO.GAMING.REGULATORY_BATCHES
+SELECT
+    printf('BATCH_%08d', i),
+    'OP01',
+    'WH01',
+    batch_ts,
+    50 + i % 450,
+    '<?xml version="1.0" encoding="UTF-8"?><Lote><Cabecera><OperadorId>OP01</OperadorId></Cabecera>'
+        || repeat('<Registro><Jugador>P000001</Jugador><Importe>10.50</Importe></Registro>', 20) || '</Lote>',
+    CASE WHEN i < $backlog THEN 'GENERATED' ELSE 'UPLOADED' END,
+    CASE WHEN i < $backlog THEN NULL ELSE batch_ts + to_seconds(30 + i % 270) END,
+    printf('OP01_WH01_%08d.xml', i),
+    '/upload/boe/',
+    NULL, NULL, NULL, NULL, NULL, NULL, 0
+FROM (
+    SELECT range AS i, $now - to_seconds(range * $batch_span / $batches) AS batch_ts
+    FROM range($batches)
+);
+
+INSERT INTO DEDEMO.GAMING.OPENFLOW_LOG_EVENTS
+SELECT
+    ts,
+    i,
+    level,
+    'org.apache.nifi.processors.' || processor,
+    CASE i % 3 WHEN 0 THEN 'BOE Regulatory' WHEN 1 THEN 'CDC Postgres' ELSE 'SFTP Delivery' END,
+    'root/BOE Regulatory',
+    printf('Timer-Driven Process Thread-%d', i % 10),
+    processor,
+    'org.apache.nifi.processors.' || processor,
+    printf('%08x-0000-0000-0000-000000000000', i % 12),
+    message,
+    NULL,
+    CASE WHEN level = 'ERROR' THEN 'java.io.IOException' END,
+    pattern,
+    substr(md5(pattern), 1, 16),
+    NULL,
+    ts
+FROM (
+    SELECT
+        i, ts, level, processor,
+        CASE
+            WHEN level = 'ERROR' THEN printf('Connection to sftp%d.boe.example refused', i % 4)
+            WHEN level = 'WARN' THEN printf('Lease on batch BATCH_%08d expired after %d ms', i, 30000 + i % 500)
+            ELSE printf('Transferred %d FlowFiles in %d ms', 1 + i % 50, i % 900)
+        END AS message,
+        CASE
+            WHEN level = 'ERROR' THEN 'Connection to <host> refused'
+            WHEN level = 'WARN' THEN 'Lease on batch <id> expired after <num> ms'
+            ELSE 'Transferred <num> FlowFiles in <num> ms'
+        END AS pattern
+    FROM (
+        SELECT
+            range AS i,
+            $now - to_seconds(range * $log_span / $log_events) AS ts,
+            CASE WHEN range % 10 = 0 THEN 'ERROR' WHEN range % 10 < 3 THEN 'WARN' ELSE 'INFO' END AS level,
+            CASE range % 4 WHEN 0 THEN 'PutSFTP' WHEN 1 THEN 'ExecuteSQL' WHEN 2 THEN 'UpdateAttribute' ELSE 'InvokeHTTP' END AS processor
+        FROM range($log_events)
+    )
+);
+
+INSERT INTO DEDEMO.GAMING.PIPELINE_LATENCY_ROLLUP
+SELECT STAGE, DATE_TRUNC('minute', RECORD_TIMESTAMP), COUNT(*), SUM(LATENCY_SEC), MAX(LATENCY_SEC), NULL, $now
+FROM DEDEMO.GAMING.LATENCY_SAMPLES
+GROUP BY 1, 2;
+
+INSERT INTO DEDEMO.GAMING.PIPELINE_COUNTERS
+WITH lag_1h AS (
+    SELECT SUM(SAMPLES) AS ROWS_1H,
+           ROUND(SUM(LATENCY_SUM_SEC) / NULLIF(SUM(SAMPLES), 0), 1) AS AVG_LAG_1H_SEC,
+           MAX(LATENCY_MAX_SEC) AS MAX_LAG_1H_SEC
+    FROM DEDEMO.GAMING.PIPELINE_LATENCY_ROLLUP
+    WHERE STAGE = 'CDC Replication' AND MINUTE_TS > $now - INTERVAL 1 HOUR
+)
+SELECT 'CDC Source', 1, (SELECT COUNT(*) FROM DEDEMO.TOURNAMENTS.POKER),
+       (SELECT MAX(_SNOWFLAKE_INSERTED_AT) FROM DEDEMO.TOURNAMENTS.POKER),
+       (SELECT MAX(_SNOWFLAKE_INSERTED_AT) FROM DEDEMO.TOURNAMENTS.POKER),
+       ROWS_1H, AVG_LAG_1H_SEC, MAX_LAG_1H_SEC, $now
+FROM lag_1h
+UNION ALL
+SELECT 'Dynamic Table', 2, (SELECT COUNT(*) FROM DEDEMO.GAMING.DT_POKER_FLATTENED), $now, NULL, NULL, NULL, NULL, $now
+UNION ALL
+SELECT 'Stream Pending', 3, $stream_pending, NULL, NULL, NULL, NULL, NULL, $now
+UNION ALL
+SELECT 'Batches Created', 4, COUNT(*), MAX(BATCH_TIMESTAMP), NULL, NULL, NULL, NULL, $now
+FROM DEDEMO.GAMING.REGULATORY_BATCHES
+UNION ALL
+SELECT 'Batches Uploaded', 5, COUNT(*), MAX(UPLOAD_TIMESTAMP), NULL, NULL, NULL, NULL, $now
+FROM DEDEMO.GAMING.REGULATORY_BATCHES WHERE STATUS = 'UPLOADED';
+"""
+
+VIEWS = """
+CREATE VIEW DEDEMO.GAMING.LATENCY_SAMPLES AS
+SELECT 'CDC Replication' AS STAGE, _SNOWFLAKE_INSERTED_AT AS RECORD_TIMESTAMP,
+       date_diff('second', CREATED_TIMESTAMP, _SNOWFLAKE_INSERTED_AT) AS LATENCY_SEC
+FROM DEDEMO.TOURNAMENTS.POKER
+UNION ALL
+SELECT 'Dynamic Table Refresh', _SNOWFLAKE_INSERTED_AT, 60
+FROM DEDEMO.TOURNAMENTS.POKER
+WHERE hash(TRANSACTION_ID) % 1000 = 0
+UNION ALL
+SELECT 'Batch to SFTP Upload', UPLOAD_TIMESTAMP, date_diff('second', BATCH_TIMESTAMP, UPLOAD_TIMESTAMP)
+FROM DEDEMO.GAMING.REGULATORY_BATCHES
+WHERE STATUS = 'UPLOADED';
+
+CREATE VIEW DEDEMO.GAMING.PIPELINE_LATENCY_ANALYSIS AS
+WITH stage_stats AS (
+    SELECT
+        STAGE,
+        COUNT(*) AS SAMPLES,
+        ROUND(AVG(LATENCY_SEC), 1) AS AVG_SEC,
+        ROUND(MAX(LATENCY_SEC), 1) AS MAX_SEC,
+        ROUND(quantile_cont(LATENCY_SEC, 0.50), 1) AS P50_SEC,
+        ROUND(quantile_cont(LATENCY_SEC, 0.95), 1) AS P95_SEC,
+        ROUND(quantile_cont(LATENCY_SEC, 0.99), 1) AS P99_SEC
+    FROM DEDEMO.GAMING.LATENCY_SAMPLES
+    WHERE RECORD_TIMESTAMP >= sf_dateadd('hour', -24, sf_now())
+    GROUP BY STAGE
+)
+SELECT
+    CASE STAGE WHEN 'CDC Replication' THEN 1 WHEN 'Dynamic Table Refresh' THEN 2 WHEN 'Batch to SFTP Upload' THEN 3 END AS STAGE_ORDER,
+    STAGE, AVG_SEC, MAX_SEC, SAMPLES, P50_SEC, P95_SEC, P99_SEC
+FROM stage_stats
+UNION ALL
+SELECT 4, 'TOTAL END-TO-END', SUM(AVG_SEC), SUM(MAX_SEC), NULL, SUM(P50_SEC), SUM(P95_SEC), SUM(P99_SEC)
+FROM stage_stats
+ORDER BY STAGE_ORDER;
+
+CREATE VIEW DEDEMO.GAMING.PIPELINE_BACKLOG AS
+SELECT
+    COUNT(*) AS BACKLOG_COUNT,
+    SUM(TRANSACTION_COUNT) AS BACKLOG_TRANSACTIONS,
+    MIN(BATCH_TIMESTAMP) AS OLDEST_BATCH_TIMESTAMP,
+    date_diff('minute', MIN(BATCH_TIMESTAMP), sf_now()) AS OLDEST_BATCH_AGE_MIN,
+    MAX(BATCH_TIMESTAMP) AS NEWEST_BATCH_TIMESTAMP,
+    date_diff('minute', MAX(BATCH_TIMESTAMP), sf_now()) AS NEWEST_BATCH_AGE_MIN
+FROM DEDEMO.GAMING.REGULATORY_BATCHES
+WHERE STATUS = 'GENERATED';
+"""
+
+ERROR_ROLLUP = """
+CREATE TABLE DEDEMO.GAMING.OPENFLOW_ERROR_ROLLUP AS
+SELECT
+    DATE_TRUNC('hour', EVENT_TIMESTAMP) AS HOUR,
+    LOG_LEVEL,
+    PROCESS_GROUP,
+    COALESCE(PROCESSOR_NAME, LOGGER) AS COMPONENT,
+    MESSAGE_FINGERPRINT,
+    COUNT(*) AS EVENTS,
+    MIN(EVENT_TIMESTAMP) AS FIRST_SEEN,
+    MAX(EVENT_TIMESTAMP) AS LAST_SEEN,
+    arg_max(EXCEPTION_CLASS, EVENT_TIMESTAMP) AS EXCEPTION_CLASS,
+    arg_max(MESSAGE, EVENT_TIMESTAMP) AS SAMPLE_MESSAGE,
+    $now AS UPDATED_AT
+FROM DEDEMO.GAMING.OPENFLOW_LOG_EVENTS
+WHERE LOG_LEVEL IN ('ERROR', 'WARN')
+GROUP BY 1, 2, 3, 4, 5;
+
+CREATE TABLE DEDEMO.GAMING.OPENFLOW_LOG_TEMPLATES AS
+SELECT DISTINCT substr(md5('template:' || MESSAGE_PATTERN), 1, 16) AS TEMPLATE_ID,
+       replace(replace(replace(MESSAGE_PATTERN, '<host>', '<*>'), '<id>', '<*>'), '<num>', '<*>') AS TEMPLATE,
+       NULL::INTEGER AS TOKEN_COUNT, $now AS CREATED_AT, $now AS UPDATED_AT
+FROM DEDEMO.GAMING.OPENFLOW_LOG_EVENTS
+WHERE LOG_LEVEL IN ('ERROR', 'WARN');
+
+CREATE TABLE DEDEMO.GAMING.OPENFLOW_LOG_FINGERPRINTS AS
+SELECT MESSAGE_FINGERPRINT, ANY_VALUE(MESSAGE_PATTERN) AS MESSAGE_PATTERN,
+       ANY_VALUE(substr(md5('template:' || MESSAGE_PATTERN), 1, 16)) AS TEMPLATE_ID,
+       MIN(EVENT_TIMESTAMP) AS FIRST_SEEN, MAX(EVENT_TIMESTAMP) AS LAST_SEEN
+FROM DEDEMO.GAMING.OPENFLOW_LOG_EVENTS
+WHERE LOG_LEVEL IN ('ERROR', 'WARN')
+GROUP BY 1;
+
+CREATE VIEW DEDEMO.GAMING.OPENFLOW_ERROR_SUMMARY AS
+SELECT HOUR, LOG_LEVEL, PROCESS_GROUP, SUM(EVENTS) AS ERROR_COUNT,
+       COUNT(DISTINCT MESSAGE_FINGERPRINT) AS UNIQUE_ERRORS
+FROM DEDEMO.GAMING.OPENFLOW_ERROR_ROLLUP
+GROUP BY 1, 2, 3;
+
+CREATE MACRO DEDEMO.GAMING.OPENFLOW_RECURRING_FAILURES(P_START, P_END) AS TABLE
+SELECT
+    COALESCE(f.TEMPLATE_ID, r.MESSAGE_FINGERPRINT) AS TEMPLATE_ID,
+    ANY_VALUE(COALESCE(t.TEMPLATE, f.MESSAGE_PATTERN)) AS TEMPLATE,
+    r.LOG_LEVEL AS LOG_LEVEL,
+    SUM(r.EVENTS) AS EVENTS,
+    COUNT(DISTINCT r.MESSAGE_FINGERPRINT) AS FINGERPRINTS,
+    string_agg(DISTINCT r.COMPONENT, ', ' ORDER BY r.COMPONENT) AS COMPONENTS,
+    COUNT(DISTINCT r.HOUR) AS HOURS_SEEN,
+    MIN(r.FIRST_SEEN) AS FIRST_SEEN,
+    MAX(r.LAST_SEEN) AS LAST_SEEN,
+    arg_max(r.EXCEPTION_CLASS, r.LAST_SEEN) AS EXCEPTION_CLASS,
+    arg_max(r.SAMPLE_MESSAGE, r.LAST_SEEN) AS SAMPLE_MESSAGE
+FROM DEDEMO.GAMING.OPENFLOW_ERROR_ROLLUP r
+LEFT JOIN DEDEMO.GAMING.OPENFLOW_LOG_FINGERPRINTS f ON f.MESSAGE_FINGERPRINT = r.MESSAGE_FINGERPRINT
+LEFT JOIN DEDEMO.GAMING.OPENFLOW_LOG_TEMPLATES t ON t.TEMPLATE_ID = f.TEMPLATE_ID
+WHERE r.HOUR >= DATE_TRUNC('hour', CAST(P_START AS TIMESTAMP))
+  AND r.HOUR < CAST(P_END AS TIMESTAMP)
+GROUP BY 1, 3;
+"""
+
+# Snowflake -> DuckDB rewrites applied to every statement, in order
+REWRITES = [
+    (re.compile(r"\bCURRENT_TIMESTAMP\(\)", re.I), "sf_now()"),
+    (re.compile(r"\bCURRENT_DATE\(\)", re.I), "CAST(sf_now() AS DATE)"),
+    (re.compile(r"::TIMESTAMP_NTZ\b", re.I), "::TIMESTAMP"),
+    (re.compile(r"\bDATEADD\(\s*(\w+)\s*,", re.I), r"sf_dateadd('\1',"),
+    (re.compile(r"\bTIMESTAMPDIFF\(\s*(\w+)\s*,", re.I), r"date_diff('\1',"),
+    (re.compile(r"\bTIME_SLICE\(([^,]+),\s*(\d+)\s*,\s*'(\w+)'", re.I), r"time_slice(\1, \2, '\3'"),
+    (re.compile(r"(?<![\w.])DATE\(", re.I), "sf_date("),
+    (re.compile(r"\bFROM\s+TABLE\(", re.I), "FROM (SELECT * FROM "),
+    (re.compile(r"'YYYY-MM-DD HH24:MI:SS'"), "'%Y-%m-%d %H:%M:%S'"),
+]
+
+SHOW_DYNAMIC_TABLES = re.compile(r"^\s*SHOW\s+DYNAMIC\s+TABLES\b", re.I)
+LIST_STAGE = re.compile(r"^\s*LIST\s+@", re.I)
+
+
+def translate(sql):
+    """Snowflake SQL as issued by the app -> DuckDB SQL"""
+    for pattern, replacement in REWRITES:
+        sql = pattern.sub(replacement, sql)
+    return sql
+
+
+class Row(tuple):
+    """Snowpark Row look-alike: positional, by (upper-case) column name, and as_dict()"""
+
+    def __new__(cls, values, fields):
+        row = super().__new__(cls, values)
+        row._fields = fields
+        return row
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return tuple.__getitem__(self, self._fields.index(key.upper()))
+        return tuple.__getitem__(self, key)
+
+    def as_dict(self):
+        return dict(zip(self._fields, self))
+
+
+class LocalDataFrame:
+    """What session.sql() returns: the statement runs on collect()/to_pandas()"""
+
+    def __init__(self, session, sql):
+        self._session = session
+        self._sql = sql
+
+    def collect(self, statement_params=None):
+        fields, rows = self._session._run(self._sql, statement_params, as_pandas=False)
+        return [Row(values, fields) for values in rows]
+
+    def to_pandas(self, statement_params=None):
+        return self._session._run(self._sql, statement_params, as_pandas=True)
+
+    def to_pandas_batches(self, statement_params=None):
+        yield self.to_pandas(statement_params)
+
+
+class _NoStage:
+    def get_stream(self, uri, *args, **kwargs):
+        raise FileNotFoundError(f"stage files are not available in the local session: {uri}")
+
+
+class LocalSession:
+    """DuckDB-backed stand-in for the Snowpark session used by the Pipeline Monitor.
+
+    Every statement is logged in self.queries as (query_tag, ms, sql).
+    """
+
+    def __init__(self, transactions=DEFAULT_SCALE["transactions"], batches=DEFAULT_SCALE["batches"],
+                 log_events=DEFAULT_SCALE["log_events"], backlog=12, stream_pending=340):
+        self.con = duckdb.connect()
+        self.con.execute("SET TimeZone = 'UTC'")
+        self.file = _NoStage()
+        self.queries = []
+        self._lock = threading.Lock()
+        self.scale = {"transactions": transactions, "batches": batches, "log_events": log_events}
+
+        now = datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0)
+        params = {
+            "now": f"TIMESTAMP '{now:%Y-%m-%d %H:%M:%S}'",
+            "transactions": max(int(transactions), 1),
+            "tx_span": 7 * 86400,
+            "batches": max(int(batches), 1),
+            "batch_span": 30 * 86400,
+            "backlog": int(backlog),
+            "log_events": max(int(log_events), 1),
+            "log_span": 7 * 86400,
+            "stream_pending": int(stream_pending),
+        }
+        started = time.perf_counter()
+        for script in (SCHEMA, VIEWS, FIXTURES, ERROR_ROLLUP):
+            for name, value in params.items():
+                script = script.replace(f"${name}", str(value))
+            self.con.execute(script)
+        self.build_sec = time.perf_counter() - started
+
+    def sql(self, query):
+        return LocalDataFrame(self, query)
+
+    def _run(self, sql, statement_params, as_pandas):
+        tag = (statement_params or {}).get("QUERY_TAG")
+        started = time.perf_counter()
+        with self._lock:
+            if SHOW_DYNAMIC_TABLES.match(sql):
+                cursor = self.con.execute("SELECT 'DT_POKER_FLATTENED' AS name, 'ACTIVE' AS scheduling_state")
+            elif LIST_STAGE.match(sql):
+                cursor = self.con.execute(
+                    "SELECT NULL::VARCHAR AS name, NULL::BIGINT AS size, NULL::VARCHAR AS md5, "
+                    "NULL::VARCHAR AS last_modified WHERE FALSE")
+            else:
+                cursor = self.con.execute(translate(sql))
+            if as_pandas:
+                result = cursor.df()
+                result.columns = [column.upper() for column in result.columns]
+            else:
+                fields = [d[0].upper() for d in cursor.description]
+                result = (fields, cursor.fetchall())
+        self.queries.append((tag, round((time.perf_counter() - started) * 1000, 1), sql))
+        return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the local stand-in session and print its row counts")
+    parser.add_argument("--transactions", type=int, default=DEFAULT_SCALE["transactions"])
+    parser.add_argument("--batches", type=int, default=DEFAULT_SCALE["batches"])
+    parser.add_argument("--log-events", type=int, default=DEFAULT_SCALE["log_events"])
+    args = parser.parse_args()
+
+    session = LocalSession(args.transactions, args.batches, args.log_events)
+    print(f"Built fixtures in {session.build_sec:.1f}s")
+    for table in ("TOURNAMENTS.POKER", "GAMING.DT_POKER_FLATTENED", "GAMING.REGULATORY_BATCHES",
+                  "GAMING.OPENFLOW_LOG_EVENTS", "GAMING.PIPELINE_LATENCY_ROLLUP", "GAMING.OPENFLOW_ERROR_ROLLUP"):
+        count = session.sql(f"SELECT COUNT(*) AS N FROM DEDEMO.{table}").collect()[0]["N"]
+        print(f"  {table:<32} {count:>10,}")
+    for row in session.sql("SELECT STAGE, SAMPLES, AVG_SEC, P95_SEC FROM DEDEMO.GAMING.PIPELINE_LATENCY_ANALYSIS").collect():
+        print(f"  {row['STAGE']:<32} samples={row['SAMPLES']} avg={row['AVG_SEC']}s p95={row['P95_SEC']}s")
+
+
+if __name__ == "__main__":
+    main()
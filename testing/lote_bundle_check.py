@@ -0,0 +1,381 @@
+#!/usr/bin/env python3
+"""
+Local check for multi-lote bundled archives in PrepareRegulatoryFile
+(custom_processors/PrepareRegulatoryFile/src/prepare_regulatory_file/lote_bundle.py).
+
+Drives the processor through testing/nifiapi_stub.py with a throwaway
+certificate, from --tasks threads standing in for its concurrent tasks.
+Lotes are spread over --keys operator/warehouse/date keys. FlowFiles routed
+to waiting are queued again, as the loop-back connection does, and a tick
+FlowFile is sent every --tick-ms as by the timer-driven GenerateFlowFile.
+
+Scenarios:
+
+  bundled   - 'Maximum Bundle Entries' --max-entries. Every lote must land in
+              exactly one archive, carried to success by its lote or a tick,
+              and every other lote must end in bundled pointing at that
+              archive. Archives must only hold lotes of one key and at most
+              --max-entries of them, and each archive must decrypt to one
+              signed entry per lote listed in dgoj.bundle.batch.ids. The
+              archive FlowFile's filename and meta.* attributes must be those
+              of the archive's first lote, whichever FlowFile carried it.
+  size      - 'Maximum Bundle Size' of about three lotes; no archive may hold
+              more signed XML than that.
+  lone      - a single lote goes to waiting at once and comes back to waiting
+              until a tick after 'Maximum Bundle Wait' carries its archive
+              out with its attributes; it then goes to bundled. Bundles open
+              on stop go out with the first ticks after the restart, and a
+              lote whose bundle was lost with the worker is prepared again.
+  failed    - an archive that cannot be written sends its carrier and, as
+              they come back, its members to failure.
+  per-lote  - 'Maximum Bundle Entries' 1 (one archive per lote, the previous
+              behaviour), for comparison.
+
+Requires signxml, cryptography, lxml and pyzipper (PrepareRegulatoryFile's
+dependencies).
+
+Usage:
+    python testing/lote_bundle_check.py
+    python testing/lote_bundle_check.py --lotes 200 --tasks 20 --max-entries 10
+"""
+
+import argparse
+import io
+import os
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "testing"))
+
+PREPARE_DIR = os.path.join(ROOT, "custom_processors", "PrepareRegulatoryFile", "src", "prepare_regulatory_file")
+ZIP_PASSWORD = "bundle-check"
+
+from nifiapi_stub import FlowFile, ProcessContext, load_processor  # noqa: E402
+from pipeline_simulator import make_credentials  # noqa: E402
+
+import pyzipper  # noqa: E402
+
+
+def make_lote(batch_id, records):
+    rows = "".join(
+        f"<Registro><Id>{batch_id}-{i:05d}</Id><Importe>{i * 7 % 1000}.50</Importe></Registro>"
+        for i in range(records))
+    return f'<?xml version="1.0" encoding="UTF-8"?><Lote id="{batch_id}">{rows}</Lote>'.encode("utf-8")
+
+
+def make_flowfiles(count, keys, records):
+    """Lotes interleaved over `keys` operator/warehouse/date keys; returns [(key, FlowFile)]."""
+    flowfiles = []
+    for i in range(count):
+        batch_id = f"batch-{i:06d}"
+        operator_id = f"OP{i % keys + 1:02d}"
+        key = f"{operator_id}_WH001_2026-01-22"
+        flowfiles.append((key, FlowFile(make_lote(batch_id, records), {
+            "filename": f"{batch_id}.zip", "meta.batchId": batch_id, "meta.operatorId": operator_id, "bundle.key": key})))
+    return flowfiles
+
+
+def tick():
+    return FlowFile(b"", {"filename": "tick"})
+
+
+def routed(flowfile, result):
+    """The FlowFile as it leaves on result's relationship: new content if any, attributes merged."""
+    contents = flowfile.getContentsAsBytes() if result.contents is None else result.contents
+    return FlowFile(contents, {**flowfile.attributes, **result.attributes})
+
+
+def make_processor(credentials, settings):
+    processor = load_processor(PREPARE_DIR, "PrepareRegulatoryFile")
+    cert_path, key_path = credentials
+    context = ProcessContext(processor, {
+        "Certificate Path": cert_path,
+        "Private Key Path": key_path,
+        "ZIP Encryption Password": ZIP_PASSWORD,
+        # The stand-in only substitutes plain ${attr} references, not EL functions
+        "Bundle Key": "${bundle.key}",
+        **settings,
+    })
+    processor.onScheduled(context)
+    return processor, context
+
+
+def run_processor(credentials, settings, flowfiles, tasks, tick_seconds):
+    """
+    Transform `flowfiles` from `tasks` threads until each leaves on a final
+    relationship, sending a tick every `tick_seconds`, then stop the processor.
+
+    Returns ([(key, FlowFile, final result)], [tick results], bundles held on stop, seconds).
+    """
+    processor, context = make_processor(credentials, settings)
+
+    finals = []
+    ticks = []
+    lock = threading.Lock()
+    queue = [(key, flowfile, flowfile) for key, flowfile in reversed(flowfiles)]
+    done = threading.Event()
+
+    def task():
+        while not done.is_set():
+            with lock:
+                item = queue.pop() if queue else None
+            if item is None:
+                time.sleep(0.005)
+                continue
+            key, original, flowfile = item
+            result = processor.transform(context, flowfile)
+            with lock:
+                if result.relationship == "waiting":
+                    queue.insert(0, (key, original, routed(flowfile, result)))
+                    continue
+                finals.append((key, original, result))
+                if len(finals) == len(flowfiles):
+                    done.set()
+
+    def ticker():
+        while not done.wait(tick_seconds):
+            result = processor.transform(context, tick())
+            with lock:
+                ticks.append(result)
+
+    started = time.monotonic()
+    threads = [threading.Thread(target=task) for _ in range(tasks)] + [threading.Thread(target=ticker)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.monotonic() - started
+    processor.onStopped(context)
+    return finals, ticks, processor.held, elapsed
+
+
+def read_archive(archive):
+    with pyzipper.AESZipFile(io.BytesIO(archive)) as zf:
+        zf.setpassword(ZIP_PASSWORD.encode("utf-8"))
+        return {name: zf.read(name) for name in zf.namelist()}
+
+
+def check_bundles(name, finals, ticks, held, max_entries, max_bytes=None):
+    """Common checks on a bundled run; returns (failures, [(bundle id, batch ids, archive bytes)])."""
+    failures = 0
+    failed = [r.attributes.get("error.message") for _, _, r in finals + [(None, None, t) for t in ticks]
+              if r.relationship not in ("success", "bundled", "idle")]
+    if failed:
+        print(f"  FAIL: {len(failed)} lote(s) or tick(s) failed: {failed[:2]}")
+        return 1, []
+
+    keys = {ff.getAttribute("meta.batchId"): key for key, ff, _ in finals}
+    carried = [r for _, _, r in finals if r.relationship == "success"] + [t for t in ticks if t.relationship == "success"]
+    archives = {r.attributes["dgoj.bundle.id"]: (r.attributes["dgoj.bundle.batch.ids"].split(","), r.contents)
+                for r in carried}
+    misnamed = [r.attributes["dgoj.bundle.id"] for r in carried
+                if (r.attributes.get("filename"), r.attributes.get("meta.batchId"))
+                != (f"{r.attributes['dgoj.bundle.batch.ids'].split(',')[0]}.zip", r.attributes["dgoj.bundle.batch.ids"].split(",")[0])]
+    if misnamed:
+        print(f"  FAIL: {len(misnamed)} archive(s) carry another lote's filename or meta.* attributes: {misnamed[:3]}")
+        failures += 1
+    archived = [batch_id for batch_ids, _ in archives.values() for batch_id in batch_ids]
+    if len(carried) != len(archives) or sorted(archived) != sorted(keys):
+        print(f"  FAIL: {len(keys)} lotes but {len(archived)} archived ({len(set(archived))} distinct) "
+              f"in {len(carried)} archive FlowFiles")
+        failures += 1
+    if held:
+        print(f"  FAIL: {len(held)} bundle(s) still held on stop after every lote was released")
+        failures += 1
+
+    strays = [ff.getAttribute("meta.batchId") for _, ff, r in finals if r.relationship == "bundled"
+              and ff.getAttribute("meta.batchId") not in archives.get(r.attributes["dgoj.bundle.id"], ([],))[0]]
+    if strays:
+        print(f"  FAIL: {len(strays)} bundled lote(s) point at an archive that does not hold them: {strays[:3]}")
+        failures += 1
+
+    for bundle_id, (batch_ids, archive) in archives.items():
+        entries = read_archive(archive)
+        if len({keys[batch_id] for batch_id in batch_ids}) != 1:
+            print(f"  FAIL: archive {bundle_id} mixes keys")
+            failures += 1
+        if len(batch_ids) > max_entries:
+            print(f"  FAIL: archive {bundle_id} holds {len(batch_ids)} lotes")
+            failures += 1
+        if sorted(entries) != sorted(f"{batch_id}.xml" for batch_id in batch_ids):
+            print(f"  FAIL: archive {bundle_id} entries {sorted(entries)[:3]} do not match its batches")
+            failures += 1
+        unsigned = [n for n, data in entries.items() if b"SignatureValue" not in data or n[:-4].encode() not in data]
+        if unsigned:
+            print(f"  FAIL: archive {bundle_id} has unsigned or foreign entries {unsigned[:3]}")
+            failures += 1
+        if max_bytes is not None and len(batch_ids) > 1 and sum(len(d) for d in entries.values()) > max_bytes:
+            print(f"  FAIL: archive {bundle_id} holds more than {max_bytes} bytes of signed XML")
+            failures += 1
+
+    sizes = [len(batch_ids) for batch_ids, _ in archives.values()]
+    by_tick = sum(1 for t in ticks if t.relationship == "success")
+    print(f"{name}: {len(finals)} lotes in {len(archives)} archives, {by_tick} carried by ticks "
+          f"(mean {sum(sizes) / max(len(sizes), 1):.1f}, max {max(sizes, default=0)} lotes each)")
+    return failures, [(bundle_id, batch_ids, archive) for bundle_id, (batch_ids, archive) in archives.items()]
+
+
+def run_bundled(credentials, args):
+    flowfiles = make_flowfiles(args.lotes, args.keys, args.records)
+    settings = {"Maximum Bundle Entries": str(args.max_entries), "Maximum Bundle Wait": f"{args.max_wait_ms} millis"}
+    finals, ticks, held, elapsed = run_processor(credentials, settings, flowfiles, args.tasks, args.tick_ms / 1000)
+    failures, archives = check_bundles("bundled", finals, ticks, held, args.max_entries)
+    archive_bytes = sum(len(archive) for _, _, archive in archives)
+    print(f"  {elapsed:.2f} s, {archive_bytes:,} archive bytes")
+    return failures, elapsed, len(archives), archive_bytes
+
+
+def run_size(credentials, args):
+    flowfiles = make_flowfiles(args.lotes // 2, 1, args.records)
+    # Signed lotes are somewhat larger than the input; leave room for about three
+    max_bytes = len(flowfiles[0][1].getContentsAsBytes()) * 3 + 6000
+    settings = {
+        "Maximum Bundle Entries": str(args.max_entries),
+        "Maximum Bundle Size": f"{max_bytes} B",
+        "Maximum Bundle Wait": f"{args.max_wait_ms} millis",
+    }
+    finals, ticks, held, _ = run_processor(credentials, settings, flowfiles, args.tasks, args.tick_ms / 1000)
+    failures, archives = check_bundles("size", finals, ticks, held, args.max_entries, max_bytes)
+    if archives and max(len(batch_ids) for _, batch_ids, _ in archives) >= args.max_entries:
+        print(f"  FAIL: 'Maximum Bundle Size' of {max_bytes} bytes did not limit any archive")
+        failures += 1
+    return failures
+
+
+def run_lone(credentials, args):
+    max_wait = 0.3
+    settings = {"Maximum Bundle Entries": str(args.max_entries), "Maximum Bundle Wait": f"{int(max_wait * 1000)} millis"}
+    processor, context = make_processor(credentials, settings)
+    # Keys alternate, so lotes 0 and 2 share a key and lotes 1 and 3 another
+    (_, first), (_, other), (_, same), (_, lost) = make_flowfiles(4, 2, args.records)
+    batch_ids = lambda result: result.attributes.get("dgoj.bundle.batch.ids")  # noqa: E731
+    failures = 0
+
+    started = time.monotonic()
+    alone = processor.transform(context, first)
+    elapsed = time.monotonic() - started
+    returned = processor.transform(context, routed(first, alone))
+    early = processor.transform(context, tick())
+    time.sleep(max_wait)
+    carried = processor.transform(context, tick())
+    released = processor.transform(context, routed(first, returned))
+    print(f"lone: first lote -> {alone.relationship} in {elapsed:.2f} s, back -> {returned.relationship}; "
+          f"tick before Maximum Bundle Wait ({max_wait:.1f} s) -> {early.relationship}, after -> {carried.relationship} "
+          f"with {batch_ids(carried)} as {carried.attributes.get('filename')}; first lote back -> {released.relationship}")
+    if alone.relationship != "waiting" or elapsed >= max_wait or returned.relationship != "waiting" \
+            or first.getContentsAsBytes() != routed(first, returned).getContentsAsBytes():
+        print("  FAIL: expected the lone lote to go to waiting, unchanged, without waiting for its bundle")
+        failures += 1
+    if early.relationship != "idle" or carried.relationship != "success" \
+            or batch_ids(carried) != first.getAttribute("meta.batchId") \
+            or sorted(read_archive(carried.contents)) != [first.getAttribute("meta.batchId") + ".xml"] \
+            or carried.attributes.get("filename") != first.getAttribute("filename"):
+        print("  FAIL: expected a tick after Maximum Bundle Wait to carry the lone lote's archive under its filename")
+        failures += 1
+    if released.relationship != "bundled" or batch_ids(released) != first.getAttribute("meta.batchId"):
+        print("  FAIL: expected the lone lote to go to bundled once its archive was emitted")
+        failures += 1
+
+    # Two bundles open on stop go out with ticks after the restart; their lotes wait meanwhile
+    waiting = [(flowfile, processor.transform(context, flowfile)) for flowfile in (other, same)]
+    processor.onStopped(context)
+    flushed = sorted(bundle.batch_ids for bundle in processor.held)
+    processor.onScheduled(context)
+    before = [processor.transform(context, routed(flowfile, result)).relationship for flowfile, result in waiting]
+    restarted = [processor.transform(context, tick()) for _ in range(3)]
+    after = [processor.transform(context, routed(flowfile, result)) for flowfile, result in waiting]
+    print(f"  flushed on stop {flushed}; after the restart waiting lotes -> {before}, ticks -> "
+          f"{[(t.relationship, batch_ids(t)) for t in restarted]}, lotes -> {[(r.relationship, batch_ids(r)) for r in after]}")
+    expected = sorted([[other.getAttribute("meta.batchId")], [same.getAttribute("meta.batchId")]])
+    if flushed != expected or before != ["waiting", "waiting"] \
+            or [t.relationship for t in restarted] != ["success", "success", "idle"] \
+            or sorted([batch_ids(t)] for t in restarted[:2]) != expected \
+            or [r.relationship for r in after] != ["bundled", "bundled"]:
+        print("  FAIL: expected the bundles flushed on stop to go out with ticks after the restart, then their lotes to bundled")
+        failures += 1
+
+    # A worker restart loses the bundler; a lote that comes back from waiting is prepared again
+    parked = processor.transform(context, lost)
+    processor, context = make_processor(credentials, settings)
+    again = processor.transform(context, routed(lost, parked))
+    time.sleep(max_wait)
+    recovered = processor.transform(context, tick())
+    print(f"  lote whose bundle was lost with the worker -> {again.relationship} in a new bundle, "
+          f"tick -> {recovered.relationship} with {batch_ids(recovered)}")
+    if again.relationship != "waiting" or again.attributes.get("dgoj.bundle.id") == parked.attributes.get("dgoj.bundle.id") \
+            or batch_ids(recovered) != lost.getAttribute("meta.batchId"):
+        print("  FAIL: expected the lost lote to be prepared again into a new bundle")
+        failures += 1
+    processor.onStopped(context)
+    return failures
+
+
+def run_failed(credentials, args, tmp):
+    blocked = os.path.join(tmp, "blocked")
+    open(blocked, "wb").close()
+    # 'Output Directory' is a regular file, so the archive cannot be written
+    settings = {"Maximum Bundle Entries": "2", "Output Directory": blocked, "Output Filename": "${filename}"}
+    processor, context = make_processor(credentials, settings)
+    (_, member), (_, carrier) = make_flowfiles(2, 1, args.records)
+
+    parked = processor.transform(context, member)
+    carried = processor.transform(context, carrier)
+    returned = processor.transform(context, routed(member, parked))
+    processor.onStopped(context)
+    print(f"failed: archive write fails -> carrier {carried.relationship}, member {parked.relationship} "
+          f"then {returned.relationship} ({returned.attributes.get('error.message', '')[:60]}...)")
+    expected = ",".join(ff.getAttribute("meta.batchId") for ff in (member, carrier))
+    if carried.relationship != "failure" or returned.relationship != "failure" \
+            or not returned.attributes.get("error.message") \
+            or returned.attributes.get("dgoj.bundle.batch.ids") != expected:
+        print("  FAIL: expected both the carrier and the member of the failed archive to go to failure")
+        return 1
+    return 0
+
+
+def run_per_lote(credentials, args):
+    flowfiles = make_flowfiles(args.lotes, args.keys, args.records)
+    finals, _, _, elapsed = run_processor(credentials, {"Maximum Bundle Entries": "1"}, flowfiles, args.tasks,
+                                          args.tick_ms / 1000)
+    archives = [r for _, _, r in finals if r.relationship == "success"]
+    archive_bytes = sum(len(r.contents) for r in archives)
+    print(f"per-lote: {len(finals)} lotes in {len(archives)} archives, {elapsed:.2f} s, "
+          f"{archive_bytes:,} archive bytes (for comparison)")
+    return elapsed, len(archives), archive_bytes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check multi-lote bundled archives in PrepareRegulatoryFile")
+    parser.add_argument("--lotes", type=int, default=60)
+    parser.add_argument("--keys", type=int, default=3, help="Operator/warehouse/date keys the lotes are spread over")
+    parser.add_argument("--records", type=int, default=200, help="Registros per lote")
+    parser.add_argument("--tasks", type=int, default=10, help="Concurrent tasks (the processor's concurrent tasks)")
+    parser.add_argument("--max-entries", type=int, default=5)
+    parser.add_argument("--max-wait-ms", type=int, default=1000)
+    parser.add_argument("--tick-ms", type=int, default=100, help="Period of the tick FlowFile")
+    args = parser.parse_args()
+
+    failures = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        credentials = make_credentials(tmp)
+        bundled_failures, bundled_seconds, bundled_archives, bundled_bytes = run_bundled(credentials, args)
+        failures += bundled_failures
+        failures += run_size(credentials, args)
+        failures += run_lone(credentials, args)
+        failures += run_failed(credentials, args, tmp)
+        per_lote_seconds, per_lote_archives, per_lote_bytes = run_per_lote(credentials, args)
+
+    print(f"\narchives (uploads and acknowledgments): {per_lote_archives} -> {bundled_archives}, "
+          f"archive bytes {per_lote_bytes:,} -> {bundled_bytes:,}, "
+          f"prepare time {per_lote_seconds:.2f} s -> {bundled_seconds:.2f} s")
+    if failures:
+        print(f"\n{failures} check(s) failed")
+        sys.exit(1)
+    print("Every lote was signed into exactly one archive, with bundles per key and within their limits")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+Local check for memory admission control in PrepareRegulatoryFile
+(custom_processors/PrepareRegulatoryFile/src/prepare_regulatory_file/memory_budget.py).
+
+Drives the processor through testing/nifiapi_stub.py with a throwaway
+certificate and lotes from sql/python/poker_xml.py. Memory is measured as
+peak RSS growth (lxml allocates outside the Python heap, so tracemalloc
+misses most of it), each measurement in a fresh child process. The children
+run with MALLOC_ARENA_MAX=2: glibc otherwise gives every thread its own
+arena and keeps memory freed in one out of reach of the others, so RSS
+keeps growing past what is live at any time.
+
+Scenarios:
+
+  expansion  - peak RSS growth per input byte while one lote of each of
+               --sizes players is signed and encrypted. Must stay below
+               DEFAULT_EXPANSION_FACTOR, which sizes the estimates.
+  concurrent - --lotes lotes of --players players from --tasks threads, once
+               with a 'Memory Budget' that fits about two of them and once
+               with an unlimited one. Every lote must succeed, the budget's
+               own peak reservation must stay within the budget and below
+               the unlimited run's, and the peak RSS growth with the budget
+               must stay within the budget plus RSS_HEADROOM (arena memory
+               that is freed but not returned to the OS).
+  oversize   - a lote whose estimate exceeds the budget goes to oversize
+               without being parsed.
+  deferred   - with the budget held, a lote goes to deferred after about
+               'Maximum Admission Wait' and the processor yields.
+  order      - a large lote waiting for room is admitted before smaller
+               lotes that arrived after it.
+
+Requires signxml, cryptography, lxml and pyzipper (PrepareRegulatoryFile's
+dependencies). Peak RSS comes from /proc (Linux) or the resource module (macOS).
+
+Usage:
+    python testing/memory_budget_check.py
+    python testing/memory_budget_check.py --players 20000 --lotes 16 --tasks 8
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "testing"))
+sys.path.insert(0, os.path.join(ROOT, "sql", "python"))
+
+PREPARE_DIR = os.path.join(ROOT, "custom_processors", "PrepareRegulatoryFile", "src", "prepare_regulatory_file")
+sys.path.insert(0, PREPARE_DIR)
+
+from memory_budget import DEFAULT_EXPANSION_FACTOR, MemoryBudget  # noqa: E402
+from nifiapi_stub import FlowFile, ProcessContext, load_processor  # noqa: E402
+
+# ru_maxrss is in kilobytes on Linux and in bytes on macOS
+RSS_UNIT = 1 if sys.platform == "darwin" else 1024
+MB = 1024 * 1024
+
+# Allowed peak RSS growth over the budget in the concurrent scenario. The
+# budget bounds live lote memory; RSS also keeps freed arena pages, which
+# measured up to about 1.1x the budget across runs.
+RSS_HEADROOM = 1.5
+
+
+def peak_rss():
+    # On Linux ru_maxrss survives fork and exec, so a child would start at its parent's peak; VmHWM starts afresh
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * RSS_UNIT
+
+
+def write_lote(path, players):
+    from poker_xml import generate_poker_xml
+    from poker_xml_benchmark import BATCH_ID, make_rows
+    with open(path, "wb") as f:
+        f.write(generate_poker_xml(make_rows(players), "OP01", "WH001", BATCH_ID).encode("utf-8"))
+
+
+def make_processor(credentials, settings):
+    processor = load_processor(PREPARE_DIR, "PrepareRegulatoryFile")
+    cert_path, key_path = credentials
+    context = ProcessContext(processor, {
+        "Certificate Path": cert_path,
+        "Private Key Path": key_path,
+        "ZIP Encryption Password": "memory-budget-check",
+        **settings,
+    })
+    processor.onScheduled(context)
+    return processor, context
+
+
+def child(spec):
+    """Runs in a fresh process: transform the lote at spec['path'] spec['lotes'] times from spec['tasks'] threads."""
+    processor, context = make_processor(spec["credentials"], spec["settings"])
+    # Warm up imports and credential loading so they do not count as lote memory
+    processor.transform(context, FlowFile(b"<Lote/>", {}))
+    with open(spec["path"], "rb") as f:
+        data = f.read()
+
+    remaining = [spec["lotes"]]
+    relationships = []
+    lock = threading.Lock()
+
+    def task():
+        while True:
+            with lock:
+                if not remaining[0]:
+                    return
+                remaining[0] -= 1
+            result = processor.transform(context, FlowFile(data, {}))
+            with lock:
+                relationships.append(result.relationship)
+
+    before = peak_rss()
+    threads = [threading.Thread(target=task) for _ in range(spec["tasks"])]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    growth = peak_rss() - before
+    stats = processor.budget.snapshot()
+    processor.onStopped(context)
+    print(json.dumps({"bytes": len(data), "growth": growth, "relationships": relationships, "stats": stats}))
+
+
+def run_child(spec):
+    # Few malloc arenas, so memory freed by one task is reused by the next (see the module docstring)
+    out = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", json.dumps(spec)],
+                         capture_output=True, text=True, check=True, env=dict(os.environ, MALLOC_ARENA_MAX="2")).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def run_expansion(credentials, tmp, args):
+    factors = []
+    for players in args.sizes:
+        path = os.path.join(tmp, f"lote_{players}.xml")
+        write_lote(path, players)
+        result = run_child({"credentials": credentials, "settings": {"Memory Budget": "1 TB"},
+                            "path": path, "lotes": 1, "tasks": 1})
+        factor = result["growth"] / result["bytes"]
+        factors.append(factor)
+        print(f"expansion: {players:>7} players, {result['bytes'] / MB:7.1f} MB lote, "
+              f"peak +{result['growth'] / MB:7.1f} MB, {factor:5.1f}x")
+    if max(factors) > DEFAULT_EXPANSION_FACTOR:
+        print(f"  FAIL: measured {max(factors):.1f}x exceeds DEFAULT_EXPANSION_FACTOR {DEFAULT_EXPANSION_FACTOR}")
+        return 1
+    print(f"  largest {max(factors):.1f}x, within DEFAULT_EXPANSION_FACTOR {DEFAULT_EXPANSION_FACTOR}")
+    return 0
+
+
+def run_concurrent(credentials, tmp, args):
+    path = os.path.join(tmp, f"lote_{args.players}.xml")
+    write_lote(path, args.players)
+    estimate = int(os.path.getsize(path) * DEFAULT_EXPANSION_FACTOR)
+    budget = int(estimate * 2.5)
+
+    failures = 0
+    results = {}
+    for label, setting in (("budget", f"{budget} B"), ("unlimited", "1 TB")):
+        result = run_child({"credentials": credentials, "settings": {"Memory Budget": setting, "Maximum Admission Wait": "10 min"},
+                            "path": path, "lotes": args.lotes, "tasks": args.tasks})
+        results[label] = result
+        print(f"concurrent ({label}): {args.lotes} lotes of {result['bytes'] / MB:.1f} MB from {args.tasks} tasks, "
+              f"peak +{result['growth'] / MB:.0f} MB, budget peak {result['stats']['peak'] / MB:.0f} MB")
+        if result["relationships"].count("success") != args.lotes:
+            print(f"  FAIL: expected every lote to succeed, got {sorted(set(result['relationships']))}")
+            failures += 1
+
+    if results["budget"]["stats"]["peak"] > budget:
+        print("  FAIL: reservations exceeded the budget")
+        failures += 1
+    if results["budget"]["stats"]["peak"] >= results["unlimited"]["stats"]["peak"]:
+        print("  FAIL: the budget did not limit concurrent reservations")
+        failures += 1
+    if results["budget"]["growth"] > budget * RSS_HEADROOM:
+        print(f"  FAIL: peak RSS growth {results['budget']['growth'] / MB:.0f} MB exceeds the budget of "
+              f"{budget / MB:.0f} MB with {RSS_HEADROOM}x headroom")
+        failures += 1
+    return failures
+
+
+def run_oversize(credentials):
+    processor, context = make_processor(credentials, {"Memory Budget": "1 MB"})
+    data = b"<Lote>" + b"<Registro/>" * 10000 + b"</Lote>"
+    started = time.monotonic()
+    result = processor.transform(context, FlowFile(data, {}))
+    elapsed = time.monotonic() - started
+    print(f"oversize: {len(data)} byte lote against a 1 MB budget -> {result.relationship} in {elapsed * 1000:.0f} ms")
+    if result.relationship != "oversize" or "dgoj.memory.estimate" not in result.attributes:
+        print("  FAIL: expected oversize with dgoj.memory.estimate")
+        return 1
+    return 0
+
+
+def run_deferred(credentials):
+    processor, context = make_processor(credentials, {"Memory Budget": "1 MB", "Maximum Admission Wait": "200 millis"})
+    data = b"<Lote>" + b"<Registro/>" * 1000 + b"</Lote>"
+    held = processor.budget.admit(int(processor.budget.limit / DEFAULT_EXPANSION_FACTOR))
+    started = time.monotonic()
+    result = processor.transform(context, FlowFile(data, {}))
+    elapsed = time.monotonic() - started
+    held.release()
+    after = processor.transform(context, FlowFile(data, {}))
+    print(f"deferred: with the budget held -> {result.relationship} after {elapsed:.2f} s, "
+          f"{context.yields} yield; released -> {after.relationship}")
+    if (result.relationship != "deferred" or not 0.2 <= elapsed < 1.5 or context.yields != 1
+            or after.relationship != "success"):
+        print("  FAIL: expected deferred after about 200 ms with one yield, then success once the budget is free")
+        return 1
+    return 0
+
+
+def run_order():
+    budget = MemoryBudget(limit=100, expansion=1, max_wait=5)
+    held = budget.admit(60)
+    admitted = []
+    lock = threading.Lock()
+
+    def waiter(name, size):
+        reservation = budget.admit(size)
+        with lock:
+            admitted.append(name)
+        time.sleep(0.05)
+        reservation.release()
+
+    large = threading.Thread(target=waiter, args=("large", 90))
+    large.start()
+    time.sleep(0.05)
+    # Small ones would fit beside the held reservation, but must queue behind the large one
+    smalls = [threading.Thread(target=waiter, args=(f"small-{i}", 10)) for i in range(3)]
+    for t in smalls:
+        t.start()
+    time.sleep(0.1)
+    early = list(admitted)
+    held.release()
+    for t in [large] + smalls:
+        t.join()
+    print(f"order: admitted {admitted}")
+    if early or admitted[0] != "large":
+        print("  FAIL: expected the large lote first, once the budget was released")
+        return 1
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check memory admission control in PrepareRegulatoryFile")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000], help="Players per lote for the expansion scenario")
+    parser.add_argument("--players", type=int, default=10000, help="Players per lote for the concurrent scenario")
+    parser.add_argument("--lotes", type=int, default=12)
+    parser.add_argument("--tasks", type=int, default=6, help="Concurrent tasks (the processor's concurrent tasks)")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(json.loads(args.child))
+        return
+
+    from pipeline_simulator import make_credentials
+
+    failures = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        credentials = make_credentials(tmp)
+        failures += run_expansion(credentials, tmp, args)
+        failures += run_concurrent(credentials, tmp, args)
+        failures += run_oversize(credentials)
+        failures += run_deferred(credentials)
+        failures += run_order()
+
+    if failures:
+        print(f"\n{failures} check(s) failed")
+        sys.exit(1)
+    print("\nConcurrent lotes stayed within the memory budget; oversize and deferred FlowFiles were routed without being signed")
+
+
+if __name__ == "__main__":
+    main()
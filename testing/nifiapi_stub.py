@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Minimal stand-in for the NiFi Python API (nifiapi) so the custom processors
+can be driven outside OpenFlow by the local simulators and checks.
+
+Only the parts the processors in custom_processors/ use are provided:
+PropertyDescriptor, StandardValidators, ExpressionLanguageScope, TimeUnit,
+DataUnit, Relationship and the FlowFileTransform/FlowFileSource result types.
+Validators are not applied and Expression Language supports plain
+${attribute} references only.
+
+install() registers the stand-in under sys.modules['nifiapi'] unless the
+real package is importable. Then:
+
+    processor = load_processor(path_to_src_dir, "PrepareRegulatoryFile")
+    context = ProcessContext(processor, {"ZIP Encryption Password": "..."})
+    result = processor.transform(context, FlowFile(xml_bytes, {"meta.batchId": "..."}))
+"""
+
+import enum
+import importlib
+import logging
+import re
+import sys
+import types
+
+_REFERENCE = re.compile(r"\$\{([^}]+)\}")
+_TIME_PERIOD = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([a-z]+)\s*$", re.IGNORECASE)
+_SECONDS = {
+    "ms": 0.001, "millis": 0.001, "milliseconds": 0.001,
+    "s": 1, "sec": 1, "secs": 1, "second": 1, "seconds": 1,
+    "m": 60, "min": 60, "mins": 60, "minute": 60, "minutes": 60,
+    "h": 3600, "hr": 3600, "hrs": 3600, "hour": 3600, "hours": 3600,
+}
+_DATA_SIZE = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([a-z]+)\s*$", re.IGNORECASE)
+
+
+class ExpressionLanguageScope(enum.Enum):
+    NONE = "NONE"
+    ENVIRONMENT = "ENVIRONMENT"
+    FLOWFILE_ATTRIBUTES = "FLOWFILE_ATTRIBUTES"
+
+
+class TimeUnit(enum.Enum):
+    NANOSECONDS = 1e-9
+    MICROSECONDS = 1e-6
+    MILLISECONDS = 1e-3
+    SECONDS = 1
+    MINUTES = 60
+    HOURS = 3600
+    DAYS = 86400
+
+
+class DataUnit(enum.Enum):
+    B = 1
+    KB = 1024
+    MB = 1024 ** 2
+    GB = 1024 ** 3
+    TB = 1024 ** 4
+
+
+class StandardValidators:
+    NON_EMPTY_VALIDATOR = "NON_EMPTY_VALIDATOR"
+    NON_BLANK_VALIDATOR = "NON_BLANK_VALIDATOR"
+    NON_NEGATIVE_INTEGER_VALIDATOR = "NON_NEGATIVE_INTEGER_VALIDATOR"
+    POSITIVE_INTEGER_VALIDATOR = "POSITIVE_INTEGER_VALIDATOR"
+    NUMBER_VALIDATOR = "NUMBER_VALIDATOR"
+    PORT_VALIDATOR = "PORT_VALIDATOR"
+    TIME_PERIOD_VALIDATOR = "TIME_PERIOD_VALIDATOR"
+    BOOLEAN_VALIDATOR = "BOOLEAN_VALIDATOR"
+    DATA_SIZE_VALIDATOR = "DATA_SIZE_VALIDATOR"
+
+
+class PropertyDescriptor:
+    def __init__(self, name, description=None, required=False, sensitive=False, default_value=None,
+                 allowable_values=None, validators=None, expression_language_scope=ExpressionLanguageScope.NONE,
+                 dependencies=None, controller_service_definition=None, display_name=None):
+        self.name = name
+        self.description = description
+        self.required = required
+        self.sensitive = sensitive
+        self.default_value = default_value
+        self.allowable_values = allowable_values
+        self.validators = validators or []
+        self.expression_language_scope = expression_language_scope
+
+
+class Relationship:
+    def __init__(self, name, description=None, auto_terminated=False):
+        self.name = name
+        self.description = description
+        self.auto_terminated = auto_terminated
+
+
+class PropertyValue:
+    def __init__(self, value):
+        self.value = value
+
+    def getValue(self):
+        return self.value
+
+    def isSet(self):
+        return self.value is not None
+
+    def evaluateAttributeExpressions(self, flowfile=None):
+        if self.value is None or flowfile is None:
+            return self
+        return PropertyValue(_REFERENCE.sub(lambda m: flowfile.getAttribute(m.group(1).strip()) or "", self.value))
+
+    def asInteger(self):
+        return None if self.value is None else int(self.value)
+
+    def asFloat(self):
+        return None if self.value is None else float(self.value)
+
+    def asBoolean(self):
+        return None if self.value is None else self.value.strip().lower() == "true"
+
+    def asTimePeriod(self, time_unit):
+        if self.value is None:
+            return None
+        match = _TIME_PERIOD.match(self.value)
+        if not match or match.group(2).lower() not in _SECONDS:
+            raise ValueError("Invalid time period '{}'".format(self.value))
+        return float(match.group(1)) * _SECONDS[match.group(2).lower()] / time_unit.value
+
+    def asDataSize(self, data_unit):
+        if self.value is None:
+            return None
+        match = _DATA_SIZE.match(self.value)
+        if not match or match.group(2).upper() not in DataUnit.__members__:
+            raise ValueError("Invalid data size '{}'".format(self.value))
+        return float(match.group(1)) * DataUnit[match.group(2).upper()].value / data_unit.value
+
+
+class ProcessContext:
+    """Property values by name; unset properties fall back to the descriptor default.
+
+    yield_resources() only counts the calls (yields).
+    """
+
+    def __init__(self, processor, properties=None):
+        self.properties = dict(properties or {})
+        self.descriptors = {d.name: d for d in processor.getPropertyDescriptors()}
+        self.yields = 0
+
+    def yield_resources(self):
+        self.yields += 1
+
+    def getProperty(self, descriptor):
+        name = descriptor if isinstance(descriptor, str) else descriptor.name
+        if name in self.properties:
+            return PropertyValue(self.properties[name])
+        default = self.descriptors[name].default_value if name in self.descriptors else None
+        return PropertyValue(default)
+
+    def getProperties(self):
+        return {d: self.getProperty(d).getValue() for d in self.descriptors.values()}
+
+
+class FlowFile:
+    """InputFlowFile stand-in."""
+
+    def __init__(self, contents=b"", attributes=None):
+        self.contents = contents
+        self.attributes = dict(attributes or {})
+
+    def getContentsAsBytes(self):
+        return self.contents
+
+    def getSize(self):
+        return len(self.contents)
+
+    def getAttribute(self, name):
+        return self.attributes.get(name)
+
+    def getAttributes(self):
+        return dict(self.attributes)
+
+
+class FlowFileTransformResult:
+    def __init__(self, relationship, contents=None, attributes=None):
+        self.relationship = relationship
+        self.contents = contents
+        self.attributes = attributes or {}
+
+
+class FlowFileSourceResult(FlowFileTransformResult):
+    pass
+
+
+class _Processor:
+    def __init__(self, *args, **kwargs):
+        self.logger = logging.getLogger(type(self).__name__)
+
+    def getPropertyDescriptors(self):
+        return []
+
+
+class FlowFileTransform(_Processor):
+    pass
+
+
+class FlowFileSource(_Processor):
+    pass
+
+
+def install():
+    """Register the stand-in as nifiapi unless the real package is importable."""
+    try:
+        importlib.import_module("nifiapi")
+        return False
+    except ImportError:
+        pass
+
+    modules = {
+        "nifiapi": {},
+        "nifiapi.properties": {
+            "PropertyDescriptor": PropertyDescriptor, "StandardValidators": StandardValidators,
+            "ExpressionLanguageScope": ExpressionLanguageScope, "ProcessContext": ProcessContext,
+            "TimeUnit": TimeUnit, "DataUnit": DataUnit, "PropertyValue": PropertyValue,
+        },
+        "nifiapi.relationship": {"Relationship": Relationship},
+        "nifiapi.flowfiletransform": {
+            "FlowFileTransform": FlowFileTransform, "FlowFileTransformResult": FlowFileTransformResult,
+        },
+        "nifiapi.flowfilesource": {
+            "FlowFileSource": FlowFileSource, "FlowFileSourceResult": FlowFileSourceResult,
+        },
+    }
+    for name, attributes in modules.items():
+        module = types.ModuleType(name)
+        module.__dict__.update(attributes)
+        sys.modules[name] = module
+    return True
+
+
+def load_processor(source_dir, class_name, *args, **kwargs):
+    """Import `class_name` from `source_dir` (a processor package's src/<package>/) and instantiate it."""
+    install()
+    if source_dir not in sys.path:
+        sys.path.insert(0, source_dir)
+    module = importlib.import_module(class_name)
+    return getattr(module, class_name)(*args, **kwargs)
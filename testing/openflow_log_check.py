@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Offline check of the OpenFlow log parser (sql/python/openflow_log.py), the
+handler of PARSE_OPENFLOW_LOG_EVENT in sql/16_openflow_logs.sql.
+
+Feeds sample OPENFLOW.OPENFLOW.EVENTS rows (VALUE as logback JSON text or as
+an object, RESOURCE_ATTRIBUTES as an object) through parse_event() and
+checks the typed columns written to OPENFLOW_LOG_EVENTS:
+
+  columns      - every event yields exactly the table's parsed columns, each
+                 a string or NULL, within the column sizes of the table
+  values       - level normalization, MDC and resource attributes, component
+                 ID, exception class, unparseable VALUE skipped
+  fingerprints - repeats of one failure that differ only in batch IDs,
+                 FlowFile records, addresses, URLs, paths, timestamps and
+                 numbers share a fingerprint; different failures do not
+  templates    - TemplateMiner (MINE_OPENFLOW_LOG_TEMPLATES in
+                 sql/17_error_rollup.sql) groups patterns that differ in
+                 unmasked tokens under one <*> template, keeps different
+                 failures apart, and assigns the same IDs after a reload
+
+Usage:
+    python testing/openflow_log_check.py
+    python testing/openflow_log_check.py --events 20000
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import uuid
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "sql", "python"))
+
+from openflow_log import FINGERPRINT_LENGTH, PATTERN_LENGTH, TemplateMiner, parse_event  # noqa: E402
+
+# Parsed columns of OPENFLOW_LOG_EVENTS with their VARCHAR sizes (None: unsized)
+COLUMNS = {
+    "LOG_LEVEL": 10,
+    "LOGGER": None,
+    "PROCESS_GROUP": None,
+    "PROCESS_GROUP_PATH": None,
+    "THREAD_NAME": None,
+    "PROCESSOR_NAME": None,
+    "PROCESSOR_TYPE": None,
+    "COMPONENT_ID": 36,
+    "MESSAGE": None,
+    "EXCEPTION": None,
+    "EXCEPTION_CLASS": None,
+    "MESSAGE_PATTERN": PATTERN_LENGTH,
+    "MESSAGE_FINGERPRINT": FINGERPRINT_LENGTH,
+}
+
+PUT_SFTP_ID = "0192a3b4-0000-1000-8000-0123456789ab"
+
+
+def flowfile_record(rng):
+    """A StandardFlowFileRecord as NiFi prints it in processor errors."""
+    return (
+        "StandardFlowFileRecord[uuid={},claim=StandardContentClaim [resourceClaim=StandardResourceClaim"
+        "[id={}-{}, container=default, section={}], offset={}, length={}],offset=0,name=OP01_WH001_{}.zip,size={}]"
+    ).format(uuid.UUID(int=rng.getrandbits(128)), rng.randrange(10 ** 13), rng.randrange(10), rng.randrange(1024),
+             rng.randrange(10 ** 6), rng.randrange(10 ** 6), rng.randrange(10 ** 7, 10 ** 8), rng.randrange(10 ** 6))
+
+
+def event(level, message, logger="org.apache.nifi.processors.standard.PutSFTP", throwable=None,
+          group="BoeGamingReport", processor="DeliverRegulatoryFile", processor_type="DeliverRegulatoryFile",
+          as_text=True):
+    """An (VALUE, RESOURCE_ATTRIBUTES) pair as OPENFLOW.OPENFLOW.EVENTS stores it."""
+    document = {
+        "timestamp": 1760875200000,
+        "level": level,
+        "threadName": "Timer-Driven Process Thread-7",
+        "loggerName": logger,
+        "formattedMessage": message,
+        "mdc": {"processGroupName": group, "processGroupNamePath": "NiFi Flow / " + group} if group else {},
+    }
+    if throwable is not None:
+        document["throwable"] = throwable
+    attributes = {"k8s.namespace.name": "runtime-demo"}
+    if processor:
+        attributes.update({"processor.name": processor, "processor.type": processor_type})
+    return (json.dumps(document) if as_text else document), attributes
+
+
+def sftp_failure(rng):
+    return "DeliverRegulatoryFile[id={}] Failed to transfer {} to {}:22 after {} ms".format(
+        PUT_SFTP_ID, flowfile_record(rng), "10.0.{}.{}".format(rng.randrange(256), rng.randrange(256)),
+        rng.randrange(1000, 60000))
+
+
+def remote_failure(rng):
+    return "Failed to list {} on sftp{}.regulator.example: no such file".format(
+        rng.choice(["/upload/boe/OP01/{}/".format(rng.randrange(10 ** 6)),
+                    "sftp://sftp{}.regulator.example:22/upload/boe/OP01".format(rng.randrange(10))]),
+        rng.randrange(10))
+
+
+def lease_failure(rng):
+    return "LeaseRegulatoryBatches[id={}] Lease {} of batch '{}' expired at 2026-10-{:02d}T{:02d}:{:02d}:{:02d}.{:03d}Z".format(
+        uuid.UUID(int=rng.getrandbits(128)), uuid.UUID(int=rng.getrandbits(128)),
+        "BATCH_{:08x}".format(rng.getrandbits(32)), rng.randrange(1, 29), rng.randrange(24), rng.randrange(60),
+        rng.randrange(60), rng.randrange(1000))
+
+
+def check_columns(rows):
+    failures = 0
+    for (value, _), parsed in rows:
+        if parsed is None:
+            continue
+        if set(parsed) != set(COLUMNS):
+            print(f"  FAIL: columns {sorted(parsed)}")
+            return 1
+        for name, size in COLUMNS.items():
+            item = parsed[name]
+            if item is not None and not isinstance(item, str):
+                print(f"  FAIL: {name} is {type(item).__name__}, not a string")
+                failures += 1
+            elif item is not None and size and len(item) > size:
+                print(f"  FAIL: {name} has {len(item)} characters, the column holds {size}")
+                failures += 1
+        if failures:
+            return failures
+    print(f"  columns: {len(rows)} events, {len(COLUMNS)} typed columns each, within the column sizes")
+    return 0
+
+
+def check_values():
+    failures = 0
+    cases = [
+        (
+            "INFO event, VALUE as JSON text",
+            event("info", "Scheduled DeliverRegulatoryFile to run with 3 threads", logger="org.apache.nifi.controller"),
+            {"LOG_LEVEL": "INFO", "LOGGER": "org.apache.nifi.controller", "PROCESS_GROUP": "BoeGamingReport",
+             "PROCESS_GROUP_PATH": "NiFi Flow / BoeGamingReport", "THREAD_NAME": "Timer-Driven Process Thread-7",
+             "PROCESSOR_NAME": "DeliverRegulatoryFile", "EXCEPTION": None, "COMPONENT_ID": None,
+             "MESSAGE_PATTERN": "Scheduled DeliverRegulatoryFile to run with <n> threads"},
+        ),
+        (
+            "ERROR event with stack trace, VALUE as object",
+            event("ERROR", "DeliverRegulatoryFile[id=0192A3B4-0000-1000-8000-0123456789AB] Upload failed",
+                  throwable="java.io.IOException: Connection reset\n\tat com.jcraft.jsch.Session.read(Session.java:1)",
+                  as_text=False),
+            {"LOG_LEVEL": "ERROR", "EXCEPTION_CLASS": "java.io.IOException", "COMPONENT_ID": PUT_SFTP_ID,
+             "MESSAGE_PATTERN": "DeliverRegulatoryFile[id=<uuid>] Upload failed"},
+        ),
+        (
+            "WARNING spelled out, no MDC, no processor",
+            event("warning", "Back pressure engaged on connection 42", group=None, processor=None),
+            {"LOG_LEVEL": "WARN", "PROCESS_GROUP": None, "PROCESSOR_NAME": None, "PROCESSOR_TYPE": None},
+        ),
+        (
+            "exception without a message",
+            event("ERROR", "", throwable="org.apache.nifi.processor.exception.ProcessException: Timed out after 30000 ms"),
+            {"MESSAGE": None, "EXCEPTION_CLASS": "org.apache.nifi.processor.exception.ProcessException",
+             "MESSAGE_PATTERN": "org.apache.nifi.processor.exception.ProcessException: Timed out after <n> ms"},
+        ),
+        (
+            "structured throwable",
+            event("ERROR", "Python processor failed", throwable={"className": "py4j.Py4JException", "message": "x"}),
+            {"EXCEPTION": '{"className":"py4j.Py4JException","message":"x"}'},
+        ),
+    ]
+    for name, (value, attributes), expected in cases:
+        parsed = parse_event(value, attributes)
+        wrong = {key: parsed.get(key) for key, want in expected.items() if parsed.get(key) != want}
+        if wrong:
+            print(f"  FAIL: {name}: got {wrong}, expected {({key: expected[key] for key in wrong})}")
+            failures += 1
+
+    for name, value in [("plain text VALUE", "not json"), ("JSON array VALUE", "[1, 2]"), ("NULL VALUE", None)]:
+        if parse_event(value, {}) is not None:
+            print(f"  FAIL: {name} was parsed; the load skips it")
+            failures += 1
+
+    if not failures:
+        print(f"  values: {len(cases)} event shapes parsed as expected, 3 unparseable values skipped")
+    return failures
+
+
+def check_fingerprints(rng, count):
+    failures = 0
+    groups = {"sftp": set(), "lease": set()}
+    for _ in range(count):
+        groups["sftp"].add(parse_event(*event("ERROR", sftp_failure(rng)))["MESSAGE_FINGERPRINT"])
+        groups["lease"].add(parse_event(*event("ERROR", lease_failure(rng), processor="LeaseRegulatoryBatches"))
+                            ["MESSAGE_FINGERPRINT"])
+    for name, fingerprints in groups.items():
+        if len(fingerprints) != 1:
+            print(f"  FAIL: {count} {name} failures gave {len(fingerprints)} fingerprints, expected 1")
+            failures += 1
+    if groups["sftp"] == groups["lease"]:
+        print("  FAIL: different failures share a fingerprint")
+        failures += 1
+
+    distinct = [
+        "DeliverRegulatoryFile[id={}] Upload failed".format(PUT_SFTP_ID),
+        "DeliverRegulatoryFile[id={}] Rename failed".format(PUT_SFTP_ID),
+        "Connection to 'sftp.example.com' refused",
+        "Connection to 'sftp.example.com' timed out",
+    ]
+    prints = {parse_event(*event("ERROR", message))["MESSAGE_FINGERPRINT"] for message in distinct}
+    if len(prints) != len(distinct):
+        print(f"  FAIL: {len(distinct)} different messages gave {len(prints)} fingerprints")
+        failures += 1
+
+    if not failures:
+        print(f"  fingerprints: 2 x {count} failures with varying IDs, records, addresses and times -> 2 fingerprints;"
+              f" {len(distinct)} distinct messages -> {len(prints)}")
+    return failures
+
+
+def check_templates(rng, count):
+    failures = 0
+    patterns = {}
+    for _ in range(count):
+        for name, message in [("sftp", sftp_failure(rng)), ("lease", lease_failure(rng)), ("remote", remote_failure(rng))]:
+            parsed = parse_event(*event("ERROR", message))
+            patterns.setdefault(parsed["MESSAGE_FINGERPRINT"], (name, parsed["MESSAGE_PATTERN"]))
+    patterns.update({fingerprint: (host, "Connection to {} refused".format(host))
+                     for fingerprint, host in [("c1", "sftp1.regulator.example"), ("c2", "sftp2.regulator.example")]})
+    patterns["t1"] = ("timeout", "Connection to sftp1.regulator.example timed out")
+
+    miner = TemplateMiner()
+    assigned = {fingerprint: miner.add(pattern)[0] for fingerprint, (_, pattern) in patterns.items()}
+    by_failure = {}
+    for fingerprint, (name, _) in patterns.items():
+        by_failure.setdefault(name, set()).add(assigned[fingerprint])
+
+    refused = by_failure["sftp1.regulator.example"] | by_failure["sftp2.regulator.example"]
+    if len(refused) != 1 or miner.templates[next(iter(refused))] != "Connection to <*> refused".split(" "):
+        print(f"  FAIL: refusals by two hosts gave {[' '.join(miner.templates[t]) for t in refused]}")
+        failures += 1
+    if len(by_failure["remote"]) != 1:
+        print(f"  FAIL: {len(by_failure['remote'])} templates for one remote listing failure, expected 1")
+        failures += 1
+    groups = [by_failure[name] for name in ("sftp", "lease", "remote", "timeout")] + [refused]
+    if len(set().union(*groups)) != len(groups):
+        print("  FAIL: different failures share a template")
+        failures += 1
+
+    reloaded = TemplateMiner()
+    for template_id, tokens in miner.templates.items():
+        reloaded.load(template_id, " ".join(tokens))
+    moved = [fingerprint for fingerprint, (_, pattern) in patterns.items()
+             if reloaded.add(pattern)[0] != assigned[fingerprint]]
+    if moved:
+        print(f"  FAIL: {len(moved)} patterns changed template after a reload")
+        failures += 1
+
+    if not failures:
+        print(f"  templates: {len(patterns)} patterns -> {len(miner.templates)} templates, stable after a reload")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the OpenFlow log parser against sample events")
+    parser.add_argument("--events", type=int, default=2000, help="Generated failure events per fingerprint check")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    samples = [event("ERROR", sftp_failure(rng)) for _ in range(args.events)]
+    samples += [event("INFO", "Transferred {} files".format(i), as_text=bool(i % 2)) for i in range(args.events)]
+    samples += [("not json", {})]
+    started = time.perf_counter()
+    rows = [(sample, parse_event(*sample)) for sample in samples]
+    elapsed = time.perf_counter() - started
+
+    print(f"openflow log parser: {len(samples)} events in {elapsed:.2f} s ({len(samples) / elapsed:,.0f} events/s)")
+    failures = (check_columns(rows) + check_values() + check_fingerprints(rng, args.events)
+                + check_templates(rng, args.events // 10))
+    if failures:
+        print(f"\n{failures} check(s) failed")
+        sys.exit(1)
+    print("\nEvery event was parsed into typed columns and repeated failures share a fingerprint and a template")
+
+
+if __name__ == "__main__":
+    main()
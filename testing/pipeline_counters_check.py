@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+"""
+Local stand-in check for REFRESH_PIPELINE_COUNTERS (sql/10_pipeline_counters.sql).
+
+Runs the refresh logic against an in-memory DuckDB database once per
+simulated minute while transactions arrive, and after every run compares
+PIPELINE_COUNTERS and PIPELINE_LAG_MINUTE with full scans:
+
+  counters  - every stage's ROW_COUNT equals COUNT(*) over its table (the
+              stream backlog and UPLOADED batches included)
+  lag       - per-minute lag buckets (summed over their inserted-at slices)
+              equal a GROUP BY over all of POKER for the last 24 hours, and
+              ROWS_1H / AVG_LAG_1H_SEC / MAX_LAG_1H_SEC equal a scan of the
+              last hour
+
+Each minute brings on-time rows plus:
+
+  late events   - rows created hours earlier that are replicated now, so
+                  they land in buckets that already have samples
+  late visible  - rows whose _SNOWFLAKE_INSERTED_AT is up to --late-minutes
+                  before the previous run's watermark (they became visible
+                  after it); must be within the procedure's overlap
+  consumed      - every few minutes the stream is consumed, as
+                  PROCESS_STAGED_BATCHES would, and batches are created and
+                  uploaded, so 'Stream Pending' drops back to zero
+
+DuckDB has no streams or INFORMATION_SCHEMA.TABLES.ROW_COUNT. The stream
+stands in as the DT rows past a consumed offset, and ROW_COUNT as
+duckdb_tables().estimated_size (also table metadata, not a scan).
+CURRENT_TIMESTAMP() is the simulated clock.
+
+Requires duckdb (pip install duckdb); it is only needed for this check.
+
+Usage:
+    python testing/pipeline_counters_check.py
+    python testing/pipeline_counters_check.py --minutes 240 --rows-per-minute 500
+"""
+
+import argparse
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+try:
+    import duckdb
+except ImportError:
+    sys.exit("duckdb is required for this check: pip install duckdb")
+
+START = datetime(2026, 3, 14, 9, 0, 0)
+# Must match overlap_minutes in REFRESH_PIPELINE_COUNTERS
+OVERLAP_MINUTES = 5
+
+DDL = """
+CREATE TABLE POKER (
+    TRANSACTION_ID VARCHAR,
+    CREATED_TIMESTAMP TIMESTAMP,
+    _SNOWFLAKE_INSERTED_AT TIMESTAMP
+);
+CREATE TABLE DT_POKER_FLATTENED (
+    SEQ BIGINT,
+    TRANSACTION_ID VARCHAR,
+    CREATED_TIMESTAMP TIMESTAMP
+);
+CREATE TABLE STREAM_OFFSET (CONSUMED_SEQ BIGINT);
+INSERT INTO STREAM_OFFSET VALUES (0);
+CREATE VIEW POKER_TRANSACTIONS_STREAM AS
+    SELECT d.* FROM DT_POKER_FLATTENED d, STREAM_OFFSET o WHERE d.SEQ > o.CONSUMED_SEQ;
+CREATE TABLE REGULATORY_BATCHES (
+    BATCH_ID VARCHAR PRIMARY KEY,
+    BATCH_TIMESTAMP TIMESTAMP,
+    TRANSACTION_COUNT BIGINT,
+    STATUS VARCHAR,
+    UPLOAD_TIMESTAMP TIMESTAMP
+);
+CREATE TABLE PIPELINE_COUNTERS (
+    STAGE VARCHAR PRIMARY KEY,
+    STAGE_ORDER INTEGER,
+    ROW_COUNT BIGINT,
+    LAST_INSERTED_AT TIMESTAMP,
+    WATERMARK TIMESTAMP,
+    ROWS_1H BIGINT,
+    AVG_LAG_1H_SEC DECIMAL(10,1),
+    MAX_LAG_1H_SEC DECIMAL(10,1),
+    UPDATED_AT TIMESTAMP
+);
+CREATE TABLE PIPELINE_LAG_MINUTE (
+    MINUTE_TS TIMESTAMP NOT NULL,
+    INSERTED_MINUTE TIMESTAMP NOT NULL,
+    LAG_SUM_SEC BIGINT,
+    LAG_MAX_SEC BIGINT,
+    SAMPLES BIGINT,
+    PRIMARY KEY (MINUTE_TS, INSERTED_MINUTE)
+);
+"""
+
+COUNTERS = """
+INSERT OR REPLACE INTO PIPELINE_COUNTERS
+WITH table_meta AS (
+    SELECT table_name as TABLE_NAME, estimated_size as ROW_COUNT
+    FROM duckdb_tables()
+    WHERE table_name IN ('POKER', 'DT_POKER_FLATTENED', 'REGULATORY_BATCHES')
+),
+lag_1h AS (
+    SELECT
+        SUM(SAMPLES) as ROWS_1H,
+        ROUND(SUM(LAG_SUM_SEC) / NULLIF(SUM(SAMPLES), 0), 1) as AVG_LAG_1H_SEC,
+        MAX(LAG_MAX_SEC) as MAX_LAG_1H_SEC
+    FROM PIPELINE_LAG_MINUTE
+    WHERE MINUTE_TS > $now - INTERVAL 1 HOUR
+),
+batches AS (
+    SELECT
+        SUM(CASE WHEN STATUS = 'UPLOADED' THEN 1 ELSE 0 END) as UPLOADED,
+        MAX(BATCH_TIMESTAMP) as LAST_BATCH,
+        MAX(UPLOAD_TIMESTAMP) as LAST_UPLOAD
+    FROM REGULATORY_BATCHES
+)
+SELECT STAGE, STAGE_ORDER, COALESCE(ROW_COUNT, 0), LAST_INSERTED_AT, WATERMARK,
+       ROWS_1H, AVG_LAG_1H_SEC, MAX_LAG_1H_SEC, $now
+FROM (
+    SELECT 'CDC Source' as STAGE, 1 as STAGE_ORDER,
+           (SELECT ROW_COUNT FROM table_meta WHERE TABLE_NAME = 'POKER') as ROW_COUNT,
+           $new_watermark as LAST_INSERTED_AT, $new_watermark as WATERMARK,
+           (SELECT ROWS_1H FROM lag_1h) as ROWS_1H,
+           (SELECT AVG_LAG_1H_SEC FROM lag_1h) as AVG_LAG_1H_SEC,
+           (SELECT MAX_LAG_1H_SEC FROM lag_1h) as MAX_LAG_1H_SEC
+    UNION ALL
+    SELECT 'Dynamic Table', 2,
+           (SELECT ROW_COUNT FROM table_meta WHERE TABLE_NAME = 'DT_POKER_FLATTENED'),
+           NULL, NULL, NULL, NULL, NULL
+    UNION ALL
+    SELECT 'Stream Pending', 3,
+           (SELECT COUNT(*) FROM POKER_TRANSACTIONS_STREAM),
+           NULL, NULL, NULL, NULL, NULL
+    UNION ALL
+    SELECT 'Batches Created', 4,
+           (SELECT ROW_COUNT FROM table_meta WHERE TABLE_NAME = 'REGULATORY_BATCHES'),
+           (SELECT LAST_BATCH FROM batches),
+           NULL, NULL, NULL, NULL
+    UNION ALL
+    SELECT 'Batches Uploaded', 5,
+           (SELECT UPLOADED FROM batches),
+           (SELECT LAST_UPLOAD FROM batches),
+           NULL, NULL, NULL, NULL
+)
+"""
+
+
+def refresh_pipeline_counters(con, now):
+    """REFRESH_PIPELINE_COUNTERS with CURRENT_TIMESTAMP() = now; returns the new CDC row count."""
+    cdc_watermark = con.execute("""
+        SELECT COALESCE(MAX(WATERMARK), TIMESTAMP '1970-01-01')
+        FROM PIPELINE_COUNTERS WHERE STAGE = 'CDC Source'
+    """).fetchone()[0]
+
+    slice_start = con.execute("""
+        SELECT CASE
+                   WHEN EXISTS (SELECT 1 FROM PIPELINE_LAG_MINUTE)
+                   THEN DATE_TRUNC('minute', $wm - to_minutes($overlap))
+                   ELSE DATE_TRUNC('minute', $now - INTERVAL 1 DAY)
+               END
+    """, {"wm": cdc_watermark, "overlap": OVERLAP_MINUTES, "now": now}).fetchone()[0]
+
+    new_watermark, new_rows = con.execute("""
+        SELECT GREATEST(COALESCE(MAX(_SNOWFLAKE_INSERTED_AT), $wm), $wm),
+               COUNT(*) FILTER (WHERE _SNOWFLAKE_INSERTED_AT > $wm)
+        FROM POKER
+        WHERE _SNOWFLAKE_INSERTED_AT >= $slice_start
+    """, {"wm": cdc_watermark, "slice_start": slice_start}).fetchone()
+
+    con.execute("BEGIN TRANSACTION")
+    con.execute("DELETE FROM PIPELINE_LAG_MINUTE WHERE INSERTED_MINUTE >= ?", [slice_start])
+    con.execute("""
+        INSERT INTO PIPELINE_LAG_MINUTE (MINUTE_TS, INSERTED_MINUTE, LAG_SUM_SEC, LAG_MAX_SEC, SAMPLES)
+        SELECT
+            DATE_TRUNC('minute', CREATED_TIMESTAMP),
+            DATE_TRUNC('minute', _SNOWFLAKE_INSERTED_AT),
+            SUM(date_diff('second', CREATED_TIMESTAMP, _SNOWFLAKE_INSERTED_AT)),
+            MAX(date_diff('second', CREATED_TIMESTAMP, _SNOWFLAKE_INSERTED_AT)),
+            COUNT(*)
+        FROM POKER
+        WHERE _SNOWFLAKE_INSERTED_AT >= ?
+        GROUP BY 1, 2
+    """, [slice_start])
+    con.execute("COMMIT")
+
+    con.execute("DELETE FROM PIPELINE_LAG_MINUTE WHERE MINUTE_TS < ? - INTERVAL 1 DAY", [now])
+    con.execute(COUNTERS, {"now": now, "new_watermark": new_watermark})
+    return new_rows
+
+
+class Source:
+    """Deterministic CDC arrivals, dynamic table refreshes, stream consumption and batches."""
+
+    def __init__(self, con, args):
+        self.con = con
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.txn = 0
+        self.seq = 0
+        self.batches = 0
+
+    def insert(self, rows):
+        self.con.executemany("INSERT INTO POKER VALUES (?, ?, ?)", rows)
+
+    def arrive(self, now, watermark):
+        """One minute of replication ending at `now`; returns (on time, late events, late visible)."""
+        rows = []
+        for _ in range(self.args.rows_per_minute):
+            inserted = now - timedelta(seconds=self.rng.uniform(0, 60))
+            rows.append(self.row(inserted, self.rng.uniform(1, 30)))
+        late_events = []
+        for _ in range(self.rng.randrange(0, self.args.rows_per_minute // 10 + 1)):
+            # Created up to a day and a half ago: some in existing buckets, some past retention
+            late_events.append(self.row(now - timedelta(seconds=self.rng.uniform(0, 60)),
+                                        self.rng.uniform(60, 36 * 3600)))
+        late_visible = []
+        if watermark is not None:
+            for _ in range(self.rng.randrange(0, self.args.rows_per_minute // 20 + 1)):
+                inserted = watermark - timedelta(seconds=self.rng.uniform(0, self.args.late_minutes * 60))
+                late_visible.append(self.row(inserted, self.rng.uniform(1, 30)))
+        self.insert(rows + late_events + late_visible)
+        return len(rows), len(late_events), len(late_visible)
+
+    def row(self, inserted, lag_sec):
+        self.txn += 1
+        return (f"TXN_{self.txn}", inserted - timedelta(seconds=lag_sec), inserted)
+
+    def refresh_dynamic_table(self):
+        self.con.execute("""
+            INSERT INTO DT_POKER_FLATTENED
+            SELECT ? + row_number() OVER (ORDER BY TRANSACTION_ID), TRANSACTION_ID, CREATED_TIMESTAMP
+            FROM POKER WHERE TRANSACTION_ID NOT IN (SELECT TRANSACTION_ID FROM DT_POKER_FLATTENED)
+        """, [self.seq])
+        self.seq = self.con.execute("SELECT COALESCE(MAX(SEQ), 0) FROM DT_POKER_FLATTENED").fetchone()[0]
+
+    def consume_stream(self, now):
+        """Read the stream into batches and advance its offset, as PROCESS_STAGED_BATCHES would."""
+        pending = self.con.execute("SELECT COUNT(*) FROM POKER_TRANSACTIONS_STREAM").fetchone()[0]
+        self.con.execute("BEGIN TRANSACTION")
+        for start in range(0, pending, self.args.batch_size):
+            self.batches += 1
+            self.con.execute("INSERT INTO REGULATORY_BATCHES VALUES (?, ?, ?, 'GENERATED', NULL)",
+                             [f"batch-{self.batches:06d}", now, min(self.args.batch_size, pending - start)])
+        self.con.execute("UPDATE STREAM_OFFSET SET CONSUMED_SEQ = ?", [self.seq])
+        self.con.execute("COMMIT")
+        # Upload roughly two thirds of what is waiting
+        self.con.execute("""
+            UPDATE REGULATORY_BATCHES SET STATUS = 'UPLOADED', UPLOAD_TIMESTAMP = ?
+            WHERE STATUS = 'GENERATED' AND hash(BATCH_ID) % 3 <> 0
+        """, [now])
+        return pending
+
+
+def compare(con, now):
+    """Counters and lag buckets against full scans; returns a list of mismatch descriptions."""
+    failures = []
+    scans = dict(con.execute("""
+        SELECT 'CDC Source', COUNT(*) FROM POKER
+        UNION ALL SELECT 'Dynamic Table', COUNT(*) FROM DT_POKER_FLATTENED
+        UNION ALL SELECT 'Stream Pending', COUNT(*) FROM POKER_TRANSACTIONS_STREAM
+        UNION ALL SELECT 'Batches Created', COUNT(*) FROM REGULATORY_BATCHES
+        UNION ALL SELECT 'Batches Uploaded', COUNT(*) FILTER (WHERE STATUS = 'UPLOADED') FROM REGULATORY_BATCHES
+    """).fetchall())
+    counters = dict(con.execute("SELECT STAGE, ROW_COUNT FROM PIPELINE_COUNTERS").fetchall())
+    for stage, scan in scans.items():
+        if counters.get(stage) != scan:
+            failures.append(f"{stage}: counter {counters.get(stage)} != COUNT(*) {scan}")
+
+    buckets = con.execute("""
+        SELECT MINUTE_TS, SUM(LAG_SUM_SEC), MAX(LAG_MAX_SEC), SUM(SAMPLES)
+        FROM PIPELINE_LAG_MINUTE
+        WHERE MINUTE_TS >= ? - INTERVAL 1 DAY
+        GROUP BY 1 ORDER BY 1
+    """, [now]).fetchall()
+    recompute = con.execute("""
+        SELECT DATE_TRUNC('minute', CREATED_TIMESTAMP) as MINUTE_TS,
+               SUM(date_diff('second', CREATED_TIMESTAMP, _SNOWFLAKE_INSERTED_AT)),
+               MAX(date_diff('second', CREATED_TIMESTAMP, _SNOWFLAKE_INSERTED_AT)),
+               COUNT(*)
+        FROM POKER
+        WHERE DATE_TRUNC('minute', CREATED_TIMESTAMP) >= ? - INTERVAL 1 DAY
+        GROUP BY 1 ORDER BY 1
+    """, [now]).fetchall()
+    if buckets != recompute:
+        differing = sorted(set(buckets) ^ set(recompute))
+        failures.append(f"PIPELINE_LAG_MINUTE: {len(differing)} bucket(s) differ from a full recompute "
+                        f"(first: {differing[0]})")
+
+    counter_lag = con.execute("""
+        SELECT ROWS_1H, AVG_LAG_1H_SEC, MAX_LAG_1H_SEC FROM PIPELINE_COUNTERS WHERE STAGE = 'CDC Source'
+    """).fetchone()
+    scan_lag = con.execute("""
+        SELECT COUNT(*),
+               ROUND(SUM(date_diff('second', CREATED_TIMESTAMP, _SNOWFLAKE_INSERTED_AT)) / COUNT(*), 1)::DECIMAL(10,1),
+               MAX(date_diff('second', CREATED_TIMESTAMP, _SNOWFLAKE_INSERTED_AT))::DECIMAL(10,1)
+        FROM POKER
+        WHERE DATE_TRUNC('minute', CREATED_TIMESTAMP) > ? - INTERVAL 1 HOUR
+    """, [now]).fetchone()
+    if tuple(counter_lag) != tuple(scan_lag):
+        failures.append(f"CDC lag (last hour): counters {counter_lag} != scan {scan_lag}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check REFRESH_PIPELINE_COUNTERS against full scans")
+    parser.add_argument("--minutes", type=int, default=120, help="Simulated refresh runs, one per minute")
+    parser.add_argument("--rows-per-minute", type=int, default=200)
+    parser.add_argument("--late-minutes", type=float, default=OVERLAP_MINUTES - 1,
+                        help="How far before the watermark late-visible rows are inserted")
+    parser.add_argument("--consume-every", type=int, default=7, help="Minutes between stream consumptions")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=20260314)
+    args = parser.parse_args()
+
+    con = duckdb.connect()
+    con.execute(DDL)
+    source = Source(con, args)
+
+    failures = []
+    totals = {"on time": 0, "late events": 0, "late visible": 0, "consumed": 0}
+    refresh_sec = 0.0
+    watermark = None
+    for minute in range(1, args.minutes + 1):
+        now = START + timedelta(minutes=minute)
+        on_time, late_events, late_visible = source.arrive(now, watermark)
+        totals["on time"] += on_time
+        totals["late events"] += late_events
+        totals["late visible"] += late_visible
+        source.refresh_dynamic_table()
+        if minute % args.consume_every == 0:
+            totals["consumed"] += source.consume_stream(now)
+
+        started = time.perf_counter()
+        refresh_pipeline_counters(con, now)
+        refresh_sec += time.perf_counter() - started
+        watermark = con.execute("SELECT WATERMARK FROM PIPELINE_COUNTERS WHERE STAGE = 'CDC Source'").fetchone()[0]
+
+        failures += [f"minute {minute}: {failure}" for failure in compare(con, now)]
+
+    # The last run consumed the stream; the counter must say so
+    source.consume_stream(now)
+    refresh_pipeline_counters(con, now)
+    failures += [f"after consuming: {failure}" for failure in compare(con, now)]
+    pending = con.execute("SELECT ROW_COUNT FROM PIPELINE_COUNTERS WHERE STAGE = 'Stream Pending'").fetchone()[0]
+    if pending:
+        failures.append(f"Stream Pending is {pending} after the stream was consumed")
+
+    print(f"{args.minutes} refreshes: {totals['on time']} on-time rows, {totals['late events']} late events, "
+          f"{totals['late visible']} late-visible rows (up to {args.late_minutes:g} min behind the watermark), "
+          f"{totals['consumed']} stream rows consumed")
+    print(f"buckets: {con.execute('SELECT COUNT(*) FROM PIPELINE_LAG_MINUTE').fetchone()[0]} minute slices; "
+          f"refresh {refresh_sec / (args.minutes + 1) * 1000:.1f} ms per run")
+    for row in con.execute("SELECT STAGE, ROW_COUNT, ROWS_1H, AVG_LAG_1H_SEC, MAX_LAG_1H_SEC "
+                           "FROM PIPELINE_COUNTERS ORDER BY STAGE_ORDER").fetchall():
+        print("  " + "  ".join("" if v is None else str(v) for v in row))
+
+    if failures:
+        for failure in failures[:20]:
+            print("FAIL " + failure)
+        print(f"\n{len(failures)} mismatch(es)")
+        sys.exit(1)
+    print(f"\nCounters matched COUNT(*) and lag buckets matched a full recompute after all {args.minutes + 1} refreshes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Offline render benchmark for the Pipeline Monitor (streamlit/pipeline_monitor.py).
+
+Runs the app headless with Streamlit's AppTest against the DuckDB stand-in
+session from testing/local_session.py (injected through
+st.session_state["snowpark_session"]) and reports, per tab, render time and
+the number of queries that reached the "warehouse", read from the app's own
+panel profile (see Panel Diagnostics in streamlit/README.md).
+
+  cold  - first run with st.cache_data / st.cache_resource cleared
+  warm  - following runs in the same browser session (median of --runs)
+
+Checks:
+  - the script raises nothing and renders no st.error / st.warning
+  - no panel query failed against the stand-in
+  - with --baseline: no tab issues more queries than the baseline, and no
+    tab is slower than baseline * (1 + --tolerance) + --slack-ms
+
+Timings depend on the machine; write a baseline on the machine that checks
+against it (--write-baseline) and keep the committed one for query counts.
+
+Requires streamlit >= 1.28 (streamlit.testing) and duckdb.
+
+Usage:
+    python testing/pipeline_monitor_benchmark.py
+    python testing/pipeline_monitor_benchmark.py --transactions 1000000 --batches 50000
+    python testing/pipeline_monitor_benchmark.py --baseline testing/pipeline_monitor_baseline.json
+    python testing/pipeline_monitor_benchmark.py --write-baseline testing/pipeline_monitor_baseline.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import statistics
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "testing"))
+
+from local_session import DEFAULT_SCALE, LocalSession  # noqa: E402
+
+try:
+    import streamlit as st
+    from streamlit.testing.v1 import AppTest
+except ImportError:
+    sys.exit("streamlit >= 1.28 is required for this benchmark: pip install streamlit")
+
+# Deprecation notices from newer Streamlit releases would drown the report
+logging.disable(logging.WARNING)
+
+APP = os.path.join(ROOT, "streamlit", "pipeline_monitor.py")
+
+
+def render(at):
+    """One script run; returns its render record from the app's panel profile"""
+    at.run()
+    if at.exception:
+        raise RuntimeError(f"app raised: {at.exception[0].value}")
+    # The app reports failed panels through st.error / st.warning
+    errors = [e.value for e in at.error] + [w.value for w in at.warning]
+    if errors:
+        raise RuntimeError(f"app rendered errors: {errors}")
+    profile = at.session_state["panel_profile"]
+    render = profile["renders"][-1]
+    failed = [q for q in profile["queries"] if q["render"] == render["render"] and q["error"]]
+    if failed:
+        raise RuntimeError("queries failed: " + "; ".join(f"{q['panel']}: {q['error']}" for q in failed))
+    return render
+
+
+def run_benchmark(session, runs, timeout):
+    st.cache_data.clear()
+    st.cache_resource.clear()
+    at = AppTest.from_file(APP, default_timeout=timeout)
+    at.session_state["snowpark_session"] = session
+
+    cold = render(at)
+    warm = [render(at) for _ in range(runs)]
+
+    result = {"cold": {}, "warm": {}}
+    for tab, t in cold["tabs"].items():
+        result["cold"][tab] = {"ms": t["ms"], "queries": t["queries"]}
+    for tab in warm[0]["tabs"]:
+        result["warm"][tab] = {
+            "ms": round(statistics.median(r["tabs"][tab]["ms"] for r in warm), 1),
+            "queries": max(r["tabs"][tab]["queries"] for r in warm),
+        }
+    result["cold_total_ms"] = cold["ms"]
+    result["warm_total_ms"] = round(statistics.median(r["ms"] for r in warm), 1)
+    return result
+
+
+def print_result(result):
+    print(f"\n{'Tab':<14} {'cold ms':>9} {'queries':>8} {'warm ms':>9} {'queries':>8}")
+    print("-" * 52)
+    for tab, cold in result["cold"].items():
+        warm = result["warm"].get(tab, {"ms": 0, "queries": 0})
+        print(f"{tab:<14} {cold['ms']:>9.1f} {cold['queries']:>8} {warm['ms']:>9.1f} {warm['queries']:>8}")
+    print("-" * 52)
+    print(f"{'TOTAL':<14} {result['cold_total_ms']:>9.1f} "
+          f"{sum(t['queries'] for t in result['cold'].values()):>8} {result['warm_total_ms']:>9.1f} "
+          f"{sum(t['queries'] for t in result['warm'].values()):>8}")
+
+
+def compare(result, baseline, tolerance, slack_ms):
+    """Regressions against a baseline, as printable strings"""
+    regressions = []
+    for phase in ("cold", "warm"):
+        for tab, base in baseline[phase].items():
+            now = result[phase].get(tab)
+            if now is None:
+                continue
+            if now["queries"] > base["queries"]:
+                regressions.append(f"{phase} {tab}: {now['queries']} queries (baseline {base['queries']})")
+            limit = base["ms"] * (1 + tolerance) + slack_ms
+            if now["ms"] > limit:
+                regressions.append(f"{phase} {tab}: {now['ms']:.1f} ms (baseline {base['ms']:.1f}, limit {limit:.1f})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Pipeline Monitor renders against a local session")
+    parser.add_argument("--transactions", type=int, default=DEFAULT_SCALE["transactions"])
+    parser.add_argument("--batches", type=int, default=DEFAULT_SCALE["batches"])
+    parser.add_argument("--log-events", type=int, default=DEFAULT_SCALE["log_events"])
+    parser.add_argument("--runs", type=int, default=3, help="Warm runs after the cold one")
+    parser.add_argument("--timeout", type=float, default=120, help="Seconds allowed per script run")
+    parser.add_argument("--baseline", help="Fail on regressions against this baseline JSON")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="Allowed relative slowdown per tab")
+    parser.add_argument("--slack-ms", type=float, default=50, help="Allowed absolute slowdown per tab")
+    parser.add_argument("--write-baseline", help="Write this run's results as a baseline JSON")
+    args = parser.parse_args()
+
+    session = LocalSession(args.transactions, args.batches, args.log_events)
+    print(f"Local session: {args.transactions:,} transactions, {args.batches:,} batches, "
+          f"{args.log_events:,} log events (built in {session.build_sec:.1f}s)")
+
+    try:
+        result = run_benchmark(session, args.runs, args.timeout)
+    except RuntimeError as e:
+        print(f"FAIL: {e}")
+        sys.exit(1)
+    result["scale"] = session.scale
+    print_result(result)
+    print(f"\n{len(session.queries)} statements reached the local session")
+
+    if args.write_baseline:
+        with open(args.write_baseline, "w") as f:
+            json.dump(result, f, indent=2)
+            f.write("\n")
+        print(f"Baseline written to {args.write_baseline}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get("scale") != session.scale:
+            print(f"WARNING: baseline scale {baseline.get('scale')} differs from this run's {session.scale}")
+        regressions = compare(result, baseline, args.tolerance, args.slack_ms)
+        if regressions:
+            print("\nRegressions against the baseline:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"\nNo regressions against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,628 @@
+#!/usr/bin/env python3
+"""
+Offline end-to-end simulator and throughput benchmark for the regulatory
+pipeline, from stream rows to delivered archives.
+
+Each stage runs on its own worker threads (the processor's concurrent tasks)
+and hands work to the next through a bounded queue, so a slow stage backs up
+the ones before it the way NiFi back pressure does:
+
+  source    - GeneratePokerTransactions blocks (custom_processors/
+              GeneratePokerTransactions), decoded to stream rows; --rate
+              throttles the load
+  stage     - MergeRecord + PutDatabaseRecord: bins rows into batches of
+              --batch-size (or --max-batch-age) and inserts them into
+              BATCH_STAGING
+  xml       - PROCESS_STAGED_BATCH: reads the batch ordered by TRANSACTION_ID,
+              builds the lote with sql/python/poker_xml.py (the Python port of
+              GENERATE_POKER_XML_JS), inserts REGULATORY_BATCHES and clears
+              BATCH_STAGING
+  validate  - ValidateXml against source_documents/DGOJ_Monitorizacion_3.3.xsd
+  prepare   - the PrepareRegulatoryFile processor itself (XAdES-BES signature,
+              AES-256 ZIP), driven through testing/nifiapi_stub.py with a
+              throwaway certificate
+  deliver   - SFTP stand-in: writes uploads/YYYY/MM/DD/<file>.part in a local
+              drop directory, renames it and marks the batch UPLOADED
+
+Tables are SQLite stand-ins for the Snowflake tables (one connection per
+worker). --db-latency-ms and --sftp-latency-ms add a fixed delay per
+statement and per upload to stand in for the round trips of the real
+systems.
+
+Reports per-stage throughput, utilization and service times, queue depths,
+and the end-to-end latency of every record (generated to delivered). The
+stage with the lowest capacity (records per busy second times workers) is
+the bottleneck. --batch-sizes runs the simulation once per batch size and
+compares them. --benchmark-json writes the measured service time per batch
+of the validate, prepare and deliver stages in the format that
+testing/flow_capacity.py reads, keyed by the BoeGamingReport processors they
+stand in for.
+
+Requires numpy, lxml, signxml, cryptography and pyzipper (the generator's
+and PrepareRegulatoryFile's dependencies).
+
+Usage:
+    python testing/pipeline_simulator.py
+    python testing/pipeline_simulator.py --records 100000 --rate 5000 --workers prepare=4 deliver=2
+    python testing/pipeline_simulator.py --batch-sizes 100 500 2000 --db-latency-ms 50
+    python testing/pipeline_simulator.py --sftp-latency-ms 40 --benchmark-json bench.json
+"""
+
+import argparse
+import datetime
+import json
+import os
+import queue
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.abspath(os.path.dirname(__file__)))
+GENERATOR_DIR = os.path.join(ROOT, "custom_processors", "GeneratePokerTransactions", "src", "generate_poker_transactions")
+PREPARE_DIR = os.path.join(ROOT, "custom_processors", "PrepareRegulatoryFile", "src", "prepare_regulatory_file")
+sys.path.insert(0, os.path.join(ROOT, "sql", "python"))
+sys.path.insert(0, GENERATOR_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from nifiapi_stub import FlowFile, ProcessContext, load_processor  # noqa: E402
+from poker_generator import PokerSchema, PokerTransactionGenerator, encode  # noqa: E402
+from poker_xml import generate_poker_xml_columns  # noqa: E402
+
+SCHEMA_PATH = os.path.join(ROOT, "setup", "schema_GeneratePokerTransactions.json")
+XSD_PATH = os.path.join(ROOT, "source_documents", "DGOJ_Monitorizacion_3.3.xsd")
+STAGES = ("source", "stage", "xml", "validate", "prepare", "deliver")
+OPERATOR_ID = "OP01"
+WAREHOUSE_ID = "WH001"
+ZIP_PASSWORD = "Sim#Pipeline$2026&Regulatory!Demo#Only$Not&Secret!"
+POLL_SECONDS = 0.05
+STOP = object()
+
+DDL = """
+CREATE TABLE IF NOT EXISTS BATCH_STAGING (
+    TRANSACTION_ID TEXT,
+    CREATED_TIMESTAMP TEXT,
+    TOURNAMENT_ID TEXT,
+    PLAYER_ID TEXT,
+    BET_AMOUNT REAL,
+    REFUND_AMOUNT REAL,
+    WIN_AMOUNT REAL,
+    PLAYER_IP TEXT,
+    DEVICE_TYPE TEXT,
+    DEVICE_ID TEXT,
+    BATCH_ID TEXT
+);
+CREATE INDEX IF NOT EXISTS BATCH_STAGING_BATCH ON BATCH_STAGING (BATCH_ID);
+CREATE TABLE IF NOT EXISTS REGULATORY_BATCHES (
+    BATCH_ID TEXT PRIMARY KEY,
+    OPERATOR_ID TEXT,
+    WAREHOUSE_ID TEXT,
+    BATCH_TIMESTAMP TEXT,
+    TRANSACTION_COUNT INTEGER,
+    GENERATED_XML TEXT,
+    STATUS TEXT,
+    UPLOAD_TIMESTAMP TEXT,
+    GENERATED_FILENAME TEXT,
+    SFTP_DIRECTORY_PATH TEXT
+);
+"""
+
+
+class Work:
+    """What travels between stages: rows (source blocks) or one batch, with each record's creation time."""
+
+    def __init__(self, records, created, rows=None, batch_id=None):
+        self.records = records
+        self.created = created
+        self.rows = rows
+        self.batch_id = batch_id
+        self.xml = None
+        self.archive = None
+        self.filename = None
+        self.directory = None
+
+
+class Stage:
+    """A stage's worker threads, reading `inbox` and writing `outbox`, with timing."""
+
+    def __init__(self, name, workers, handle, inbox, outbox, idle=None, finish=None):
+        self.name = name
+        self.workers = workers
+        self.handle = handle
+        self.inbox = inbox
+        self.outbox = outbox
+        self.idle = idle
+        self.finish = finish
+        self.items = 0
+        self.records = 0
+        self.busy = 0.0
+        self.blocked = 0.0
+        self.service = []
+        self.failed = 0
+        self._lock = threading.Lock()
+        self._running = workers
+        self._threads = [threading.Thread(target=self._run, name=f"{name}-{i}", daemon=True) for i in range(workers)]
+
+    def start(self):
+        for thread in self._threads:
+            thread.start()
+
+    def join(self):
+        for thread in self._threads:
+            thread.join()
+
+    def _timed(self, fn, *args):
+        started = time.perf_counter()
+        try:
+            outputs = fn(*args)
+        except Exception as e:
+            # A dead worker would stop draining its queue and stall the run
+            print(f"  {self.name} failed: {e}", file=sys.stderr)
+            outputs = [None]
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self.busy += elapsed
+            for work in outputs or []:
+                self.items += 1
+                self.records += work.records
+                self.service.append(elapsed / len(outputs))
+        return outputs or []
+
+    def _emit(self, outputs):
+        for work in outputs:
+            if work is None:
+                with self._lock:
+                    self.failed += 1
+                continue
+            if self.outbox is None:
+                continue
+            started = time.perf_counter()
+            self.outbox.put(work)
+            with self._lock:
+                self.blocked += time.perf_counter() - started
+
+    def _run(self):
+        while True:
+            try:
+                work = self.inbox.get(timeout=POLL_SECONDS)
+            except queue.Empty:
+                if self.idle:
+                    self._emit(self._timed(self.idle))
+                continue
+            if work is STOP:
+                self.inbox.put(STOP)
+                break
+            self._emit(self._timed(self.handle, work))
+
+        with self._lock:
+            self._running -= 1
+            last = self._running == 0
+        if last:
+            if self.finish:
+                self._emit(self._timed(self.finish))
+            if self.outbox is not None:
+                self.outbox.put(STOP)
+
+
+class Database:
+    """SQLite stand-in for the Snowflake tables, one connection per thread."""
+
+    def __init__(self, path, latency):
+        self.path = path
+        self.latency = latency
+        self._local = threading.local()
+        with sqlite3.connect(path) as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.executescript(DDL)
+
+    def connection(self):
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+
+    def round_trip(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+
+def make_credentials(directory):
+    """Throwaway self-signed certificate and key for PrepareRegulatoryFile."""
+    from cryptography import x509
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import rsa
+    from cryptography.x509.oid import NameOID
+
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "Pipeline Simulator")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (x509.CertificateBuilder().subject_name(name).issuer_name(name).public_key(key.public_key())
+            .serial_number(x509.random_serial_number())
+            .not_valid_before(now - datetime.timedelta(days=1)).not_valid_after(now + datetime.timedelta(days=30))
+            .sign(key, hashes.SHA256()))
+
+    cert_path = os.path.join(directory, "simulator_cert.pem")
+    key_path = os.path.join(directory, "simulator_key.pem")
+    with open(cert_path, "wb") as f:
+        f.write(cert.public_bytes(serialization.Encoding.PEM))
+    with open(key_path, "wb") as f:
+        f.write(key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8,
+                                  serialization.NoEncryption()))
+    return cert_path, key_path
+
+
+class Pipeline:
+    """Wires the stages together for one run."""
+
+    def __init__(self, args, batch_size, workdir, credentials):
+        self.args = args
+        self.batch_size = batch_size
+        self.db = Database(os.path.join(workdir, "pipeline.db"), args.db_latency_ms / 1000)
+        self.drop = os.path.join(workdir, "sftp")
+        self.generator = PokerTransactionGenerator(PokerSchema.load(SCHEMA_PATH), seed=args.seed,
+                                                   hot_tournaments=args.hot_tournaments, hot_share=args.hot_share,
+                                                   whale_players=args.whale_players, whale_share=args.whale_share)
+        self.bin = []
+        self.bin_created = []
+        self.bin_opened = None
+        self.latencies = []
+        self.delivered = []
+        self._delivered_lock = threading.Lock()
+        self._schema = threading.local()
+
+        cert_path, key_path = credentials
+        self.processor = load_processor(PREPARE_DIR, "PrepareRegulatoryFile")
+        self.context = ProcessContext(self.processor, {
+            "Certificate Path": cert_path,
+            "Private Key Path": key_path,
+            "ZIP Encryption Password": ZIP_PASSWORD,
+            "XML Filename": "enveloped.xml",
+        })
+
+        workers = dict(stage=1, xml=1, validate=1, prepare=1, deliver=1)
+        workers.update(args.workers)
+        capacity = args.queue_capacity
+        self.queues = {name: queue.Queue(maxsize=capacity) for name in STAGES[1:]}
+        self.stages = [
+            Stage("stage", workers["stage"], self.stage, self.queues["stage"], self.queues["xml"],
+                  idle=self.stage_idle, finish=self.stage_flush),
+            Stage("xml", workers["xml"], self.build_xml, self.queues["xml"], self.queues["validate"]),
+            Stage("validate", workers["validate"], self.validate, self.queues["validate"], self.queues["prepare"]),
+            Stage("prepare", workers["prepare"], self.prepare, self.queues["prepare"], self.queues["deliver"]),
+            Stage("deliver", workers["deliver"], self.deliver, self.queues["deliver"], None),
+        ]
+        self.source = Stage("source", 1, None, None, self.queues["stage"])
+
+    # source -------------------------------------------------------------
+
+    def run_source(self):
+        """Emit --records rows in blocks of --source-block, throttled to --rate records/s."""
+        source = self.source
+        started = time.perf_counter()
+        emitted = 0
+        index = 0
+        while emitted < self.args.records:
+            if self.args.rate:
+                delay = started + emitted / self.args.rate - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            size = min(self.args.source_block, self.args.records - emitted)
+            source._emit(source._timed(self.generate, index, size))
+            emitted += size
+            index += 1
+        source.outbox.put(STOP)
+
+    def generate(self, index, size):
+        created = time.time()
+        stamp = datetime.datetime.fromtimestamp(created, datetime.timezone.utc).isoformat(timespec="milliseconds")
+        rows = []
+        for line in encode(self.generator.block(index, size), "JSONL").splitlines():
+            record = json.loads(line)
+            data = record["transaction_data"]
+            rows.append((record["transaction_id"], stamp, data["tournament_id"], data["player_id"],
+                         data["bet_amount"], data["refund_amount"], data["win_amount"],
+                         data["player_ip"], data["device_type"], data["device_id"]))
+        return [Work(size, np.full(size, created), rows=rows)]
+
+    # stage: MergeRecord + PutDatabaseRecord ------------------------------
+
+    def stage(self, work):
+        outputs = []
+        offset = 0
+        while offset < work.records:
+            if not self.bin:
+                self.bin_opened = time.monotonic()
+            take = min(self.batch_size - len(self.bin), work.records - offset)
+            self.bin.extend(work.rows[offset:offset + take])
+            self.bin_created.append(work.created[offset:offset + take])
+            offset += take
+            if len(self.bin) >= self.batch_size:
+                outputs.append(self.stage_flush()[0])
+        return outputs
+
+    def stage_idle(self):
+        if self.bin and time.monotonic() - self.bin_opened >= self.args.max_batch_age:
+            return self.stage_flush()
+        return []
+
+    def stage_flush(self):
+        if not self.bin:
+            return []
+        batch_id = str(uuid.uuid4())
+        db = self.db.connection()
+        db.execute("BEGIN")
+        db.executemany("INSERT INTO BATCH_STAGING VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                       [row + (batch_id,) for row in self.bin])
+        db.execute("COMMIT")
+        self.db.round_trip()
+        work = Work(len(self.bin), np.concatenate(self.bin_created), batch_id=batch_id)
+        self.bin = []
+        self.bin_created = []
+        return [work]
+
+    # xml: PROCESS_STAGED_BATCH ------------------------------------------
+
+    def build_xml(self, work):
+        db = self.db.connection()
+        rows = db.execute("""
+            SELECT PLAYER_ID, BET_AMOUNT, REFUND_AMOUNT, WIN_AMOUNT, PLAYER_IP, DEVICE_TYPE, DEVICE_ID
+            FROM BATCH_STAGING WHERE BATCH_ID = ? ORDER BY TRANSACTION_ID
+        """, (work.batch_id,)).fetchall()
+        self.db.round_trip()
+        work.xml = generate_poker_xml_columns(*zip(*rows), OPERATOR_ID, WAREHOUSE_ID, work.batch_id)
+
+        now = datetime.datetime.now(datetime.timezone.utc)
+        work.filename = "{}_{}_{}.zip".format(OPERATOR_ID, WAREHOUSE_ID, work.batch_id.replace("-", ""))
+        work.directory = "uploads/" + now.strftime("%Y/%m/%d")
+        db.execute("BEGIN")
+        db.execute("""
+            INSERT INTO REGULATORY_BATCHES (BATCH_ID, OPERATOR_ID, WAREHOUSE_ID, BATCH_TIMESTAMP, TRANSACTION_COUNT,
+                                            GENERATED_XML, STATUS, GENERATED_FILENAME, SFTP_DIRECTORY_PATH)
+            VALUES (?, ?, ?, ?, ?, ?, 'GENERATED', ?, ?)
+        """, (work.batch_id, OPERATOR_ID, WAREHOUSE_ID, now.isoformat(), len(rows), work.xml,
+              work.filename, work.directory))
+        db.execute("DELETE FROM BATCH_STAGING WHERE BATCH_ID = ?", (work.batch_id,))
+        db.execute("COMMIT")
+        self.db.round_trip()
+        return [work]
+
+    # validate: ValidateXml ----------------------------------------------
+
+    def validate(self, work):
+        from lxml import etree
+
+        schema = getattr(self._schema, "xsd", None)
+        if schema is None:
+            schema = self._schema.xsd = etree.XMLSchema(etree.parse(XSD_PATH))
+        if not schema.validate(etree.fromstring(work.xml.encode("utf-8"))):
+            print(f"  batch {work.batch_id} failed XSD validation: {schema.error_log.last_error}", file=sys.stderr)
+            return [None]
+        return [work]
+
+    # prepare: PrepareRegulatoryFile -------------------------------------
+
+    def prepare(self, work):
+        result = self.processor.transform(self.context, FlowFile(work.xml.encode("utf-8"), {"meta.batchId": work.batch_id}))
+        if result.relationship != "success":
+            print(f"  batch {work.batch_id} failed in PrepareRegulatoryFile: {result.attributes.get('error.message')}",
+                  file=sys.stderr)
+            return [None]
+        work.archive = result.contents
+        work.xml = None
+        return [work]
+
+    # deliver: SFTP stand-in + acknowledgment ----------------------------
+
+    def deliver(self, work):
+        directory = os.path.join(self.drop, work.directory)
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, work.filename)
+        with open(path + ".part", "wb") as f:
+            f.write(work.archive)
+        os.replace(path + ".part", path)
+        if self.args.sftp_latency_ms:
+            time.sleep(self.args.sftp_latency_ms / 1000)
+
+        uploaded = time.time()
+        db = self.db.connection()
+        db.execute("UPDATE REGULATORY_BATCHES SET STATUS = 'UPLOADED', UPLOAD_TIMESTAMP = ? WHERE BATCH_ID = ?",
+                   (datetime.datetime.fromtimestamp(uploaded, datetime.timezone.utc).isoformat(), work.batch_id))
+        self.db.round_trip()
+        with self._delivered_lock:
+            self.latencies.append(uploaded - work.created)
+            self.delivered.append(path)
+        work.archive = None
+        return [work]
+
+    # run ----------------------------------------------------------------
+
+    def run(self):
+        samples = {name: [] for name in self.queues}
+        done = threading.Event()
+
+        def sample():
+            while not done.wait(self.args.sample_ms / 1000):
+                for name, q in self.queues.items():
+                    samples[name].append(q.qsize())
+
+        monitor = threading.Thread(target=sample, daemon=True)
+        started = time.perf_counter()
+        monitor.start()
+        for stage in self.stages:
+            stage.start()
+        source = threading.Thread(target=self.run_source, daemon=True)
+        source.start()
+        source.join()
+        for stage in self.stages:
+            stage.join()
+        elapsed = time.perf_counter() - started
+        done.set()
+        monitor.join()
+        return elapsed, samples
+
+
+def percentile(values, q):
+    return float(np.percentile(values, q)) if len(values) else 0.0
+
+
+def capacity(stage):
+    """Records/s the stage could sustain with all workers busy."""
+    return stage.records / stage.busy * stage.workers if stage.busy else float("inf")
+
+
+# BoeGamingReport processors measured by each stage, for --benchmark-json
+BENCHMARK_PROCESSORS = {
+    "validate": "ValidateXml",
+    "prepare": "DgojXadesProcessor",
+    "deliver": "DeliverRegulatoryFile",
+}
+
+
+def benchmark(pipeline):
+    """Per-FlowFile service times of the stages that map to one processor each."""
+    processors = {}
+    for stage in pipeline.stages:
+        if stage.name in BENCHMARK_PROCESSORS and stage.items:
+            processors[BENCHMARK_PROCESSORS[stage.name]] = {"service_ms": round(stage.busy / stage.items * 1000, 3)}
+    return {"batch_size": pipeline.batch_size, "processors": processors}
+
+
+def report(pipeline, elapsed, samples):
+    stages = [pipeline.source] + pipeline.stages
+    print(f"  {'stage':<9} {'workers':>7} {'items':>7} {'records':>9} {'busy s':>8} {'util':>6} "
+          f"{'rec/s':>9} {'capacity':>10} {'svc p50 ms':>10} {'svc p95 ms':>10} {'blocked s':>9}")
+    for stage in stages:
+        util = stage.busy / (stage.workers * elapsed)
+        service = np.array(stage.service) * 1000
+        print(f"  {stage.name:<9} {stage.workers:>7} {stage.items:>7} {stage.records:>9} {stage.busy:>8.2f} "
+              f"{util:>6.0%} {stage.records / elapsed:>9,.0f} {capacity(stage):>10,.0f} "
+              f"{percentile(service, 50):>10.1f} {percentile(service, 95):>10.1f} {stage.blocked:>9.2f}")
+
+    capacity_text = f"{pipeline.args.queue_capacity}"
+    print(f"\n  {'queue':<13} {'capacity':>8} {'mean depth':>10} {'max depth':>9} {'full':>6}")
+    for stage in pipeline.stages:
+        depths = np.array(samples[stage.name] or [0])
+        full = float(np.mean(depths >= pipeline.args.queue_capacity))
+        print(f"  {'-> ' + stage.name:<13} {capacity_text:>8} {depths.mean():>10.1f} {depths.max():>9} {full:>6.0%}")
+
+    latencies = np.concatenate(pipeline.latencies) if pipeline.latencies else np.array([])
+    print(f"\n  end-to-end latency ({len(latencies)} records): p50 {percentile(latencies, 50):.2f} s, "
+          f"p90 {percentile(latencies, 90):.2f} s, p99 {percentile(latencies, 99):.2f} s, "
+          f"max {latencies.max() if len(latencies) else 0:.2f} s")
+
+    bottleneck = min(pipeline.stages, key=capacity)
+    print(f"  delivered {len(latencies) / elapsed:,.0f} records/s over {elapsed:.2f} s; "
+          f"bottleneck: {bottleneck.name} ({capacity(bottleneck):,.0f} records/s with {bottleneck.workers} worker(s))")
+    return latencies, bottleneck
+
+
+def verify(pipeline):
+    """Delivered archives, table state and record counts agree."""
+    import pyzipper
+
+    failures = 0
+    db = pipeline.db.connection()
+    staged = db.execute("SELECT COUNT(*) FROM BATCH_STAGING").fetchone()[0]
+    batches, uploaded, records = db.execute("""
+        SELECT COUNT(*), SUM(STATUS = 'UPLOADED'), SUM(TRANSACTION_COUNT) FROM REGULATORY_BATCHES
+    """).fetchone()
+    failed = sum(stage.failed for stage in pipeline.stages)
+
+    if staged or uploaded != batches or len(pipeline.delivered) != batches or failed:
+        print(f"  FAIL: {staged} rows left in BATCH_STAGING, {uploaded} of {batches} batches UPLOADED, "
+              f"{len(pipeline.delivered)} files delivered, {failed} failed")
+        failures += 1
+    if records != pipeline.args.records:
+        print(f"  FAIL: {records} records in REGULATORY_BATCHES, expected {pipeline.args.records}")
+        failures += 1
+
+    if pipeline.delivered:
+        with pyzipper.AESZipFile(pipeline.delivered[0]) as zf:
+            zf.setpassword(ZIP_PASSWORD.encode("utf-8"))
+            signed = zf.read("enveloped.xml")
+        if b"SignatureValue" not in signed or b"<Lote" not in signed:
+            print("  FAIL: delivered archive does not hold a signed lote")
+            failures += 1
+    return failures
+
+
+def parse_workers(values):
+    workers = {}
+    for value in values or []:
+        name, _, count = value.partition("=")
+        if name not in STAGES[1:] or not count.isdigit() or int(count) < 1:
+            raise argparse.ArgumentTypeError(f"--workers expects stage=N with stage in {', '.join(STAGES[1:])}")
+        if name == "stage" and int(count) != 1:
+            raise argparse.ArgumentTypeError("the stage step bins rows like MergeRecord and runs with one worker")
+        workers[name] = int(count)
+    return workers
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate the regulatory pipeline end to end and find its bottleneck")
+    parser.add_argument("--records", type=int, default=20000, help="Stream rows to push through the pipeline")
+    parser.add_argument("--rate", type=float, default=0, help="Source rate in records/s (0: as fast as the pipeline takes them)")
+    parser.add_argument("--source-block", type=int, default=100, help="Rows per source FlowFile")
+    parser.add_argument("--batch-size", type=int, default=500, help="Rows per batch (MergeRecord, 500 in the demo flow)")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", help="Run once per batch size and compare")
+    parser.add_argument("--max-batch-age", type=float, default=5.0, help="Seconds before a partial batch is flushed (Max Bin Age)")
+    parser.add_argument("--workers", nargs="+", metavar="STAGE=N", help="Workers per stage, e.g. prepare=4 deliver=2")
+    parser.add_argument("--queue-capacity", type=int, default=10, help="Items each queue holds before back pressure")
+    parser.add_argument("--db-latency-ms", type=float, default=0, help="Added per database statement")
+    parser.add_argument("--sftp-latency-ms", type=float, default=0, help="Added per upload")
+    parser.add_argument("--sample-ms", type=float, default=50, help="Queue depth sampling interval")
+    parser.add_argument("--benchmark-json", help="Write per-processor service times for testing/flow_capacity.py "
+                                                 "(from the last batch size)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--hot-tournaments", type=int, default=0)
+    parser.add_argument("--hot-share", type=float, default=0.0)
+    parser.add_argument("--whale-players", type=int, default=0)
+    parser.add_argument("--whale-share", type=float, default=0.0)
+    args = parser.parse_args()
+    try:
+        args.workers = parse_workers(args.workers)
+    except argparse.ArgumentTypeError as e:
+        parser.error(str(e))
+
+    failures = 0
+    summary = []
+    with tempfile.TemporaryDirectory() as tmp:
+        credentials = make_credentials(tmp)
+        for batch_size in args.batch_sizes or [args.batch_size]:
+            print(f"batch size {batch_size}: {args.records} records"
+                  f"{f' at {args.rate:,.0f} records/s' if args.rate else ''}")
+            workdir = tempfile.mkdtemp(dir=tmp)
+            pipeline = Pipeline(args, batch_size, workdir, credentials)
+            elapsed, samples = pipeline.run()
+            latencies, bottleneck = report(pipeline, elapsed, samples)
+            failures += verify(pipeline)
+            summary.append((batch_size, len(pipeline.delivered), elapsed, len(latencies) / elapsed,
+                            percentile(latencies, 50), percentile(latencies, 99), bottleneck.name))
+            print()
+            measured = benchmark(pipeline)
+
+    if args.benchmark_json:
+        with open(args.benchmark_json, "w", encoding="utf-8") as f:
+            json.dump(measured, f, indent=2)
+        print(f"Service times written to {args.benchmark_json}\n")
+
+    if len(summary) > 1:
+        print(f"{'batch size':>10} {'batches':>8} {'elapsed s':>9} {'rec/s':>9} {'p50 s':>7} {'p99 s':>7}  bottleneck")
+        for batch_size, batches, elapsed, rate, p50, p99, bottleneck in summary:
+            print(f"{batch_size:>10} {batches:>8} {elapsed:>9.2f} {rate:>9,.0f} {p50:>7.2f} {p99:>7.2f}  {bottleneck}")
+        print()
+
+    if failures:
+        print(f"{failures} check(s) failed")
+        sys.exit(1)
+    print("Every record was batched, validated, signed, encrypted and delivered")
+
+
+if __name__ == "__main__":
+    main()
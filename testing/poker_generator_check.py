@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Local check for the synthetic poker transaction generator
+(custom_processors/GeneratePokerTransactions).
+
+Generates records from setup/schema_GeneratePokerTransactions.json and checks:
+
+  schema     - every record has the schema's fields, enum values, PLR[0-9]{6}
+               player IDs, amounts within range, dates inside the past/future
+               windows, v4 UUIDs and IPv4 addresses
+  formats    - JSONL, CSV and Postgres COPY output decode to the same records
+  seed       - the same seed gives identical bytes, another seed does not
+  skew       - hot tournament and whale shares match the settings and whale
+               bets sit in the top of the bet range
+  throughput - records/s per output format (at least --min-rate)
+
+Usage:
+    python testing/poker_generator_check.py
+    python testing/poker_generator_check.py --records 1000000 --min-rate 0
+"""
+
+import argparse
+import collections
+import csv
+import datetime
+import io
+import json
+import os
+import re
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "custom_processors", "GeneratePokerTransactions", "src", "generate_poker_transactions"))
+
+from poker_generator import FORMATS, WHALE_BET_RANGE, PokerSchema, PokerTransactionGenerator, encode  # noqa: E402
+
+SCHEMA_PATH = os.path.join(ROOT, "setup", "schema_GeneratePokerTransactions.json")
+NOW = datetime.datetime(2026, 1, 22, 10, 0, tzinfo=datetime.timezone.utc)
+UUID4 = re.compile(r"^[0-9a-f]{8}-[0-9a-f]{4}-4[0-9a-f]{3}-[89ab][0-9a-f]{3}-[0-9a-f]{12}$")
+PLAYER = re.compile(r"^PLR[0-9]{6}$")
+IPV4 = re.compile(r"^(\d{1,3})\.(\d{1,3})\.(\d{1,3})\.(\d{1,3})$")
+VARIANTS = {"TH": "Texas Holdem NL", "OM": "Omaha PL", "ST": "Stud"}
+
+
+def generate(generator, count, block_size, output_format):
+    chunks = []
+    for index in range((count + block_size - 1) // block_size):
+        size = min(block_size, count - index * block_size)
+        chunks.append(encode(generator.block(index, size), output_format, header=output_format == "CSV" and index == 0))
+    return b"".join(chunks)
+
+
+def parse_time(text):
+    return datetime.datetime.strptime(text, "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=datetime.timezone.utc)
+
+
+def check_schema(records, schema_json):
+    errors = collections.Counter()
+    data_schema = schema_json["properties"]["transaction_data"]
+    properties = data_schema["properties"]
+    past = NOW - datetime.timedelta(days=30)
+    future = NOW + datetime.timedelta(days=7)
+
+    for record in records:
+        if not UUID4.match(record["transaction_id"]):
+            errors["transaction_id"] += 1
+        data = record["transaction_data"]
+        for name in data_schema["required"]:
+            if name not in data:
+                errors["missing " + name] += 1
+        for name, spec in properties.items():
+            value = data.get(name)
+            if "enum" in spec and value not in spec["enum"]:
+                errors[name] += 1
+            if spec.get("type") == "number" and not spec["minimum"] <= value <= spec["maximum"]:
+                errors[name] += 1
+        if not UUID4.match(data["tournament_id"]) or not UUID4.match(data["device_id"]):
+            errors["uuid"] += 1
+        if not PLAYER.match(data["player_id"]):
+            errors["player_id"] += 1
+        ip = IPV4.match(data["player_ip"])
+        if not ip or any(int(octet) > 255 for octet in ip.groups()):
+            errors["player_ip"] += 1
+        if not past <= parse_time(data["tournament_start"]) <= NOW:
+            errors["tournament_start"] += 1
+        if not NOW <= parse_time(data["tournament_end"]) <= future:
+            errors["tournament_end"] += 1
+        if VARIANTS[data["variant"]] != data["variant_commercial"]:
+            errors["variant pairing"] += 1
+    return errors
+
+
+def from_csv(data):
+    rows = []
+    for row in csv.DictReader(io.StringIO(data.decode("utf-8"))):
+        transaction_id = row.pop("transaction_id")
+        for name in ("bet_amount", "refund_amount", "win_amount"):
+            row[name] = float(row[name])
+        rows.append({"transaction_id": transaction_id, "transaction_data": row})
+    return rows
+
+
+def from_copy(data):
+    rows = []
+    for line in data.decode("utf-8").splitlines():
+        transaction_id, document = line.split("\t")
+        rows.append({"transaction_id": transaction_id, "transaction_data": json.loads(document.replace("\\\\", "\\"))})
+    return rows
+
+
+def run_schema_and_formats(schema, schema_json, args):
+    generator = PokerTransactionGenerator(schema, seed=7, now=NOW)
+    jsonl = generate(generator, args.sample, args.block_size, "JSONL")
+    records = [json.loads(line) for line in jsonl.splitlines()]
+
+    failures = 0
+    errors = check_schema(records, schema_json)
+    tournaments = collections.defaultdict(set)
+    for record in records:
+        data = record["transaction_data"]
+        tournaments[data["tournament_id"]].add((data["tournament_name"], data["tournament_start"], data["tournament_end"], data["variant"]))
+    inconsistent = sum(1 for details in tournaments.values() if len(details) > 1)
+    print(f"schema: {len(records)} records, {len(tournaments)} tournaments, errors {dict(errors) or 'none'}")
+    if errors or len(records) != args.sample:
+        print("  FAIL: records do not match the schema")
+        failures += 1
+    if inconsistent:
+        print(f"  FAIL: {inconsistent} tournament(s) with inconsistent details")
+        failures += 1
+
+    csv_records = from_csv(generate(generator, args.sample, args.block_size, "CSV"))
+    copy_records = from_copy(generate(generator, args.sample, args.block_size, "POSTGRES_COPY"))
+    same = csv_records == records and copy_records == records
+    print(f"formats: JSONL, CSV and POSTGRES_COPY decode to {'the same' if same else 'DIFFERENT'} records")
+    if not same:
+        print("  FAIL: output formats disagree")
+        failures += 1
+    return failures
+
+
+def run_seed(schema, args):
+    first = generate(PokerTransactionGenerator(schema, seed=42, now=NOW), args.sample, args.block_size, "JSONL")
+    again = generate(PokerTransactionGenerator(schema, seed=42, now=NOW), args.sample, args.block_size, "JSONL")
+    other = generate(PokerTransactionGenerator(schema, seed=43, now=NOW), args.sample, args.block_size, "JSONL")
+    print(f"seed: same seed identical {first == again}, other seed identical {first == other}")
+    if first != again or first == other:
+        print("  FAIL: output is not determined by the seed")
+        return 1
+    return 0
+
+
+def run_skew(schema, args):
+    hot_tournaments, hot_share, whales, whale_share = 5, 0.5, 20, 0.1
+    generator = PokerTransactionGenerator(schema, seed=11, now=NOW, tournaments=1000,
+                                          hot_tournaments=hot_tournaments, hot_share=hot_share,
+                                          whale_players=whales, whale_share=whale_share)
+    records = [json.loads(line)["transaction_data"] for line in generate(generator, args.sample, args.block_size, "JSONL").splitlines()]
+
+    tournaments = collections.Counter(r["tournament_id"] for r in records)
+    players = collections.Counter(r["player_id"] for r in records)
+    top_tournaments = sum(n for _, n in tournaments.most_common(hot_tournaments)) / len(records)
+    whale_ids = {player for player, _ in players.most_common(whales)}
+    whale_records = [r for r in records if r["player_id"] in whale_ids]
+    whale_floor = 500 - (500 - 10) * WHALE_BET_RANGE
+    low_whale_bets = sum(1 for r in whale_records if r["bet_amount"] < whale_floor)
+
+    # Hot tournaments also get their ordinary share of the remaining records
+    expected_hot = hot_share + (1 - hot_share) * hot_tournaments / 1000
+    print(f"skew: top {hot_tournaments} tournaments {top_tournaments:.1%} of records (expected ~{expected_hot:.1%}), "
+          f"top {whales} players {len(whale_records) / len(records):.1%} (expected ~{whale_share:.0%}), "
+          f"whale bets below {whale_floor:.0f}: {low_whale_bets}")
+    failures = 0
+    if abs(top_tournaments - expected_hot) > 0.02:
+        print("  FAIL: hot tournament share is off")
+        failures += 1
+    if abs(len(whale_records) / len(records) - whale_share) > 0.02 or low_whale_bets:
+        print("  FAIL: whale share or whale bets are off")
+        failures += 1
+    return failures
+
+
+def run_throughput(schema, args):
+    failures = 0
+    generator = PokerTransactionGenerator(schema, seed=1, now=NOW, hot_tournaments=5, hot_share=0.3,
+                                          whale_players=50, whale_share=0.05)
+    for output_format in FORMATS:
+        started = time.perf_counter()
+        data = generate(generator, args.records, args.block_size, output_format)
+        elapsed = time.perf_counter() - started
+        rate = args.records / elapsed
+        print(f"throughput: {output_format:<13} {args.records} records in {elapsed:.2f} s, "
+              f"{rate:>10,.0f} records/s, {len(data) / elapsed / 1e6:.0f} MB/s")
+        if rate < args.min_rate:
+            print(f"  FAIL: below {args.min_rate:,} records/s")
+            failures += 1
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the synthetic poker transaction generator")
+    parser.add_argument("--sample", type=int, default=20000, help="Records decoded for the schema, format, seed and skew checks")
+    parser.add_argument("--records", type=int, default=500000, help="Records generated per format for throughput")
+    parser.add_argument("--block-size", type=int, default=10000)
+    parser.add_argument("--min-rate", type=int, default=100000, help="Minimum records/s per format (0 to only report)")
+    args = parser.parse_args()
+
+    with open(SCHEMA_PATH) as f:
+        schema_json = json.load(f)
+    schema = PokerSchema(schema_json)
+
+    failures = 0
+    failures += run_schema_and_formats(schema, schema_json, args)
+    failures += run_seed(schema, args)
+    failures += run_skew(schema, args)
+    failures += run_throughput(schema, args)
+
+    if failures:
+        print(f"\n{failures} check(s) failed")
+        sys.exit(1)
+    print("\nGenerated transactions match the schema, are reproducible from the seed and meet the target rate")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Scaling benchmark for sql/python/poker_xml.py.
+
+Times lote generation for 1k-100k players with the Python generator
+(join over per-player fragments) and, for comparison, the literal
+string-concatenation port of GENERATE_POKER_XML_JS. Reports time per
+player at each size; linear scaling shows up as a flat per-player cost.
+
+Usage:
+    python testing/poker_xml_benchmark.py
+    python testing/poker_xml_benchmark.py --sizes 1000 10000 100000 --repeat 5
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "sql", "python"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from poker_xml import generate_poker_xml, generate_poker_xml_columns  # noqa: E402
+from poker_xml_equivalence import FIXED_NOW, js_port_generate  # noqa: E402
+
+DEVICE_TYPES = ["MOBILE", "DESKTOP", "TABLET", "TV", "OTHER"]
+BATCH_ID = "3f2a9c1e-7b4d-4e8f-9a0b-1c2d3e4f5a6b"
+
+
+def make_rows(count, seed=7):
+    rng = random.Random(seed)
+    return [
+        {
+            "PLAYER_ID": "PLAYER_{:06d}".format(rng.randint(1, 999999)),
+            "BET_AMOUNT": round(rng.uniform(1, 500), 2),
+            "REFUND_AMOUNT": round(rng.uniform(0, 20), 2) if rng.random() < 0.1 else 0,
+            "WIN_AMOUNT": round(rng.uniform(0, 2000), 2) if rng.random() < 0.3 else 0,
+            "PLAYER_IP": "10.{}.{}.{}".format(rng.randint(0, 255), rng.randint(0, 255), rng.randint(1, 254)),
+            "DEVICE_TYPE": rng.choice(DEVICE_TYPES),
+            "DEVICE_ID": "DEV-{:08x}".format(rng.getrandbits(32)),
+        }
+        for _ in range(count)
+    ]
+
+
+def best_of(repeat, fn):
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Python XML generator")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000, 10000, 50000, 100000])
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per size (best is reported)")
+    parser.add_argument("--skip-js-port", action="store_true", help="Only time the Python generator")
+    args = parser.parse_args()
+
+    date_str = FIXED_NOW.strftime("%Y%m%d%H%M%S")
+    print(f"{'players':>8} {'rows (s)':>9} {'us/player':>10} {'cols (s)':>9} {'us/player':>10} "
+          f"{'js port (s)':>12} {'us/player':>10} {'MB':>7}")
+
+    per_player = []
+    for size in args.sizes:
+        rows = make_rows(size)
+        columns = [[row[key] for row in rows] for key in (
+            "PLAYER_ID", "BET_AMOUNT", "REFUND_AMOUNT", "WIN_AMOUNT",
+            "PLAYER_IP", "DEVICE_TYPE", "DEVICE_ID",
+        )]
+
+        rows_sec, xml = best_of(args.repeat, lambda: generate_poker_xml(
+            rows, "OP01", "WH001", BATCH_ID, now=FIXED_NOW))
+        cols_sec, cols_xml = best_of(args.repeat, lambda: generate_poker_xml_columns(
+            *columns, "OP01", "WH001", BATCH_ID, now=FIXED_NOW))
+        if cols_xml != xml:
+            print(f"Column and row outputs differ at {size} players")
+            sys.exit(1)
+
+        js_cell = f"{'-':>12} {'-':>10}"
+        if not args.skip_js_port:
+            js_sec, js_xml = best_of(1, lambda: js_port_generate(
+                rows, "OP01", "WH001", BATCH_ID, date_str))
+            if js_xml != xml:
+                print(f"Output differs from the JS port at {size} players")
+                sys.exit(1)
+            js_cell = f"{js_sec:>12.3f} {js_sec / size * 1e6:>10.2f}"
+
+        per_player.append(cols_sec / size)
+        print(f"{size:>8} {rows_sec:>9.3f} {rows_sec / size * 1e6:>10.2f} "
+              f"{cols_sec:>9.3f} {cols_sec / size * 1e6:>10.2f} {js_cell} "
+              f"{len(xml.encode('utf-8')) / 1e6:>7.1f}")
+
+    spread = max(per_player) / min(per_player)
+    print(f"\nPer-player cost spread across sizes (columns): {spread:.2f}x "
+          f"({'linear' if spread < 1.5 else 'NOT linear'})")
+
+
+if __name__ == "__main__":
+    main()
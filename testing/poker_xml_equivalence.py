@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+"""
+Equivalence check for sql/python/poker_xml.py against GENERATE_POKER_XML_JS.
+
+Generates random batches (seeded) and compares the Python generator with:
+  - a line-by-line Python port of the JavaScript UDF body (always), and
+  - the JavaScript body itself, extracted from sql/04_functions.sql and run
+    under Node.js (when `node` is on PATH).
+
+Valid input must produce byte-identical XML. Input containing XML special
+characters is checked separately: the Python output must parse and
+round-trip the original values (the JS UDF emits malformed XML there).
+
+Failing cases are shrunk to the smallest player list that still differs.
+
+Usage:
+    python testing/poker_xml_equivalence.py
+    python testing/poker_xml_equivalence.py --cases 2000 --seed 7 --no-node
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import shutil
+import subprocess
+import sys
+import xml.etree.ElementTree as ET
+from datetime import datetime, timezone
+from fractions import Fraction
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "sql", "python"))
+
+from poker_xml import generate_poker_xml  # noqa: E402
+
+MAX_REPORTED = 5
+FIXED_NOW = datetime(2026, 3, 14, 9, 26, 53, tzinfo=timezone.utc)
+NS = "{http://cnjuego.gob.es/sci/v3.3.xsd}"
+
+
+# ---------------------------------------------------------------------------
+# Port of the JavaScript UDF (kept deliberately literal)
+# ---------------------------------------------------------------------------
+
+def _js_falsy(value):
+    return value is None or value == "" or value == 0 or value is False
+
+
+def _js_or(value, default):
+    return default if _js_falsy(value) else value
+
+
+def _js_to_fixed_2(x):
+    """Number.prototype.toFixed(2): pick n with n/100 - x closest to 0, larger n on ties."""
+    sign = "-" if x < 0 else ""
+    exact = abs(Fraction(x)) * 100
+    n = exact.numerator // exact.denominator
+    if exact - n >= Fraction(1, 2):
+        n += 1
+    return "{}{}.{:02d}".format(sign, n // 100, n % 100)
+
+
+def js_port_generate(json_array, operator_id, warehouse_id, batch_id, date_str):
+    device_map = {"MOBILE": "MO", "DESKTOP": "PC", "PC": "PC", "TABLET": "TB", "TV": "TF", "OTHER": "OT"}
+
+    def map_device_type(device_type):
+        if _js_falsy(device_type):
+            return "PC"
+        return device_map.get(device_type.upper(), "OT")
+
+    xml = '<?xml version="1.0" encoding="UTF-8"?>'
+    xml += '<Lote xmlns="http://cnjuego.gob.es/sci/v3.3.xsd" xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance">'
+    xml += "<Cabecera>"
+    xml += "<OperadorId>" + operator_id + "</OperadorId>"
+    xml += "<AlmacenId>" + warehouse_id + "</AlmacenId>"
+    xml += "<LoteId>" + batch_id + "</LoteId>"
+    xml += "<Version>3.3</Version>"
+    xml += "</Cabecera>"
+    xml += '<Registro xsi:type="RegistroPoquerTorneo">'
+    xml += "<Cabecera>"
+    xml += "<RegistroId>REG_" + batch_id + "</RegistroId>"
+    xml += "<SubregistroId>1</SubregistroId>"
+    xml += "<SubregistroTotal>1</SubregistroTotal>"
+    xml += "<Fecha>" + date_str + "</Fecha>"
+    xml += "</Cabecera>"
+    xml += "<Juego>"
+    xml += "<JuegoId>TOUR_" + batch_id[0:8] + "</JuegoId>"
+    xml += "<JuegoDesc>Texas Holdem Demo Tournament</JuegoDesc>"
+    xml += "<TipoJuego>POT</TipoJuego>"
+    xml += "<FechaInicio>" + date_str + "+0100</FechaInicio>"
+    xml += "<FechaFin>" + date_str + "+0100</FechaFin>"
+    xml += "<JuegoEnRed>S</JuegoEnRed>"
+    xml += "<LiquidezInternacional>N</LiquidezInternacional>"
+    xml += "<Variante>TH</Variante>"
+    xml += "<VarianteComercial>Texas Holdem No Limit</VarianteComercial>"
+    xml += "<NumeroParticipantes>" + str(len(json_array) if json_array else 0) + "</NumeroParticipantes>"
+    xml += "</Juego>"
+
+    for txn in json_array or []:
+        xml += "<Jugador>"
+        xml += "<ID><OperadorId>" + operator_id + "</OperadorId>"
+        xml += "<JugadorId>" + _js_or(txn.get("PLAYER_ID"), "UNKNOWN") + "</JugadorId></ID>"
+        xml += "<Participacion><Linea>"
+        xml += "<Cantidad>" + _js_to_fixed_2(_js_or(txn.get("BET_AMOUNT"), 0)) + "</Cantidad>"
+        xml += "<Unidad>EUR</Unidad>"
+        xml += "</Linea></Participacion>"
+        xml += "<ParticipacionDevolucion><Linea>"
+        xml += "<Cantidad>" + _js_to_fixed_2(_js_or(txn.get("REFUND_AMOUNT"), 0)) + "</Cantidad>"
+        xml += "<Unidad>EUR</Unidad>"
+        xml += "</Linea></ParticipacionDevolucion>"
+        xml += "<Premios><Linea>"
+        xml += "<Cantidad>" + _js_to_fixed_2(_js_or(txn.get("WIN_AMOUNT"), 0)) + "</Cantidad>"
+        xml += "<Unidad>EUR</Unidad>"
+        xml += "</Linea></Premios>"
+        xml += "<IP>" + _js_or(txn.get("PLAYER_IP"), "0.0.0.0") + "</IP>"
+        xml += "<Dispositivo>" + map_device_type(txn.get("DEVICE_TYPE")) + "</Dispositivo>"
+        xml += "<IdDispositivo>" + _js_or(txn.get("DEVICE_ID"), "UNKNOWN") + "</IdDispositivo>"
+        xml += "</Jugador>"
+
+    xml += "</Registro>"
+    xml += "</Lote>"
+    return xml
+
+
+# ---------------------------------------------------------------------------
+# The real JavaScript body, run under Node.js
+# ---------------------------------------------------------------------------
+
+NODE_DRIVER = """
+const FIXED_MS = %d;
+const RealDate = Date;
+Date = class extends RealDate {
+  constructor(...args) { if (args.length === 0) { super(FIXED_MS); } else { super(...args); } }
+};
+const udf = new Function("JSON_ARRAY", "P_OPERATOR_ID", "P_WAREHOUSE_ID", "P_BATCH_ID", %s);
+let input = "";
+process.stdin.on("data", (chunk) => { input += chunk; });
+process.stdin.on("end", () => {
+  const cases = JSON.parse(input);
+  const out = cases.map((c) => udf(c.rows, c.operator_id, c.warehouse_id, c.batch_id));
+  process.stdout.write(JSON.stringify(out));
+});
+"""
+
+
+def load_js_body():
+    with open(os.path.join(ROOT, "sql", "04_functions.sql")) as f:
+        sql = f.read()
+    match = re.search(r"GENERATE_POKER_XML_JS\(.*?AS \$\$(.*?)\$\$;", sql, re.DOTALL)
+    if not match:
+        raise RuntimeError("GENERATE_POKER_XML_JS body not found in sql/04_functions.sql")
+    return match.group(1)
+
+
+def run_node(cases):
+    fixed_ms = int(FIXED_NOW.timestamp() * 1000)
+    script = NODE_DRIVER % (fixed_ms, json.dumps(load_js_body()))
+    result = subprocess.run(
+        ["node", "-e", script], input=json.dumps(cases),
+        capture_output=True, text=True, check=True,
+    )
+    return json.loads(result.stdout)
+
+
+# ---------------------------------------------------------------------------
+# Case generation
+# ---------------------------------------------------------------------------
+
+SAFE_CHARS = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_.:/ "
+SPECIAL_CHARS = "&<>'\""
+DEVICE_TYPES = ["MOBILE", "mobile", "Desktop", "PC", "TABLET", "tv", "OTHER", "CONSOLE", "", None]
+TIE_AMOUNTS = [0.125, 0.375, 1.005, 2.675, 1.115, 10.245, 0.5, 2.5]
+
+
+def random_text(rng, alphabet, max_len=16):
+    return "".join(rng.choice(alphabet) for _ in range(rng.randint(1, max_len)))
+
+
+def random_amount(rng):
+    roll = rng.random()
+    if roll < 0.10:
+        return None
+    if roll < 0.20:
+        return 0
+    if roll < 0.30:
+        return rng.choice(TIE_AMOUNTS) * rng.choice([1, -1])
+    if roll < 0.40:
+        return rng.randint(-500, 5000)
+    return round(rng.uniform(-100, 10000), 2)
+
+
+def random_row(rng, alphabet):
+    row = {}
+    for key in ("PLAYER_ID", "PLAYER_IP", "DEVICE_ID"):
+        roll = rng.random()
+        if roll < 0.08:
+            row[key] = None
+        elif roll < 0.12:
+            row[key] = ""
+        elif roll < 0.95:
+            row[key] = random_text(rng, alphabet)
+    for key in ("BET_AMOUNT", "REFUND_AMOUNT", "WIN_AMOUNT"):
+        if rng.random() < 0.95:
+            row[key] = random_amount(rng)
+    if rng.random() < 0.95:
+        row["DEVICE_TYPE"] = rng.choice(DEVICE_TYPES)
+    return row
+
+
+def random_case(rng, alphabet=SAFE_CHARS):
+    return {
+        "rows": [random_row(rng, alphabet) for _ in range(rng.randint(0, 40))],
+        "operator_id": rng.choice(["OP01", "OP02", "X9"]),
+        "warehouse_id": rng.choice(["WH001", "WH002"]),
+        "batch_id": "{:08x}-{:04x}-{:04x}-{:04x}-{:012x}".format(
+            rng.getrandbits(32), rng.getrandbits(16), rng.getrandbits(16),
+            rng.getrandbits(16), rng.getrandbits(48)),
+    }
+
+
+def python_xml(case):
+    return generate_poker_xml(case["rows"], case["operator_id"], case["warehouse_id"],
+                              case["batch_id"], now=FIXED_NOW)
+
+
+def port_xml(case):
+    return js_port_generate(case["rows"], case["operator_id"], case["warehouse_id"],
+                            case["batch_id"], FIXED_NOW.strftime("%Y%m%d%H%M%S"))
+
+
+def shrink(case, reference):
+    """Drop players one at a time while the outputs still differ."""
+    rows = list(case["rows"])
+    i = 0
+    while i < len(rows):
+        candidate = dict(case, rows=rows[:i] + rows[i + 1:])
+        if python_xml(candidate) != reference(candidate):
+            rows = candidate["rows"]
+        else:
+            i += 1
+    return dict(case, rows=rows)
+
+
+def first_difference(a, b):
+    for i, (x, y) in enumerate(zip(a, b)):
+        if x != y:
+            return i
+    return min(len(a), len(b))
+
+
+def report(name, case, expected, actual, failures):
+    if failures > MAX_REPORTED:
+        return
+    pos = first_difference(expected, actual)
+    print(f"FAIL [{name}] case: {json.dumps(case)}")
+    print(f"  expected ...{expected[max(0, pos - 40):pos + 40]}...")
+    print(f"  actual   ...{actual[max(0, pos - 40):pos + 40]}...")
+
+
+def check_escaping(rng, cases):
+    """Special characters must round-trip through a real XML parser."""
+    failures = 0
+    for _ in range(cases):
+        case = random_case(rng, SAFE_CHARS + SPECIAL_CHARS)
+        root = ET.fromstring(python_xml(case).encode("utf-8"))
+        players = root.findall(f"{NS}Registro/{NS}Jugador")
+        expected = [row.get("PLAYER_ID") or "UNKNOWN" for row in case["rows"]]
+        actual = [p.find(f"{NS}ID/{NS}JugadorId").text for p in players]
+        if expected != actual:
+            failures += 1
+            print(f"FAIL [escaping] case: {json.dumps(case)}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check Python XML generator against the JS UDF")
+    parser.add_argument("--cases", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=20260314)
+    parser.add_argument("--no-node", action="store_true", help="Skip the Node.js comparison")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    cases = [random_case(rng) for _ in range(args.cases)]
+    failures = 0
+
+    for case in cases:
+        actual = python_xml(case)
+        expected = port_xml(case)
+        if actual != expected:
+            failures += 1
+            if failures <= MAX_REPORTED:
+                small = shrink(case, port_xml)
+                report("js port", small, port_xml(small), python_xml(small), failures)
+    print(f"js port:  {args.cases} cases compared")
+
+    if not args.no_node and shutil.which("node"):
+        node_out = run_node(cases)
+        for case, expected in zip(cases, node_out):
+            actual = python_xml(case)
+            if actual != expected:
+                failures += 1
+                if failures <= MAX_REPORTED:
+                    small = shrink(case, lambda c: run_node([c])[0])
+                    report("node", small, run_node([small])[0], python_xml(small), failures)
+        print(f"node:     {len(node_out)} cases compared against sql/04_functions.sql")
+    else:
+        print("node:     skipped")
+
+    failures += check_escaping(rng, max(1, args.cases // 5))
+    print(f"escaping: {max(1, args.cases // 5)} cases parsed")
+
+    if failures:
+        print(f"\n{failures} failing case(s)")
+        sys.exit(1)
+    print("\nPython generator is byte-identical to GENERATE_POKER_XML_JS for valid input")
+
+
+if __name__ == "__main__":
+    main()
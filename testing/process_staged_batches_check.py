@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Local stand-in check for PROCESS_STAGED_BATCHES (sql/05_procedures.sql).
+
+Runs the per-batch procedure logic and the set-based logic against two
+identical in-memory DuckDB databases and checks that they leave
+REGULATORY_BATCHES row-for-row identical and BATCH_STAGING empty, then
+reports the time each took.
+
+  per-batch  - PROCESS_STAGED_BATCH once per batch: COUNT(*), an ordered
+               aggregate feeding the XML generator, an INSERT and a DELETE
+  set-based  - PROCESS_STAGED_BATCHES: fix the batch set as a list, one
+               grouped INSERT ... SELECT (count + XML per BATCH_ID), one
+               DELETE; called inside an open transaction that the caller
+               commits, as the Write Audit Record post-SQL does
+
+DuckDB has no partitioned Python UDTFs, so the GENERATE_POKER_XML_ROWS pass is
+stood in for by GROUP BY BATCH_ID with an ordered LIST() fed to a scalar
+Python UDF that calls the same sql/python/poker_xml.py code.
+
+Requires duckdb (pip install duckdb); it is only needed for this check.
+
+Usage:
+    python testing/process_staged_batches_check.py
+    python testing/process_staged_batches_check.py --batches 500 --rows-per-batch 600
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "sql", "python"))
+
+from poker_xml import generate_poker_xml, generate_poker_xml_columns  # noqa: E402
+
+try:
+    import duckdb
+except ImportError:
+    sys.exit("duckdb is required for this check: pip install duckdb")
+
+FIXED_NOW = datetime(2026, 3, 14, 9, 26, 53, tzinfo=timezone.utc)
+PLAYER_FIELDS = ("PLAYER_ID", "BET_AMOUNT", "REFUND_AMOUNT", "WIN_AMOUNT",
+                 "PLAYER_IP", "DEVICE_TYPE", "DEVICE_ID")
+
+DDL = """
+CREATE TABLE BATCH_STAGING (
+    TRANSACTION_ID VARCHAR,
+    CREATED_TIMESTAMP TIMESTAMP,
+    TOURNAMENT_ID VARCHAR,
+    PLAYER_ID VARCHAR,
+    BET_AMOUNT DECIMAL(10,2),
+    REFUND_AMOUNT DECIMAL(10,2),
+    WIN_AMOUNT DECIMAL(10,2),
+    PLAYER_IP VARCHAR,
+    DEVICE_TYPE VARCHAR,
+    DEVICE_ID VARCHAR,
+    BATCH_INSERT_TIME TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    BATCH_ID VARCHAR
+);
+CREATE TABLE REGULATORY_BATCHES (
+    BATCH_ID VARCHAR(50) NOT NULL PRIMARY KEY,
+    OPERATOR_ID VARCHAR(4),
+    WAREHOUSE_ID VARCHAR(10),
+    BATCH_TIMESTAMP TIMESTAMP,
+    TRANSACTION_COUNT BIGINT,
+    GENERATED_XML VARCHAR,
+    STATUS VARCHAR(20),
+    UPLOAD_TIMESTAMP TIMESTAMP,
+    GENERATED_FILENAME VARCHAR(500),
+    SFTP_DIRECTORY_PATH VARCHAR(1000)
+);
+"""
+
+# Deterministic staging data: batch b gets rows_per_batch transactions
+LOAD = """
+INSERT INTO BATCH_STAGING (
+    TRANSACTION_ID, CREATED_TIMESTAMP, TOURNAMENT_ID, PLAYER_ID,
+    BET_AMOUNT, REFUND_AMOUNT, WIN_AMOUNT, PLAYER_IP, DEVICE_TYPE, DEVICE_ID, BATCH_ID
+)
+SELECT
+    'TXN_' || b || '_' || r,
+    TIMESTAMP '2026-03-14 09:00:00' + INTERVAL (r) SECOND,
+    'TOUR_' || (b % 7),
+    CASE WHEN hash(b, r, 0) % 50 = 0 THEN NULL ELSE 'PLAYER_' || (hash(b, r, 1) % 100000) END,
+    (hash(b, r, 2) % 50000) / 100.0,
+    CASE WHEN hash(b, r, 3) % 10 = 0 THEN (hash(b, r, 4) % 2000) / 100.0 ELSE 0 END,
+    CASE WHEN hash(b, r, 5) % 3 = 0 THEN (hash(b, r, 6) % 200000) / 100.0 ELSE NULL END,
+    '10.' || (hash(b, r, 7) % 256) || '.' || (hash(b, r, 8) % 256) || '.' || (hash(b, r, 9) % 254 + 1),
+    ['MOBILE', 'DESKTOP', 'TABLET', 'TV', 'OTHER', 'console', NULL][(hash(b, r, 10) % 7)::BIGINT + 1],
+    'DEV-' || (hash(b, r, 11) % 1000000),
+    substr(md5(b::VARCHAR), 1, 8) || '-' || substr(md5(b::VARCHAR), 9, 4) || '-' ||
+    substr(md5(b::VARCHAR), 13, 4) || '-' || substr(md5(b::VARCHAR), 17, 4) || '-' ||
+    substr(md5(b::VARCHAR), 21, 12)
+FROM range(?) t(b), range(?) u(r)
+"""
+
+PLAYER_STRUCT = """struct_pack(
+    PLAYER_ID := PLAYER_ID, BET_AMOUNT := BET_AMOUNT::DOUBLE,
+    REFUND_AMOUNT := REFUND_AMOUNT::DOUBLE, WIN_AMOUNT := WIN_AMOUNT::DOUBLE,
+    PLAYER_IP := PLAYER_IP, DEVICE_TYPE := DEVICE_TYPE, DEVICE_ID := DEVICE_ID
+)"""
+
+
+def connect(batches, rows_per_batch):
+    con = duckdb.connect()
+    con.execute(DDL)
+    con.execute(LOAD, [batches, rows_per_batch])
+
+    def poker_xml_udf(rows, operator_id, warehouse_id, batch_id):
+        columns = [[row[field] for row in rows] for field in PLAYER_FIELDS]
+        return generate_poker_xml_columns(*columns, operator_id, warehouse_id, batch_id, now=FIXED_NOW)
+
+    row_type = duckdb.struct_type({
+        "PLAYER_ID": "VARCHAR", "BET_AMOUNT": "DOUBLE", "REFUND_AMOUNT": "DOUBLE",
+        "WIN_AMOUNT": "DOUBLE", "PLAYER_IP": "VARCHAR", "DEVICE_TYPE": "VARCHAR",
+        "DEVICE_ID": "VARCHAR",
+    })
+    con.create_function(
+        "GENERATE_POKER_XML_ROWS", poker_xml_udf,
+        [duckdb.list_type(row_type), "VARCHAR", "VARCHAR", "VARCHAR"], "VARCHAR",
+    )
+    return con
+
+
+def process_staged_batch(con, batch_id, operator_id="OP01", warehouse_id="WH001"):
+    """PROCESS_STAGED_BATCH: three passes over staging for one batch."""
+    txn_count = con.execute(
+        "SELECT COUNT(*) FROM BATCH_STAGING WHERE BATCH_ID = ?", [batch_id]).fetchone()[0]
+    if txn_count == 0:
+        return "No transactions found for batch " + batch_id
+
+    rows = con.execute(
+        f"SELECT list({PLAYER_STRUCT} ORDER BY TRANSACTION_ID) FROM BATCH_STAGING WHERE BATCH_ID = ?",
+        [batch_id]).fetchone()[0]
+    xml_result = generate_poker_xml(rows, operator_id, warehouse_id, batch_id, now=FIXED_NOW)
+
+    con.execute("""
+        INSERT INTO REGULATORY_BATCHES (
+            BATCH_ID, OPERATOR_ID, WAREHOUSE_ID, BATCH_TIMESTAMP,
+            TRANSACTION_COUNT, GENERATED_XML, STATUS,
+            GENERATED_FILENAME, SFTP_DIRECTORY_PATH
+        ) VALUES (?, ?, ?, CURRENT_TIMESTAMP, ?, ?, 'GENERATED', ?, 'uploads/' || strftime(CURRENT_TIMESTAMP, '%Y/%m/%d'))
+    """, [batch_id, operator_id, warehouse_id, txn_count, xml_result,
+          operator_id + "_" + warehouse_id + "_" + batch_id.replace("-", "") + ".zip"])
+
+    con.execute("DELETE FROM BATCH_STAGING WHERE BATCH_ID = ?", [batch_id])
+    return f"Processed batch {batch_id} with {txn_count} transactions"
+
+
+def process_staged_batches(con, batch_ids=None, operator_id="OP01", warehouse_id="WH001"):
+    """PROCESS_STAGED_BATCHES: one grouped INSERT ... SELECT and one DELETE.
+
+    No DDL and no BEGIN/COMMIT of its own; it runs in the caller's transaction.
+    """
+    staged_ids = con.execute("""
+        SELECT list(DISTINCT BATCH_ID) FROM BATCH_STAGING
+        WHERE ?::VARCHAR[] IS NULL OR list_contains(?::VARCHAR[], BATCH_ID)
+    """, [batch_ids, batch_ids]).fetchone()[0] or []
+    if not staged_ids:
+        return "No staged transactions found"
+
+    con.execute(f"""
+        INSERT INTO REGULATORY_BATCHES (
+            BATCH_ID, OPERATOR_ID, WAREHOUSE_ID, BATCH_TIMESTAMP,
+            TRANSACTION_COUNT, GENERATED_XML, STATUS,
+            GENERATED_FILENAME, SFTP_DIRECTORY_PATH
+        )
+        SELECT
+            s.BATCH_ID, $op, $wh, CURRENT_TIMESTAMP,
+            COUNT(*),
+            GENERATE_POKER_XML_ROWS(list({PLAYER_STRUCT} ORDER BY TRANSACTION_ID), $op, $wh, s.BATCH_ID),
+            'GENERATED',
+            $op || '_' || $wh || '_' || replace(s.BATCH_ID, '-', '') || '.zip',
+            'uploads/' || strftime(CURRENT_TIMESTAMP, '%Y/%m/%d')
+        FROM BATCH_STAGING s
+        WHERE list_contains($ids::VARCHAR[], s.BATCH_ID)
+        GROUP BY s.BATCH_ID
+    """, {"op": operator_id, "wh": warehouse_id, "ids": staged_ids})
+    txn_count = con.execute("""
+        DELETE FROM BATCH_STAGING
+        USING (SELECT unnest(?::VARCHAR[]) AS BATCH_ID) b
+        WHERE BATCH_STAGING.BATCH_ID = b.BATCH_ID
+    """, [staged_ids]).fetchone()[0]
+    return f"Processed {len(staged_ids)} batches with {txn_count} transactions"
+
+
+def in_caller_transaction(con, batch_ids=None):
+    """Call process_staged_batches the way the Write Audit Record post-SQL does:
+    inside an open transaction that the caller commits."""
+    con.execute("BEGIN TRANSACTION")
+    try:
+        result = process_staged_batches(con, batch_ids)
+    except Exception:
+        con.execute("ROLLBACK")
+        raise
+    con.execute("COMMIT")
+    return result
+
+
+def audit_rows(con):
+    return con.execute("""
+        SELECT BATCH_ID, OPERATOR_ID, WAREHOUSE_ID, TRANSACTION_COUNT, GENERATED_XML,
+               STATUS, UPLOAD_TIMESTAMP, GENERATED_FILENAME, SFTP_DIRECTORY_PATH
+        FROM REGULATORY_BATCHES ORDER BY BATCH_ID
+    """).fetchall()
+
+
+def staged_count(con):
+    return con.execute("SELECT COUNT(*) FROM BATCH_STAGING").fetchone()[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare per-batch and set-based batch processing")
+    parser.add_argument("--batches", type=int, default=200)
+    parser.add_argument("--rows-per-batch", type=int, default=500)
+    args = parser.parse_args()
+
+    per_batch = connect(args.batches, args.rows_per_batch)
+    set_based = connect(args.batches, args.rows_per_batch)
+    batch_ids = [r[0] for r in per_batch.execute(
+        "SELECT DISTINCT BATCH_ID FROM BATCH_STAGING ORDER BY 1").fetchall()]
+
+    start = time.perf_counter()
+    for batch_id in batch_ids:
+        process_staged_batch(per_batch, batch_id)
+    per_batch_sec = time.perf_counter() - start
+
+    # Explicit ID list for part of the backlog, then everything still pending
+    subset = batch_ids[: len(batch_ids) // 4]
+    start = time.perf_counter()
+    first = in_caller_transaction(set_based, subset)
+    remaining_after_subset = set_based.execute(
+        "SELECT COUNT(DISTINCT BATCH_ID) FROM BATCH_STAGING").fetchone()[0]
+    second = in_caller_transaction(set_based)
+    set_based_sec = time.perf_counter() - start
+
+    failures = []
+    if remaining_after_subset != len(batch_ids) - len(subset):
+        failures.append(f"ID list left {remaining_after_subset} batches pending, "
+                        f"expected {len(batch_ids) - len(subset)}")
+    if staged_count(per_batch) or staged_count(set_based):
+        failures.append("BATCH_STAGING not empty after processing")
+    expected, actual = audit_rows(per_batch), audit_rows(set_based)
+    if len(expected) != len(actual):
+        failures.append(f"REGULATORY_BATCHES row count {len(actual)} != {len(expected)}")
+    mismatched = [e[0] for e, a in zip(expected, actual) if e != a]
+    if mismatched:
+        failures.append(f"{len(mismatched)} REGULATORY_BATCHES rows differ (first: {mismatched[0]})")
+    if in_caller_transaction(set_based) != "No staged transactions found":
+        failures.append("Empty staging did not short-circuit")
+
+    print(f"set-based: {first}; {second}")
+    print(f"{'batches':>8} {'rows':>9} {'per-batch (s)':>14} {'set-based (s)':>14} {'speedup':>8}")
+    print(f"{len(batch_ids):>8} {len(batch_ids) * args.rows_per_batch:>9} "
+          f"{per_batch_sec:>14.2f} {set_based_sec:>14.2f} {per_batch_sec / set_based_sec:>7.1f}x")
+    # In Snowflake each statement also pays compile/queue latency, so the
+    # statement count is the larger part of the difference there
+    print(f"statements: per-batch {4 * len(batch_ids)}, set-based {2 * 3}")
+
+    if failures:
+        for failure in failures:
+            print("FAIL " + failure)
+        sys.exit(1)
+    print(f"\n{len(expected)} REGULATORY_BATCHES rows identical; staging cleared in both")
+
+
+if __name__ == "__main__":
+    main()
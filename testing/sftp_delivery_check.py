@@ -0,0 +1,447 @@
+#!/usr/bin/env python3
+"""
+Local check for the pooled SFTP delivery (DeliverRegulatoryFile processor).
+
+Starts a paramiko SFTP server on localhost backed by a temporary directory,
+optionally behind a proxy that adds network round-trip latency, and drives
+SftpSessionPool from custom_processors/DeliverRegulatoryFile against it:
+
+  pooled    - archives uploaded from several threads into uploads/YYYY/MM/DD
+              directories; contents must match, sessions must be reused
+              and each directory checked once
+  rename    - temp-name-then-rename leaves no partial files; FAIL conflict
+              resolution rejects an existing file, NONE overwrites it
+  dropped   - the server drops every connection; the next uploads must
+              succeed on fresh sessions
+  benchmark - PutSFTP-style delivery (new session, directory checks and
+              unpipelined writes per file) against the pool
+
+Usage:
+    python testing/sftp_delivery_check.py
+    python testing/sftp_delivery_check.py --files 200 --rtt-ms 40 --size-kb 64
+"""
+
+import argparse
+import errno
+import heapq
+import logging
+import os
+import posixpath
+import socket
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import paramiko
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "custom_processors", "DeliverRegulatoryFile", "src", "deliver_regulatory_file"))
+
+from sftp_pool import RemoteFileExists, SftpSessionPool, connector  # noqa: E402
+
+USERNAME = "gaming-demo"
+
+
+# ---------------------------------------------------------------------------
+# Local SFTP server
+# ---------------------------------------------------------------------------
+
+class StubServer(paramiko.ServerInterface):
+    def __init__(self, authorized_key):
+        self.authorized_key = authorized_key
+
+    def check_auth_publickey(self, username, key):
+        if username == USERNAME and key == self.authorized_key:
+            return paramiko.AUTH_SUCCESSFUL
+        return paramiko.AUTH_FAILED
+
+    def get_allowed_auths(self, username):
+        return "publickey"
+
+    def check_channel_request(self, kind, chanid):
+        return paramiko.OPEN_SUCCEEDED if kind == "session" else paramiko.OPEN_FAILED_ADMINISTRATIVELY_PROHIBITED
+
+
+class StubHandle(paramiko.SFTPHandle):
+    def stat(self):
+        try:
+            return paramiko.SFTPAttributes.from_stat(os.fstat(self.readfile.fileno()))
+        except OSError as e:
+            return paramiko.SFTPServer.convert_errno(e.errno)
+
+
+class StubSFTPServer(paramiko.SFTPServerInterface):
+    """Serves ``root`` like an SFTP home directory and counts requests."""
+
+    def __init__(self, server, root, counters, *args, **kwargs):
+        super().__init__(server, *args, **kwargs)
+        self.root = root
+        self.counters = counters
+
+    def _local(self, path):
+        return os.path.join(self.root, self.canonicalize(path).lstrip("/"))
+
+    def _count(self, op):
+        self.counters[op] = self.counters.get(op, 0) + 1
+
+    def canonicalize(self, path):
+        return posixpath.normpath("/" + path)
+
+    def list_folder(self, path):
+        self._count("list")
+        local = self._local(path)
+        try:
+            return [paramiko.SFTPAttributes.from_stat(os.stat(os.path.join(local, name)), name)
+                    for name in os.listdir(local)]
+        except OSError as e:
+            return paramiko.SFTPServer.convert_errno(e.errno)
+
+    def stat(self, path):
+        self._count("stat")
+        try:
+            return paramiko.SFTPAttributes.from_stat(os.stat(self._local(path)))
+        except OSError as e:
+            return paramiko.SFTPServer.convert_errno(e.errno)
+
+    lstat = stat
+
+    def open(self, path, flags, attr):
+        self._count("open")
+        try:
+            fd = os.open(self._local(path), flags, 0o644)
+        except OSError as e:
+            return paramiko.SFTPServer.convert_errno(e.errno)
+        mode = "wb" if flags & os.O_WRONLY else ("r+b" if flags & os.O_RDWR else "rb")
+        handle = StubHandle(flags)
+        handle.filename = self._local(path)
+        handle.readfile = handle.writefile = os.fdopen(fd, mode)
+        return handle
+
+    def remove(self, path):
+        self._count("remove")
+        try:
+            os.remove(self._local(path))
+        except OSError as e:
+            return paramiko.SFTPServer.convert_errno(e.errno)
+        return paramiko.SFTP_OK
+
+    def rename(self, oldpath, newpath):
+        # SFTP v3 semantics: fail if the target exists
+        self._count("rename")
+        if os.path.exists(self._local(newpath)):
+            return paramiko.SFTPServer.convert_errno(errno.EEXIST)
+        os.rename(self._local(oldpath), self._local(newpath))
+        return paramiko.SFTP_OK
+
+    def posix_rename(self, oldpath, newpath):
+        self._count("posix_rename")
+        os.replace(self._local(oldpath), self._local(newpath))
+        return paramiko.SFTP_OK
+
+    def mkdir(self, path, attr):
+        self._count("mkdir")
+        try:
+            os.mkdir(self._local(path))
+        except OSError as e:
+            return paramiko.SFTPServer.convert_errno(e.errno)
+        return paramiko.SFTP_OK
+
+    def chattr(self, path, attr):
+        return paramiko.SFTP_OK
+
+
+class LocalSftpServer:
+    """Threaded SFTP server on 127.0.0.1; counts sessions and requests."""
+
+    def __init__(self, root, host_key, authorized_key):
+        self.root = root
+        self.host_key = host_key
+        self.authorized_key = authorized_key
+        self.sessions = 0
+        self.counters = {}
+        self.transports = []
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind(("127.0.0.1", 0))
+        self.sock.listen(64)
+        self.port = self.sock.getsockname()[1]
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def _accept(self):
+        while True:
+            try:
+                conn, _ = self.sock.accept()
+            except OSError:
+                return
+            transport = paramiko.Transport(conn)
+            transport.add_server_key(self.host_key)
+            transport.set_subsystem_handler("sftp", paramiko.SFTPServer, StubSFTPServer,
+                                            root=self.root, counters=self.counters)
+            self.sessions += 1
+            self.transports.append(transport)
+            transport.start_server(server=StubServer(self.authorized_key))
+
+    def drop_connections(self):
+        for transport in self.transports:
+            transport.close()
+        self.transports = []
+
+    def reset_counters(self):
+        self.sessions = 0
+        self.counters.clear()
+
+    def close(self):
+        self.sock.close()
+        self.drop_connections()
+
+
+class LatencyProxy:
+    """TCP proxy that delays every segment by half the round trip each way."""
+
+    def __init__(self, target_port, rtt_ms):
+        self.target_port = target_port
+        self.delay = rtt_ms / 2000
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind(("127.0.0.1", 0))
+        self.sock.listen(64)
+        self.port = self.sock.getsockname()[1]
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def _accept(self):
+        while True:
+            try:
+                client, _ = self.sock.accept()
+            except OSError:
+                return
+            upstream = socket.create_connection(("127.0.0.1", self.target_port))
+            for src, dst in ((client, upstream), (upstream, client)):
+                self._pipe(src, dst)
+
+    def _pipe(self, src, dst):
+        queue = []
+        ready = threading.Condition()
+
+        def reader():
+            sequence = 0
+            while True:
+                try:
+                    data = src.recv(65536)
+                except OSError:
+                    data = b""
+                with ready:
+                    heapq.heappush(queue, (time.monotonic() + self.delay, sequence, data))
+                    sequence += 1
+                    ready.notify()
+                if not data:
+                    return
+
+        def writer():
+            while True:
+                with ready:
+                    while not queue:
+                        ready.wait()
+                    due, _, data = queue[0]
+                    wait = due - time.monotonic()
+                    if wait > 0:
+                        ready.wait(wait)
+                        continue
+                    heapq.heappop(queue)
+                try:
+                    if not data:
+                        dst.shutdown(socket.SHUT_WR)
+                        return
+                    dst.sendall(data)
+                except OSError:
+                    return
+
+        threading.Thread(target=reader, daemon=True).start()
+        threading.Thread(target=writer, daemon=True).start()
+
+    def close(self):
+        self.sock.close()
+
+
+# ---------------------------------------------------------------------------
+# Scenarios
+# ---------------------------------------------------------------------------
+
+def day_directory(i, days=3):
+    return "uploads/2026/10/{:02d}".format(10 + i % days)
+
+
+def check_files(root, expected):
+    failures = 0
+    for path, data in expected.items():
+        local = os.path.join(root, path)
+        if not os.path.exists(local) or open(local, "rb").read() != data:
+            print("  FAIL: {} missing or different".format(path))
+            failures += 1
+    leftovers = [name for _, _, names in os.walk(root) for name in names if name.startswith(".")]
+    if leftovers:
+        print("  FAIL: temporary files left behind: {}".format(leftovers[:3]))
+        failures += 1
+    return failures
+
+
+def run_pooled(server, connect, args):
+    server.reset_counters()
+    pool = SftpSessionPool(connect, max_sessions=3)
+    payloads = {"{}/batch_{:04d}.zip".format(day_directory(i), i): os.urandom(args.size_kb * 1024)
+                for i in range(args.files)}
+    payloads["uploads/2026/10/10/large.zip"] = os.urandom(2 * 1024 * 1024)
+
+    def upload(item):
+        path, data = item
+        return pool.upload(posixpath.dirname(path), posixpath.basename(path), data)
+
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        results = list(executor.map(upload, payloads.items()))
+    pool.close()
+
+    failures = check_files(server.root, payloads)
+    reused = sum(1 for r in results if r["session_reused"])
+    print("pooled: {} files on {} sessions ({} reused), {} directory round trips, server requests {}".format(
+        len(results), server.sessions, reused, pool.stats["directory_checks"], dict(sorted(server.counters.items()))))
+    if server.sessions > 3:
+        print("  FAIL: more sessions than the pool size")
+        failures += 1
+    if server.counters.get("mkdir", 0) != 6:  # uploads, 2026, 10 and three days
+        print("  FAIL: expected 6 mkdir requests, got {}".format(server.counters.get("mkdir", 0)))
+        failures += 1
+    missing = {"wait_millis", "connect_millis", "directory_millis", "write_millis", "total_millis", "uploaded_at"} - set(results[0])
+    if missing:
+        print("  FAIL: timings missing: {}".format(missing))
+        failures += 1
+    return failures
+
+
+def run_rename(server, connect, args):
+    failures = 0
+    pool = SftpSessionPool(connect, max_sessions=1)
+    directory = "uploads/2026/10/20"
+    first, second = os.urandom(4096), os.urandom(4096)
+
+    pool.upload(directory, "report.zip", first, temporary_rename=True)
+    failures += check_files(server.root, {directory + "/report.zip": first})
+    try:
+        pool.upload(directory, "report.zip", second, temporary_rename=True, conflict_resolution="FAIL")
+        print("  FAIL: existing file was not rejected")
+        failures += 1
+    except RemoteFileExists:
+        pass
+    pool.upload(directory, "report.zip", second, temporary_rename=True, conflict_resolution="NONE")
+    failures += check_files(server.root, {directory + "/report.zip": second})
+    pool.close()
+
+    print("rename: temp-name-then-rename, FAIL rejects and NONE overwrites ({})".format("ok" if not failures else "FAIL"))
+    return failures
+
+
+def run_dropped(server, connect, args):
+    pool = SftpSessionPool(connect, max_sessions=2)
+    payloads = {"uploads/2026/10/21/drop_{}.zip".format(i): os.urandom(1024) for i in range(6)}
+    items = list(payloads.items())
+    for path, data in items[:3]:
+        pool.upload(posixpath.dirname(path), posixpath.basename(path), data)
+    server.drop_connections()
+    time.sleep(0.2)
+    for path, data in items[3:]:
+        pool.upload(posixpath.dirname(path), posixpath.basename(path), data)
+    pool.close()
+
+    failures = check_files(server.root, payloads)
+    replaced = pool.stats["expired"] + pool.stats["retried"]
+    print("dropped: uploads continued after the server dropped all sessions ({} session(s) replaced)".format(replaced))
+    if replaced == 0:
+        print("  FAIL: dropped session was not detected")
+        failures += 1
+    return failures
+
+
+def upload_unpooled(connect, directory, filename, data, chunk_size=32768):
+    """PutSFTP with Batch Size 1: new session, directory walk, unpipelined write."""
+    client, sftp = connect()
+    try:
+        SftpSessionPool(lambda: None).ensure_directory(sftp, directory)
+        with sftp.open(posixpath.join(directory, filename), "wb") as remote:
+            for offset in range(0, len(data), chunk_size):
+                remote.write(data[offset:offset + chunk_size])
+    finally:
+        sftp.close()
+        client.close()
+
+
+def run_benchmark(server, connect, args):
+    payloads = [("uploads/2026/10/{:02d}".format(22 + i % 2), "bench_{:04d}.zip".format(i), os.urandom(args.size_kb * 1024))
+                for i in range(args.files)]
+
+    def timed(upload):
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            list(executor.map(lambda item: upload(*item), payloads))
+        return time.perf_counter() - started
+
+    server.reset_counters()
+    baseline = timed(lambda d, f, data: upload_unpooled(connect, d, f, data))
+    baseline_sessions, baseline_requests = server.sessions, sum(server.counters.values())
+
+    server.reset_counters()
+    pool = SftpSessionPool(connect, max_sessions=3)
+    pooled = timed(lambda d, f, data: pool.upload(d, f, data))
+    pool.close()
+
+    print("benchmark: {} x {} KB, 3 threads, {} ms RTT".format(args.files, args.size_kb, args.rtt_ms))
+    print("  {:<10} {:>8} {:>9} {:>9} {:>10}".format("", "seconds", "files/s", "sessions", "requests"))
+    print("  {:<10} {:>8.2f} {:>9.1f} {:>9} {:>10}".format("per-file", baseline, args.files / baseline,
+                                                         baseline_sessions, baseline_requests))
+    print("  {:<10} {:>8.2f} {:>9.1f} {:>9} {:>10}".format("pooled", pooled, args.files / pooled,
+                                                         server.sessions, sum(server.counters.values())))
+    print("  speedup {:.1f}x".format(baseline / pooled))
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check pooled SFTP delivery against a local paramiko server")
+    parser.add_argument("--files", type=int, default=60)
+    parser.add_argument("--size-kb", type=int, default=32, help="Archive size for the pooled and benchmark runs")
+    parser.add_argument("--rtt-ms", type=float, default=20.0, help="Simulated network round trip (0 to disable)")
+    args = parser.parse_args()
+
+    # Server transports log client disconnects as socket errors
+    logging.getLogger("paramiko").setLevel(logging.CRITICAL)
+
+    host_key = paramiko.RSAKey.generate(2048)
+    client_key = paramiko.RSAKey.generate(2048)
+
+    failures = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        root = os.path.join(tmp, "sftp")
+        os.mkdir(root)
+        key_path = os.path.join(tmp, "id_rsa")
+        client_key.write_private_key_file(key_path)
+
+        server = LocalSftpServer(root, host_key, paramiko.RSAKey(filename=key_path))
+        proxy = LatencyProxy(server.port, args.rtt_ms) if args.rtt_ms > 0 else None
+        port = proxy.port if proxy else server.port
+        connect = connector("127.0.0.1", port, USERNAME, private_key_path=key_path)
+
+        failures += run_pooled(server, connect, args)
+        failures += run_rename(server, connect, args)
+        failures += run_dropped(server, connect, args)
+        failures += run_benchmark(server, connect, args)
+
+        if proxy:
+            proxy.close()
+        server.close()
+
+    if failures:
+        print("\n{} check(s) failed".format(failures))
+        sys.exit(1)
+    print("\nAll uploads delivered intact over pooled sessions")
+
+
+if __name__ == "__main__":
+    main()